@@ -39,6 +39,29 @@ TRANSFORM_FEEDBACK_BUFFER Transform feedback buffer
 UNIFORM_BUFFER            Uniform block storage
 ========================= ==================================
 
+A buffer can be allocated with an immutable storage using :meth:`GlBuffer.set_storage` or
+:meth:`GlBuffer.allocate_storage`, and then mapped persistently so as the data are written directly
+to the GPU visible memory::
+
+  vbo = GlArrayBuffer()
+  vbo.allocate_storage((1024, 3), np.float32) # persistent and coherent by default
+  vertices = vbo.map_range()
+  vertices[:] = ...
+
+If the storage is not coherent, then the written ranges must be flushed using
+:meth:`GlBuffer.flush_range`.  In both cases the application must synchronise itself with the GPU
+before to overwrite a range in use, e.g. using a fence.
+
+A buffer can also keep a CPU shadow copy of its data, see :meth:`GlBuffer.create_shadow`.  The
+writes to the shadow are recorded as dirty ranges, which are merged and uploaded by
+:meth:`GlBuffer.sync` in a few ``glBufferSubData`` calls::
+
+  vbo = GlArrayBuffer(vertexes)
+  vbo.create_shadow(merge_gap=1024)
+  vbo[10] = (1., 2.)
+  vbo[100:110] = ...
+  vbo.sync() # once per frame
+
 """
 
 ####################################################################################################
@@ -50,6 +73,7 @@ import numpy as np
 ####################################################################################################
 
 from . import GL
+from .DeletionQueue import deletion_queue
 
 ####################################################################################################
 
@@ -57,6 +81,350 @@ _module_logger = logging.getLogger(__name__)
 
 ####################################################################################################
 
+#: OpenGL type of the Numpy data types
+__gl_types__ = {
+    np.dtype(np.float16):GL.GL_HALF_FLOAT,
+    np.dtype(np.float32):GL.GL_FLOAT,
+    np.dtype(np.float64):GL.GL_DOUBLE,
+    np.dtype(np.int8):GL.GL_BYTE,
+    np.dtype(np.uint8):GL.GL_UNSIGNED_BYTE,
+    np.dtype(np.int16):GL.GL_SHORT,
+    np.dtype(np.uint16):GL.GL_UNSIGNED_SHORT,
+    np.dtype(np.int32):GL.GL_INT,
+    np.dtype(np.uint32):GL.GL_UNSIGNED_INT,
+    }
+
+def gl_type_from_dtype(dtype):
+
+    """ Return the OpenGL type of a vertex attribute from a Numpy data type, the packed types are
+    given by the vertex format, see :mod:`.VertexFormat`.
+    """
+
+    dtype = np.dtype(dtype)
+    try:
+        return __gl_types__[dtype]
+    except KeyError:
+        raise ValueError("Data type %s is not supported" % str(dtype))
+
+def _attribute_format(vertex_format, name, dtype):
+
+    """ Return the number of components of a scalar, the OpenGL type and the normalized flag of the
+    attribute *name* of data type *dtype*, from the attribute type of the vertex format if any.
+    """
+
+    attribute_type = vertex_format.get(name) if vertex_format else None
+    if attribute_type is None:
+        return 1, gl_type_from_dtype(dtype), False
+    if attribute_type.dtype != dtype:
+        raise ValueError("Attribute %s has data type %s instead of %s" %
+                         (name, str(dtype), str(attribute_type.dtype)))
+    gl_type = attribute_type.gl_type or gl_type_from_dtype(dtype)
+    return attribute_type.size or 1, gl_type, attribute_type.normalized
+
+####################################################################################################
+
+class VertexAttributeFormat(object):
+
+    """ This class defines the format of a vertex attribute within a vertex: its name, its number
+    of components, its OpenGL type and its offset in byte.  The rows of a matrix attribute are bound
+    at the attribute location plus *location_offset*.
+    """
+
+    ##############################################
+
+    def __init__(self, name, size, type_, offset=0, normalized=False, location_offset=0):
+
+        self.name = name
+        self.size = size
+        self.type = type_
+        self.offset = offset
+        self.normalized = normalized
+        self.location_offset = location_offset
+
+    ##############################################
+
+    def __repr__(self):
+
+        return 'VertexAttributeFormat %s size %u type %u offset %u' % (self.name, self.size, self.type,
+                                                                       self.offset)
+
+####################################################################################################
+
+def vertex_attribute_formats(dtype, shape, vertex_format=None):
+
+    """ Return the list of :class:`VertexAttributeFormat` and the stride in byte for an array of the
+    given data type and shape.
+
+    The fields of a structured data type are mapped to attributes of the same name, a field can
+    have up to four components, e.g. ``('position', np.float32, 3)``.  A matrix field, e.g.
+    ``('transform', np.float32, (4, 4))``, is mapped to one attribute per row at consecutive
+    locations, thus the matrices must be stored transposed for a GLSL ``mat4``.  For a non-structured data
+    type, the array can have a second dimension for the components and the attribute name is
+    :obj:`None`.  The normalized and packed formats are defined by the attribute types of the
+    *vertex format*, a dictionary *name: attribute type*, see :mod:`.VertexFormat`.
+    """
+
+    dtype = np.dtype(dtype)
+    if dtype.names is None:
+        size, gl_type, normalized = _attribute_format(vertex_format, None, dtype)
+        if len(shape) == 2:
+            size = shape[1] # xyzw
+        formats = [VertexAttributeFormat(None, size, gl_type, normalized=normalized)]
+        if len(shape) == 2:
+            stride = shape[1] * dtype.itemsize
+        else:
+            stride = dtype.itemsize
+    else:
+        formats = []
+        for name in dtype.names:
+            field_dtype, offset = dtype.fields[name][:2]
+            base_dtype = field_dtype.base
+            scalar_size, gl_type, normalized = _attribute_format(vertex_format, name, base_dtype)
+            if field_dtype.ndim > 2:
+                raise ValueError("Field %s: fields of more than two dimensions are not supported" % name)
+            elif field_dtype.ndim == 2:
+                number_of_rows, size = field_dtype.shape
+            elif field_dtype.ndim == 1:
+                number_of_rows, size = 1, field_dtype.shape[0]
+            else:
+                number_of_rows, size = 1, scalar_size
+            if size > 4 or number_of_rows > 4:
+                raise ValueError("Field %s has more than 4 components" % name)
+            row_nbytes = size * base_dtype.itemsize
+            for row in range(number_of_rows):
+                formats.append(VertexAttributeFormat(name, size, gl_type, offset + row * row_nbytes,
+                                                     normalized=normalized, location_offset=row))
+        stride = dtype.itemsize
+
+    return formats, stride
+
+####################################################################################################
+
+def interleave(fields):
+
+    """ Return a structured array which interleaves the arrays of the list of pairs (name, array).
+    The arrays must have the same number of rows.
+    """
+
+    fields = list(fields)
+    number_of_vertexes = fields[0][1].shape[0]
+    dtype = []
+    for name, array in fields:
+        if array.shape[0] != number_of_vertexes:
+            raise ValueError("Field %s has %u rows instead of %u" % (name, array.shape[0], number_of_vertexes))
+        dtype.append((name, array.dtype, array.shape[1:]))
+    vertexes = np.zeros(number_of_vertexes, dtype=dtype)
+    for name, array in fields:
+        vertexes[name] = array
+
+    return vertexes
+
+####################################################################################################
+
+def _is_supported(command, version, extension):
+
+    """ Test if *command* is wrapped and if the context has the OpenGL *version* or the *extension*.
+    """
+
+    if not hasattr(GL.commands, command):
+        return False
+    context_version = (GL.glGetIntegerv(GL.GL_MAJOR_VERSION), GL.glGetIntegerv(GL.GL_MINOR_VERSION))
+    if context_version >= version:
+        return True
+    extensions = [GL.glGetStringi(GL.GL_EXTENSIONS, i)
+                  for i in range(GL.glGetIntegerv(GL.GL_NUM_EXTENSIONS))]
+    return extension in extensions
+
+####################################################################################################
+
+_has_vertex_attrib_binding = None
+
+def has_vertex_attrib_binding():
+
+    """ Test if the separate vertex attribute format is supported, i.e. OpenGL 4.3 or
+    ARB_vertex_attrib_binding.
+    """
+
+    global _has_vertex_attrib_binding
+    if _has_vertex_attrib_binding is None:
+        _has_vertex_attrib_binding = _is_supported('glVertexAttribFormat', (4, 3),
+                                                   b'GL_ARB_vertex_attrib_binding')
+    return _has_vertex_attrib_binding
+
+####################################################################################################
+
+_has_buffer_storage = None
+
+def has_buffer_storage():
+
+    """ Test if the immutable buffer storage is supported, i.e. OpenGL 4.4 or ARB_buffer_storage.
+    """
+
+    global _has_buffer_storage
+    if _has_buffer_storage is None:
+        _has_buffer_storage = _is_supported('glBufferStorage', (4, 4), b'GL_ARB_buffer_storage')
+    return _has_buffer_storage
+
+####################################################################################################
+
+def bind_vertex_attributes(buffer_id, formats, stride, offset, locations, divisor=0):
+
+    """ Bind a vertex buffer to attribute locations of the bound vertex array object.
+
+    The parameter *offset* is the offset of the first vertex in the buffer in byte and *locations*
+    is a list of pairs (:class:`VertexAttributeFormat`, location).  If *divisor* is not null, the
+    attributes advance once per *divisor* instances instead of once per vertex.
+
+    If it is supported, the separate attribute format is used and the buffer is bound to the binding
+    index given by the lowest location, else ``glVertexAttribPointer`` is used.
+    """
+
+    if not locations:
+        return
+    if has_vertex_attrib_binding():
+        binding_index = min(location for attribute_format, location in locations)
+        GL.glBindVertexBuffer(binding_index, buffer_id, offset, stride)
+        GL.glVertexBindingDivisor(binding_index, divisor)
+        for attribute_format, location in locations:
+            GL.glVertexAttribFormat(location, attribute_format.size, attribute_format.type,
+                                    attribute_format.normalized, attribute_format.offset)
+            GL.glVertexAttribBinding(location, binding_index)
+            GL.glEnableVertexAttribArray(location)
+    else:
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, buffer_id)
+        for attribute_format, location in locations:
+            GL.glVertexAttribPointer(location, attribute_format.size, attribute_format.type,
+                                     attribute_format.normalized, stride,
+                                     offset + attribute_format.offset)
+            GL.glVertexAttribDivisor(location, divisor)
+            GL.glEnableVertexAttribArray(location) # cf. enable # required !
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+
+####################################################################################################
+
+class GlVertexBufferMixin(object):
+
+    """ This class implements the binding of a buffer, or a range of a buffer, to vertex attributes.
+
+    The subclass must define the attributes *_attribute_formats* and *_stride*, and the method
+    :meth:`_vertex_buffer` which returns the buffer id and the offset of the first vertex.
+    """
+
+    _attribute_formats = ()
+    _stride = 0
+
+    ##############################################
+
+    def _vertex_buffer(self):
+
+        raise NotImplementedError
+
+    ##############################################
+
+    @property
+    def attribute_formats(self):
+
+        return self._attribute_formats
+
+    ##############################################
+
+    def _resolve_locations(self, locations):
+
+        """ Return the list of pairs (format, location) for a mapping name -> location. """
+
+        pairs = []
+        for attribute_format in self._attribute_formats:
+            if attribute_format.name in locations:
+                location = locations[attribute_format.name]
+                # Accept a vertex attribute of a shader program or of an interface
+                location = getattr(location, 'location', location)
+                pairs.append((attribute_format, location + attribute_format.location_offset))
+        return pairs
+
+    ##############################################
+
+    def bind_at_location(self, location):
+
+        """ Bind and enable the Vertex Buffer Object at the given attribute location.  The data must
+        not be structured or have only one field.
+        """
+
+        names = set(attribute_format.name for attribute_format in self._attribute_formats)
+        if len(names) != 1:
+            raise ValueError("Buffer has %u fields, use bind_at_locations" % len(names))
+        self._logger.debug("Bind at location %u" % (location))
+        self.bind_at_locations({names.pop():location})
+
+    ##############################################
+
+    def bind_at_locations(self, locations, divisor=0):
+
+        """ Bind and enable the fields of a structured buffer to the attribute locations of the
+        bound Vertex Array Object.
+
+        The parameter *locations* is a dictionary *name: location* or the attributes of a shader
+        program or of a shader program interface.  The fields which are not in *locations* are
+        skipped.  A per-instance buffer is bound with a *divisor* of 1.
+        """
+
+        pairs = self._resolve_locations(locations)
+        buffer_id, offset = self._vertex_buffer()
+        bind_vertex_attributes(buffer_id, self._attribute_formats, self._stride, offset, pairs, divisor)
+
+        return pairs
+
+####################################################################################################
+
+class DirtyRanges(object):
+
+    """ This class records the dirty ranges [start, stop) of an array. """
+
+    ##############################################
+
+    def __init__(self):
+
+        self._ranges = []
+
+    ##############################################
+
+    def __len__(self):
+
+        return len(self._ranges)
+
+    ##############################################
+
+    def add(self, start, stop):
+
+        """ Mark the range [start, stop) as dirty. """
+
+        if stop > start:
+            self._ranges.append((int(start), int(stop)))
+
+    ##############################################
+
+    def clear(self):
+
+        self._ranges = []
+
+    ##############################################
+
+    def merge(self, gap=0):
+
+        """ Return the sorted list of the disjoint ranges, the ranges separated by at most *gap* are
+        merged.
+        """
+
+        merged = []
+        for start, stop in sorted(self._ranges):
+            if merged and start - merged[-1][1] <= gap:
+                if stop > merged[-1][1]:
+                    merged[-1][1] = stop
+            else:
+                merged.append([start, stop])
+        return merged
+
+####################################################################################################
+
 class GlBuffer(object):
 
     """ This class wraps an OpenGL Buffer.
@@ -67,6 +435,19 @@ class GlBuffer(object):
 
       type
 
+      nbytes
+
+      number_of_syncs
+
+      number_of_uploads
+        number of ``glBufferSubData`` calls done by :meth:`sync`
+
+      bytes_uploaded
+        number of bytes uploaded by :meth:`sync`
+
+      last_sync_nbytes
+        number of bytes uploaded by the last :meth:`sync`, i.e. per frame
+
     """
 
     # size and type attributes are used by VertexAttribPointer like functions.
@@ -76,16 +457,34 @@ class GlBuffer(object):
     #: Define the target in subclass
     _target = None
 
+    #: Target to which the buffer is bound to transfer the data, by default the target of the buffer
+    _transfer_target = None
+
     ##############################################
 
     def __init__(self, data=None):
 
         self._gl_id = GL.glGenBuffers(1)
+        # The deletion queue of the context which creates the buffer
+        self._deletion_queue = deletion_queue()
+        self._deletion_queue.register('buffer', self._gl_id, self)
 
         self.size = 0
+        self.nbytes = 0
         self._dtype = None
         self._dtype_nbytes = None
+        self._data_shape = None
         self.type = None
+        self._storage_flags = None
+        self._mapped_array = None
+        self._shadow = None
+        self._dirty_ranges = DirtyRanges()
+        self.merge_gap = 0
+
+        self.number_of_syncs = 0
+        self.number_of_uploads = 0
+        self.bytes_uploaded = 0
+        self.last_sync_nbytes = 0
 
         if data is not None:
             self.set(data)
@@ -95,7 +494,7 @@ class GlBuffer(object):
     def __del__(self):
 
         self._logger.debug("Delete Object %u" % (self._gl_id))
-        GL.glDeleteBuffers([self._gl_id])
+        self._deletion_queue.enqueue('buffer', self._gl_id)
 
     ##############################################
 
@@ -123,7 +522,68 @@ class GlBuffer(object):
 
     ##############################################
 
-    def _set(self, data, usage):
+    def _bind_transfer(self):
+
+        """ Bind the buffer to transfer data and return the target. """
+
+        target = self._transfer_target if self._transfer_target is not None else self._target
+        GL.glBindBuffer(target, self._gl_id)
+
+        return target
+
+    ##############################################
+
+    def _buffer_data(self, data, usage):
+
+        """ (Re)allocate the data store, *data* is an array or a number of bytes. """
+
+        target = self._bind_transfer()
+        GL.glBufferData(target, data, usage)
+        GL.glBindBuffer(target, 0)
+
+    ##############################################
+
+    def _buffer_sub_data(self, offset, data):
+
+        """ Write an array at the offset *offset* in byte. """
+
+        target = self._bind_transfer()
+        GL.glBufferSubData(target, offset, data)
+        GL.glBindBuffer(target, 0)
+
+    ##############################################
+
+    def _get_buffer_sub_data(self, offset, data):
+
+        """ Read the array *data* from the offset *offset* in byte. """
+
+        target = self._bind_transfer()
+        GL.glGetBufferSubData(target, offset, data)
+        GL.glBindBuffer(target, 0)
+
+    ##############################################
+
+    def _set_data_type(self, dtype, shape, vertex_format=None):
+
+        """ Set the data type, the shape and the vertex attribute formats from the array layout and
+        the vertex format, see :func:`vertex_attribute_formats`.
+        """
+
+        self._dtype = np.dtype(dtype)
+        self._dtype_nbytes = self._dtype.itemsize
+        self._data_shape = tuple(shape)
+        self._attribute_formats, self._stride = vertex_attribute_formats(self._dtype, shape,
+                                                                         vertex_format)
+        if self._dtype.names is None:
+            self.type = self._attribute_formats[0].type
+            self.size = self._attribute_formats[0].size
+        else:
+            self.type = None
+            self.size = None
+
+    ##############################################
+
+    def _set(self, data, usage, vertex_format=None):
 
         """Set the data of the buffer.
 
@@ -133,29 +593,16 @@ class GlBuffer(object):
 
         """
 
-        self._dtype = data.dtype
-        if data.dtype == np.float32:
-            self.type = GL.GL_FLOAT
-        elif data.dtype == np.float64:
-            self.type = GL.GL_DOUBLE
-        elif data.dtype == np.int32:
-            self.type = GL.GL_INT
-        elif data.dtype == np.uint32:
-            self.type = GL.GL_UNSIGNED_INT
-        else:
-            raise ValueError()
-        self._dtype_nbytes = self._dtype.type(1).nbytes
+        if self._storage_flags is not None:
+            raise NameError("The storage of the buffer is immutable")
 
-        # Fixme: shape?
-        shape = data.shape
-        if len(shape) == 2:
-            self.size = data.shape[1] # xyzw
-        else:
-            self.size = 1
+        self._set_data_type(data.dtype, data.shape, vertex_format)
+        self.nbytes = data.nbytes
+        if self._shadow is not None:
+            self._shadow = np.array(data)
+            self._dirty_ranges.clear()
 
-        self.bind()
-        GL.glBufferData(self._target, data, usage)
-        self.unbind()
+        self._buffer_data(data, usage)
 
     ##############################################
 
@@ -174,11 +621,10 @@ class GlBuffer(object):
         The parameter offset lies in a linear array shape.
         """
 
-        self.bind()
-        # print(offset, self._dtype_nbytes)
-        offset = offset * self._dtype_nbytes
-        GL.glBufferSubData(self._target, offset, data)
-        self.unbind()
+        if self._shadow is not None:
+            self._shadow.reshape(-1)[offset:offset + data.size] = data.reshape(-1)
+
+        self._buffer_sub_data(offset * self._dtype_nbytes, data)
 
     ##############################################
 
@@ -194,13 +640,278 @@ class GlBuffer(object):
                 raise ValueError("size must be provided when data is None")
             data = np.zeros((size,), dtype=self._dtype)
 
-        self.bind()
-        offset = offset * self._dtype_nbytes
-        GL.glGetBufferSubData(self._target, offset, data)
-        self.unbind()
+        self._get_buffer_sub_data(offset * self._dtype_nbytes, data)
 
         return data
 
+    ##############################################
+
+    def create_shadow(self, merge_gap=0, shape=None):
+
+        """ Create a CPU shadow copy of the buffer, initialised with the data read back from the
+        buffer.
+
+        The dirty ranges separated by at most *merge_gap* bytes are uploaded in one call by
+        :meth:`sync`.  The shadow has the shape of the last array set, or *shape* if given.
+        """
+
+        if self._dtype is None:
+            raise NameError("The buffer is not set")
+        if shape is None:
+            shape = self._data_shape
+        self.merge_gap = merge_gap
+        shadow = np.zeros(shape, dtype=self._dtype)
+        self.read_sub_data(0, shadow.reshape(-1))
+        self._shadow = shadow
+        self._dirty_ranges.clear()
+
+    ##############################################
+
+    @property
+    def shadow(self):
+
+        """ The shadow array or :obj:`None`, direct writes must be marked using :meth:`mark_dirty`.
+        """
+
+        return self._shadow
+
+    ##############################################
+
+    def _check_shadow(self):
+
+        if self._shadow is None:
+            raise NameError("The buffer doesn't have a shadow")
+
+    ##############################################
+
+    def mark_dirty(self, start, stop):
+
+        """ Mark the range [start, stop) of the shadow as dirty.
+
+        The parameter start and stop lies in a linear array shape.
+        """
+
+        self._check_shadow()
+        self._dirty_ranges.add(start, stop)
+
+    ##############################################
+
+    def __getitem__(self, key):
+
+        self._check_shadow()
+        return self._shadow[key]
+
+    ##############################################
+
+    def __setitem__(self, key, value):
+
+        """ Write to the shadow and mark the written rows as dirty. """
+
+        self._check_shadow()
+        self._shadow[key] = value
+
+        row_size = int(np.prod(self._shadow.shape[1:]))
+        number_of_rows = self._shadow.shape[0]
+        if isinstance(key, tuple):
+            key = key[0]
+        if isinstance(key, slice) and key.step in (None, 1):
+            start, stop, step = key.indices(number_of_rows)
+            self._dirty_ranges.add(start * row_size, stop * row_size)
+        elif isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += number_of_rows
+            self._dirty_ranges.add(key * row_size, (key + 1) * row_size)
+        else:
+            rows = np.unique(np.arange(number_of_rows)[key])
+            # split the rows in runs of consecutive rows
+            breaks = np.nonzero(np.diff(rows) != 1)[0] + 1
+            for run in np.split(rows, breaks):
+                if run.size:
+                    self._dirty_ranges.add(run[0] * row_size, (run[-1] + 1) * row_size)
+
+    ##############################################
+
+    @property
+    def number_of_dirty_ranges(self):
+
+        return len(self._dirty_ranges)
+
+    ##############################################
+
+    def sync(self):
+
+        """ Upload the dirty ranges of the shadow and return the number of bytes uploaded. """
+
+        self._check_shadow()
+
+        nbytes = 0
+        if self._dirty_ranges:
+            shadow = self._shadow.reshape(-1)
+            gap = self.merge_gap // self._dtype_nbytes
+            target = self._bind_transfer()
+            for start, stop in self._dirty_ranges.merge(gap):
+                data = shadow[start:stop]
+                GL.glBufferSubData(target, start * self._dtype_nbytes, data)
+                nbytes += data.nbytes
+                self.number_of_uploads += 1
+            GL.glBindBuffer(target, 0)
+            self._dirty_ranges.clear()
+
+        self.number_of_syncs += 1
+        self.bytes_uploaded += nbytes
+        self.last_sync_nbytes = nbytes
+
+        return nbytes
+
+    ##############################################
+
+    def set_storage(self, data,
+                    flags=GL.GL_MAP_WRITE_BIT | GL.GL_MAP_PERSISTENT_BIT | GL.GL_MAP_COHERENT_BIT,
+                    vertex_format=None):
+
+        """ Allocate an immutable storage initialised with the Numpy array *data*.
+
+        flags: bitwise combination of GL_DYNAMIC_STORAGE_BIT, GL_MAP_READ_BIT, GL_MAP_WRITE_BIT,
+        GL_MAP_PERSISTENT_BIT, GL_MAP_COHERENT_BIT and GL_CLIENT_STORAGE_BIT.
+
+        The normalized and packed attributes are given by *vertex_format*, see :mod:`.VertexFormat`.
+
+        """
+
+        self._set_storage(data, data.dtype, data.shape, flags, vertex_format)
+
+    ##############################################
+
+    def allocate_storage(self, shape, dtype=np.float32,
+                         flags=GL.GL_MAP_WRITE_BIT | GL.GL_MAP_PERSISTENT_BIT | GL.GL_MAP_COHERENT_BIT,
+                         vertex_format=None):
+
+        """ Allocate an uninitialised immutable storage for an array of the given shape and data type,
+        see :meth:`set_storage`.
+        """
+
+        if isinstance(shape, int):
+            shape = (shape,)
+        self._set_storage(None, dtype, shape, flags, vertex_format)
+
+    ##############################################
+
+    def _set_storage(self, data, dtype, shape, flags, vertex_format=None):
+
+        if self._storage_flags is not None:
+            raise NameError("The storage of the buffer is immutable")
+
+        self._set_data_type(dtype, shape, vertex_format)
+        self.nbytes = int(np.prod(shape)) * self._dtype_nbytes
+        self._storage_flags = flags
+
+        # the size is given by the data array if any
+        if data is None:
+            data = self.nbytes
+        target = self._bind_transfer()
+        GL.glBufferStorage(target, data, flags)
+        GL.glBindBuffer(target, 0)
+
+    ##############################################
+
+    @property
+    def is_coherent(self):
+
+        """ The storage is immutable and coherent. """
+
+        return self._storage_flags is not None and bool(self._storage_flags & GL.GL_MAP_COHERENT_BIT)
+
+    ##############################################
+
+    @property
+    def is_mapped(self):
+
+        return self._mapped_array is not None
+
+    ##############################################
+
+    @property
+    def mapped_array(self):
+
+        """ The Numpy array of the mapped range or :obj:`None`. """
+
+        return self._mapped_array
+
+    ##############################################
+
+    def map_range(self, offset=0, size=None, access=None):
+
+        """ Map a range of the buffer and return it as a Numpy array without copying it.
+
+        The parameter offset and size lies in a linear array shape, by default the whole buffer is
+        mapped.  By default, the access is set from the storage flags and an explicit flush is
+        required if the storage is persistent but not coherent, see :meth:`flush_range`.
+
+        The array becomes invalid when the buffer is unmapped.
+        """
+
+        if self._mapped_array is not None:
+            raise NameError("Buffer is already mapped")
+
+        if size is None:
+            size = self.nbytes // self._dtype_nbytes - offset
+        if access is None:
+            if self._storage_flags is None:
+                access = GL.GL_MAP_WRITE_BIT
+            else:
+                access = self._storage_flags & (GL.GL_MAP_READ_BIT | GL.GL_MAP_WRITE_BIT |
+                                                GL.GL_MAP_PERSISTENT_BIT | GL.GL_MAP_COHERENT_BIT)
+                if (access & GL.GL_MAP_PERSISTENT_BIT and access & GL.GL_MAP_WRITE_BIT
+                    and not access & GL.GL_MAP_COHERENT_BIT):
+                    access |= GL.GL_MAP_FLUSH_EXPLICIT_BIT
+
+        target = self._bind_transfer()
+        array = GL.glMapBufferRange(target,
+                                    offset * self._dtype_nbytes, size * self._dtype_nbytes,
+                                    access, dtype=self._dtype)
+        GL.glBindBuffer(target, 0)
+        if array is None:
+            raise NameError("Failed to map the buffer")
+        self._mapped_array = array
+
+        return array
+
+    ##############################################
+
+    def flush_range(self, offset=0, size=None):
+
+        """ Flush a range of the mapped array which was written, the storage must be mapped with
+        GL_MAP_FLUSH_EXPLICIT_BIT.
+
+        The parameter offset and size lies in the linear array shape of the mapped array, by default
+        the whole mapped range is flushed.
+        """
+
+        if self._mapped_array is None:
+            raise NameError("Buffer is not mapped")
+        if size is None:
+            size = self._mapped_array.size - offset
+
+        target = self._bind_transfer()
+        GL.glFlushMappedBufferRange(target, offset * self._dtype_nbytes, size * self._dtype_nbytes)
+        GL.glBindBuffer(target, 0)
+
+    ##############################################
+
+    def unmap(self):
+
+        """ Unmap the buffer.  Return :obj:`False` if the data store was corrupted while mapped. """
+
+        if self._mapped_array is None:
+            raise NameError("Buffer is not mapped")
+
+        target = self._bind_transfer()
+        status = GL.glUnmapBuffer(target)
+        GL.glBindBuffer(target, 0)
+        self._mapped_array = None
+
+        return bool(status)
+
 ####################################################################################################
 
 class GlUniformBuffer(GlBuffer):
@@ -218,9 +929,75 @@ class GlUniformBuffer(GlBuffer):
 
 ####################################################################################################
 
-class GlArrayBuffer(GlBuffer):
+class GlShaderStorageBuffer(GlBuffer):
+
+    """ This class wraps an OpenGl Shader Storage Buffer, i.e. a read-write storage for the
+    shaders, see :class:`.ComputeProgram.GlComputeProgram`.
+
+    The buffer records the shape of the array which is set, so as :meth:`read` returns an array of
+    the same shape.
+    """
+
+    _target = GL.GL_SHADER_STORAGE_BUFFER
+
+    _logger = _module_logger.getChild(__name__)
+
+    ##############################################
+
+    def __init__(self, data=None):
+
+        self.shape = None
+        super(GlShaderStorageBuffer, self).__init__(data)
+
+    ##############################################
+
+    def set(self, data, usage=GL.GL_DYNAMIC_COPY):
+
+        self.shape = data.shape
+        self._set(data, usage)
 
-    """ This class wraps an OpenGl Array Buffer. """
+    ##############################################
+
+    def allocate(self, shape, dtype=np.float32, usage=GL.GL_DYNAMIC_COPY):
+
+        """ Allocate an uninitialised data store for an array of the given shape and data type, e.g.
+        for the output of a compute shader.
+        """
+
+        if isinstance(shape, int):
+            shape = (shape,)
+        self.shape = tuple(shape)
+        self._set_data_type(dtype, shape)
+        self.nbytes = int(np.prod(shape)) * self._dtype_nbytes
+        self._buffer_data(self.nbytes, usage)
+
+    ##############################################
+
+    def read(self, data=None):
+
+        """ Read the buffer synchronously and return an array of the shape which was set. """
+
+        if data is None:
+            data = np.zeros(self.shape, dtype=self._dtype)
+        self._get_buffer_sub_data(0, data)
+
+        return data
+
+####################################################################################################
+
+class GlArrayBuffer(GlBuffer, GlVertexBufferMixin):
+
+    """ This class wraps an OpenGl Array Buffer.
+
+    The data can be a structured array so as to interleave the vertex attributes, for example::
+
+      vertex_dtype = np.dtype([('position', np.float32, 3), ('normal', np.float32, 3)])
+      vbo = GlArrayBuffer(vertexes) # vertexes is an array of vertex_dtype
+      vbo.bind_at_locations(shader_program.attributes)
+
+    The normalized and packed attributes are given by the *vertex format*, see :mod:`.VertexFormat`.
+
+    """
 
     _target = GL.GL_ARRAY_BUFFER
 
@@ -228,20 +1005,77 @@ class GlArrayBuffer(GlBuffer):
 
     ##############################################
 
+    def set(self, data, usage=GL.GL_STATIC_DRAW, vertex_format=None):
+        self._set(data, usage, vertex_format)
+
+    ##############################################
+
+    def _vertex_buffer(self):
+
+        return self._gl_id, 0
+
+####################################################################################################
+
+class GlElementArrayBuffer(GlBuffer):
+
+    """ This class wraps an OpenGl Element Array Buffer, i.e. the vertex indices of
+    ``glDrawElements``.
+
+    The indices must be unsigned integers, see :func:`PyOpenGLng.Math.Mesh.index_dtype`.  The buffer
+    must be bound when the vertex array object is bound, since the binding is part of its state.
+
+    Public attributes:
+
+      number_of_indices
+
+      index_type
+        OpenGL type of the indices
+
+    """
+
+    _target = GL.GL_ELEMENT_ARRAY_BUFFER
+
+    # The element array binding is part of the state of the bound vertex array object
+    _transfer_target = GL.GL_COPY_WRITE_BUFFER
+
+    _logger = _module_logger.getChild('GlElementArrayBuffer')
+
+    ##############################################
+
+    def __init__(self, data=None):
+
+        self.number_of_indices = 0
+        self.index_type = None
+
+        super(GlElementArrayBuffer, self).__init__(data)
+
+    ##############################################
+
     def set(self, data, usage=GL.GL_STATIC_DRAW):
+
+        if data.dtype not in (np.uint8, np.uint16, np.uint32):
+            raise ValueError("Data type %s is not an index type" % str(data.dtype))
+        data = data.reshape(-1)
         self._set(data, usage)
+        self.number_of_indices = data.size
+        self.index_type = self.type
 
     ##############################################
 
-    def bind_at_location(self, location):
+    def draw(self, mode=GL.GL_TRIANGLES, count=None, offset=0, number_of_instances=None):
 
-        """ Bind and enable the Vertex Buffer Object at the given attribute location. """
+        """ Draw the primitives from the indices, the vertex array object must be bound.  The
+        parameter offset is the index of the first index.  If *number_of_instances* is given, the
+        primitives are drawn instanced.
+        """
 
-        self._logger.debug("Bind at location %u" % (location))
-        self.bind()
-        GL.glVertexAttribPointer(location, self.size, self.type, GL.GL_FALSE, 0, None)
-        GL.glEnableVertexAttribArray(location) # cf. enable # required !
-        self.unbind()
+        if count is None:
+            count = self.number_of_indices - offset
+        if number_of_instances is None:
+            GL.glDrawElements(mode, count, self.index_type, offset * self._dtype_nbytes)
+        else:
+            GL.glDrawElementsInstanced(mode, count, self.index_type, offset * self._dtype_nbytes,
+                                       number_of_instances)
 
 ####################################################################################################
 #
@@ -0,0 +1,517 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+""" This module implements a heap which sub-allocates many small buffers in a few large buffer
+objects.
+
+A :class:`GlBufferHeap` manages a list of blocks, each block is a buffer object with a free list of
+ranges sorted by offset.  A range is allocated using a first-fit strategy and the adjacent free
+ranges are coalesced when a range is freed.  A new block is created when no free range is large
+enough.  The method :meth:`GlBufferHeap.compact` packs the allocations at the beginning of the heap
+using ``glCopyBufferSubData`` and releases the empty blocks.
+
+A :class:`GlHeapAllocation` can be used in place of a :class:`GlArrayBuffer`::
+
+  buffer_heap = GlBufferHeap()
+  vertex_array = GlSegmentVertexArray(segments, buffer_heap=buffer_heap)
+
+The vertex attribute bindings of an allocation are recorded, so as they are updated when the
+allocation is moved.
+
+"""
+
+####################################################################################################
+
+import bisect
+import logging
+import time
+import weakref
+
+import numpy as np
+
+####################################################################################################
+
+from . import GL
+from .Buffer import GlBuffer, GlVertexBufferMixin, bind_vertex_attributes, vertex_attribute_formats
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+class FreeList(object):
+
+    """ This class implements the free list of a range of *nbytes* bytes.
+
+    Public attributes:
+
+      nbytes
+
+      free_ranges
+        sorted list of the free ranges [offset, nbytes]
+
+    """
+
+    ##############################################
+
+    def __init__(self, nbytes):
+
+        self.nbytes = nbytes
+        self.free_ranges = [[0, nbytes]]
+
+    ##############################################
+
+    @property
+    def free_nbytes(self):
+        return sum(nbytes for offset, nbytes in self.free_ranges)
+
+    ##############################################
+
+    def allocate(self, nbytes):
+
+        """ Return the offset of a free range of *nbytes* bytes using a first-fit strategy or
+        :obj:`None`.
+        """
+
+        for i, free_range in enumerate(self.free_ranges):
+            offset, free_nbytes = free_range
+            if free_nbytes >= nbytes:
+                if free_nbytes == nbytes:
+                    del self.free_ranges[i]
+                else:
+                    free_range[0] += nbytes
+                    free_range[1] -= nbytes
+                return offset
+        return None
+
+    ##############################################
+
+    def free(self, offset, nbytes):
+
+        """ Free a range and coalesce it with the adjacent free ranges. """
+
+        free_ranges = self.free_ranges
+        i = bisect.bisect_left(free_ranges, [offset, nbytes])
+        # Coalesce with the next range
+        if i < len(free_ranges) and offset + nbytes == free_ranges[i][0]:
+            nbytes += free_ranges[i][1]
+            del free_ranges[i]
+        # Coalesce with the previous range
+        if i > 0 and free_ranges[i-1][0] + free_ranges[i-1][1] == offset:
+            free_ranges[i-1][1] += nbytes
+        else:
+            free_ranges.insert(i, [offset, nbytes])
+
+####################################################################################################
+
+class GlHeapBlock(GlBuffer, FreeList):
+
+    """ This class wraps a buffer object of a heap.
+
+    Public attributes:
+
+      nbytes
+
+      free_ranges
+        sorted list of the free ranges [offset, nbytes]
+
+      allocations
+        weak set of the live allocations
+
+    """
+
+    _logger = _module_logger.getChild('GlHeapBlock')
+
+    ##############################################
+
+    def __init__(self, heap, nbytes):
+
+        super(GlHeapBlock, self).__init__()
+        FreeList.__init__(self, nbytes)
+
+        self._heap = heap
+        self._target = heap.target
+        self.allocations = weakref.WeakSet()
+
+        self._buffer_data(nbytes, heap.usage)
+
+    ##############################################
+
+    def copy_to(self, source_offset, block, destination_offset, nbytes):
+
+        """ Copy a range to a block, the destination must be before the source if the block is the
+        same.
+        """
+
+        GL.glBindBuffer(GL.GL_COPY_READ_BUFFER, self._gl_id)
+        GL.glBindBuffer(GL.GL_COPY_WRITE_BUFFER, block._gl_id)
+        if block is self:
+            # The source and destination ranges must not overlap
+            chunk_nbytes = source_offset - destination_offset
+        else:
+            chunk_nbytes = nbytes
+        copied_nbytes = 0
+        while copied_nbytes < nbytes:
+            chunk = min(chunk_nbytes, nbytes - copied_nbytes)
+            GL.glCopyBufferSubData(GL.GL_COPY_READ_BUFFER, GL.GL_COPY_WRITE_BUFFER,
+                                   source_offset + copied_nbytes, destination_offset + copied_nbytes,
+                                   chunk)
+            copied_nbytes += chunk
+        GL.glBindBuffer(GL.GL_COPY_READ_BUFFER, 0)
+        GL.glBindBuffer(GL.GL_COPY_WRITE_BUFFER, 0)
+
+####################################################################################################
+
+class GlHeapAllocation(GlVertexBufferMixin):
+
+    """ This class represents an allocation in a buffer heap.
+
+    Public attributes:
+
+      block
+        :class:`GlHeapBlock` instance or :obj:`None` if the allocation is empty
+
+      offset
+        offset in the block in byte
+
+      nbytes
+        number of bytes of the data
+
+    The interface is compatible with :class:`GlArrayBuffer`.
+    """
+
+    _logger = _module_logger.getChild('GlHeapAllocation')
+
+    ##############################################
+
+    def __init__(self, heap):
+
+        self._heap = heap
+        self.block = None
+        self.offset = 0
+        self.nbytes = 0
+        self._reserved_nbytes = 0
+        self._dtype = None
+        self._dtype_nbytes = None
+        self._bindings = {} # vertex array id -> [list of (format, location), divisor]
+
+    ##############################################
+
+    def __del__(self):
+
+        self.free()
+
+    ##############################################
+
+    def free(self):
+
+        """ Return the range to the heap. """
+
+        if self.block is not None:
+            self._heap._free(self)
+            self.block = None
+            self.nbytes = self._reserved_nbytes = 0
+
+    ##############################################
+
+    def set(self, data, usage=None, vertex_format=None):
+
+        """ Set the data, the allocation is moved if the data doesn't fit in the current range.  The
+        parameter *usage* is ignored, it is defined by the heap.  The normalized and packed
+        attributes are given by *vertex_format*, see :mod:`.VertexFormat`.
+        """
+
+        self._dtype = data.dtype
+        self._dtype_nbytes = data.dtype.itemsize
+        self._attribute_formats, self._stride = vertex_attribute_formats(data.dtype, data.shape,
+                                                                         vertex_format)
+
+        moved = False
+        if data.nbytes > self._reserved_nbytes:
+            self.free()
+            self._heap._allocate(self, data.nbytes)
+            moved = True
+        self.nbytes = data.nbytes
+
+        self.block._buffer_sub_data(self.offset, data)
+
+        if moved:
+            self._update_bindings()
+
+    ##############################################
+
+    def set_sub_data(self, data, offset):
+
+        """ Set sub-data, the parameter offset lies in a linear array shape. """
+
+        self.block._buffer_sub_data(self.offset + offset * self._dtype_nbytes, data)
+
+    ##############################################
+
+    def read_sub_data(self, offset=0, size=None):
+
+        """ Read sub-data, the parameter offset and size lies in a linear array shape. """
+
+        if size is None:
+            size = self.nbytes // self._dtype_nbytes - offset
+        data = np.zeros((size,), dtype=self._dtype)
+        self.block._get_buffer_sub_data(self.offset + offset * self._dtype_nbytes, data)
+
+        return data
+
+    ##############################################
+
+    def _vertex_buffer(self):
+
+        return self.block._gl_id, self.offset
+
+    ##############################################
+
+    def bind_at_locations(self, locations, divisor=0):
+
+        """ Bind the allocation to the attribute locations of the bound vertex array object, see
+        :meth:`GlVertexBufferMixin.bind_at_locations`.
+        """
+
+        pairs = super(GlHeapAllocation, self).bind_at_locations(locations, divisor)
+        vertex_array = GL.glGetIntegerv(GL.GL_VERTEX_ARRAY_BINDING)
+        bindings = self._bindings.setdefault(vertex_array, [[], 0])
+        bound_locations = set(location for attribute_format, location in pairs)
+        bindings[0] = [pair for pair in bindings[0] if pair[1] not in bound_locations] + pairs
+        bindings[1] = divisor
+        self._heap.number_of_binds += 1
+
+        return pairs
+
+    ##############################################
+
+    def _forget_vertex_array(self, vertex_array):
+
+        """ Remove the bindings to a vertex array object which is deleted. """
+
+        self._bindings.pop(vertex_array, None)
+
+    ##############################################
+
+    def _update_bindings(self):
+
+        """ Update the vertex attribute bindings after a move.  The bindings to the vertex array
+        objects which no longer exist are removed.
+        """
+
+        if not self._bindings:
+            return
+        current_vertex_array = GL.glGetIntegerv(GL.GL_VERTEX_ARRAY_BINDING)
+        buffer_id, offset = self._vertex_buffer()
+        for vertex_array, (pairs, divisor) in list(self._bindings.items()):
+            if not GL.glIsVertexArray(vertex_array):
+                del self._bindings[vertex_array]
+                continue
+            GL.glBindVertexArray(vertex_array)
+            bind_vertex_attributes(buffer_id, self._attribute_formats, self._stride, offset, pairs,
+                                   divisor)
+        GL.glBindVertexArray(current_vertex_array)
+
+####################################################################################################
+
+class GlBufferHeap(object):
+
+    """ This class implements a buffer heap.
+
+    The blocks have a size of *block_nbytes* bytes, or more for a larger allocation, and the
+    allocation offsets are aligned to *alignment* bytes.
+
+    Public attributes:
+
+      number_of_allocations
+
+      number_of_frees
+
+      number_of_binds
+
+      allocation_time
+        cumulated time spent to allocate in second
+
+      number_of_compactions
+
+      moved_nbytes
+
+    """
+
+    _logger = _module_logger.getChild('GlBufferHeap')
+
+    ##############################################
+
+    def __init__(self, block_nbytes=4*1024**2, target=GL.GL_ARRAY_BUFFER, usage=GL.GL_DYNAMIC_DRAW,
+                 alignment=16):
+
+        self.block_nbytes = block_nbytes
+        self.target = target
+        self.usage = usage
+        self.alignment = alignment
+        self._blocks = []
+
+        self.number_of_allocations = 0
+        self.number_of_frees = 0
+        self.number_of_binds = 0
+        self.allocation_time = 0
+        self.number_of_compactions = 0
+        self.moved_nbytes = 0
+
+    ##############################################
+
+    def __len__(self):
+
+        return len(self._blocks)
+
+    ##############################################
+
+    def _align(self, nbytes):
+
+        return ((nbytes + self.alignment - 1) // self.alignment) * self.alignment
+
+    ##############################################
+
+    def buffer(self, data=None):
+
+        """ Return a new allocation initialised with the Numpy array *data*, the range is allocated at
+        the first call to :meth:`GlHeapAllocation.set`.
+        """
+
+        allocation = GlHeapAllocation(self)
+        if data is not None:
+            allocation.set(data)
+        return allocation
+
+    ##############################################
+
+    def _allocate(self, allocation, nbytes):
+
+        start_time = time.time()
+
+        nbytes = self._align(max(nbytes, 1))
+        for block in self._blocks:
+            offset = block.allocate(nbytes)
+            if offset is not None:
+                break
+        else:
+            block = GlHeapBlock(self, max(self.block_nbytes, nbytes))
+            self._blocks.append(block)
+            offset = block.allocate(nbytes)
+        block.allocations.add(allocation)
+        allocation.block = block
+        allocation.offset = offset
+        allocation._reserved_nbytes = nbytes
+
+        self.number_of_allocations += 1
+        self.allocation_time += time.time() - start_time
+
+    ##############################################
+
+    def _free(self, allocation):
+
+        block = allocation.block
+        block.allocations.discard(allocation)
+        block.free(allocation.offset, allocation._reserved_nbytes)
+        self.number_of_frees += 1
+
+    ##############################################
+
+    def compact(self):
+
+        """ Pack the allocations at the beginning of the heap and release the empty blocks, except
+        the first one.
+        """
+
+        # Allocations are moved to a lower address, in the same block or in a previous block
+        allocations = [(i, allocation)
+                       for i, block in enumerate(self._blocks)
+                       for allocation in block.allocations]
+        allocations.sort(key=lambda item: (item[0], item[1].offset))
+        for block in self._blocks:
+            block.free_ranges = []
+            block.allocations = weakref.WeakSet()
+        block_index = 0
+        offset = 0
+        for i, allocation in allocations:
+            nbytes = allocation._reserved_nbytes
+            while offset + nbytes > self._blocks[block_index].nbytes:
+                self._release_tail(block_index, offset)
+                block_index += 1
+                offset = 0
+            block = self._blocks[block_index]
+            if allocation.block is not block or allocation.offset != offset:
+                allocation.block.copy_to(allocation.offset, block, offset, allocation.nbytes)
+                self.moved_nbytes += allocation.nbytes
+                allocation.block = block
+                allocation.offset = offset
+                allocation._update_bindings()
+            block.allocations.add(allocation)
+            offset += nbytes
+        self._release_tail(block_index, offset)
+        for i in range(block_index + 1, len(self._blocks)):
+            self._release_tail(i, 0)
+        self._blocks = [block for i, block in enumerate(self._blocks) if not i or block.allocations]
+        self.number_of_compactions += 1
+
+    ##############################################
+
+    def _release_tail(self, block_index, offset):
+
+        block = self._blocks[block_index]
+        if offset < block.nbytes:
+            block.free_ranges = [[offset, block.nbytes - offset]]
+
+    ##############################################
+
+    def stats(self):
+
+        """ Return a dictionary of statistics. """
+
+        heap_nbytes = sum(block.nbytes for block in self._blocks)
+        free_nbytes = sum(block.free_nbytes for block in self._blocks)
+        free_range_nbytes = [nbytes for block in self._blocks for offset, nbytes in block.free_ranges]
+        if free_range_nbytes:
+            largest_free_nbytes = max(free_range_nbytes)
+        else:
+            largest_free_nbytes = 0
+
+        return dict(
+            number_of_blocks=len(self._blocks),
+            heap_nbytes=heap_nbytes,
+            used_nbytes=heap_nbytes - free_nbytes,
+            free_nbytes=free_nbytes,
+            number_of_free_ranges=len(free_range_nbytes),
+            largest_free_nbytes=largest_free_nbytes,
+            number_of_live_allocations=sum(len(block.allocations) for block in self._blocks),
+            number_of_allocations=self.number_of_allocations,
+            number_of_frees=self.number_of_frees,
+            number_of_binds=self.number_of_binds,
+            allocation_time=self.allocation_time,
+            number_of_compactions=self.number_of_compactions,
+            moved_nbytes=self.moved_nbytes,
+            )
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
@@ -0,0 +1,249 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+
+""" This module implements compute programs which process Numpy arrays stored in shader storage
+buffers.
+
+A compute shader declares its work group size and its storage blocks, for example::
+
+  #version 430
+  layout(local_size_x = 64) in;
+  layout(std430) buffer positions { vec4 position[]; };
+  layout(std430) buffer normals { vec4 normal[]; };
+  void main() {
+    uint i = gl_GlobalInvocationID.x;
+    if (i < normal.length())
+      ...
+  }
+
+The storage blocks are bound by name to :class:`.Buffer.GlShaderStorageBuffer` or to Numpy arrays,
+which are uploaded, and the number of work groups is computed from the number of items::
+
+  program = GlComputeProgram('normals', source_code=source)
+  normals = GlShaderStorageBuffer()
+  normals.allocate((n, 4), np.float32)
+  program(n, positions=positions_array, normals=normals)
+  with readback_pool.read_buffer(normals) as future:
+      result = future.result()
+
+A dispatch is followed by a memory barrier, so as the results can be read by the next commands.  The
+results are read synchronously by :meth:`.Buffer.GlShaderStorageBuffer.read` or asynchronously using
+a :class:`.Readback.GlReadbackPool`.
+
+"""
+
+####################################################################################################
+
+import logging
+
+import numpy as np
+
+####################################################################################################
+
+from . import GL
+from .Buffer import GlBuffer, GlShaderStorageBuffer, _is_supported
+from .Shader import GlShader, GlShaderProgram
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+_has_compute_shader = None
+
+def has_compute_shader():
+
+    """ Test if the compute shaders are supported, i.e. OpenGL 4.3 or ARB_compute_shader. """
+
+    global _has_compute_shader
+    if _has_compute_shader is None:
+        _has_compute_shader = _is_supported('glDispatchCompute', (4, 3), b'GL_ARB_compute_shader')
+    return _has_compute_shader
+
+####################################################################################################
+
+class GlComputeProgram(GlShaderProgram):
+
+    """ This class defines a program made of a compute shader.
+
+    The source is given by *source_code* or *file_name*, see :class:`.Shader.GlShader`.
+
+    Public attributes:
+
+      local_size
+        work group size (x, y, z) declared by the shader
+
+      number_of_dispatches
+
+    """
+
+    _logger = _module_logger.getChild('GlComputeProgram')
+
+    #: Default memory barriers after a dispatch: storage reads, buffer copies and vertex attributes
+    __default_barriers__ = (GL.GL_SHADER_STORAGE_BARRIER_BIT
+                            | GL.GL_BUFFER_UPDATE_BARRIER_BIT
+                            | GL.GL_VERTEX_ATTRIB_ARRAY_BARRIER_BIT)
+
+    ##############################################
+
+    def __init__(self, name, source_code=None, file_name=None):
+
+        if not has_compute_shader():
+            raise RuntimeError("Compute shaders are not supported,"
+                               " OpenGL 4.3 or ARB_compute_shader is required")
+
+        super(GlComputeProgram, self).__init__(name)
+
+        self._shader = GlShader(GlShader.COMPUTE_SHADER, file_name=file_name, source_code=source_code)
+        self.attach_shader(self._shader)
+        self.link()
+
+        local_size = np.zeros(3, dtype=np.int32)
+        GL.glGetProgramiv(self.program_id, GL.GL_COMPUTE_WORK_GROUP_SIZE, local_size)
+        self.local_size = tuple(int(x) for x in local_size)
+        self._maximum_group_count = tuple(int(GL.glGetIntegeri_v(GL.GL_MAX_COMPUTE_WORK_GROUP_COUNT, i))
+                                          for i in range(3))
+
+        self._storage_block_bindings = {}
+
+        self.number_of_dispatches = 0
+
+    ##############################################
+
+    def storage_block_binding(self, name):
+
+        """ Return the binding point of the storage block *name*, a binding point is assigned to the
+        block the first time.
+        """
+
+        binding_point = self._storage_block_bindings.get(name)
+        if binding_point is None:
+            index = GL.glGetProgramResourceIndex(self.program_id, GL.GL_SHADER_STORAGE_BLOCK, name)
+            if index == GL.GL_INVALID_INDEX:
+                raise NameError("Storage block %s is not defined in program %s" % (name, self._name))
+            binding_point = len(self._storage_block_bindings)
+            GL.glShaderStorageBlockBinding(self.program_id, index, binding_point)
+            self._storage_block_bindings[name] = binding_point
+
+        return binding_point
+
+    ##############################################
+
+    def bind_storage_buffer(self, name, buffer_):
+
+        """ Bind a :class:`.Buffer.GlShaderStorageBuffer`, or any buffer, to the storage block
+        *name*.
+        """
+
+        # The binding point is indexed by the shader storage target whatever the buffer class
+        GL.glBindBufferBase(GL.GL_SHADER_STORAGE_BUFFER, self.storage_block_binding(name),
+                            buffer_._gl_id)
+
+    ##############################################
+
+    def number_of_groups(self, number_of_items):
+
+        """ Return the number of work groups (x, y, z) which cover *number_of_items*, an integer or a
+        tuple of up to 3 integers.
+        """
+
+        if isinstance(number_of_items, (int, np.integer)):
+            number_of_items = (number_of_items,)
+        number_of_items = tuple(number_of_items) + (1,) * (3 - len(number_of_items))
+        number_of_groups = tuple(-(-int(n) // size) for n, size in zip(number_of_items, self.local_size))
+        for count, maximum in zip(number_of_groups, self._maximum_group_count):
+            if count > maximum:
+                raise ValueError("Number of work groups %s exceeds the limit %s" %
+                                 (str(number_of_groups), str(self._maximum_group_count)))
+
+        return number_of_groups
+
+    ##############################################
+
+    def dispatch(self, number_of_items, barriers=None):
+
+        """ Dispatch the work groups which cover *number_of_items* and insert a memory barrier.
+        Return the number of work groups.
+
+        The shader must ignore the invocations beyond the number of items, since the last work group
+        can be partial.  The parameter *barriers* is a bitwise combination of ``GL_*_BARRIER_BIT``,
+        by default the storage buffers, the buffer copies and the vertex attributes.
+        """
+
+        number_of_groups = self.number_of_groups(number_of_items)
+        self.bind()
+        GL.glDispatchCompute(*number_of_groups)
+        self.unbind()
+        if barriers is None:
+            barriers = self.__default_barriers__
+        if barriers:
+            GL.glMemoryBarrier(barriers)
+        self.number_of_dispatches += 1
+
+        return number_of_groups
+
+    ##############################################
+
+    def dispatch_indirect(self, buffer_, offset=0, barriers=None):
+
+        """ Dispatch the number of work groups read from a buffer at the offset *offset* in byte,
+        i.e. three unsigned integers written by a previous pass.
+        """
+
+        GL.glBindBuffer(GL.GL_DISPATCH_INDIRECT_BUFFER, buffer_._gl_id)
+        self.bind()
+        GL.glDispatchComputeIndirect(offset)
+        self.unbind()
+        GL.glBindBuffer(GL.GL_DISPATCH_INDIRECT_BUFFER, 0)
+        if barriers is None:
+            barriers = self.__default_barriers__
+        if barriers:
+            GL.glMemoryBarrier(barriers)
+        self.number_of_dispatches += 1
+
+    ##############################################
+
+    def __call__(self, number_of_items, barriers=None, uniforms=None, **buffers):
+
+        """ Bind the buffers to the storage blocks given by the keyword names, set the *uniforms*
+        given by a dictionary and dispatch.  A Numpy array is uploaded to a new
+        :class:`.Buffer.GlShaderStorageBuffer`.  Return the dictionary of the bound buffers.
+        """
+
+        bound_buffers = {}
+        for name, buffer_ in buffers.items():
+            if not isinstance(buffer_, GlBuffer):
+                buffer_ = GlShaderStorageBuffer(np.ascontiguousarray(buffer_))
+            self.bind_storage_buffer(name, buffer_)
+            bound_buffers[name] = buffer_
+        if uniforms:
+            for name, value in uniforms.items():
+                self.uniforms[name] = value
+        self.dispatch(number_of_items, barriers)
+
+        return bound_buffers
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
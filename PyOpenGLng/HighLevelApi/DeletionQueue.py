@@ -0,0 +1,268 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+""" This module implements a deferred deletion queue for the OpenGL objects.
+
+The finalizers of the high level objects are called by the garbage collector, possibly from another
+thread or when no context is current.  Thus they don't delete the OpenGL objects but enqueue their
+names in the deletion queue of the context, and :meth:`GlDeletionQueue.flush` must be called at the
+frame boundaries, e.g. at the end of ``paintGL``, so as to delete the pending objects with one
+``glDelete*`` call per type.  The sync objects, i.e. the fences, are enqueued in the same way.
+
+The widgets of the high level API flush the queue at the end of ``paintGL``.  Without a widget, the
+application must flush the queue on its rendering loop, e.g. after ``swap_buffers``.  The
+:class:`PyOpenGLng.Wrapper.Executor.GlExecutor` calls its *idle_callback* when its queue is drained,
+which can be set to ``lambda: deletion_queue().flush()``, and the workers of the
+:class:`PyOpenGLng.Wrapper.RenderPool.RenderPool` flush the queue after each job.
+
+A finalizer doesn't unmap a buffer either: it drops the mapped array, the deletion of the buffer
+unmaps it implicitly, and a buffer which is reused must be unmapped by an explicit call.
+
+The queue also tracks the live objects, so as to report the leaks, e.g. at the exit of the
+application::
+
+  deletion_queue().flush()
+  deletion_queue().report_leaks()
+
+A queue must be created per context, the current queue is switched using :func:`set_deletion_queue`.
+An object keeps the queue which is current when it is created, thus its finalizer enqueues its name
+in the queue of its context, whichever queue is current when the garbage collector runs.
+
+"""
+
+####################################################################################################
+
+import logging
+import threading
+import traceback
+
+import numpy as np
+
+####################################################################################################
+
+from . import GL
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+class GlDeletionQueue(object):
+
+    """ This class implements a deletion queue for a context.
+
+    If *track_leaks* is set, the stack of the creation of the objects is recorded and reported with
+    the leaks.
+
+    Public attributes:
+
+      number_of_flushes
+
+      number_of_calls
+        number of ``glDelete*`` calls
+
+      number_of_deleted_objects
+
+    """
+
+    _logger = _module_logger.getChild('GlDeletionQueue')
+
+    #: Delete command per object type, the command takes an array of names
+    __delete_commands__ = {
+        'buffer':'glDeleteBuffers',
+        'framebuffer':'glDeleteFramebuffers',
+        'query':'glDeleteQueries',
+        'renderbuffer':'glDeleteRenderbuffers',
+        'sampler':'glDeleteSamplers',
+        'texture':'glDeleteTextures',
+        'transform_feedback':'glDeleteTransformFeedbacks',
+        'vertex_array':'glDeleteVertexArrays',
+        }
+
+    #: Delete command per object type, the command takes one name
+    __delete_single_commands__ = {
+        'program':'glDeleteProgram',
+        'shader':'glDeleteShader',
+        'sync':'glDeleteSync',
+        }
+
+    ##############################################
+
+    def __init__(self, track_leaks=False):
+
+        self.track_leaks = track_leaks
+
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._live = {}
+
+        self.number_of_flushes = 0
+        self.number_of_calls = 0
+        self.number_of_deleted_objects = 0
+
+    ##############################################
+
+    def _check_type(self, object_type):
+
+        if (object_type not in self.__delete_commands__
+            and object_type not in self.__delete_single_commands__):
+            raise ValueError("Unknown object type %s" % object_type)
+
+    ##############################################
+
+    def register(self, object_type, name, obj=None):
+
+        """ Register a created object for the leak tracking, *obj* is the Python object which owns
+        the name.
+        """
+
+        self._check_type(object_type)
+        if self.track_leaks:
+            stack = ''.join(traceback.format_stack()[:-1])
+        else:
+            stack = None
+        description = obj.__class__.__name__ if obj is not None else None
+        with self._lock:
+            self._live.setdefault(object_type, {})[name] = (description, stack)
+
+    ##############################################
+
+    def enqueue(self, object_type, name):
+
+        """ Enqueue the deletion of the object *name* of type *object_type*, e.g. 'buffer'.  This
+        method can be called from any thread.
+        """
+
+        self._check_type(object_type)
+        with self._lock:
+            self._pending.setdefault(object_type, []).append(name)
+            live = self._live.get(object_type)
+            if live is not None:
+                live.pop(name, None)
+
+    ##############################################
+
+    @property
+    def number_of_pending_objects(self):
+
+        return sum(len(names) for names in self._pending.values())
+
+    ##############################################
+
+    def flush(self):
+
+        """ Delete the pending objects, a context must be current.  Return the number of deleted
+        objects.
+        """
+
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+
+        number_of_objects = 0
+        for object_type, names in pending.items():
+            if object_type in self.__delete_commands__:
+                delete_command = getattr(GL, self.__delete_commands__[object_type])
+                delete_command(np.array(names, dtype=np.uint32))
+                self.number_of_calls += 1
+            else:
+                delete_command = getattr(GL, self.__delete_single_commands__[object_type])
+                for name in names:
+                    delete_command(name)
+                self.number_of_calls += len(names)
+            number_of_objects += len(names)
+        self._logger.debug("Deleted %u objects", number_of_objects)
+
+        self.number_of_flushes += 1
+        self.number_of_deleted_objects += number_of_objects
+
+        return number_of_objects
+
+    ##############################################
+
+    def leaks(self):
+
+        """ Return a dictionary object type -> {name: (description, stack)} of the live objects. """
+
+        with self._lock:
+            return {object_type:dict(live) for object_type, live in self._live.items() if live}
+
+    ##############################################
+
+    def stats(self):
+
+        """ Return a dictionary of statistics. """
+
+        with self._lock:
+            number_of_live_objects = {object_type:len(live) for object_type, live in self._live.items()}
+        return dict(
+            number_of_flushes=self.number_of_flushes,
+            number_of_calls=self.number_of_calls,
+            number_of_deleted_objects=self.number_of_deleted_objects,
+            number_of_pending_objects=self.number_of_pending_objects,
+            number_of_live_objects=number_of_live_objects,
+        )
+
+    ##############################################
+
+    def report_leaks(self):
+
+        """ Log the live and pending objects as warnings and return the number of leaks. """
+
+        number_of_leaks = 0
+        for object_type, live in self.leaks().items():
+            for name, (description, stack) in sorted(live.items()):
+                number_of_leaks += 1
+                self._logger.warning("Leak %s %u %s", object_type, name, description or '')
+                if stack is not None:
+                    self._logger.warning("Created at\n%s", stack)
+        number_of_pending_objects = self.number_of_pending_objects
+        if number_of_pending_objects:
+            self._logger.warning("%u objects are not flushed", number_of_pending_objects)
+
+        return number_of_leaks + number_of_pending_objects
+
+####################################################################################################
+
+_deletion_queue = None
+
+def deletion_queue():
+
+    """ Return the deletion queue of the current context. """
+
+    global _deletion_queue
+    if _deletion_queue is None:
+        _deletion_queue = GlDeletionQueue()
+    return _deletion_queue
+
+def set_deletion_queue(queue):
+
+    """ Set the deletion queue of the current context, e.g. when the current context is switched.
+    """
+
+    global _deletion_queue
+    _deletion_queue = queue
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
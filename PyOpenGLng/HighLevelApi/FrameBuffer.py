@@ -19,6 +19,19 @@
 ####################################################################################################
 
 """ This class provides tools to manage OpenGL Frame Buffer Objects.
+
+A :class:`GlOffscreenFrameBuffer` implements a render to texture pipeline with several colour
+attachments and an optional multisampling, and a :class:`GlFrameBufferPool` reuses the offscreen
+frame buffers of the same size and format::
+
+  frame_buffer = pool.acquire(width, height, colour_formats=(GL.GL_RGBA8, GL.GL_R32F), samples=4)
+  frame_buffer.bind()
+  # draw ...
+  frame_buffer.unbind()
+  frame_buffer.resolve()
+  image = frame_buffer.read()
+  pool.release(frame_buffer)
+
 """
 
 # https://www.opengl.org/wiki/Framebuffer_Object
@@ -34,6 +47,8 @@ import numpy as np
 ####################################################################################################
 
 from . import GL
+from .DeletionQueue import deletion_queue
+from .Texture import GlTexture2D, __image_types__
 
 ####################################################################################################
 
@@ -45,30 +60,47 @@ class GlRenderBuffer(object):
 
     """ This class wraps an OpenGL Render Buffer.
 
+    The storage is multisampled if *samples* is not null.
+
     Public attributes:
 
+      width
+
+      height
+
+      internal_format
+
+      samples
+
     """
 
     _logger = _module_logger.getChild('GlRenderBuffer')
 
     ##############################################
     
-    def __init__(self, width, height, internal_format):
+    def __init__(self, width, height, internal_format, samples=0):
 
-        # internal_format: GL.GL_RGBA GL.GL_DEPTH_COMPONENT GL.GL_DEPTH_COMPONENT24
-        
-        self._gl_id = GL.glGenRenderBuffers(1)
+        # internal_format: GL.GL_RGBA8 GL.GL_DEPTH_COMPONENT24 GL.GL_DEPTH24_STENCIL8
+
+        self.width = width
+        self.height = height
+        self.internal_format = internal_format
+        self.samples = samples
 
+        self._gl_id = GL.glGenRenderbuffers(1)
         self.bind()
-        target = GL.GL_RENDERBUFFER
-        GL.glRenderbufferStorage(target, internal_format, width, height)
+        GL.glRenderbufferStorageMultisample(GL.GL_RENDERBUFFER, samples, internal_format,
+                                            width, height)
+        self.unbind()
+        self._deletion_queue = deletion_queue()
+        self._deletion_queue.register('renderbuffer', self._gl_id, self)
 
     ##############################################
     
     def __del__(self):
 
         self._logger.debug("Delete Object %u" % (self._gl_id))
-        GL.glDeleteRenderBuffers([self._gl_id])
+        self._deletion_queue.enqueue('renderbuffer', self._gl_id)
 
     ##############################################
 
@@ -110,7 +142,9 @@ class GlFrameBuffer(object):
     
     def __init__(self):
 
-        self._gl_id = GL.glGenFrameBuffers(1)
+        self._gl_id = GL.glGenFramebuffers(1)
+        self._deletion_queue = deletion_queue()
+        self._deletion_queue.register('framebuffer', self._gl_id, self)
         self._attachments = set()
 
     ##############################################
@@ -118,7 +152,7 @@ class GlFrameBuffer(object):
     def __del__(self):
 
         self._logger.debug("Delete Object %u" % (self._gl_id))
-        GL.glDeleteFrameBuffers([self._gl_id])
+        self._deletion_queue.enqueue('framebuffer', self._gl_id)
 
     ##############################################
     
@@ -126,7 +160,7 @@ class GlFrameBuffer(object):
 
         """ Bind the buffer. """
 
-        GL.glBindBuffer(target, self._gl_id)
+        GL.glBindFramebuffer(target, self._gl_id)
 
     ##############################################
     
@@ -134,44 +168,53 @@ class GlFrameBuffer(object):
 
         """ Unind the buffer. """
 
-        GL.glBindBuffer(target, 0)
+        GL.glBindFramebuffer(target, 0)
 
     ##############################################
 
-    def attach_colour_texture(self, texture, attachment=0, target=GL.GL_FRAMEBUFFER):
+    def _attach_texture(self, attachment, texture, target):
 
-        self.bind()
-        attachment = GL.GL_COLOR_ATTACHMENT0 + attachment
         # level = 0
+        self.bind(target)
         # G:glFramebufferTexture2D(target, attachment, GL.GL_TEXTURE_2D, texture.id, 0)
         GL.glFramebufferTexture(target, attachment, texture.id, 0)
+        self.unbind(target)
+
+    ##############################################
+
+    def _attach_render_buffer(self, attachment, render_buffer, target):
+
+        self.bind(target)
+        GL.glFramebufferRenderbuffer(target, attachment, GL.GL_RENDERBUFFER, render_buffer.id)
+        self.unbind(target)
+
+    ##############################################
+
+    def attach_colour_texture(self, texture, attachment=0, target=GL.GL_FRAMEBUFFER):
+
+        attachment = GL.GL_COLOR_ATTACHMENT0 + attachment
+        self._attach_texture(attachment, texture, target)
         self._attachments.add(attachment)
 
     ##############################################
 
     def attach_depth_texture(self, texture, target=GL.GL_FRAMEBUFFER):
 
-        self.bind()
-        # level = 0
-        GL.glFramebufferTexture(target, Gl.GL_DEPTH_ATTACHMENT, texture.id, 0)
+        self._attach_texture(GL.GL_DEPTH_ATTACHMENT, texture, target)
 
     ##############################################
 
     def attach_colour_render_buffer(self, render_buffer, attachment=0, target=GL.GL_FRAMEBUFFER):
 
-        self.bind()
         attachment = GL.GL_COLOR_ATTACHMENT0 + attachment
-        render_buffer.bind()
-        Gl.glFramebufferRenderbuffer(target, attachment, GL.GL_RENDERBUFFER, render_buffer.id)
+        self._attach_render_buffer(attachment, render_buffer, target)
         self._attachments.add(attachment)
 
     ##############################################
 
     def attach_depth_render_buffer(self, render_buffer, target=GL.GL_FRAMEBUFFER):
 
-        self.bind()
-        render_buffer.bind()
-        Gl.glFramebufferRenderbuffer(target, GL.GL_DEPTH_ATTACHMENT, GL.GL_RENDERBUFFER, render_buffer.id)
+        self._attach_render_buffer(GL.GL_DEPTH_ATTACHMENT, render_buffer, target)
 
     ##############################################
         
@@ -184,52 +227,345 @@ class GlFrameBuffer(object):
         """ Check frame buffer status. """
 
         self.bind()
-        is_complete = GL.glCheckFramebufferStatus(GL.GL_FRAMEBUFFER) == GL.GL_FRAMEBUFFER_COMPLETE
+        status = GL.glCheckFramebufferStatus(GL.GL_FRAMEBUFFER)
+        self.unbind()
+        is_complete = status == GL.GL_FRAMEBUFFER_COMPLETE
         # GL.GL_FRAMEBUFFER_UNDEFINED
         # GL.GL_FRAMEBUFFER_INCOMPLETE_ATTACHMENT 
         # GL.GL_FRAMEBUFFER_INCOMPLETE_MISSING_ATTACHMENT 
         # GL.GL_FRAMEBUFFER_INCOMPLETE_DRAW_BUFFER 
         # GL.GL_FRAMEBUFFER_UNSUPPORTED 
         # GL.GL_FRAMEBUFFER_COMPLETE
-        # self.unbind()
         return is_complete
 
     ##############################################
 
+    @property
+    def id(self):
+        return self._gl_id
+
+    @property
+    def attachments(self):
+        return sorted(self._attachments)
+
+    ##############################################
+
+    def set_draw_buffers(self, attachments=None):
+
+        """ Set the colour attachments which are written by the fragment shader outputs, by default
+        all the colour attachments.
+        """
+
+        if attachments is None:
+            attachments = sorted(self._attachments)
+        self.bind(GL.GL_DRAW_FRAMEBUFFER)
+        GL.glDrawBuffers(attachments)
+        self.unbind(GL.GL_DRAW_FRAMEBUFFER)
+
+    ##############################################
+
+    def set_read_buffer(self, attachment=0):
+
+        """ Set the colour attachment which is read by ``glReadPixels`` and ``glBlitFramebuffer``.
+        """
+
+        attachment = GL.GL_COLOR_ATTACHMENT0 + attachment
+        self.bind(GL.GL_READ_FRAMEBUFFER)
+        GL.glReadBuffer(attachment)
+        self.unbind(GL.GL_READ_FRAMEBUFFER)
+
+    ##############################################
+
+    def blit(self, destination, source_rectangle, destination_rectangle=None,
+             mask=GL.GL_COLOR_BUFFER_BIT, filter_=GL.GL_NEAREST):
+
+        """ Copy a rectangle (x0, y0, x1, y1) of the read buffer to the draw buffers of the frame
+        buffer *destination*, the default frame buffer if it is :obj:`None`.  A multisampled frame
+        buffer is resolved by a blit to a single sampled frame buffer of the same size.
+        """
+
+        if destination_rectangle is None:
+            destination_rectangle = source_rectangle
+        destination_id = destination._gl_id if destination is not None else 0
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, self._gl_id)
+        GL.glBindFramebuffer(GL.GL_DRAW_FRAMEBUFFER, destination_id)
+        GL.glBlitFramebuffer(*(tuple(source_rectangle) + tuple(destination_rectangle)
+                               + (mask, filter_)))
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, 0)
+        GL.glBindFramebuffer(GL.GL_DRAW_FRAMEBUFFER, 0)
+
+    ##############################################
+
     def draw(self):
 
+        """ Bind the frame buffer for drawing to all its colour attachments. """
+
+        self.set_draw_buffers()
         self.bind()
-        GL.glDrawBuffers(list(self._attachments))
-        # set viewport to texture size
-        # GL.glViewport(0, 0, width, height)
-        # draw ...
-        # self.unbind()
-                
+
         # GLSL
         # layout (location = 0) out vec4 normal_output;
         # GL.glBindFragDataLocation()
 
+####################################################################################################
+
+class GlOffscreenFrameBuffer(object):
+
+    """ This class implements an offscreen frame buffer which renders to textures.
+
+    The colour attachments have the internal formats *colour_formats*, the depth attachment has the
+    format *depth_format* and is omitted if it is :obj:`None`.  The depth is attached as a
+    render buffer, or as a texture if *depth_texture* is set and the frame buffer is not
+    multisampled.
+
+    If *samples* is not null, the frame buffer is rendered to multisampled render buffers, which
+    are resolved to the textures by :meth:`resolve` using ``glBlitFramebuffer``.
+
+    Public attributes:
+
+      number_of_allocations
+
+      number_of_resolves
+
+    """
+
+    _logger = _module_logger.getChild('GlOffscreenFrameBuffer')
+
+    __texture_parameters__ = (
+        (GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_EDGE),
+        (GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_EDGE),
+        (GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR),
+        (GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR),
+        )
+
     ##############################################
 
-        # bind the source framebuffer and select a color attachment to copy from
-        # GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, fbo_src)
-        # GL.glReadBuffers(GL.GL_COLOR_ATTACHMENT2)
-        #
-        # bind the destination framebuffer and select the color attachments to copy to
-        # GL.glBindFramebuffer(GL.GL_DRAW_FRAMEBUFFER, fbo_dst)
-        # GLuint attachments[2] = { GL.GL_COLOR_ATTACHMENT0, GL.GL_COLOR_ATTACHMENT1 }
-        # GL.glDrawBuffers(2, attachments)
-        #
-        # copy
-        # GL.glBlitFramebuffer(0, 0, 1024, 1024,
-        #                      0, 0, 512, 512,
-        #                      GL.GL_COLOR_BUFFER_BIT, GL.GL_LINEAR)
-
-        # glReadBuffer(mode)
-        # """mode: Specifies a color buffer. Accepted values are GL_FRONT_LEFT, GL_FRONT_RIGHT, GL_BACK_LEFT,
-        # GL_BACK_RIGHT, GL_FRONT, GL_BACK, GL_LEFT, GL_RIGHT, and the constants GL_COLOR_ATTACHMENT.
-        # """
-        
+    def __init__(self, width, height, colour_formats=(GL.GL_RGBA8,),
+                 depth_format=GL.GL_DEPTH_COMPONENT24, samples=0, depth_texture=False):
+
+        self._colour_formats = tuple(colour_formats)
+        self._depth_format = depth_format
+        self._samples = samples
+        self._depth_texture = bool(depth_texture) and not samples and depth_format is not None
+
+        self._frame_buffer = GlFrameBuffer()
+        self._resolve_frame_buffer = GlFrameBuffer() if samples else None
+        self._textures = [GlTexture2D(self.__texture_parameters__) for colour_format in colour_formats]
+        self._render_buffers = []
+        self._depth = None
+        self._width = self._height = None
+
+        self.number_of_allocations = 0
+        self.number_of_resolves = 0
+
+        self.resize(width, height)
+
+    ##############################################
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def samples(self):
+        return self._samples
+
+    @property
+    def key(self):
+
+        """ The tuple (width, height, colour formats, depth format, samples, depth texture). """
+
+        return (self._width, self._height, self._colour_formats, self._depth_format,
+                self._samples, self._depth_texture)
+
+    @property
+    def frame_buffer(self):
+        return self._frame_buffer
+
+    @property
+    def textures(self):
+        return list(self._textures)
+
+    def texture(self, index=0):
+        return self._textures[index]
+
+    @property
+    def depth_texture(self):
+        return self._depth if self._depth_texture else None
+
+    ##############################################
+
+    def resize(self, width, height):
+
+        """ Allocate the attachments for the size *width* x *height*.  Return :obj:`False` if the
+        size didn't change.
+        """
+
+        if (width, height) == (self._width, self._height):
+            return False
+
+        self._width, self._height = width, height
+        samples = self._samples
+
+        # The texture names change since the storage is immutable, thus the attachments are set again
+        self._render_buffers = []
+        for i, (texture, colour_format) in enumerate(zip(self._textures, self._colour_formats)):
+            texture.allocate(width, height, colour_format)
+            if samples:
+                render_buffer = GlRenderBuffer(width, height, colour_format, samples)
+                self._render_buffers.append(render_buffer)
+                self._frame_buffer.attach_colour_render_buffer(render_buffer, i)
+                self._resolve_frame_buffer.attach_colour_texture(texture, i)
+            else:
+                self._frame_buffer.attach_colour_texture(texture, i)
+
+        if self._depth_format is not None:
+            if self._depth_texture:
+                if self._depth is None:
+                    self._depth = GlTexture2D(self.__texture_parameters__)
+                self._depth.allocate(width, height, self._depth_format)
+                self._frame_buffer.attach_depth_texture(self._depth)
+            else:
+                self._depth = GlRenderBuffer(width, height, self._depth_format, samples)
+                self._frame_buffer.attach_depth_render_buffer(self._depth)
+
+        self._frame_buffer.set_draw_buffers()
+        for frame_buffer in (self._frame_buffer, self._resolve_frame_buffer):
+            if frame_buffer is not None and not frame_buffer.check():
+                raise ValueError("Frame buffer %ux%u is incomplete" % (width, height))
+        self.number_of_allocations += 1
+
+        return True
+
+    ##############################################
+
+    def bind(self):
+
+        """ Bind the frame buffer for drawing and set the viewport to its size. """
+
+        self._frame_buffer.bind(GL.GL_DRAW_FRAMEBUFFER)
+        GL.glViewport(0, 0, self._width, self._height)
+
+    ##############################################
+
+    def unbind(self):
+
+        """ Bind the default frame buffer, the viewport must be restored by the caller. """
+
+        self._frame_buffer.unbind(GL.GL_DRAW_FRAMEBUFFER)
+
+    ##############################################
+
+    def resolve(self):
+
+        """ Resolve the multisampled render buffers to the textures, it does nothing if the frame
+        buffer is not multisampled.
+        """
+
+        if not self._samples:
+            return
+
+        rectangle = (0, 0, self._width, self._height)
+        for i in range(len(self._textures)):
+            # Blit the attachments one by one, since the read buffer is copied to all the draw buffers
+            self._frame_buffer.set_read_buffer(i)
+            self._resolve_frame_buffer.set_draw_buffers([GL.GL_COLOR_ATTACHMENT0 + i])
+            self._frame_buffer.blit(self._resolve_frame_buffer, rectangle)
+        self._frame_buffer.set_read_buffer(0)
+        self.number_of_resolves += 1
+
+    ##############################################
+
+    def read(self, index=0, dtype=np.uint8):
+
+        """ Read the colour attachment *index* as an RGBA array of shape (height, width, 4), the
+        multisampled frame buffer must be resolved before.
+        """
+
+        data_type = __image_types__[np.dtype(dtype)][0]
+        frame_buffer = self._resolve_frame_buffer or self._frame_buffer
+        frame_buffer.set_read_buffer(index)
+        image = np.empty((self._height, self._width, 4), dtype=dtype)
+        frame_buffer.bind(GL.GL_READ_FRAMEBUFFER)
+        # Restore the pack alignment, the readback pool relies on it
+        pack_alignment = GL.glGetIntegerv(GL.GL_PACK_ALIGNMENT)
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+        GL.glReadPixels(0, 0, self._width, self._height, GL.GL_RGBA, data_type, image)
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, pack_alignment)
+        frame_buffer.unbind(GL.GL_READ_FRAMEBUFFER)
+
+        return image
+
+####################################################################################################
+
+class GlFrameBufferPool(object):
+
+    """ This class implements a pool of offscreen frame buffers keyed by their size and format.
+
+    Public attributes:
+
+      number_of_hits
+
+      number_of_misses
+
+    """
+
+    _logger = _module_logger.getChild('GlFrameBufferPool')
+
+    ##############################################
+
+    def __init__(self):
+
+        self._free_frame_buffers = {}
+
+        self.number_of_hits = 0
+        self.number_of_misses = 0
+
+    ##############################################
+
+    @property
+    def number_of_free_frame_buffers(self):
+
+        return sum(len(frame_buffers) for frame_buffers in self._free_frame_buffers.values())
+
+    ##############################################
+
+    def acquire(self, width, height, colour_formats=(GL.GL_RGBA8,),
+                depth_format=GL.GL_DEPTH_COMPONENT24, samples=0, depth_texture=False):
+
+        """ Return a free :class:`GlOffscreenFrameBuffer` of this size and format, or create it. """
+
+        key = (width, height, tuple(colour_formats), depth_format, samples,
+               bool(depth_texture) and not samples and depth_format is not None)
+        frame_buffers = self._free_frame_buffers.get(key)
+        if frame_buffers:
+            self.number_of_hits += 1
+            return frame_buffers.pop()
+        else:
+            self.number_of_misses += 1
+            return GlOffscreenFrameBuffer(width, height, colour_formats, depth_format,
+                                          samples, depth_texture)
+
+    ##############################################
+
+    def release(self, frame_buffer):
+
+        """ Return a frame buffer to the pool. """
+
+        self._free_frame_buffers.setdefault(frame_buffer.key, []).append(frame_buffer)
+
+    ##############################################
+
+    def clear(self):
+
+        """ Release the free frame buffers, their objects are enqueued in the deletion queue. """
+
+        self._free_frame_buffers.clear()
+
 ####################################################################################################
 #
 # End
@@ -47,6 +47,7 @@ from . import GL
 from ..Math.Geometry import Vector
 from ..Math.Interval import IntervalInt2D
 from .GlFeatures import GlVersion, GlFeatures
+from .DeletionQueue import deletion_queue
 from .Ortho2D import Ortho2D, XAXIS, YAXIS, XYAXIS, ZoomManagerAbc
 
 ####################################################################################################
@@ -232,6 +233,9 @@ class GlWidgetBase(QOpenGLWidget):
         
         self.paint()
 
+        # Delete the objects released during the frame
+        deletion_queue().flush()
+
     ##############################################
 
     def update(self):
@@ -39,6 +39,7 @@ except ImportError:
 ####################################################################################################
 
 from . import GL
+from .DeletionQueue import deletion_queue
 from .GlFeatures import GlVersion, GlFeatures
 
 ####################################################################################################
@@ -144,6 +145,9 @@ class GlWidgetBase3D(QOpenGLWidget):
 
         self.paint()
 
+        # Delete the objects released during the frame
+        deletion_queue().flush()
+
     ##############################################
 
     def update(self):
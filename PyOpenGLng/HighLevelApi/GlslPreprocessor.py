@@ -0,0 +1,393 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+
+""" This module implements a preprocessor for the GLSL include directives.
+
+A directive of the form::
+
+  #include(file.glsl)
+  #include "file.glsl"
+
+is replaced by the content of the file, which is searched relatively to the including file then in
+the include search path.  The directives within comments are ignored.  A file is included once, the
+following includes are skipped like with an include guard, and an include cycle raises a
+:exc:`ValueError`.
+
+The files are parsed once and cached by path and modification time.  The preprocessor emits
+``#line`` directives, each file has a source string number, so as the line of a compiler error can
+be mapped back to the file and the line of the original source::
+
+  preprocessor = glsl_preprocessor()
+  preprocessor.include_paths.append(path)
+  glsl_source = preprocessor.process_file(file_name)
+  file_name, line = glsl_source.map_line(string_number, line)
+
+:class:`.Shader.GlShader` uses the shared preprocessor returned by :func:`glsl_preprocessor` to load
+the source files.
+
+"""
+
+####################################################################################################
+
+import logging
+import os
+import re
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+_include_pattern = re.compile(r'^\s*#\s*include\s*(?:\((?P<name>[^)]*)\)|"(?P<quoted_name>[^"]*)")\s*$')
+_malformed_include_pattern = re.compile(r'^\s*#\s*include\b')
+_version_pattern = re.compile(r'^\s*#\s*version\s+(?P<version>\d+)(?:\s+(?P<profile>\w+))?')
+
+####################################################################################################
+
+def _strip_comments(line, in_comment):
+
+    """ Return the pair (*code*, *in_comment*) where *code* is the line without the comments, and
+    *in_comment* tells if a block comment continues on the next line.
+    """
+
+    code = []
+    position = 0
+    while position < len(line):
+        if in_comment:
+            stop = line.find('*/', position)
+            if stop < 0:
+                break
+            in_comment = False
+            position = stop + 2
+        else:
+            block_start = line.find('/*', position)
+            line_start = line.find('//', position)
+            if line_start >= 0 and (block_start < 0 or line_start < block_start):
+                code.append(line[position:line_start])
+                break
+            elif block_start >= 0:
+                code.append(line[position:block_start])
+                in_comment = True
+                position = block_start + 2
+            else:
+                code.append(line[position:])
+                break
+
+    return ''.join(code), in_comment
+
+####################################################################################################
+
+class GlslFile(object):
+
+    """ This class stores a parsed source file.
+
+    Public attributes:
+
+      path
+
+      mtime
+        modification time of the file when it was parsed
+
+      lines
+        list of the lines
+
+      includes
+        list of the pairs (*line_index*, *name*) of the include directives
+
+      version
+        pair (*version*, *profile*) of the ``#version`` directive, or :obj:`None`
+
+      version_line_index
+
+    """
+
+    ##############################################
+
+    def __init__(self, path, mtime, source_code):
+
+        self.path = path
+        self.mtime = mtime
+        self.lines = source_code.splitlines()
+        self.includes = []
+        self.version = None
+        self.version_line_index = None
+
+        in_comment = False
+        for line_index, line in enumerate(self.lines):
+            if in_comment or '/' in line:
+                code, in_comment = _strip_comments(line, in_comment)
+            else:
+                code = line
+            # a directive must start a line
+            if not code.lstrip().startswith('#'):
+                continue
+            match = _include_pattern.match(code)
+            if match is not None:
+                name = match.group('name') or match.group('quoted_name')
+                self.includes.append((line_index, name.strip()))
+            elif _malformed_include_pattern.match(code):
+                raise ValueError("Malformed include at %s:%u" % (path, line_index + 1))
+            elif self.version is None:
+                match = _version_pattern.match(code)
+                if match is not None:
+                    self.version = (int(match.group('version')), match.group('profile'))
+                    self.version_line_index = line_index
+
+####################################################################################################
+
+class GlslSource(object):
+
+    """ This class stores a preprocessed source.
+
+    Public attributes:
+
+      source
+        the preprocessed source code
+
+      files
+        list of the paths of the files indexed by their source string number
+
+      dependencies
+        dictionary *path*: list of the included paths, in the include order
+
+    """
+
+    ##############################################
+
+    def __init__(self, source, glsl_files, dependencies):
+
+        self.source = source
+        self._glsl_files = glsl_files
+        self.files = [glsl_file.path for glsl_file in glsl_files]
+        self.dependencies = dependencies
+
+    ##############################################
+
+    def __str__(self):
+
+        return self.source
+
+    ##############################################
+
+    def map_line(self, string_number, line):
+
+        """ Return the pair (*path*, *line*) of a line reported by the compiler. """
+
+        if 0 <= string_number < len(self.files):
+            return self.files[string_number], line
+        else:
+            return None, line
+
+    ##############################################
+
+    def context(self, string_number, line, context_size=1):
+
+        """ Return the lines of the original source around a line reported by the compiler, the
+        lines are prefixed by their number.
+        """
+
+        if not 0 <= string_number < len(self._glsl_files):
+            return []
+        lines = self._glsl_files[string_number].lines
+        lower_index = max(0, line - 1 - context_size)
+        upper_index = min(line + context_size, len(lines))
+
+        return ['%3u| %s' % (index + 1, lines[index]) for index in range(lower_index, upper_index)]
+
+####################################################################################################
+
+class GlslPreprocessor(object):
+
+    """ This class implements a GLSL preprocessor for the include directives.
+
+    The included files are searched in the directory of the including file then in *include_paths*.
+
+    Public attributes:
+
+      include_paths
+        list of the directories of the include search path
+
+      dependency_graph
+        dictionary *path*: tuple of the paths included by this file, for all the processed files
+
+      number_of_parsed_files
+
+      number_of_cache_hits
+
+    """
+
+    _logger = _module_logger.getChild('GlslPreprocessor')
+
+    ##############################################
+
+    def __init__(self, include_paths=()):
+
+        self.include_paths = list(include_paths)
+        self.dependency_graph = {}
+        self._cache = {}
+
+        self.number_of_parsed_files = 0
+        self.number_of_cache_hits = 0
+
+    ##############################################
+
+    def _parse(self, path):
+
+        """ Return the :class:`GlslFile` of a path, the file is parsed again if it was modified. """
+
+        mtime = os.path.getmtime(path)
+        glsl_file = self._cache.get(path)
+        if glsl_file is not None and glsl_file.mtime == mtime:
+            self.number_of_cache_hits += 1
+            return glsl_file
+
+        with open(path, 'r') as f:
+            source_code = f.read()
+        glsl_file = GlslFile(path, mtime, source_code)
+        self._cache[path] = glsl_file
+        self.number_of_parsed_files += 1
+
+        return glsl_file
+
+    ##############################################
+
+    def find_include(self, name, directory):
+
+        """ Return the path of an included file, *directory* is the directory of the including file.
+        """
+
+        for include_path in [directory] + self.include_paths:
+            path = os.path.normpath(os.path.join(include_path, name))
+            if os.path.isfile(path):
+                return path
+        raise ValueError("Include file %s not found in %s" % (name, ', '.join([directory] + self.include_paths)))
+
+    ##############################################
+
+    def dependants(self, path):
+
+        """ Return the set of the processed files which include *path*, directly or not, e.g. to
+        reload the shaders when an include file is modified.
+        """
+
+        path = os.path.normpath(os.path.abspath(path))
+        dependants = set()
+        stack = [path]
+        while stack:
+            included_path = stack.pop()
+            for including_path, included_paths in self.dependency_graph.items():
+                if included_path in included_paths and including_path not in dependants:
+                    dependants.add(including_path)
+                    stack.append(including_path)
+
+        return dependants
+
+    ##############################################
+
+    def clear_cache(self):
+
+        self._cache.clear()
+
+    ##############################################
+
+    def process_file(self, file_name):
+
+        """ Preprocess a file and return a :class:`GlslSource`. """
+
+        path = os.path.normpath(os.path.abspath(file_name))
+        glsl_file = self._parse(path)
+
+        # The semantic of #line changed in GLSL 3.30 and ES 3.00: the directive sets the number of
+        # the next line instead of the directive line.
+        version, profile = glsl_file.version or (110, None)
+        if profile == 'es':
+            line_offset = 0 if version >= 300 else -1
+        else:
+            line_offset = 0 if version >= 330 else -1
+
+        pieces = []
+        glsl_files = []
+        dependencies = {}
+        self._process(glsl_file, pieces, glsl_files, dependencies, [], line_offset)
+        for including_path, included_paths in dependencies.items():
+            self.dependency_graph[including_path] = tuple(included_paths)
+
+        return GlslSource('\n'.join(pieces) + '\n', glsl_files, dependencies)
+
+    ##############################################
+
+    def _process(self, glsl_file, pieces, glsl_files, dependencies, include_stack, line_offset):
+
+        """ Append the lines of a file to *pieces*, the includes are processed recursively. """
+
+        string_number = len(glsl_files)
+        glsl_files.append(glsl_file)
+        included_paths = dependencies.setdefault(glsl_file.path, [])
+        include_stack = include_stack + [glsl_file.path]
+
+        lines = glsl_file.lines
+        # The #line directive must follow the #version directive
+        if glsl_file.version_line_index is not None and string_number == 0:
+            start = glsl_file.version_line_index + 1
+            pieces.extend(lines[:start])
+        else:
+            start = 0
+        pieces.append('#line %u %u' % (start + 1 + line_offset, string_number))
+
+        directory = os.path.dirname(glsl_file.path)
+        for line_index, name in glsl_file.includes:
+            if line_index < start:
+                raise ValueError("Include before #version at %s:%u" % (glsl_file.path, line_index + 1))
+            pieces.extend(lines[start:line_index])
+            start = line_index + 1
+            path = self.find_include(name, directory)
+            if path in include_stack:
+                cycle = include_stack[include_stack.index(path):] + [path]
+                raise ValueError("Include cycle " + ' -> '.join(cycle))
+            included_paths.append(path)
+            if any(included_file.path == path for included_file in glsl_files):
+                # already included, keep the line numbering
+                self._logger.debug("Skip duplicated include %s in %s" % (path, glsl_file.path))
+                pieces.append('// include %s' % name)
+                continue
+            self._process(self._parse(path), pieces, glsl_files, dependencies, include_stack, line_offset)
+            pieces.append('#line %u %u' % (start + 1 + line_offset, string_number))
+        pieces.extend(lines[start:])
+
+####################################################################################################
+
+_glsl_preprocessor = None
+
+def glsl_preprocessor():
+
+    """ Return the shared preprocessor. """
+
+    global _glsl_preprocessor
+    if _glsl_preprocessor is None:
+        _glsl_preprocessor = GlslPreprocessor()
+    return _glsl_preprocessor
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
@@ -0,0 +1,458 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+
+""" This module implements the measurement of the GPU time using timer query objects.
+
+The result of a query is available when the GPU has executed the commands, usually one or two
+frames later, and reading it before stalls the pipeline.  Thus the queries are recycled through a
+ring and their results are collected only when they are available.
+
+A :class:`GlGpuTimer` measures the GPU time of a block using a ``GL_TIME_ELAPSED`` query::
+
+  timer = GlGpuTimer()
+  with timer:
+      draw()
+  ...
+  print(timer.elapsed_time)
+
+The time elapsed queries cannot be nested, a :class:`GlFrameProfiler` measures nested passes using
+``GL_TIMESTAMP`` queries and produces a report per frame, which includes the number of calls of
+the OpenGL commands issued by the CPU during the frame::
+
+  profiler = GlFrameProfiler()
+  # in paintGL
+  with profiler.frame():
+      with profiler.pass_('shadow'):
+          ...
+      with profiler.pass_('opaque'):
+          with profiler.pass_('terrain'):
+              ...
+  for report in profiler.pop_reports():
+      print(report['passes'])
+
+"""
+
+####################################################################################################
+
+import collections
+import contextlib
+import json
+import logging
+import time
+
+####################################################################################################
+
+from . import GL
+from .Buffer import _is_supported
+from .DeletionQueue import deletion_queue
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+_has_timer_query = None
+
+def has_timer_query():
+
+    """ Test if the timer queries are supported, i.e. OpenGL 3.3 or ARB_timer_query. """
+
+    global _has_timer_query
+    if _has_timer_query is None:
+        _has_timer_query = _is_supported('glQueryCounter', (3, 3), b'GL_ARB_timer_query')
+    return _has_timer_query
+
+####################################################################################################
+
+class GlQueryPool(object):
+
+    """ This class recycles the names of query objects of a target.
+
+    The pool owns the queries, thus all the created queries are deleted with the pool, including the
+    queries which are not released.
+
+    Public attributes:
+
+      number_of_queries
+        number of created queries
+
+    """
+
+    _logger = _module_logger.getChild('GlQueryPool')
+
+    ##############################################
+
+    def __init__(self, target):
+
+        self._target = target
+        self._queries = []
+        self._free_queries = []
+        self.number_of_queries = 0
+        self._deletion_queue = deletion_queue()
+
+    ##############################################
+
+    def __del__(self):
+
+        for query in self._queries:
+            self._deletion_queue.enqueue('query', query)
+
+    ##############################################
+
+    def acquire(self):
+
+        """ Return a free query name, a new query is created if the pool is empty. """
+
+        if not self._free_queries:
+            query = GL.glGenQueries(1)
+            self._deletion_queue.register('query', query, self)
+            self._queries.append(query)
+            self.number_of_queries += 1
+            return query
+        return self._free_queries.pop()
+
+    ##############################################
+
+    def release(self, query):
+
+        self._free_queries.append(query)
+
+####################################################################################################
+
+def is_query_available(query):
+
+    """ Test if the result of a query is available, this call doesn't stall the pipeline. """
+
+    return bool(GL.glGetQueryObjectiv(query, GL.GL_QUERY_RESULT_AVAILABLE))
+
+def query_result(query):
+
+    """ Return the 64-bit result of a query in ns, the call waits until it is available. """
+
+    return GL.glGetQueryObjectui64v(query, GL.GL_QUERY_RESULT)
+
+####################################################################################################
+
+class GlGpuTimer(object):
+
+    """ This class measures the GPU time of a block using ``GL_TIME_ELAPSED`` queries.
+
+    At most *number_of_queries* measurements are in flight, if all the queries are pending when a
+    new measurement begins, the oldest result is waited for.
+
+    Public attributes:
+
+      elapsed_time
+        last available GPU time in s or :obj:`None`
+
+      number_of_measurements
+
+      number_of_stalls
+        number of results waited for
+
+    """
+
+    _logger = _module_logger.getChild('GlGpuTimer')
+
+    #: A single time elapsed query can be active at a time
+    _active_timer = None
+
+    ##############################################
+
+    def __init__(self, number_of_queries=4):
+
+        self._query_pool = GlQueryPool(GL.GL_TIME_ELAPSED)
+        self._number_of_queries = number_of_queries
+        self._pending_queries = collections.deque()
+        self._query = None
+
+        self.elapsed_time = None
+        self.number_of_measurements = 0
+        self.number_of_stalls = 0
+
+    ##############################################
+
+    def __enter__(self):
+
+        if GlGpuTimer._active_timer is not None:
+            raise NameError("A time elapsed query is already active")
+        self.collect()
+        if len(self._pending_queries) >= self._number_of_queries:
+            self.number_of_stalls += 1
+            self._read(self._pending_queries.popleft())
+        self._query = self._query_pool.acquire()
+        GL.glBeginQuery(GL.GL_TIME_ELAPSED, self._query)
+        GlGpuTimer._active_timer = self
+
+        return self
+
+    ##############################################
+
+    def __exit__(self, type_, value, traceback):
+
+        GL.glEndQuery(GL.GL_TIME_ELAPSED)
+        GlGpuTimer._active_timer = None
+        self._pending_queries.append(self._query)
+        self._query = None
+
+    ##############################################
+
+    def _read(self, query):
+
+        self.elapsed_time = query_result(query) * 1e-9
+        self.number_of_measurements += 1
+        self._query_pool.release(query)
+
+    ##############################################
+
+    def collect(self):
+
+        """ Read the available results without stall and return the last elapsed time. """
+
+        while self._pending_queries and is_query_available(self._pending_queries[0]):
+            self._read(self._pending_queries.popleft())
+
+        return self.elapsed_time
+
+    ##############################################
+
+    def wait(self):
+
+        """ Wait for the pending results and return the last elapsed time. """
+
+        while self._pending_queries:
+            self._read(self._pending_queries.popleft())
+
+        return self.elapsed_time
+
+####################################################################################################
+
+class GlFrameProfiler(object):
+
+    """ This class measures the GPU time of nested passes per frame using ``GL_TIMESTAMP`` queries.
+
+    The reports are collected when the results are available, at most *number_of_frames_in_flight*
+    frames are pending.  If the results of the oldest frame are not yet available at the beginning
+    of a frame, then this frame is not profiled, thus the profiler never stalls the pipeline.
+
+    A report is a dictionary with the keys:
+
+      frame
+        frame number
+
+      cpu_time
+        CPU time of the frame in s
+
+      gpu_time
+        GPU time of the frame in s
+
+      passes
+        list of tuples (path, start, duration), *path* is the names of the nested passes joined by
+        '/' and the times in s are relative to the beginning of the frame
+
+      calls
+        dictionary of the number of calls of the OpenGL commands during the frame, if
+        *call_statistics* is set
+
+    Public attributes:
+
+      number_of_frames
+
+      number_of_skipped_frames
+
+    """
+
+    _logger = _module_logger.getChild('GlFrameProfiler')
+
+    ##############################################
+
+    def __init__(self, number_of_frames_in_flight=3, call_statistics=True, history=1000):
+
+        self._number_of_frames_in_flight = number_of_frames_in_flight
+        self._call_statistics = call_statistics
+        self._query_pool = GlQueryPool(GL.GL_TIMESTAMP)
+        self._pending_frames = collections.deque()
+        self._reports = collections.deque(maxlen=history)
+
+        self._frame = None # report of the current frame
+        self._timestamps = None # list of (path, begin query, end query) of the current frame
+        self._frame_queries = None
+        self._pass_names = []
+        self._call_counters = None
+
+        self.number_of_frames = 0
+        self.number_of_skipped_frames = 0
+
+    ##############################################
+
+    @property
+    def is_profiling(self):
+
+        """ Test if the current frame is profiled. """
+
+        return self._timestamps is not None
+
+    ##############################################
+
+    def _timestamp(self):
+
+        query = self._query_pool.acquire()
+        GL.glQueryCounter(query, GL.GL_TIMESTAMP)
+        return query
+
+    ##############################################
+
+    @staticmethod
+    def _count_calls():
+
+        return {command.name:command.call_counter for command in GL.called_commands()}
+
+    ##############################################
+
+    def begin_frame(self):
+
+        """ Begin a frame, the available reports of the previous frames are collected. """
+
+        self.collect()
+        self._frame = dict(frame=self.number_of_frames, cpu_time=time.perf_counter())
+        self.number_of_frames += 1
+        if len(self._pending_frames) >= self._number_of_frames_in_flight:
+            self.number_of_skipped_frames += 1
+            self._timestamps = None
+        else:
+            self._timestamps = []
+            self._pass_names = []
+            self._frame_queries = (self._timestamp(), None)
+        if self._call_statistics:
+            self._call_counters = self._count_calls()
+
+    ##############################################
+
+    def end_frame(self):
+
+        """ End the current frame. """
+
+        frame = self._frame
+        frame['cpu_time'] = time.perf_counter() - frame['cpu_time']
+        if self._call_statistics:
+            calls = {name:counter - self._call_counters.get(name, 0)
+                     for name, counter in self._count_calls().items()}
+            frame['calls'] = {name:counter for name, counter in calls.items() if counter > 0}
+        if self._timestamps is not None:
+            frame_queries = (self._frame_queries[0], self._timestamp())
+            self._pending_frames.append((frame, frame_queries, self._timestamps))
+        else:
+            # The GPU time of a skipped frame is not measured
+            frame['gpu_time'] = None
+            frame['passes'] = []
+            self._reports.append(frame)
+        self._frame = self._timestamps = None
+
+    ##############################################
+
+    @contextlib.contextmanager
+    def frame(self):
+
+        """ Context manager which profiles a frame. """
+
+        self.begin_frame()
+        try:
+            yield self
+        finally:
+            self.end_frame()
+
+    ##############################################
+
+    @contextlib.contextmanager
+    def pass_(self, name):
+
+        """ Context manager which measures a pass, the passes can be nested. """
+
+        self._pass_names.append(name)
+        if self._timestamps is not None:
+            path = '/'.join(self._pass_names)
+            begin_query = self._timestamp()
+        try:
+            yield
+        finally:
+            if self._timestamps is not None:
+                self._timestamps.append((path, begin_query, self._timestamp()))
+            self._pass_names.pop()
+
+    ##############################################
+
+    def collect(self):
+
+        """ Collect the reports of the frames whose results are available, without stall. """
+
+        while self._pending_frames:
+            frame, (frame_begin, frame_end), timestamps = self._pending_frames[0]
+            # The queries are executed in order
+            if not is_query_available(frame_end):
+                break
+            self._pending_frames.popleft()
+            origin = query_result(frame_begin)
+            frame['gpu_time'] = (query_result(frame_end) - origin) * 1e-9
+            passes = []
+            for path, begin_query, end_query in timestamps:
+                begin = query_result(begin_query)
+                passes.append((path, (begin - origin) * 1e-9, (query_result(end_query) - begin) * 1e-9))
+                self._query_pool.release(begin_query)
+                self._query_pool.release(end_query)
+            self._query_pool.release(frame_begin)
+            self._query_pool.release(frame_end)
+            # sort by start, the inner passes end before the outer passes
+            frame['passes'] = sorted(passes, key=lambda item: item[1])
+            self._reports.append(frame)
+
+    ##############################################
+
+    def pop_reports(self):
+
+        """ Return the collected reports and clear them. """
+
+        self.collect()
+        reports = list(self._reports)
+        self._reports.clear()
+
+        return reports
+
+    ##############################################
+
+    def export(self, path):
+
+        """ Append the collected reports to a file in the JSON Lines format and clear them.  Return
+        the number of exported reports.
+        """
+
+        reports = self.pop_reports()
+        with open(path, 'a') as f:
+            for report in reports:
+                f.write(json.dumps(report, sort_keys=True) + '\n')
+
+        return len(reports)
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
@@ -28,7 +28,11 @@
 #
 ####################################################################################################
 
-""" This modules provides tools to manage texture. """
+""" This modules provides tools to manage texture.
+
+The texture has an immutable storage, see :class:`.Texture.GlTexture2D`, which is allocated again
+when the shape of the image changes.  A video stream should be uploaded using :meth:`update`.
+"""
 
 ####################################################################################################
 
@@ -39,6 +43,7 @@ import numpy as np
 ####################################################################################################
 
 from . import GL
+from .Texture import GlTexture2D, set_texture_parameters
 
 ####################################################################################################
 
@@ -46,109 +51,65 @@ _module_logger = logging.getLogger(__name__)
 
 ####################################################################################################
 
-class ImageTexture(object):
-
-    _logger = _module_logger.getChild('ImageTexture')
-
-    ##############################################
-    
-    def __init__(self, image):
-
-        self._gl_id = GL.glGenTextures(1)
-        self._setup_texture()
-        self._shape = None
-        self.set(image)
-
-    ##############################################
-    
-    def __del__(self):
-
-        GL.glDeleteTextures([self._gl_id])
+class ImageTexture(GlTexture2D):
 
-    ##############################################
-
-    @property
-    def id(self):
-        return self._gl_id
+    """ This class wraps a texture of an uint8 image, a single plane image is mapped to the alpha
+    channel.  If *number_of_unpack_buffers* is not null, the updates are staged in a ring of pixel
+    unpack buffers.
+    """
 
-    ##############################################
-    
-    def bind(self):
-
-        """ Bind the texture. """
-
-        # Select the texture unit and bind it
-        GL.glActiveTexture(GL.GL_TEXTURE0)
-        GL.glBindTexture(GL.GL_TEXTURE_2D, self._gl_id) # [0]
-
-    ##############################################
-    
-    def unbind(self):
-
-        """ Unbind the texture. """
+    _logger = _module_logger.getChild('ImageTexture')
 
-        # Select the texture unit and unbind it
-        GL.glActiveTexture(GL.GL_TEXTURE0)
-        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+    #: Swizzle of a single plane image, which is stored in the red channel
+    __alpha_swizzle__ = (
+        (GL.GL_TEXTURE_SWIZZLE_R, GL.GL_ZERO),
+        (GL.GL_TEXTURE_SWIZZLE_G, GL.GL_ZERO),
+        (GL.GL_TEXTURE_SWIZZLE_B, GL.GL_ZERO),
+        (GL.GL_TEXTURE_SWIZZLE_A, GL.GL_RED),
+        )
+
+    __identity_swizzle__ = (
+        (GL.GL_TEXTURE_SWIZZLE_R, GL.GL_RED),
+        (GL.GL_TEXTURE_SWIZZLE_G, GL.GL_GREEN),
+        (GL.GL_TEXTURE_SWIZZLE_B, GL.GL_BLUE),
+        (GL.GL_TEXTURE_SWIZZLE_A, GL.GL_ALPHA),
+        )
 
     ##############################################
     
-    def _setup_texture(self):
-
-        """ setup the texture. """
+    def __init__(self, image, number_of_unpack_buffers=0):
 
-        self.bind()
-
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP)
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP)
         minifying_function = GL.GL_LINEAR
         # minifying_function = GL.GL_NEAREST
         # minifying_function = GL.GL_LINEAR_MIPMAP_LINEAR
         # minifying_function = GL.GL_NEAREST_MIPMAP_NEAREST
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, minifying_function)
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, minifying_function)
-
-        # Fixme: required?
-        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1) # 1 means byte-alignment
+        parameters = (
+            (GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP),
+            (GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP),
+            (GL.GL_TEXTURE_MAG_FILTER, minifying_function),
+            (GL.GL_TEXTURE_MIN_FILTER, minifying_function),
+            )
+        super(ImageTexture, self).__init__(parameters, number_of_unpack_buffers)
+        self._swizzle = None # (texture name, alpha)
 
-        self.unbind()
-
-    ##############################################
-
-    @property
-    def shape(self):
-        return self._shape
+        self.set(image)
 
     ##############################################
     
     def set(self, image):
 
-        shape = image.shape
-        height, width = shape[:2]
-        self._shape = height, width
-        if len(shape) == 3:
-            depth = shape[2]
-        else:
-            depth = 1
-
-        if depth == 1:
-            internal_format = data_format = GL.GL_ALPHA
-        else:
-            internal_format = data_format = GL.GL_RGB
-
-        level = 0
-        border = 0
-
-        if image.dtype == np.uint8:
-            data_type = GL.GL_UNSIGNED_BYTE
-        else:
+        """ Set the image, a single plane image is mapped to the alpha channel. """
+
+        if image.dtype != np.uint8:
             raise NotImplementedError
 
-        self.bind()
-        GL.glTexImage2D(GL.GL_TEXTURE_2D,
-                        level, internal_format, width, height, border, data_format, data_type,
-                        image)
-        self.unbind()
+        alpha = image.ndim == 2 or image.shape[2] == 1
+        super(ImageTexture, self).set(image)
+        # A new storage is a new texture name
+        if self._swizzle != (self._gl_id, alpha):
+            swizzle = self.__alpha_swizzle__ if alpha else self.__identity_swizzle__
+            set_texture_parameters(self._gl_id, swizzle)
+            self._swizzle = (self._gl_id, alpha)
 
 ####################################################################################################
 #
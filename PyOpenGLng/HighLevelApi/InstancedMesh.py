@@ -0,0 +1,153 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+""" This module implements the instanced rendering of a mesh.
+
+An :class:`InstancedMesh` draws many copies of a base mesh with one ``glDrawElementsInstanced``
+call.  Each instance has a transform matrix and optionally a colour, which are stored in a
+per-instance buffer and bound to the vertex attributes *transform* and *colour* with a divisor of 1.
+For example::
+
+  positions, normals = unit_sphere()
+  spheres = InstancedMesh((positions, normals), translation_matrices(centres, radius), colours)
+  spheres.bind_to_shader(shader_program_interface.attributes)
+  spheres.draw()
+
+The vertex shader must declare ``in mat4 transform``, which uses four consecutive locations, and
+compute the position as ``model_view_projection_matrix * transform * vec4(position, 1)``.
+
+"""
+
+####################################################################################################
+
+import logging
+
+import numpy as np
+
+####################################################################################################
+
+from .PrimitiveVertexArray import IndexedTriangleVertexArray
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+def translation_matrices(translations, scales=1.):
+
+    """ Return an array of shape (N, 4, 4) of the transform matrices which scale then translate,
+    *scales* is a scalar or an array of N scales.
+    """
+
+    translations = np.asarray(translations, dtype=np.float32)
+    number_of_instances = translations.shape[0]
+    matrices = np.zeros((number_of_instances, 4, 4), dtype=np.float32)
+    scales = np.broadcast_to(np.asarray(scales, dtype=np.float32), (number_of_instances,))
+    for i in range(3):
+        matrices[:,i,i] = scales
+    matrices[:,:3,3] = translations[:,:3]
+    matrices[:,3,3] = 1
+
+    return matrices
+
+####################################################################################################
+
+class InstancedMesh(IndexedTriangleVertexArray):
+
+    """ This class draws the instances of a mesh.
+
+    The parameter *mesh* is a pair (*positions*, *normals*) of a triangle soup, *transforms* is an
+    array of shape (N, 4, 4) and *colours* an array of shape (N, 4).  If the instances don't have
+    a colour, the mesh is drawn with *colour*.
+
+    Public attributes:
+
+      number_of_instances
+
+    """
+
+    _logger = _module_logger.getChild('InstancedMesh')
+
+    ##############################################
+
+    def __init__(self, mesh, transforms=None, colours=None, colour=(1., 1., 1., 1.),
+                 buffer_heap=None, **kwargs):
+
+        self.number_of_instances = 0
+        self._instance_buffer = None
+
+        positions, normals = mesh
+        super(InstancedMesh, self).__init__((positions, normals, colour), buffer_heap=buffer_heap,
+                                            **kwargs)
+
+        self._instance_buffer = self._create_buffer()
+        if transforms is not None:
+            self.set_instances(transforms, colours)
+
+    ##############################################
+
+    def set_instances(self, transforms, colours=None):
+
+        """ Set the transform matrices, and the colours if given, of the instances. """
+
+        transforms = np.asarray(transforms)
+        fields = [('transform', np.float32, (4, 4))]
+        if colours is not None:
+            colours = np.asarray(colours)
+            fields.append(('colour', colours.dtype, colours.shape[1:]))
+        instances = np.zeros(transforms.shape[0], dtype=fields)
+        # A mat4 attribute is read column by column
+        instances['transform'] = np.transpose(transforms, (0, 2, 1))
+        if colours is not None:
+            instances['colour'] = colours
+
+        self.number_of_instances = instances.shape[0]
+        self._instance_buffer.set(instances)
+        # The instance format could have changed
+        if self._shader_program_interface is not None:
+            self.bind_to_shader(self._shader_program_interface)
+
+    ##############################################
+
+    def bind_to_shader(self, shader_program_interface):
+
+        """ Bind the mesh to the attributes *position* and *normal*, and the instances to the
+        attributes *transform* and *colour*.
+        """
+
+        super(InstancedMesh, self).bind_to_shader(shader_program_interface)
+        if self._instance_buffer is not None and self.number_of_instances:
+            self.bind_buffer(self._instance_buffer, shader_program_interface, divisor=1)
+
+    ##############################################
+
+    def draw(self):
+
+        """ Draw the instances with one call. """
+
+        if self.number_of_instances:
+            super(InstancedMesh, self).draw(self.number_of_instances)
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
@@ -31,6 +31,11 @@
 """ This modules provides tools to draw segments and rectangles primitives.
 
 The aim of these classes has to be used by a Geometry Shader.
+
+The vertex arrays can use a :class:`GlStreamBuffer` instead of dedicated buffers for dynamic
+geometry, the method :meth:`set` must then be called within a frame of the stream buffer and the
+attributes are bound again to the shader at each call.  For many small static objects, the vertex
+buffers can be allocated in a :class:`GlBufferHeap`.
 """
 
 ####################################################################################################
@@ -41,7 +46,10 @@ import numpy as np
 ####################################################################################################
 
 from . import GL
-from .Buffer import GlArrayBuffer
+from ..Math.Mesh import weld_mesh
+from .Buffer import GlElementArrayBuffer, interleave
+from .VertexFormat import (INT_2_10_10_10_REV, UNORM8, pack_int_2_10_10_10_rev, pack_unorm,
+                           set_constant_attribute)
 from .VertexArrayObject import GlVertexArrayObject
 
 ####################################################################################################
@@ -52,12 +60,17 @@ class GlLinesVertexArray(GlVertexArrayObject):
 
     ##############################################
 
-    def __init__(self, objects=None):
+    def __init__(self, objects=None, stream_buffer=None, buffer_heap=None):
 
-        super(GlLinesVertexArray, self).__init__()
+        super(GlLinesVertexArray, self).__init__(buffer_heap)
 
         self._number_of_objects = 0
-        self._vertex_array_buffer = GlArrayBuffer()
+        self._stream_buffer = stream_buffer
+        self._shader_program_interface_attribute = None
+        if stream_buffer is None:
+            self._vertex_array_buffer = self._create_buffer()
+        else:
+            self._vertex_array_buffer = None
 
         if objects is not None:
             self.set(objects)
@@ -70,11 +83,27 @@ class GlLinesVertexArray(GlVertexArrayObject):
 
     ##############################################
 
+    def _upload(self, vertex):
+
+        """ Upload the vertex to the buffer or to the stream buffer. """
+
+        if self._stream_buffer is None:
+            self._vertex_array_buffer.set(vertex)
+        else:
+            self._vertex_array_buffer = self._stream_buffer.write(vertex)
+            if self._shader_program_interface_attribute is not None:
+                self.bind_to_shader(self._shader_program_interface_attribute)
+
+    ##############################################
+
     def bind_to_shader(self, shader_program_interface_attribute):
 
         """ Bind the vertex array to the shader program interface attribute.
         """
 
+        self._shader_program_interface_attribute = shader_program_interface_attribute
+        if self._vertex_array_buffer is None: # stream buffer is not yet set
+            return
         self.bind()
         shader_program_interface_attribute.bind_to_buffer(self._vertex_array_buffer)
         self.unbind()
@@ -99,9 +128,10 @@ class GlSegmentVertexArray(GlLinesVertexArray):
 
     ##############################################
 
-    def __init__(self, segments=None):
+    def __init__(self, segments=None, stream_buffer=None, buffer_heap=None):
 
-        super(GlSegmentVertexArray, self).__init__(objects=segments)
+        super(GlSegmentVertexArray, self).__init__(objects=segments, stream_buffer=stream_buffer,
+                                                   buffer_heap=buffer_heap)
 
     ##############################################
 
@@ -120,7 +150,7 @@ class GlSegmentVertexArray(GlLinesVertexArray):
 
         self._logger.debug(str(vertex)) # Fixme:
 
-        self._vertex_array_buffer.set(vertex)
+        self._upload(vertex)
 
 ####################################################################################################
 
@@ -130,9 +160,10 @@ class GlRectangleVertexArray(GlLinesVertexArray):
 
     ##############################################
 
-    def __init__(self, rectangles=None):
+    def __init__(self, rectangles=None, stream_buffer=None, buffer_heap=None):
 
-        super(GlRectangleVertexArray, self).__init__(objects=rectangles)
+        super(GlRectangleVertexArray, self).__init__(objects=rectangles, stream_buffer=stream_buffer,
+                                                     buffer_heap=buffer_heap)
 
     ##############################################
 
@@ -149,72 +180,176 @@ class GlRectangleVertexArray(GlLinesVertexArray):
             vertex[j] = rectangle.point
             vertex[j+1] = rectangle.dimension
 
-        self._vertex_array_buffer.set(vertex)
+        self._upload(vertex)
 
 ####################################################################################################
 
 class TriangleVertexArray(GlVertexArrayObject):
 
-    """ Base class to draw primitives as triangles. """
+    """ Base class to draw primitives as triangles.
+
+    The positions, normals and colours are interleaved in one buffer.  A single colour is set as a
+    constant generic attribute.  If indices are given, the triangles are drawn using
+    ``glDrawElements``.
+    """
 
     # Fixme: 3d
 
     ##############################################
 
-    def __init__(self, items=None):
+    def __init__(self, items=None, stream_buffer=None, buffer_heap=None, compact=False):
 
-        super(TriangleVertexArray, self).__init__()
+        super(TriangleVertexArray, self).__init__(buffer_heap)
 
-        self._number_of_items = 0
-        self._positions_buffer = GlArrayBuffer()
-        self._normals_buffer = GlArrayBuffer()
-        self._colours_buffer = GlArrayBuffer()
+        self._number_of_vertexes = 0
+        self._stream_buffer = stream_buffer
+        self._shader_program_interface = None
+        self._compact = compact
+        self._constant_colour = None
+        self._colour_location = None
+        self._element_buffer = None
+        self._number_of_indices = 0
+        if stream_buffer is None:
+            self._vertex_buffer = self._create_buffer()
+        else:
+            self._vertex_buffer = None
 
         if items is not None:
             self.set(*items)
 
     ##############################################
 
-    def set(self, positions, normals, colours):
+    def set(self, positions, normals, colours, indices=None):
+
+        """ Set the vertex array from the arrays of the vertex positions, normals and colours, three
+        consecutive vertexes, or vertex indices if given, define a triangle.
+
+        If *colours* is a single RGBA colour, then it is set as a constant attribute for the draw.
 
-        """ Set the vertex array from an iterable of triangles. """
+        If the vertex array is compact, the normals are packed as ``GL_INT_2_10_10_10_REV`` and the
+        colours as normalized RGBA8, i.e. 20 bytes per vertex instead of 40 bytes.
+        """
 
-        self._number_of_items = positions.shape[0]
+        self._number_of_vertexes = positions.shape[0]
 
         # Fixme:
         #  - set from high level primitive: slow
         #  - set from Numpy array: fast but check for mistake
 
-        # vertex = np.zeros((self._number_of_objects, 3), dtype='f') # dtype=np.float
+        colours = np.asarray(colours)
+        vertex_format = None
+        if self._compact:
+            normals = pack_int_2_10_10_10_rev(normals)
+            vertex_format = {'normal':INT_2_10_10_10_REV}
+        fields = [('position', positions), ('normal', normals)]
+        if colours.ndim == 1:
+            self._constant_colour = np.array(colours, dtype=np.float32)
+        else:
+            self._constant_colour = None
+            if self._compact:
+                if colours.dtype.kind == 'f':
+                    colours = pack_unorm(colours)
+                else:
+                    colours = colours.astype(UNORM8.dtype)
+                vertex_format['colour'] = UNORM8
+            fields.append(('colour', colours))
+        vertexes = interleave(fields)
+
+        if self._stream_buffer is None:
+            self._vertex_buffer.set(vertexes, vertex_format=vertex_format)
+        else:
+            self._vertex_buffer = self._stream_buffer.write(vertexes, vertex_format=vertex_format)
+        self._set_indices(indices)
+        # The vertex format could have changed
+        if self._shader_program_interface is not None:
+            self.bind_to_shader(self._shader_program_interface)
+
+    ##############################################
+
+    def _set_indices(self, indices):
+
+        if indices is None:
+            self._number_of_indices = 0
+            return
 
-        self._positions_buffer.set(positions)
-        self._normals_buffer.set(normals)
-        self._colours_buffer.set(colours)
+        if self._element_buffer is None:
+            self._element_buffer = GlElementArrayBuffer()
+        self._element_buffer.set(indices)
+        self._number_of_indices = self._element_buffer.number_of_indices
+        # The element array buffer binding is recorded in the vertex array object
+        self.bind_element_buffer(self._element_buffer)
+
+    ##############################################
+
+    @property
+    def is_indexed(self):
+        return self._number_of_indices > 0
 
     ##############################################
 
     def bind_to_shader(self, shader_program_interface):
 
-        """ Bind the vertex array to the shader program interface attribute.
+        """ Bind the vertex array to the shader program interface attributes *position*, *normal* and
+        *colour*.
         """
 
-        # Fixme: we cannot reuse the vbo
+        self._shader_program_interface = shader_program_interface
+        if self._vertex_buffer is None: # stream buffer is not yet set
+            return
+        self.bind_buffer(self._vertex_buffer, shader_program_interface)
+        if self._constant_colour is not None and 'colour' in shader_program_interface:
+            location = shader_program_interface['colour']
+            self._colour_location = getattr(location, 'location', location)
+            self.disable_attribute(self._colour_location)
+        else:
+            self._colour_location = None
+
+    ##############################################
+
+    def draw(self, number_of_instances=None):
+
+        """ Draw the vertex array as triangles, instanced if *number_of_instances* is given. """
 
         self.bind()
-        shader_program_interface.position.bind_to_buffer(self._positions_buffer)
-        shader_program_interface.normal.bind_to_buffer(self._normals_buffer)
-        shader_program_interface.colour.bind_to_buffer(self._colours_buffer)
+        if self._colour_location is not None:
+            set_constant_attribute(self._colour_location, self._constant_colour)
+        if self._number_of_indices:
+            self._element_buffer.draw(GL.GL_TRIANGLES, number_of_instances=number_of_instances)
+        elif number_of_instances is None:
+            GL.glDrawArrays(GL.GL_TRIANGLES, 0, self._number_of_vertexes)
+        else:
+            GL.glDrawArraysInstanced(GL.GL_TRIANGLES, 0, self._number_of_vertexes, number_of_instances)
         self.unbind()
 
+####################################################################################################
+
+class IndexedTriangleVertexArray(TriangleVertexArray):
+
+    """ This class draws a triangle soup as an indexed mesh: the vertexes having the same position,
+    normal and colour are welded, see :func:`PyOpenGLng.Math.Mesh.weld`.
+
+    The keyword arguments *tolerance* and *normal_tolerance* are passed to the welding.
+    """
+
     ##############################################
 
-    def draw(self):
+    def __init__(self, items=None, stream_buffer=None, buffer_heap=None, compact=False, **kwargs):
 
-        """ Draw the vertex array as lines. """
+        self._weld_kwargs = kwargs
+        super(IndexedTriangleVertexArray, self).__init__(items, stream_buffer, buffer_heap, compact)
 
-        self.bind()
-        GL.glDrawArrays(GL.GL_TRIANGLES, 0, 3*self._number_of_items)
-        self.unbind()
+    ##############################################
+
+    def set(self, positions, normals, colours, indices=None):
+
+        """ Set the vertex array from a triangle soup, or from an indexed mesh if *indices* is
+        given.
+        """
+
+        if indices is None:
+            positions, normals, colours, indices = weld_mesh(positions, normals, colours,
+                                                             **self._weld_kwargs)
+        super(IndexedTriangleVertexArray, self).set(positions, normals, colours, indices)
 
 ####################################################################################################
 #
@@ -0,0 +1,236 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+
+""" This module implements a persistent cache of program binaries, so as to skip the compilation
+and the link of the shader programs at startup.
+
+A program binary is retrieved by ``glGetProgramBinary`` after the link and stored in a file named
+after a key, which is a hash of the preprocessed sources of the shaders, of the program interface,
+of the transform feedback varyings and of the vendor, renderer and version strings of the driver.
+At the next startup, the program is loaded by ``glProgramBinary``.  If the driver rejects the
+binary, e.g. after an update which doesn't change the version string, the program is compiled and
+linked from the sources, and the cache is updated.
+
+The cache is set on the shader manager before the shaders are loaded::
+
+  shader_manager = GlShaderManager()
+  shader_manager.set_program_binary_cache(GlProgramBinaryCache(cache_path))
+  shader_manager.load_from_file(...)
+  shader_manager.link_program(...)
+
+"""
+
+####################################################################################################
+
+import hashlib
+import logging
+import os
+import struct
+
+####################################################################################################
+
+from . import GL
+from .Buffer import _is_supported
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+_has_program_binary = None
+
+def has_program_binary():
+
+    """ Test if the program binaries are supported, i.e. OpenGL 4.1 or ARB_get_program_binary, and
+    the driver provides at least one binary format.
+    """
+
+    global _has_program_binary
+    if _has_program_binary is None:
+        _has_program_binary = (_is_supported('glProgramBinary', (4, 1), b'GL_ARB_get_program_binary')
+                               and GL.glGetIntegerv(GL.GL_NUM_PROGRAM_BINARY_FORMATS) > 0)
+    return _has_program_binary
+
+####################################################################################################
+
+class GlProgramBinaryCache(object):
+
+    """ This class implements a cache of program binaries in the directory *path*, which is created
+    if it doesn't exist.
+
+    Public attributes:
+
+      number_of_hits
+        number of programs loaded from a binary
+
+      number_of_misses
+        number of programs linked from the sources
+
+      number_of_rejects
+        number of binaries rejected by the driver, they are counted as misses
+
+    """
+
+    _logger = _module_logger.getChild('GlProgramBinaryCache')
+
+    #: The header of a file is the binary format
+    __header__ = struct.Struct('<I')
+
+    ##############################################
+
+    def __init__(self, path):
+
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        self.enabled = has_program_binary()
+        self._driver = tuple(GL.glGetString(name) for name in (GL.GL_VENDOR,
+                                                               GL.GL_RENDERER,
+                                                               GL.GL_VERSION))
+
+        self.number_of_hits = 0
+        self.number_of_misses = 0
+        self.number_of_rejects = 0
+
+    ##############################################
+
+    def program_key(self, shaders, program_interface=None, transform_feedback_varyings=None):
+
+        """ Return the key of a program as an hexadecimal string. """
+
+        items = list(self._driver)
+        for shader in shaders:
+            items += [str(shader.shader_type), str(shader)]
+        if program_interface is not None:
+            items += ['attribute %s %u' % (attribute.name, attribute.location)
+                      for attribute in program_interface.attributes]
+            items += ['uniform block %s %u' % (uniform_block.name, uniform_block.binding_point)
+                      for uniform_block in program_interface.uniform_blocks]
+        if transform_feedback_varyings is not None:
+            items += ['varying ' + name for name in transform_feedback_varyings]
+
+        key = hashlib.sha1()
+        for item in items:
+            if not isinstance(item, bytes):
+                item = item.encode('utf-8')
+            key.update(item + b'\0')
+
+        return key.hexdigest()
+
+    ##############################################
+
+    def _file_name(self, key):
+
+        return os.path.join(self.path, key + '.bin')
+
+    ##############################################
+
+    def _load(self, shader_program, key):
+
+        """ Load the binary of a program, return :obj:`False` if it isn't cached or if it is
+        rejected.
+        """
+
+        file_name = self._file_name(key)
+        if not os.path.exists(file_name):
+            return False
+
+        with open(file_name, 'rb') as f:
+            data = f.read()
+        header_size = self.__header__.size
+        if len(data) > header_size:
+            binary_format, = self.__header__.unpack(data[:header_size])
+            if shader_program.load_binary(binary_format, data[header_size:]):
+                return True
+        self._logger.info("Reject program binary %s" % (file_name))
+        self.number_of_rejects += 1
+        os.remove(file_name)
+
+        return False
+
+    ##############################################
+
+    def _store(self, shader_program, key):
+
+        """ Store the binary of a linked program, the file is renamed once written so as a reader
+        never sees a partial file.  The rename replaces an existing file, also on Windows.
+        """
+
+        binary_format, binary = shader_program.get_binary()
+        if not binary:
+            return
+
+        file_name = self._file_name(key)
+        tmp_file_name = file_name + '.tmp'
+        with open(tmp_file_name, 'wb') as f:
+            f.write(self.__header__.pack(binary_format))
+            f.write(binary)
+        os.replace(tmp_file_name, file_name)
+
+    ##############################################
+
+    def link_program(self, shader_program, shaders, program_interface=None,
+                     transform_feedback_varyings=None):
+
+        """ Load the binary of a program if it is cached, else attach the shaders, which are
+        compiled if required, link the program and store its binary.
+        """
+
+        if program_interface is not None:
+            shader_program.set_program_interface(program_interface)
+        if transform_feedback_varyings is not None:
+            shader_program.set_transform_feedback_varyings(transform_feedback_varyings)
+
+        key = None
+        if self.enabled:
+            key = self.program_key(shaders, program_interface, transform_feedback_varyings)
+            if self._load(shader_program, key):
+                self.number_of_hits += 1
+                return shader_program
+
+        self.number_of_misses += 1
+        for shader in shaders:
+            shader_program.attach_shader(shader)
+        if key is not None:
+            shader_program.set_binary_retrievable()
+        shader_program.link()
+        if key is not None:
+            self._store(shader_program, key)
+
+        return shader_program
+
+    ##############################################
+
+    def clear(self):
+
+        """ Remove the cached binaries. """
+
+        for file_name in os.listdir(self.path):
+            if file_name.endswith('.bin'):
+                os.remove(os.path.join(self.path, file_name))
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
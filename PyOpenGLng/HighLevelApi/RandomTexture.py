@@ -29,6 +29,8 @@ import numpy as np
 ####################################################################################################
 
 from . import GL
+from .DeletionQueue import deletion_queue
+from .Texture import create_texture, set_texture_parameters
 from .Shader import GlShaderProgram
 
 ####################################################################################################
@@ -62,9 +64,7 @@ class GlRandomTexture(object):
     
     def __del__(self):
 
-        #Fixme:
-        # GL.glDeleteTextures([self._gl_textures_id])
-        pass
+        self._deletion_queue.enqueue('texture', self._gl_textures_id)
 
     ##############################################
     
@@ -90,14 +90,13 @@ class GlRandomTexture(object):
 
         """ Create the texture. """
 
-        self._gl_textures_id = GL.glGenTextures(1)
-
-        self.bind()
-
-        GL.glTexParameteri(GL.GL_TEXTURE_1D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_NEAREST) # ?
-        GL.glTexParameteri(GL.GL_TEXTURE_1D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_NEAREST) # ?
-
-        self.unbind()
+        self._deletion_queue = deletion_queue()
+        self._gl_textures_id = create_texture(GL.GL_TEXTURE_1D, self, self._deletion_queue)
+        set_texture_parameters(self._gl_textures_id,
+                               [(GL.GL_TEXTURE_MAG_FILTER, GL.GL_NEAREST), # ?
+                                (GL.GL_TEXTURE_MIN_FILTER, GL.GL_NEAREST), # ?
+                               ],
+                               GL.GL_TEXTURE_1D)
 
     ##############################################
     
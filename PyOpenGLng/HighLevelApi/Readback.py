@@ -0,0 +1,429 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+""" This module implements asynchronous readbacks using pixel pack buffers.
+
+A synchronous ``glReadPixels`` or ``glGetBufferSubData`` stalls the pipeline until the GPU has
+completed the commands which write the data.  A :class:`GlReadbackPool` instead issues the copy into
+a pack buffer of its pool, inserts a fence and returns a :class:`GlReadbackFuture` immediately.  The
+future resolves to a Numpy array mapped from the pack buffer without copy.
+
+The number of pack buffers bounds the number of readbacks in flight, a buffer returns to the pool
+when the future is released.  For example, to export the frames with a latency of two frames::
+
+  pool = GlReadbackPool(number_of_buffers=3)
+  futures = collections.deque()
+  for frame in frames:
+      render(frame)
+      futures.append(pool.read_pixels(0, 0, width, height, frame_buffer=frame_buffer))
+      if len(futures) == 3:
+          with futures.popleft() as future:
+              save(future.result())
+
+"""
+
+####################################################################################################
+
+import logging
+import time
+
+import numpy as np
+
+####################################################################################################
+
+from . import GL
+from .Buffer import GlBuffer
+from .DeletionQueue import deletion_queue
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+#: Number of components of the pixel formats
+__pixel_format_components__ = {
+    GL.GL_RED:1,
+    GL.GL_GREEN:1,
+    GL.GL_BLUE:1,
+    GL.GL_RG:2,
+    GL.GL_RGB:3,
+    GL.GL_BGR:3,
+    GL.GL_RGBA:4,
+    GL.GL_BGRA:4,
+    GL.GL_DEPTH_COMPONENT:1,
+    GL.GL_STENCIL_INDEX:1,
+    }
+
+#: Numpy data type of the pixel types
+__pixel_type_dtypes__ = {
+    GL.GL_UNSIGNED_BYTE:np.uint8,
+    GL.GL_BYTE:np.int8,
+    GL.GL_UNSIGNED_SHORT:np.uint16,
+    GL.GL_SHORT:np.int16,
+    GL.GL_UNSIGNED_INT:np.uint32,
+    GL.GL_INT:np.int32,
+    GL.GL_HALF_FLOAT:np.float16,
+    GL.GL_FLOAT:np.float32,
+    }
+
+def pixel_layout(format_, type_):
+
+    """ Return the number of components and the Numpy data type of a pixel format and type. """
+
+    try:
+        return __pixel_format_components__[format_], np.dtype(__pixel_type_dtypes__[type_])
+    except KeyError:
+        raise ValueError("Pixel format %s and type %s are not supported" % (format_, type_))
+
+####################################################################################################
+
+class GlPixelPackBuffer(GlBuffer):
+
+    """ This class wraps an OpenGl Pixel Pack Buffer. """
+
+    _target = GL.GL_PIXEL_PACK_BUFFER
+
+    _logger = _module_logger.getChild('GlPixelPackBuffer')
+
+    ##############################################
+
+    def set(self, data, usage=GL.GL_STREAM_READ):
+        self._set(data, usage)
+
+    ##############################################
+
+    def reserve(self, nbytes):
+
+        """ Reallocate the data store if it is smaller than *nbytes*. """
+
+        if self.nbytes < nbytes:
+            self._set_data_type(np.uint8, (nbytes,))
+            self.nbytes = nbytes
+            self._buffer_data(nbytes, GL.GL_STREAM_READ)
+
+####################################################################################################
+
+class GlReadbackFuture(object):
+
+    """ This class represents a pending readback.
+
+    The array returned by :meth:`result` is mapped from the pack buffer, it becomes invalid when the
+    future is released.  A future can be used as a context manager which releases it.
+    """
+
+    _logger = _module_logger.getChild('GlReadbackFuture')
+
+    ##############################################
+
+    def __init__(self, pool, pack_buffer, fence, nbytes, dtype, shape, row_nbytes=None):
+
+        self._deletion_queue = deletion_queue()
+        self._pool = pool
+        self._pack_buffer = pack_buffer
+        self._fence = fence
+        self.nbytes = nbytes
+        self._dtype = dtype
+        self._shape = shape
+        self._row_nbytes = row_nbytes
+        self._array = None
+
+    ##############################################
+
+    def __del__(self):
+
+        if self._pack_buffer is not None:
+            self._discard()
+
+    ##############################################
+
+    def __enter__(self):
+
+        return self
+
+    ##############################################
+
+    def __exit__(self, type_, value, traceback):
+
+        self.release()
+
+    ##############################################
+
+    def _delete_fence(self):
+
+        GL.glDeleteSync(self._fence)
+        self._fence = None
+
+    ##############################################
+
+    def done(self):
+
+        """ Test if the GPU has completed the readback, without waiting. """
+
+        if self._fence is None:
+            return True
+        status = GL.glClientWaitSync(self._fence, 0, 0)
+        if status in (GL.GL_ALREADY_SIGNALED, GL.GL_CONDITION_SATISFIED):
+            self._delete_fence()
+            return True
+        elif status == GL.GL_WAIT_FAILED:
+            raise NameError("Failed to wait the fence")
+        else:
+            return False
+
+    ##############################################
+
+    def wait(self, timeout=None):
+
+        """ Wait the GPU has completed the readback, *timeout* is in second.  Return :obj:`False` if
+        the timeout expired.
+        """
+
+        if self._fence is None:
+            return True
+
+        start_time = time.time()
+        while True:
+            if timeout is None:
+                timeout_ns = self._pool.fence_timeout
+            else:
+                timeout_ns = max(0, int((timeout - (time.time() - start_time)) * 1e9))
+            status = GL.glClientWaitSync(self._fence, GL.GL_SYNC_FLUSH_COMMANDS_BIT, timeout_ns)
+            if status == GL.GL_ALREADY_SIGNALED:
+                break
+            elif status == GL.GL_CONDITION_SATISFIED:
+                self._pool.number_of_waits += 1
+                self._pool.wait_time += time.time() - start_time
+                break
+            elif status == GL.GL_WAIT_FAILED:
+                raise NameError("Failed to wait the fence")
+            # else GL_TIMEOUT_EXPIRED
+            if timeout is not None:
+                return False
+        self._delete_fence()
+
+        return True
+
+    ##############################################
+
+    def result(self, timeout=None):
+
+        """ Wait the readback and return the Numpy array mapped from the pack buffer. """
+
+        if self._pack_buffer is None:
+            raise NameError("The future is released")
+        if self._array is None:
+            if not self.wait(timeout):
+                raise NameError("Readback timeout expired")
+            array = self._pack_buffer.map_range(0, self.nbytes, GL.GL_MAP_READ_BIT)
+            if self._row_nbytes is not None:
+                # remove the row padding
+                height = self._shape[0]
+                pixel_nbytes = int(np.prod(self._shape[1:])) * self._dtype.itemsize
+                array = array.reshape(height, self._row_nbytes)[:,:pixel_nbytes]
+            self._array = array.view(self._dtype).reshape(self._shape)
+
+        return self._array
+
+    ##############################################
+
+    def release(self):
+
+        """ Unmap the pack buffer and return it to the pool. """
+
+        if self._pack_buffer is None:
+            return
+        if self._fence is not None:
+            self._delete_fence()
+        if self._pack_buffer.is_mapped:
+            self._pack_buffer.unmap()
+        self._array = None
+        self._pool._release(self._pack_buffer)
+        self._pack_buffer = None
+
+    ##############################################
+
+    def _discard(self):
+
+        """ Release the future without OpenGL call, e.g. from a finalizer.  The fence is enqueued in
+        the deletion queue and the pack buffer is unmapped by the pool when it is reused.
+        """
+
+        if self._fence is not None:
+            self._deletion_queue.enqueue('sync', self._fence)
+            self._fence = None
+        self._array = None
+        self._pool._release(self._pack_buffer)
+        self._pack_buffer = None
+
+####################################################################################################
+
+class GlReadbackPool(object):
+
+    """ This class implements a pool of pixel pack buffers for asynchronous readbacks.
+
+    At most *number_of_buffers* readbacks can be in flight, a readback raises a :exc:`NameError` if
+    all the buffers are used by unreleased futures.  If *pack_alignment* is given, the pool sets
+    ``GL_PACK_ALIGNMENT`` to this value for its reads, else the current value is queried, so as the
+    row padding always matches the layout written by the driver.
+
+    Public attributes:
+
+      number_of_reads
+
+      bytes_read
+
+      number_of_waits
+        number of results which waited the GPU
+
+      wait_time
+        cumulated time spent to wait the fences in second
+
+    """
+
+    _logger = _module_logger.getChild('GlReadbackPool')
+
+    ##############################################
+
+    def __init__(self, number_of_buffers=3, pack_alignment=None, fence_timeout=1000000000):
+
+        self.number_of_buffers = number_of_buffers
+        self.pack_alignment = pack_alignment
+        self.fence_timeout = fence_timeout # ns
+
+        self._free_buffers = []
+        self._number_of_created_buffers = 0
+
+        self.number_of_reads = 0
+        self.bytes_read = 0
+        self.number_of_waits = 0
+        self.wait_time = 0
+
+    ##############################################
+
+    @property
+    def number_in_flight(self):
+
+        return self._number_of_created_buffers - len(self._free_buffers)
+
+    ##############################################
+
+    def _acquire(self, nbytes):
+
+        """ Return a free pack buffer of at least *nbytes*. """
+
+        if self._free_buffers:
+            pack_buffer = self._free_buffers.pop()
+            # A discarded future doesn't unmap its buffer
+            if pack_buffer.is_mapped:
+                pack_buffer.unmap()
+        elif self._number_of_created_buffers < self.number_of_buffers:
+            pack_buffer = GlPixelPackBuffer()
+            self._number_of_created_buffers += 1
+        else:
+            raise NameError("All the pack buffers are in flight, release a future")
+        pack_buffer.reserve(nbytes)
+
+        self.number_of_reads += 1
+        self.bytes_read += nbytes
+
+        return pack_buffer
+
+    ##############################################
+
+    def _release(self, pack_buffer):
+
+        self._free_buffers.append(pack_buffer)
+
+    ##############################################
+
+    def read_pixels(self, x, y, width, height, format_=GL.GL_RGBA, type_=GL.GL_UNSIGNED_BYTE,
+                    frame_buffer=None, attachment=0):
+
+        """ Read a block of pixels of the bound read framebuffer, or the colour *attachment* of
+        *frame_buffer*, and return a :class:`GlReadbackFuture`.
+
+        The array of the result has the shape (height, width, components).  The read framebuffer
+        binding is restored after the read.
+        """
+
+        components, dtype = pixel_layout(format_, type_)
+        pixel_nbytes = components * dtype.itemsize
+        current_alignment = GL.glGetIntegerv(GL.GL_PACK_ALIGNMENT)
+        if self.pack_alignment is None:
+            alignment = current_alignment
+        else:
+            alignment = self.pack_alignment
+        row_nbytes = ((width * pixel_nbytes + alignment - 1) // alignment) * alignment
+        nbytes = row_nbytes * height
+        if row_nbytes == width * pixel_nbytes:
+            row_nbytes = None
+
+        pack_buffer = self._acquire(nbytes)
+        if frame_buffer is not None:
+            read_frame_buffer = GL.glGetIntegerv(GL.GL_READ_FRAMEBUFFER_BINDING)
+            GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, frame_buffer._gl_id)
+            if format_ not in (GL.GL_DEPTH_COMPONENT, GL.GL_STENCIL_INDEX):
+                GL.glReadBuffer(GL.GL_COLOR_ATTACHMENT0 + attachment)
+        pack_buffer.bind()
+        if alignment != current_alignment:
+            GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, alignment)
+        GL.glReadPixels(x, y, width, height, format_, type_, 0) # offset in the pack buffer
+        if alignment != current_alignment:
+            GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, current_alignment)
+        pack_buffer.unbind()
+        if frame_buffer is not None:
+            GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, read_frame_buffer)
+        fence = GL.glFenceSync(GL.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+
+        return GlReadbackFuture(self, pack_buffer, fence, nbytes, dtype, (height, width, components),
+                                row_nbytes)
+
+    ##############################################
+
+    def read_buffer(self, buffer_, offset=0, size=None):
+
+        """ Read a range of a :class:`GlBuffer` and return a :class:`GlReadbackFuture`.
+
+        The parameter offset and size lies in a linear array shape, by default the buffer is read up
+        to its end.
+        """
+
+        dtype = buffer_._dtype
+        if size is None:
+            size = buffer_.nbytes // dtype.itemsize - offset
+        nbytes = size * dtype.itemsize
+
+        pack_buffer = self._acquire(nbytes)
+        GL.glBindBuffer(GL.GL_COPY_READ_BUFFER, buffer_._gl_id)
+        GL.glBindBuffer(GL.GL_COPY_WRITE_BUFFER, pack_buffer._gl_id)
+        GL.glCopyBufferSubData(GL.GL_COPY_READ_BUFFER, GL.GL_COPY_WRITE_BUFFER,
+                               offset * dtype.itemsize, 0, nbytes)
+        GL.glBindBuffer(GL.GL_COPY_READ_BUFFER, 0)
+        GL.glBindBuffer(GL.GL_COPY_WRITE_BUFFER, 0)
+        fence = GL.glFenceSync(GL.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+
+        return GlReadbackFuture(self, pack_buffer, fence, nbytes, dtype, (size,))
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
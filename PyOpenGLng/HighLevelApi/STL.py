@@ -27,7 +27,7 @@ import numpy as np
 
 ####################################################################################################
 
-from .PrimitiveVertexArray import TriangleVertexArray
+from .PrimitiveVertexArray import TriangleVertexArray, IndexedTriangleVertexArray
 from PyOpenGLng.Tools.EnumFactory import EnumFactory
 
 ####################################################################################################
@@ -138,7 +138,13 @@ class StlParser(object):
 
     ##############################################
 
-    def to_vertex_array(self):
+    def to_vertex_array(self, indexed=False):
+
+        """ Return a vertex array, the vertexes are welded if *indexed* is set.
+
+        The vertexes are welded by position and normal, thus the facets of a flat shaded mesh share
+        few vertexes.
+        """
 
         # Fixme: here ?
 
@@ -146,7 +152,11 @@ class StlParser(object):
         self.colours = np.zeros((self.positions.shape[0], 4), dtype=np.float32)
         self.colours[...] = colour
 
-        return TriangleVertexArray((self.positions, self.normals, self.colours))
+        if indexed:
+            cls = IndexedTriangleVertexArray
+        else:
+            cls = TriangleVertexArray
+        return cls((self.positions, self.normals, self.colours))
 
 ####################################################################################################
 # 
@@ -39,12 +39,12 @@
 
 ####################################################################################################
 
+import six
 from six import with_metaclass
 
 ####################################################################################################
 
 import logging
-import os
 import re
 
 import numpy as np
@@ -53,6 +53,7 @@ import numpy as np
 
 from . import GL
 from . import Type as GlType
+from .GlslPreprocessor import glsl_preprocessor
 from ..Tools.AttributeDictionaryInterface import (AttributeDictionaryInterface, AttributeDictionaryInterfaceDescriptor)
 from ..Tools.Singleton import SingletonMetaClass
 
@@ -75,13 +76,16 @@ class GlShader(object):
 
           // #shader_type SHADER_TYPE
 
-    where *SHADER_TYPE* could be either *vertex*, *fragment* and *geometry*. It is case insensitive.
+    where *SHADER_TYPE* could be either *vertex*, *fragment*, *geometry* and *compute*. It is case
+    insensitive.
 
     Source files are preprocessed so as to replace line of the form::
 
       #include(file.glsl)
 
-    the path is relative to the parent source file.
+    the path is relative to the parent source file or to the include search path of the
+    *preprocessor*, by default the shared :class:`.GlslPreprocessor.GlslPreprocessor`.  The lines of
+    the compiler errors are reported in the original files.
     """
 
     _logger = _module_logger.getChild('GlShader')
@@ -95,29 +99,35 @@ class GlShader(object):
     VERTEX_SHADER = GL.GL_VERTEX_SHADER
     # TESSELATION_CONTROL_SHADER = GL.GL_TESS_CONTROL_SHADER
     # TESSELATION_EVALUATION_SHADER = GL.GL_TESS_EVALUATION_SHADER
+    COMPUTE_SHADER = getattr(GL, 'GL_COMPUTE_SHADER', None)
 
     SHADER_TYPES = (VERTEX_SHADER,
                     FRAGMENT_SHADER,
                     GEOMETRY_SHADER,
+                    COMPUTE_SHADER,
                     # TESSELATION_CONTROL_SHADER,
                     # TESSELATION_EVALUATION_SHADER,
                     )
 
     ##############################################
 
-    def __init__(self, shader_type=None, file_name=None, source_code=None):
+    def __init__(self, shader_type=None, file_name=None, source_code=None, preprocessor=None):
 
+        self._preprocessor = preprocessor
+        self._shader_type = None
         if shader_type is not None:
             self._set_shader_type(shader_type)
-        else:
-            self._shader_type = None
 
         self.clear_source()
         if source_code is not None:
             self.load_from_string(source_code)
+            if self._shader_type is None:
+                self._set_shader_type_from_source_code()
         elif file_name is not None:
             self.load_from_file(file_name)
 
+        if self._shader_type is None:
+            raise ValueError("Shader type is not defined")
         self._shader_id = GL.glCreateShader(self._shader_type)
 
     ##############################################
@@ -143,11 +153,18 @@ class GlShader(object):
 
     ##############################################
 
+    @property
+    def shader_type(self):
+        return self._shader_type
+
+    ##############################################
+
     def clear_source(self):
 
         """ Clear the internal source code buffer. """
 
         self._source = ''
+        self._glsl_source = None
         self._compiled = False
 
     ##############################################
@@ -158,7 +175,7 @@ class GlShader(object):
 
         if self._shader_type is not None:
             raise NameError("Shader type is already defined")
-        if shader_type not in self.SHADER_TYPES:
+        if shader_type is None or shader_type not in self.SHADER_TYPES:
             raise ValueError("Wrong shader type")
         self._shader_type = shader_type
 
@@ -187,58 +204,15 @@ class GlShader(object):
 
     ##############################################
 
-    def _preprocessor(self, source_code, path):
-
-        """ Preprocess the source code. """
-
-        # Fixme: remove commented lines!
-        include_start_pattern = '#include('
-        include_stop_pattern = ')'
-        current_position = 0
-        while True:
-            include_start_position = source_code.find(include_start_pattern, current_position)
-            if include_start_position >= 0:
-                include_stop_position = source_code.find(include_stop_pattern, include_start_position)
-                if include_stop_position:
-                    include_file_name = source_code[include_start_position + len(include_start_pattern):include_stop_position]
-                    self._logger.debug("Include GLSL file %s" % (include_file_name))
-                    # Fixme: implement -I like search path
-                    include_source_code = self._load_from_file(os.path.join(path, include_file_name))
-                    current_position = include_stop_position +1
-                    source_code = source_code[:include_start_position] \
-                        + '/* Begin include ' + include_file_name + ' */\n' \
-                        + include_source_code \
-                        + '/* End include ' + include_file_name + ' */\n' \
-                        + source_code[current_position:]
-                else:
-                    line_count = source_code.count('\n', end=include_start_position)
-                    raise ValueError("Malformed include at line %u" % (line_count))
-            else:
-                break
-
-        return source_code
-
-    ##############################################
-
-    def _load_from_file(self, file_name):
-
-        """ Load source code from file and preprocess it. """
-
-        with open(file_name, 'r') as f:
-            source_code = f.read()
-        source_code = self._preprocessor(source_code, path=os.path.dirname(file_name))
-
-        return source_code
-
-    ##############################################
-
     def load_from_file(self, file_name):
 
         """ Load the source code from the file given by *file_name*, preprocess it and append it to
         the internal buffer. The shader type is determined from the source.
         """
 
-        self.load_from_string(self._load_from_file(file_name))
+        preprocessor = self._preprocessor or glsl_preprocessor()
+        self._glsl_source = preprocessor.process_file(file_name)
+        self.load_from_string(self._glsl_source.source)
         self._set_shader_type_from_source_code()
 
     ##############################################
@@ -253,7 +227,13 @@ class GlShader(object):
         GL.glShaderSource(self._shader_id, self._source)
         GL.glCompileShader(self._shader_id)
 
-        log, length = GL.glGetShaderInfoLog(self._shader_id, 1000)
+        compiled = GL.glGetShaderiv(self._shader_id, GL.GL_COMPILE_STATUS)
+        # The log is read back only if it is used
+        if compiled and not self._logger.isEnabledFor(logging.DEBUG):
+            self._compiled = True
+            return
+
+        log, length = GL.glGetShaderInfoLog(self._shader_id)
         message = """
 Compile Shader:
   -----------------------------------------------------------------------------
@@ -268,7 +248,7 @@ Log:
 
         # Fixme: high level function
         # Fixme: shader doesn't have name
-        if not GL.glGetShaderiv(self._shader_id, GL.GL_COMPILE_STATUS):
+        if not compiled:
             source_lines = self._source.splitlines()
             last_line = len(source_lines) -1
             # Fixme: count digit of last_line
@@ -276,41 +256,50 @@ Log:
                             for location in range(last_line +1)]
             self._logger.info('Source:\n' + '\n'.join(source_lines))
             self._logger.error(log)
+            errors = []
             for line in log.splitlines():
-                ### From vispy
-                ### def _parse_error(self, error):
-                ###     # Nvidia
-                ###     # 0(7): error C1008: undefined variable "MV"
-                ###     m = re.match(r'(\d+)\((\d+)\)\s*:\s(.*)', error)
-                ###     if m:
-                ###         return int(m.group(2)), m.group(3)
-                ###     # ATI / Intel
-                ###     # ERROR: 0:131: '{' : syntax error parse error
-                ###     m = re.match(r'ERROR:\s(\d+):(\d+):\s(.*)', error)
-                ###     if m:
-                ###         return int(m.group(2)), m.group(3)
-                ###     # Nouveau
-                ###     # 0:28(16): error: syntax error, unexpected ')', expecting '('
-                ###     m = re.match(r'(\d+):(\d+)\((\d+)\):\s(.*)', error)
-                ###     if m:
-                ###         return int(m.group(2)), m.group(4)
-                ###     # Other ...
-                ####    return None, error
-                match = re.match(r'\d\((\d+)\) : error', line)
-                # intel: # 0:18(10): error: no precision specified this scope for type `vec4'
-                if match is not None:
-                    location = int(match.group(1))
-                    context_size = 1
-                    lower_location = max(0, location-context_size)
-                    upper_location = min(location+context_size, last_line)
-                    context_source_lines = source_lines[lower_location:upper_location +1]
-                    self._logger.error('\n' + line + '\n\n' + '\n'.join(context_source_lines))
-            raise ValueError('GLSL Compilation Error')
+                location = parse_compiler_log_line(line)
+                if location is not None:
+                    string_number, line_number, text = location
+                    if self._glsl_source is not None:
+                        file_name, line_number = self._glsl_source.map_line(string_number, line_number)
+                        context_source_lines = self._glsl_source.context(string_number, line_number)
+                    else:
+                        file_name = None
+                        context_source_lines = source_lines[max(0, line_number-2):line_number+1]
+                    error = '%s:%u: %s' % (file_name or '<string>', line_number, text)
+                    self._logger.error('\n' + error + '\n\n' + '\n'.join(context_source_lines))
+                    errors.append(error)
+            raise ValueError('\n'.join(['GLSL Compilation Error'] + errors))
 
         self._compiled = True
 
 ####################################################################################################
 
+#: Patterns of the compiler log lines, which give the source string number, the line and the message
+_compiler_log_patterns = (
+    # Mesa, Nouveau: 0:28(16): error: syntax error, unexpected ')', expecting '('
+    re.compile(r'^(\d+):(\d+)\(\d+\):\s*(.*)$'),
+    # Nvidia: 0(7) : error C1008: undefined variable "MV"
+    re.compile(r'^(\d+)\((\d+)\)\s*:\s*(.*)$'),
+    # ATI, Intel: ERROR: 0:131: '{' : syntax error parse error
+    re.compile(r'^(?:ERROR|WARNING):\s*(\d+):(\d+):\s*(.*)$'),
+    )
+
+def parse_compiler_log_line(line):
+
+    """ Return the tuple (*string_number*, *line*, *message*) of a compiler log line, or :obj:`None`
+    if the line doesn't match a known format.
+    """
+
+    for pattern in _compiler_log_patterns:
+        match = pattern.match(line.strip())
+        if match is not None:
+            return int(match.group(1)), int(match.group(2)), match.group(3)
+    return None
+
+####################################################################################################
+
 def sorted_by_location(a_list):
     return sorted(a_list, key=lambda a: a._location)
 
@@ -330,11 +319,15 @@ class GlVariable(object):
 
     def __init__(self, shader_program, name, location, gl_type, size,
                  within_uniform_block=False, offset=-1,
+                 array_stride=0, matrix_stride=0, is_row_major=False,
                  ):
 
         """ The argument *shader_program* is the :class:`GlShaderProgram` instance, *name* is the
         name of the uniform in the source code, *location* is the location of the uniform, *gl_type*
         the OpenGL data type and *size* is the number of elements of the uniform.
+
+        Within a uniform block, *offset*, *array_stride*, *matrix_stride* and *is_row_major* define
+        the layout of the uniform in byte.
         """
 
         self._shader_program = shader_program
@@ -344,6 +337,43 @@ class GlVariable(object):
         self._size = size
         self._within_uniform_block = within_uniform_block
         self._offset = offset
+        self._array_stride = array_stride
+        self._matrix_stride = matrix_stride
+        self._is_row_major = is_row_major
+
+    ##############################################
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def location(self):
+        return self._location
+
+    @property
+    def gl_type(self):
+        return self._gl_type
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def offset(self):
+        return self._offset
+
+    @property
+    def array_stride(self):
+        return self._array_stride
+
+    @property
+    def matrix_stride(self):
+        return self._matrix_stride
+
+    @property
+    def is_row_major(self):
+        return self._is_row_major
 
     ##############################################
 
@@ -518,12 +548,13 @@ class GlUniformBlock(AttributeDictionaryInterface):
 
     ##############################################
 
-    def __init__(self, name, location, uniforms):
+    def __init__(self, name, location, uniforms, data_size=0):
 
         super(GlUniformBlock, self).__init__()
 
         object.__setattr__(self, '_uniform_block_name', name)
         object.__setattr__(self, '_uniform_block_location', location)
+        object.__setattr__(self, '_uniform_block_data_size', data_size)
 
         for uniform in uniforms:
             self._dictionary[uniform._name] = uniform
@@ -542,6 +573,15 @@ class GlUniformBlock(AttributeDictionaryInterface):
 
     ##############################################
 
+    def uniform_block_data_size(self):
+
+        """ Return the size of the block data in byte, see :class:`.UniformBlock.UniformBlockLayout`.
+        """
+
+        return self._uniform_block_data_size
+
+    ##############################################
+
     def __str__(self):
 
         text = 'Uniform Block[%2u]: %s\n' % (self.uniform_block_location(), self.uniform_block_name())
@@ -573,6 +613,8 @@ class GlShaderProgramUniformBlocks(AttributeDictionaryInterface):
             # Fixme:
             if isinstance(indices, np.int32):
                 indices = (int(indices),)
+            data_size = GL.glGetActiveUniformBlockiv(program_id, uniform_block_location,
+                                                     GL.GL_UNIFORM_BLOCK_DATA_SIZE)
             uniforms = []
             for i in indices:
                 # Fixme: Mesa ?
@@ -580,11 +622,15 @@ class GlShaderProgramUniformBlocks(AttributeDictionaryInterface):
                     continue
 
                 name, length, size, gl_type_id = GL.glGetActiveUniform(program_id, i, 1000)
-                offset = GL.glGetActiveUniformsiv(program_id, i, GL.GL_UNIFORM_OFFSET)
+                layout = {}
+                for pname in ('offset', 'array_stride', 'matrix_stride', 'is_row_major'):
+                    value = GL.glGetActiveUniformsiv(program_id, i, getattr(GL, 'GL_UNIFORM_' + pname.upper()))
+                    layout[pname] = int(value)
                 gl_type = GlType.gl_types[gl_type_id]
 
-                if size > 1:
-                    raise NotImplementedError("Array uniform is not implemented")
+                # An array is named after its first element
+                if name.endswith('[0]'):
+                    name = name[:-3]
 
                 if isinstance(gl_type, GlType.GlVariableType):
                     cls = GlUniformVariable
@@ -597,10 +643,12 @@ class GlShaderProgramUniformBlocks(AttributeDictionaryInterface):
                 else:
                     raise NotImplementedError()
 
+                layout['is_row_major'] = bool(layout['is_row_major'])
                 instance = cls(shader_program, name, -1, gl_type, size,
-                               within_uniform_block= True, offset=offset)
+                               within_uniform_block= True, **layout)
                 uniforms.append(instance)
-            self._dictionary[uniform_block_name] = GlUniformBlock(uniform_block_name, uniform_block_location, uniforms)
+            self._dictionary[uniform_block_name] = GlUniformBlock(uniform_block_name, uniform_block_location,
+                                                                  uniforms, int(data_size))
 
 ####################################################################################################
 
@@ -647,6 +695,88 @@ class GlShaderProgramAttributes(AttributeDictionaryInterface):
 
 ####################################################################################################
 
+class GlTransformFeedbackVarying(GlVariable):
+
+    """ This class defines a varying captured by transform feedback, *location* is the index of the
+    varying and *offset* its offset in the interleaved vertex.
+    """
+
+    VARIABLE_LABEL = 'Varying'
+
+    ##############################################
+
+    @property
+    def dtype(self):
+
+        """ Return the Numpy field format (data type, shape) of the varying, a matrix is captured
+        column by column, thus a GLSL ``matCxR`` has the shape (C, R) of :class:`.Type.GlMatrixType`.
+        """
+
+        gl_type = self._gl_type
+        if isinstance(gl_type, GlType.GlVariableType):
+            shape = ()
+        else:
+            shape = tuple(gl_type.shape)
+        if self._size > 1:
+            shape = (self._size,) + shape
+
+        return np.dtype((gl_type.dtype, shape))
+
+####################################################################################################
+
+class GlShaderProgramTransformFeedbackVaryings(AttributeDictionaryInterface):
+
+    """ This class is a wrapper to access the transform feedback varyings of a shader program, they
+    are iterated in the capture order.
+
+    Public attributes:
+
+      interleaved
+        the varyings are captured in one buffer, else in one buffer per varying
+
+      dtype
+        Numpy structured data type of a captured vertex
+
+    """
+
+    ##############################################
+
+    def __init__(self, shader_program):
+
+        super(GlShaderProgramTransformFeedbackVaryings, self).__init__()
+
+        program_id = shader_program.program_id
+
+        buffer_mode = GL.glGetProgramiv(program_id, GL.GL_TRANSFORM_FEEDBACK_BUFFER_MODE)
+        interleaved = buffer_mode == GL.GL_INTERLEAVED_ATTRIBS
+
+        offset = 0
+        number_of_varyings = GL.glGetProgramiv(program_id, GL.GL_TRANSFORM_FEEDBACK_VARYINGS)
+        for i in range(number_of_varyings):
+            name, length, size, gl_type_id = GL.glGetTransformFeedbackVarying(program_id, i, 1000)
+            gl_type = GlType.gl_types[gl_type_id]
+            varying = GlTransformFeedbackVarying(shader_program, name, i, gl_type, size, offset=offset)
+            self._dictionary[name] = varying
+            if interleaved:
+                offset += varying.dtype.itemsize
+
+        object.__setattr__(self, 'interleaved', interleaved)
+        object.__setattr__(self, 'dtype', np.dtype([(varying.name, varying.dtype) for varying in self]))
+
+    ##############################################
+
+    def __len__(self):
+
+        return len(self._dictionary)
+
+    ##############################################
+
+    def __setattr__(self, name, value):
+
+        raise NotImplementedError()
+
+####################################################################################################
+
 class GlShaderProgramInterfaceUniformBlock(object):
 
     """ This class defines a programming interface for an uniform block as a pair (name,
@@ -751,6 +881,13 @@ class GlShaderProgram(object):
 
       shader_program.attributes.positions.bind_to_buffer(positions_vbo)
 
+    The varyings captured by transform feedback must be set before linking, see
+    :class:`.TransformFeedback.GlTransformFeedback`::
+
+      shader_program.set_transform_feedback_varyings(('gl_Position', 'colour'))
+      shader_program.link()
+      shader_program.transform_feedback_varyings.dtype
+
     """
 
     _logger = _module_logger.getChild('GlShaderProgram')
@@ -768,6 +905,7 @@ class GlShaderProgram(object):
         self.uniforms = None
         self.uniform_blocks = None
         self.attributes = None
+        self.transform_feedback_varyings = None
 
     ##############################################
 
@@ -795,8 +933,12 @@ class GlShaderProgram(object):
 
         GL.glLinkProgram(self.program_id)
 
-        length = GL.glGetProgramiv(self.program_id, GL.GL_INFO_LOG_LENGTH)
-        log, length = GL.glGetProgramInfoLog(self.program_id, length)
+        linked = GL.glGetProgramiv(self.program_id, GL.GL_LINK_STATUS)
+        if linked and not self._logger.isEnabledFor(logging.DEBUG):
+            self._init_linked_program()
+            return
+
+        log, length = GL.glGetProgramInfoLog(self.program_id)
         message = """
 Link program '%s'
 Log:
@@ -805,17 +947,67 @@ Log:
   -----------------------------------------------------------------------------
 """
         self._logger.debug(message % (self._name, log))
-        if not GL.glGetProgramiv(self.program_id, GL.GL_LINK_STATUS):
+        if not linked:
             raise ValueError("Failed to link program {}\n".format(self._name)
                              + log)
 
+        self._init_linked_program()
+
+    ##############################################
+
+    def _init_linked_program(self):
+
+        """ Reflect the interface of the linked program. """
+
         self._linked = True
 
         self.uniforms = GlShaderProgramUniforms(self)
         self.uniform_blocks = GlShaderProgramUniformBlocks(self)
         self.attributes = GlShaderProgramAttributes(self)
+        self.transform_feedback_varyings = GlShaderProgramTransformFeedbackVaryings(self)
 
-        self._logger.debug(str(self))
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(str(self))
+
+    ##############################################
+
+    def set_binary_retrievable(self):
+
+        """ Hint the driver that the binary will be retrieved, see :meth:`get_binary`.  The program
+        should not be linked.
+        """
+
+        GL.glProgramParameteri(self.program_id, GL.GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL.GL_TRUE)
+
+    ##############################################
+
+    def get_binary(self):
+
+        """ Return the pair (*binary_format*, *binary*) of the linked program, where *binary* is a
+        bytes string.
+        """
+
+        binary, length, binary_format = GL.glGetProgramBinary(self.program_id)
+
+        return int(binary_format), binary[:length].tobytes()
+
+    ##############################################
+
+    def load_binary(self, binary_format, binary):
+
+        """ Load a program binary returned by :meth:`get_binary` instead of linking the program.
+        Return :obj:`False` if the binary is rejected by the driver, the program must then be
+        linked from the sources.
+        """
+
+        GL.glProgramBinary(self.program_id, binary_format, np.frombuffer(binary, dtype=np.uint8))
+        if not GL.glGetProgramiv(self.program_id, GL.GL_LINK_STATUS):
+            self._logger.info("Program binary of %s is rejected" % (self._name))
+            return False
+
+        self._init_linked_program()
+
+        return True
 
     ##############################################
 
@@ -848,6 +1040,25 @@ Log:
 
     ##############################################
 
+    def set_transform_feedback_varyings(self, names, interleaved=True):
+
+        """ Set the varyings captured by transform feedback, in this order.  The varyings are
+        interleaved in one buffer or captured in one buffer per varying.  The program should not be
+        linked.
+        """
+
+        if self._linked:
+            raise NameError("Transform feedback varyings must be set before linking.")
+
+        if interleaved:
+            buffer_mode = GL.GL_INTERLEAVED_ATTRIBS
+        else:
+            buffer_mode = GL.GL_SEPARATE_ATTRIBS
+        # The wrapper passes a list of strings as bytes
+        GL.glTransformFeedbackVaryings(self.program_id, [six.b(name) for name in names], buffer_mode)
+
+    ##############################################
+
     def set_program_interface(self, program_interface):
 
         """ Set the programming interface. """
@@ -889,6 +1100,11 @@ Log:
         text += 'Attributes:\n'
         for attribute in sorted_by_location(self.attributes):
             text += ' - %s\n' % (attribute)
+        if len(self.transform_feedback_varyings):
+            text += '\n'
+            text += 'Transform Feedback Varyings:\n'
+            for varying in self.transform_feedback_varyings:
+                text += ' - %s\n' % (varying)
 
         return text
 
@@ -919,6 +1135,23 @@ class GlShaderManager(with_metaclass(SingletonMetaClass, object)):
 
         self._shaders = {}
         self._programs = {}
+        self._program_binary_cache = None
+
+    ##############################################
+
+    @property
+    def program_binary_cache(self):
+        return self._program_binary_cache
+
+    ##############################################
+
+    def set_program_binary_cache(self, program_binary_cache):
+
+        """ Set a :class:`.ProgramBinaryCache.GlProgramBinaryCache`, the shaders are then compiled
+        only if the binary of a program is not cached.
+        """
+
+        self._program_binary_cache = program_binary_cache
 
     ##############################################
 
@@ -953,14 +1186,16 @@ class GlShaderManager(with_metaclass(SingletonMetaClass, object)):
     def load_from_file(self, shader_name, shader_file_name):
 
         """ Load a shader from a source file and compile it. This shader is identified by
-        *shader_name*.
+        *shader_name*.  If a program binary cache is set, the shader is compiled when a program is
+        linked from it.
         """
 
         if shader_name in self:
             raise NameError("Shader %s is already defined" % (shader_name))
 
         shader = GlShader(file_name=shader_file_name)
-        shader.compile()
+        if self._program_binary_cache is None:
+            shader.compile()
         self._shaders[shader_name] = shader
 
         return shader
@@ -971,22 +1206,32 @@ class GlShaderManager(with_metaclass(SingletonMetaClass, object)):
                      program_interface=None,
                      shader_program_class=GlShaderProgram,
                      shader_program_args=(),
+                     transform_feedback_varyings=None,
                      ):
 
         """ Link a program with the given list of shader names. This program is identified by
-        *shader_name*.  The argument *program_interface* can be used to set the program interface.
+        *shader_name*.  The argument *program_interface* can be used to set the program interface
+        and *transform_feedback_varyings* the list of the interleaved varyings captured by transform
+        feedback.
         """
 
         if program_name in self:
             raise NameError("Program %s is already defined" % (program_name))
 
         shader_program = shader_program_class(program_name, *shader_program_args)
-        for shader_name in shader_list:
-            shader_program.attach_shader(self[shader_name])
-        # Fixme: move to link ?
-        if program_interface is not None:
-            shader_program.set_program_interface(program_interface)
-        shader_program.link()
+        shaders = [self[shader_name] for shader_name in shader_list]
+        if self._program_binary_cache is not None:
+            self._program_binary_cache.link_program(shader_program, shaders, program_interface,
+                                                    transform_feedback_varyings)
+        else:
+            for shader in shaders:
+                shader_program.attach_shader(shader)
+            # Fixme: move to link ?
+            if program_interface is not None:
+                shader_program.set_program_interface(program_interface)
+            if transform_feedback_varyings is not None:
+                shader_program.set_transform_feedback_varyings(transform_feedback_varyings)
+            shader_program.link()
         if program_interface is not None:
             shader_program.set_uniform_block_bindings()
         self._programs[program_name] = shader_program
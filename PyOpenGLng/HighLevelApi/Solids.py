@@ -26,7 +26,7 @@ import numpy as np
 
 ####################################################################################################
 
-from .PrimitiveVertexArray import TriangleVertexArray
+from .PrimitiveVertexArray import TriangleVertexArray, IndexedTriangleVertexArray
 
 ####################################################################################################
 
@@ -54,7 +54,8 @@ def compute_normals(positions):
     normals = np.cross(vector1, vector2, axisa=-1, axisb=-1, axisc=-1)
     normals /= norm(normals)
 
-    return normals
+    # one normal per vertex
+    return np.repeat(normals, 3, axis=0)
 
 ####################################################################################################
 
@@ -106,7 +107,16 @@ def unit_cube():
 
 ####################################################################################################
 
-def cube(width, height, depth):
+def _vertex_array(positions, normals, colours, indexed):
+
+    if indexed:
+        return IndexedTriangleVertexArray((positions, normals, colours))
+    else:
+        return TriangleVertexArray((positions, normals, colours))
+
+####################################################################################################
+
+def cube(width, height, depth, indexed=False):
 
     # Fixme: scale!
 
@@ -137,7 +147,7 @@ def cube(width, height, depth):
         colour8, colour4, colour6], # near
                          dtype=np.float32)
 
-    return TriangleVertexArray((positions, normals, colours))
+    return _vertex_array(positions, normals, colours, indexed)
 
 ####################################################################################################
 
@@ -192,7 +202,7 @@ def unit_sphere():
 
 ####################################################################################################
 
-def sphere(radius):
+def sphere(radius, indexed=False):
 
     # Fixme: scale!
 
@@ -202,7 +212,7 @@ def sphere(radius):
     colours = np.zeros((positions.shape[0], 4), dtype=np.float32)
     colours[...] = colour
 
-    return TriangleVertexArray((positions, normals, colours))
+    return _vertex_array(positions, normals, colours, indexed)
 
 ####################################################################################################
 
@@ -247,7 +257,7 @@ def unit_torus():
 
 ####################################################################################################
 
-def torus(radius):
+def torus(radius, indexed=False):
 
     # Fixme: scale!
 
@@ -257,7 +267,7 @@ def torus(radius):
     colours = np.zeros((positions.shape[0], 4), dtype=np.float32)
     colours[...] = colour
 
-    return TriangleVertexArray((positions, normals, colours))
+    return _vertex_array(positions, normals, colours, indexed)
 
 ####################################################################################################
 #
@@ -0,0 +1,223 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+
+""" This module implements the drawing of the images of a texture array pool with one call.
+
+A :class:`GlSpriteBatch` draws textured quads, the sprites, whose images are stored in a
+:class:`.TextureArrayPool.GlTextureArrayPool`.  A sprite is an instance of a unit quad, which has
+the per-instance attributes *rectangle*, *uv_rectangle* and *layer*, thus all the sprites are drawn
+with one ``glDrawArraysInstanced`` call and one texture binding::
+
+  batch = GlSpriteBatch(pool)
+  for region, position in zip(regions, positions):
+      batch.add(region, position)
+  batch.bind_to_shader(sprite_shader_program_interface.attributes)
+  batch.draw()
+
+The vertex shader must declare ``in vec2 corner`` for the unit quad and compute the position and the
+texture coordinates of a corner from the per-instance attributes, the fragment shader samples a
+``sampler2DArray``.
+
+"""
+
+####################################################################################################
+
+import logging
+
+import numpy as np
+
+####################################################################################################
+
+from . import GL
+from .VertexArrayObject import GlVertexArrayObject
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+class GlSpriteBatch(GlVertexArrayObject):
+
+    """ This class draws the images of a pool as instanced quads.
+
+    Public attributes:
+
+      number_of_sprites
+
+    """
+
+    _logger = _module_logger.getChild('GlSpriteBatch')
+
+    #: Per-instance vertex format
+    __instance_dtype__ = np.dtype([('rectangle', np.float32, 4), # x, y, width, height
+                                   ('uv_rectangle', np.float32, 4), # u min, v min, u max, v max
+                                   ('layer', np.float32), # a float is sampled by a sampler2DArray
+                                  ])
+
+    ##############################################
+
+    def __init__(self, pool, buffer_heap=None):
+
+        super(GlSpriteBatch, self).__init__(buffer_heap)
+
+        self._pool = pool
+        self._shader_program_interface = None
+
+        # Unit quad drawn as a triangle strip
+        corners = np.zeros(4, dtype=[('corner', np.float32, 2)])
+        corners['corner'] = ((0, 0), (1, 0), (0, 1), (1, 1))
+        self._corner_buffer = self._create_buffer(corners)
+        self._instance_buffer = self._create_buffer()
+
+        self._instances = np.zeros(16, dtype=self.__instance_dtype__)
+        self.number_of_sprites = 0
+        self._dirty = False
+
+    ##############################################
+
+    @property
+    def pool(self):
+        return self._pool
+
+    ##############################################
+
+    def __len__(self):
+
+        return self.number_of_sprites
+
+    ##############################################
+
+    def clear(self):
+
+        """ Remove all the sprites. """
+
+        self.number_of_sprites = 0
+        self._dirty = True
+
+    ##############################################
+
+    def _reserve(self, number_of_sprites):
+
+        if number_of_sprites > self._instances.shape[0]:
+            instances = np.zeros(max(number_of_sprites, 2 * self._instances.shape[0]),
+                                 dtype=self.__instance_dtype__)
+            instances[:self.number_of_sprites] = self._instances[:self.number_of_sprites]
+            self._instances = instances
+
+    ##############################################
+
+    def add(self, region, position, dimension=None):
+
+        """ Add a sprite for a :class:`.TextureArrayPool.GlTextureArrayRegion` and return its index.
+
+        The sprite is drawn in the rectangle defined by its base *position* and its *dimension*,
+        by default the dimension of the image in texel.
+        """
+
+        index = self.number_of_sprites
+        self._reserve(index + 1)
+        self.number_of_sprites += 1
+        self.move(index, position, dimension, region)
+
+        return index
+
+    ##############################################
+
+    def move(self, index, position, dimension=None, region=None):
+
+        """ Move the sprite *index*, and change its image if *region* is given. """
+
+        if not 0 <= index < self.number_of_sprites:
+            raise ValueError("Sprite %u doesn't exist" % index)
+        instance = self._instances[index]
+        if region is not None:
+            instance['uv_rectangle'] = region.uv_rectangle
+            instance['layer'] = region.layer
+            if dimension is None:
+                dimension = region.width, region.height
+        elif dimension is None:
+            dimension = instance['rectangle'][2:]
+        instance['rectangle'] = position[0], position[1], dimension[0], dimension[1]
+        self._dirty = True
+
+    ##############################################
+
+    def set(self, regions, rectangles):
+
+        """ Set the sprites from a list of regions and an array of rectangles (x, y, width, height)
+        of shape (N, 4).
+        """
+
+        number_of_sprites = len(regions)
+        self.number_of_sprites = 0
+        self._reserve(number_of_sprites)
+        instances = self._instances[:number_of_sprites]
+        instances['rectangle'] = rectangles
+        instances['uv_rectangle'] = [region.uv_rectangle for region in regions]
+        instances['layer'] = [region.layer for region in regions]
+        self.number_of_sprites = number_of_sprites
+        self._dirty = True
+
+    ##############################################
+
+    def bind_to_shader(self, shader_program_interface):
+
+        """ Bind the unit quad to the attribute *corner* and the sprites to the attributes
+        *rectangle*, *uv_rectangle* and *layer*.
+        """
+
+        self._shader_program_interface = shader_program_interface
+        self.bind_buffer(self._corner_buffer, shader_program_interface)
+        if self._instance_buffer.attribute_formats:
+            self.bind_buffer(self._instance_buffer, shader_program_interface, divisor=1)
+
+    ##############################################
+
+    def _upload(self):
+
+        self._instance_buffer.set(self._instances[:self.number_of_sprites])
+        self._dirty = False
+        # The buffer could have moved in the heap
+        if self._shader_program_interface is not None:
+            self.bind_buffer(self._instance_buffer, self._shader_program_interface, divisor=1)
+
+    ##############################################
+
+    def draw(self, texture_unit=0):
+
+        """ Draw the sprites with one call, the pool is bound to *texture_unit*. """
+
+        if self._dirty and self.number_of_sprites:
+            self._upload()
+        if not self.number_of_sprites:
+            return
+        self._pool.bind(texture_unit)
+        self.bind()
+        GL.glDrawArraysInstanced(GL.GL_TRIANGLE_STRIP, 0, 4, self.number_of_sprites)
+        self.unbind()
+        self._pool.unbind(texture_unit)
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
@@ -27,6 +27,8 @@ import numpy as np
 ####################################################################################################
 
 from . import GL
+from .DeletionQueue import deletion_queue
+from .Texture import create_texture, set_texture_parameters
 
 ####################################################################################################
 
@@ -47,7 +49,7 @@ class GlStippleTexture(object):
 
     def __del__(self):
 
-        GL.glDeleteTextures([self._gl_textures_id])
+        self._deletion_queue.enqueue('texture', self._gl_textures_id)
 
     ##############################################
 
@@ -73,14 +75,13 @@ class GlStippleTexture(object):
 
         """ Create the texture. """
 
-        self._gl_textures_id = GL.glGenTextures(1)
-
-        self.bind()
-
-        GL.glTexParameteri(GL.GL_TEXTURE_1D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_NEAREST) # ?
-        GL.glTexParameteri(GL.GL_TEXTURE_1D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_NEAREST) # ?
-
-        self.unbind()
+        self._deletion_queue = deletion_queue()
+        self._gl_textures_id = create_texture(GL.GL_TEXTURE_1D, self, self._deletion_queue)
+        set_texture_parameters(self._gl_textures_id,
+                               [(GL.GL_TEXTURE_MAG_FILTER, GL.GL_NEAREST), # ?
+                                (GL.GL_TEXTURE_MIN_FILTER, GL.GL_NEAREST), # ?
+                               ],
+                               GL.GL_TEXTURE_1D)
 
     ##############################################
 
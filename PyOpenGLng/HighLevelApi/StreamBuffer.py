@@ -0,0 +1,328 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+""" This module implements a ring buffer to stream per-frame dynamic geometry.
+
+A :class:`GlStreamBuffer` splits one buffer object in several regions, by default three, and each
+frame allocates its data in the next region.  The regions are protected from being overwritten
+while the GPU uses them:
+
+* if the buffer is persistent, the storage is mapped once and the allocations are written directly
+  to the GPU visible memory, a fence is inserted at the end of each frame and waited before the
+  region is reused,
+* else the allocations are staged in a Numpy array and uploaded by :meth:`GlStreamBuffer.flush`,
+  the buffer is orphaned each time the ring wraps around so as the driver can allocate a new store
+  instead of waiting the GPU.
+
+The usual programming flow is::
+
+  stream_buffer = GlStreamBuffer(region_nbytes=1024**2)
+
+  stream_buffer.begin_frame()
+  vertexes = stream_buffer.allocate((number_of_vertexes, 2), np.float32)
+  vertexes.array[...] = ...
+  stream_buffer.flush()
+  shader_program_interface.position.bind_to_buffer(vertexes)
+  GL.glDrawArrays(...)
+  stream_buffer.end_frame()
+
+"""
+
+####################################################################################################
+
+import logging
+import time
+
+import numpy as np
+
+####################################################################################################
+
+from . import GL
+from .Buffer import GlBuffer, GlVertexBufferMixin, has_buffer_storage, vertex_attribute_formats
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+class GlStreamAllocation(GlVertexBufferMixin):
+
+    """ This class represents an allocation in a stream buffer.
+
+    Public attributes:
+
+      array
+        Numpy array of the allocated range, it must not be used after the end of the frame
+
+      offset
+        offset of the allocation in the buffer in byte
+
+    An allocation can be bound to vertex attributes like a :class:`GlArrayBuffer`, the array can
+    be structured.
+    """
+
+    _logger = _module_logger.getChild('GlStreamAllocation')
+
+    ##############################################
+
+    def __init__(self, stream_buffer, offset, array, vertex_format=None):
+
+        self.stream_buffer = stream_buffer
+        self.offset = offset
+        self.array = array
+        self._attribute_formats, self._stride = vertex_attribute_formats(array.dtype, array.shape,
+                                                                         vertex_format)
+
+    ##############################################
+
+    @property
+    def nbytes(self):
+        return self.array.nbytes
+
+    ##############################################
+
+    def _vertex_buffer(self):
+
+        return self.stream_buffer._gl_id, self.offset
+
+####################################################################################################
+
+class GlStreamBuffer(GlBuffer):
+
+    """ This class implements a ring buffer for streaming.
+
+    The buffer is made of *number_of_regions* regions of *region_nbytes* bytes, a frame cannot
+    allocate more than a region.  The allocation offsets are aligned to *alignment* bytes.
+
+    If *persistent* is set and the context supports the immutable buffer storage, i.e. OpenGL 4.4 or
+    ARB_buffer_storage, the buffer is mapped persistently, else it is orphaned.
+
+    Public attributes:
+
+      number_of_frames
+
+      number_of_allocations
+
+      number_of_waits
+        number of frames which waited a fence
+
+      wait_time
+        cumulated time spent to wait the fences in second
+
+      number_of_orphans
+
+      bytes_allocated
+
+    """
+
+    _logger = _module_logger.getChild('GlStreamBuffer')
+
+    ##############################################
+
+    def __init__(self, region_nbytes, number_of_regions=3, target=GL.GL_ARRAY_BUFFER,
+                 persistent=True, alignment=16, fence_timeout=1000000000):
+
+        super(GlStreamBuffer, self).__init__()
+
+        self._target = target
+        self.alignment = alignment
+        self.region_nbytes = self._align(region_nbytes, alignment)
+        self.number_of_regions = number_of_regions
+        self.nbytes = self.region_nbytes * number_of_regions
+        self.persistent = persistent and has_buffer_storage()
+        self._fence_timeout = fence_timeout # ns
+
+        self._fences = [None]*number_of_regions
+        self._region = -1
+        self._region_offset = 0
+        self._head = 0
+        self._flushed_head = 0
+        self._in_frame = False
+
+        self.number_of_frames = 0
+        self.number_of_allocations = 0
+        self.number_of_waits = 0
+        self.wait_time = 0
+        self.number_of_orphans = 0
+        self.bytes_allocated = 0
+
+        self.bind()
+        if self.persistent:
+            self._storage_flags = GL.GL_MAP_WRITE_BIT | GL.GL_MAP_PERSISTENT_BIT | GL.GL_MAP_COHERENT_BIT
+            GL.glBufferStorage(self._target, self.nbytes, self._storage_flags) # size of the data
+            self._mapped_array = GL.glMapBufferRange(self._target, 0, self.nbytes, self._storage_flags)
+            if self._mapped_array is None:
+                raise NameError("Failed to map the stream buffer")
+            self._array = self._mapped_array
+        else:
+            GL.glBufferData(self._target, self.nbytes, GL.GL_STREAM_DRAW)
+            self._array = np.zeros(self.nbytes, dtype=np.uint8)
+        self.unbind()
+
+    ##############################################
+
+    def __del__(self):
+
+        for fence in self._fences:
+            if fence is not None:
+                self._deletion_queue.enqueue('sync', fence)
+        # The deletion of the buffer unmaps it
+        self._mapped_array = None
+        self._array = None
+        super(GlStreamBuffer, self).__del__()
+
+    ##############################################
+
+    @staticmethod
+    def _align(offset, alignment):
+
+        return ((offset + alignment - 1) // alignment) * alignment
+
+    ##############################################
+
+    def _wait_fence(self, fence):
+
+        """ Wait the GPU has completed the commands before the fence. """
+
+        start_time = time.time()
+        waited = False
+        while True:
+            status = GL.glClientWaitSync(fence, GL.GL_SYNC_FLUSH_COMMANDS_BIT, self._fence_timeout)
+            if status == GL.GL_ALREADY_SIGNALED:
+                break
+            elif status == GL.GL_CONDITION_SATISFIED:
+                waited = True
+                break
+            elif status == GL.GL_WAIT_FAILED:
+                raise NameError("Failed to wait the fence")
+            # else GL_TIMEOUT_EXPIRED
+            waited = True
+            self._logger.warning("Fence timeout expired")
+        GL.glDeleteSync(fence)
+        if waited:
+            self.number_of_waits += 1
+            self.wait_time += time.time() - start_time
+
+    ##############################################
+
+    def begin_frame(self):
+
+        """ Begin a frame, the allocations are done in the next region of the ring. """
+
+        if self._in_frame:
+            raise NameError("A frame is already begun")
+
+        self._region = (self._region + 1) % self.number_of_regions
+        fence = self._fences[self._region]
+        if fence is not None:
+            self._fences[self._region] = None
+            self._wait_fence(fence)
+        if not self.persistent and self._region == 0 and self.number_of_frames:
+            # Orphan the store, the driver allocates a new one if the GPU still use it
+            self.bind()
+            GL.glBufferData(self._target, self.nbytes, GL.GL_STREAM_DRAW)
+            self.unbind()
+            self.number_of_orphans += 1
+
+        self._region_offset = self._region * self.region_nbytes
+        self._head = 0
+        self._flushed_head = 0
+        self._in_frame = True
+        self.number_of_frames += 1
+
+    ##############################################
+
+    def allocate(self, shape, dtype=np.float32, alignment=None, vertex_format=None):
+
+        """ Allocate an array of the given shape and data type in the current frame and return a
+        :class:`GlStreamAllocation`.  The normalized and packed attributes are given by
+        *vertex_format*, see :mod:`.VertexFormat`.
+        """
+
+        if not self._in_frame:
+            raise NameError("No frame is begun")
+        if alignment is None:
+            alignment = self.alignment
+
+        dtype = np.dtype(dtype)
+        if isinstance(shape, int):
+            shape = (shape,)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        offset = self._align(self._head, alignment)
+        if offset + nbytes > self.region_nbytes:
+            raise ValueError("Allocation of %u bytes exceeds the region size of %u bytes" %
+                             (nbytes, self.region_nbytes))
+        self._head = offset + nbytes
+        self.number_of_allocations += 1
+        self.bytes_allocated += nbytes
+
+        offset += self._region_offset
+        array = self._array[offset:offset + nbytes].view(dtype).reshape(shape)
+
+        return GlStreamAllocation(self, offset, array, vertex_format)
+
+    ##############################################
+
+    def write(self, data, alignment=None, vertex_format=None):
+
+        """ Allocate a copy of the Numpy array *data* in the current frame and return a
+        :class:`GlStreamAllocation`.
+        """
+
+        allocation = self.allocate(data.shape, data.dtype, alignment, vertex_format)
+        allocation.array[...] = data
+        return allocation
+
+    ##############################################
+
+    def flush(self):
+
+        """ Make the allocations visible to the GPU, it must be called before the draw commands.  It
+        is a no-op for a persistent buffer since it is coherent.
+        """
+
+        if not self.persistent and self._head > self._flushed_head:
+            start = self._region_offset + self._flushed_head
+            stop = self._region_offset + self._head
+            self.bind()
+            GL.glBufferSubData(self._target, start, self._array[start:stop])
+            self.unbind()
+        self._flushed_head = self._head
+
+    ##############################################
+
+    def end_frame(self):
+
+        """ End the frame, it must be called after the draw commands which use the allocations. """
+
+        if not self._in_frame:
+            raise NameError("No frame is begun")
+
+        self.flush()
+        if self.persistent:
+            self._fences[self._region] = GL.glFenceSync(GL.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        self._in_frame = False
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
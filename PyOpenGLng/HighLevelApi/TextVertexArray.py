@@ -52,9 +52,23 @@ _module_logger = logging.getLogger(__name__)
 
 ####################################################################################################
 
+#: Vertex layout, the field names are the attribute names of the shader
+text_vertex_dtype = np.dtype([
+    ('position', np.float32, (4,)),
+    ('glyph_size', np.float32, (2,)),
+    ('position_uv', np.float32, (2,)),
+    ('colour', np.float32, (4,)),
+    ])
+
+####################################################################################################
+
 class TextVertexArray(GlVertexArrayObject):
 
-    """ This class wraps a Text Vertex Array. """
+    """ This class wraps a Text Vertex Array.
+
+    If a :class:`GlStreamBuffer` is given, the vertexes are uploaded to it instead of new buffers,
+    the method :meth:`upload` must then be called within a frame of the stream buffer.
+    """
 
     _logger = _module_logger.getChild('TextVertexArray')
 
@@ -62,26 +76,24 @@ class TextVertexArray(GlVertexArrayObject):
 
     ##############################################
     
-    def __init__(self, image_texture):
+    def __init__(self, image_texture, stream_buffer=None):
 
         super(TextVertexArray, self).__init__()
 
+        self._stream_buffer = stream_buffer
+        self._shader_program_interface = None
+
         self._image_texture = image_texture # Fixme: could contains several font and size
         self._font_atlas_shape = image_texture.shape
 
         self._number_of_vertexes = 0
-        self._vertexes, self._glyph_sizes, self._texture_coordinates, self._colours = self._create_arrays(0)
+        self._vertexes = self._create_array(0)
 
     ##############################################
     
-    def _create_arrays(self, number_of_vertexes):
+    def _create_array(self, number_of_vertexes):
 
-        vertexes = np.zeros((number_of_vertexes, 4), dtype=np.float32)
-        glyph_sizes = np.zeros((number_of_vertexes, 2), dtype=np.float32)
-        texture_coordinates = np.zeros((number_of_vertexes, 2), dtype=np.float32)
-        colours = np.zeros((number_of_vertexes, 4), dtype=np.float32)
-
-        return vertexes, glyph_sizes, texture_coordinates, colours
+        return np.zeros(number_of_vertexes, dtype=text_vertex_dtype)
 
     ##############################################
     
@@ -100,7 +112,11 @@ class TextVertexArray(GlVertexArrayObject):
 
         number_of_glyphs = len(text)
         number_of_vertexes = number_of_glyphs
-        vertexes, glyph_sizes, texture_coordinates, colours = self._create_arrays(number_of_vertexes)
+        array = self._create_array(number_of_vertexes)
+        vertexes = array['position']
+        glyph_sizes = array['glyph_size']
+        texture_coordinates = array['position_uv']
+        colours = array['colour']
 
         pen = [x, y]
         prev = None
@@ -151,11 +167,16 @@ class TextVertexArray(GlVertexArrayObject):
 
         # Concatenate the vertexes
         self._number_of_vertexes += number_of_vertexes
-        self._vertexes = np.concatenate((self._vertexes, vertexes))
-        self._glyph_sizes = np.concatenate((self._glyph_sizes, glyph_sizes))
-        self._texture_coordinates = np.concatenate((self._texture_coordinates, texture_coordinates))
-        # self._horizontal_offsets = np.concatenate((self._horizontal_offsets, horizontal_offsets))
-        self._colours = np.concatenate((self._colours, colours))
+        self._vertexes = np.concatenate((self._vertexes, array))
+
+    ##############################################
+    
+    def clear(self):
+
+        """ Remove the texts, e.g. to rebuild them at each frame. """
+
+        self._number_of_vertexes = 0
+        self._vertexes = self._create_array(0)
 
     ##############################################
     
@@ -168,29 +189,28 @@ class TextVertexArray(GlVertexArrayObject):
     
     def upload(self):
 
-        # Create VBO
+        if self._stream_buffer is not None:
+            self._vertexes_vbo = self._stream_buffer.write(self._vertexes)
+            if self._shader_program_interface is not None:
+                self.bind_to_shader(self._shader_program_interface)
+            return
+
+        # Create VBO, the attributes are interleaved
         # self._logger.debug(str(self._vertexes))
         self._vertexes_vbo = GlArrayBuffer(self._vertexes)
-        self._glyph_sizes_vbo = GlArrayBuffer(self._glyph_sizes)
-        self._texture_coordinates_vbo = GlArrayBuffer(self._texture_coordinates)
-        self._colours_vbo = GlArrayBuffer(self._colours)
 
     ##############################################
     
     def bind_to_shader(self, shader_program_interface):
 
-        self.bind()
+        self._shader_program_interface = shader_program_interface
 
-        shader_program_interface.position.bind_to_buffer(self._vertexes_vbo) # self._vertex_vbo
-        shader_program_interface.glyph_size.bind_to_buffer(self._glyph_sizes_vbo)
-        shader_program_interface.position_uv.bind_to_buffer(self._texture_coordinates_vbo) # self._uv_vbo
-        shader_program_interface.colour.bind_to_buffer(self._colours_vbo)
+        # position, glyph_size, position_uv and colour
+        self.bind_buffer(self._vertexes_vbo, shader_program_interface)
 
         # Texture unit as default
         # shader_program.uniforms.texture0 = 0
 
-        self.unbind()
-
     ##############################################
     
     def draw(self, shader_program):
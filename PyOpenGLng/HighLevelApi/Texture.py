@@ -0,0 +1,616 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+""" This module provides the functions to create and set up the texture objects.
+
+A texture is bound to the texture unit 0 so as to set it up.
+
+A :class:`GlTexture2D` has an immutable storage allocated by ``glTexStorage2D``, which is updated in
+place by ``glTexSubImage2D``.  For a video stream, the updates can be staged through a ring of pixel
+unpack buffers, so as the transfer to the texture overlaps the next frame::
+
+  texture = GlTexture2D(number_of_unpack_buffers=2)
+  texture.set(first_frame)
+  for frame in frames:
+      texture.update(frame)
+      draw()
+
+A :class:`GlTexture2DArray` is a stack of layers of the same size, see
+:class:`.TextureArrayPool.GlTextureArrayPool`.
+
+"""
+
+####################################################################################################
+
+import logging
+
+import numpy as np
+
+####################################################################################################
+
+from . import GL
+from .Buffer import GlBuffer, _is_supported
+from .DeletionQueue import deletion_queue
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+_has_texture_storage = None
+
+def has_texture_storage():
+
+    """ Test if the immutable texture storage is supported, i.e. OpenGL 4.2 or ARB_texture_storage.
+    """
+
+    global _has_texture_storage
+    if _has_texture_storage is None:
+        _has_texture_storage = _is_supported('glTexStorage2D', (4, 2), b'GL_ARB_texture_storage')
+    return _has_texture_storage
+
+####################################################################################################
+
+#: Pixel format name of the number of planes
+__plane_formats__ = {1:'RED', 2:'RG', 3:'RGB', 4:'RGBA'}
+
+#: Internal format prefix of the number of planes
+__internal_format_prefixes__ = {1:'R', 2:'RG', 3:'RGB', 4:'RGBA'}
+
+#: Pixel type, normalized and integer internal format suffixes of the image data types
+__image_types__ = {
+    np.dtype(np.uint8):(GL.GL_UNSIGNED_BYTE, '8', '8UI'),
+    np.dtype(np.int8):(GL.GL_BYTE, '8_SNORM', '8I'),
+    np.dtype(np.uint16):(GL.GL_UNSIGNED_SHORT, '16', '16UI'),
+    np.dtype(np.int16):(GL.GL_SHORT, '16_SNORM', '16I'),
+    np.dtype(np.float16):(GL.GL_HALF_FLOAT, '16F', None),
+    np.dtype(np.float32):(GL.GL_FLOAT, '32F', None),
+    }
+
+def texture_format(image, integer_internal_format=False):
+
+    """ Return the internal format, the pixel format and the pixel type of an image.
+
+    The parameter *image* is a Numpy array of shape (height, width) or (height, width, planes),
+    with up to 4 interleaved planes.  The flag *integer_internal_format* specifies if the texture
+    uses an integer internal format.
+    """
+
+    if image.ndim == 2:
+        number_of_planes = 1
+    elif image.ndim == 3:
+        number_of_planes = image.shape[2]
+    else:
+        raise ValueError("Image dimension %u is not supported" % (image.ndim))
+    if number_of_planes not in __plane_formats__:
+        raise ValueError("Image number of planes %s is not supported" % (number_of_planes))
+    try:
+        data_type, normalized_suffix, integer_suffix = __image_types__[image.dtype]
+    except KeyError:
+        raise ValueError("Image data type %s is not supported" % (str(image.dtype)))
+
+    format_name = 'GL_' + __plane_formats__[number_of_planes]
+    if integer_internal_format:
+        if integer_suffix is None:
+            raise ValueError("Image data type %s has no integer format" % (str(image.dtype)))
+        format_name += '_INTEGER'
+        suffix = integer_suffix
+    else:
+        suffix = normalized_suffix
+    internal_format = getattr(GL, 'GL_' + __internal_format_prefixes__[number_of_planes] + suffix)
+
+    return internal_format, getattr(GL, format_name), data_type
+
+####################################################################################################
+
+def create_texture(target=GL.GL_TEXTURE_2D, owner=None, queue=None):
+
+    """ Create a texture name for *target* and register it in the deletion queue *queue*, by
+    default the current one, on behalf of *owner*.
+    """
+
+    texture_id = GL.glGenTextures(1)
+    if queue is None:
+        queue = deletion_queue()
+    queue.register('texture', texture_id, owner)
+
+    return texture_id
+
+####################################################################################################
+
+def set_texture_parameters(texture_id, parameters, target=GL.GL_TEXTURE_2D):
+
+    """ Set the integer parameters of a texture, *parameters* is a list of pairs (name, value). """
+
+    GL.glActiveTexture(GL.GL_TEXTURE0)
+    GL.glBindTexture(target, texture_id)
+    for name, value in parameters:
+        GL.glTexParameteri(target, name, value)
+    GL.glBindTexture(target, 0)
+
+####################################################################################################
+
+class GlPixelUnpackBuffer(GlBuffer):
+
+    """ This class wraps an OpenGl Pixel Unpack Buffer, i.e. the data source of a texture upload.
+    """
+
+    _target = GL.GL_PIXEL_UNPACK_BUFFER
+
+    _logger = _module_logger.getChild('GlPixelUnpackBuffer')
+
+    ##############################################
+
+    def set(self, data, usage=GL.GL_STREAM_DRAW):
+
+        """ Set the data, the previous data store is orphaned, thus the call doesn't wait a pending
+        transfer from this buffer.
+        """
+
+        self._set(data, usage)
+
+####################################################################################################
+
+class GlTexture2D(object):
+
+    """ This class wraps a 2D texture with an immutable storage.
+
+    The parameter *parameters* is a list of pairs (name, value) which are passed to
+    ``glTexParameteri``.  If *number_of_unpack_buffers* is not null, the updates are staged in a
+    ring of pixel unpack buffers.
+
+    The storage is allocated by :meth:`set` for the shape and the format of the image.  Since it is
+    immutable, a new texture name is created when they change.  If the immutable storage is not
+    supported, :meth:`set` falls back to ``glTexImage2D``.
+
+    Public attributes:
+
+      number_of_allocations
+
+      number_of_updates
+
+      bytes_uploaded
+
+    """
+
+    _logger = _module_logger.getChild('GlTexture2D')
+
+    ##############################################
+
+    def __init__(self, parameters=(), number_of_unpack_buffers=0):
+
+        self._parameters = list(parameters)
+        self._storage = None # (width, height, internal format, levels)
+        self._deletion_queue = deletion_queue()
+        self._integer_internal_format = False
+        self._unpack_buffers = [GlPixelUnpackBuffer() for i in range(number_of_unpack_buffers)]
+        self._unpack_buffer_index = 0
+
+        self.number_of_allocations = 0
+        self.number_of_updates = 0
+        self.bytes_uploaded = 0
+
+        self._create()
+
+    ##############################################
+
+    def __del__(self):
+
+        self._deletion_queue.enqueue('texture', self._gl_id)
+
+    ##############################################
+
+    def _create(self):
+
+        self._gl_id = create_texture(GL.GL_TEXTURE_2D, self, self._deletion_queue)
+        if self._parameters:
+            set_texture_parameters(self._gl_id, self._parameters)
+        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1) # 1 means byte-alignment
+
+    ##############################################
+
+    @property
+    def id(self):
+        return self._gl_id
+
+    ##############################################
+
+    @property
+    def shape(self):
+
+        """ The shape (height, width) of the storage or :obj:`None`. """
+
+        if self._storage is None:
+            return None
+        else:
+            return self._storage[1], self._storage[0]
+
+    ##############################################
+
+    @property
+    def internal_format(self):
+
+        return self._storage[2] if self._storage is not None else None
+
+    ##############################################
+
+    def bind(self, texture_unit=0):
+
+        """ Bind the texture to a texture unit. """
+
+        GL.glActiveTexture(GL.GL_TEXTURE0 + texture_unit)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self._gl_id)
+
+    ##############################################
+
+    def unbind(self, texture_unit=0):
+
+        """ Unbind the texture of a texture unit. """
+
+        GL.glActiveTexture(GL.GL_TEXTURE0 + texture_unit)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+
+    ##############################################
+
+    def allocate(self, width, height, internal_format, levels=1):
+
+        """ Allocate the immutable storage.  Return :obj:`True` if a new storage was allocated, i.e.
+        if the texture name changed.
+        """
+
+        storage = (width, height, internal_format, levels)
+        if storage == self._storage:
+            return False
+
+        if self._storage is not None:
+            # An immutable storage cannot be reallocated
+            self._deletion_queue.enqueue('texture', self._gl_id)
+            self._create()
+        self.bind()
+        GL.glTexStorage2D(GL.GL_TEXTURE_2D, levels, internal_format, width, height)
+        self.unbind()
+        self._storage = storage
+        self.number_of_allocations += 1
+
+        return True
+
+    ##############################################
+
+    def set(self, image, integer_internal_format=False, internal_format=None):
+
+        """ Set the image, the storage is allocated if the shape or the internal format changed.
+
+        The internal format is given by :func:`texture_format` unless *internal_format* is given.
+        """
+
+        default_internal_format, data_format, data_type = texture_format(image, integer_internal_format)
+        if internal_format is None:
+            internal_format = default_internal_format
+        height, width = image.shape[:2]
+        self._integer_internal_format = integer_internal_format
+
+        if has_texture_storage():
+            self.allocate(width, height, internal_format)
+            self.update(image)
+        else:
+            self.bind()
+            GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, internal_format, width, height, 0,
+                            data_format, data_type, np.ascontiguousarray(image))
+            self.unbind()
+            self._storage = (width, height, internal_format, 1)
+            self.number_of_allocations += 1
+            self.number_of_updates += 1
+            self.bytes_uploaded += image.nbytes
+
+    ##############################################
+
+    def update(self, image, region=None):
+
+        """ Update the storage in place using ``glTexSubImage2D``.
+
+        The parameter *region* is a tuple (x, y, width, height) in texel, by default the whole
+        texture is updated.  The image must have the shape of the region.
+        """
+
+        if self._storage is None:
+            raise NameError("The texture storage is not allocated")
+
+        height, width = image.shape[:2]
+        if region is None:
+            x = y = 0
+            region_shape = self.shape
+        else:
+            x, y, region_width, region_height = region
+            region_shape = region_height, region_width
+            if x + region_width > self._storage[0] or y + region_height > self._storage[1]:
+                raise ValueError("Region %s is out of the texture" % str(region))
+        if (height, width) != region_shape:
+            raise ValueError("Image shape %s doesn't match the region %s" % (str(image.shape[:2]),
+                                                                            str(region_shape)))
+
+        internal_format, data_format, data_type = texture_format(image, self._integer_internal_format)
+        image = np.ascontiguousarray(image)
+
+        if self._unpack_buffers:
+            unpack_buffer = self._unpack_buffers[self._unpack_buffer_index]
+            self._unpack_buffer_index = (self._unpack_buffer_index + 1) % len(self._unpack_buffers)
+            unpack_buffer.set(image.reshape(-1))
+            unpack_buffer.bind()
+            pixels = 0 # offset in the unpack buffer
+        else:
+            pixels = image
+
+        self.bind()
+        GL.glTexSubImage2D(GL.GL_TEXTURE_2D, 0, x, y, width, height, data_format, data_type, pixels)
+        self.unbind()
+
+        if self._unpack_buffers:
+            unpack_buffer.unbind()
+
+        self.number_of_updates += 1
+        self.bytes_uploaded += image.nbytes
+
+####################################################################################################
+
+_has_copy_image = None
+
+def has_copy_image():
+
+    """ Test if the copy between textures is supported, i.e. OpenGL 4.3 or ARB_copy_image. """
+
+    global _has_copy_image
+    if _has_copy_image is None:
+        _has_copy_image = _is_supported('glCopyImageSubData', (4, 3), b'GL_ARB_copy_image')
+    return _has_copy_image
+
+####################################################################################################
+
+class GlTexture2DArray(object):
+
+    """ This class wraps a 2D array texture with an immutable storage, i.e. a stack of layers of the
+    same size which is bound to one texture unit.
+
+    The parameter *parameters* is a list of pairs (name, value) which are passed to
+    ``glTexParameteri``.
+
+    Public attributes:
+
+      number_of_allocations
+
+      number_of_updates
+
+      bytes_uploaded
+
+    """
+
+    _logger = _module_logger.getChild('GlTexture2DArray')
+
+    ##############################################
+
+    def __init__(self, parameters=()):
+
+        self._parameters = list(parameters)
+        self._storage = None # (width, height, number of layers, internal format)
+        self._deletion_queue = deletion_queue()
+
+        self.number_of_allocations = 0
+        self.number_of_updates = 0
+        self.bytes_uploaded = 0
+
+        self._create()
+
+    ##############################################
+
+    def __del__(self):
+
+        self._deletion_queue.enqueue('texture', self._gl_id)
+
+    ##############################################
+
+    def _create(self):
+
+        self._gl_id = create_texture(GL.GL_TEXTURE_2D_ARRAY, self, self._deletion_queue)
+        if self._parameters:
+            set_texture_parameters(self._gl_id, self._parameters, GL.GL_TEXTURE_2D_ARRAY)
+        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1) # 1 means byte-alignment
+
+    ##############################################
+
+    @property
+    def id(self):
+        return self._gl_id
+
+    ##############################################
+
+    @property
+    def shape(self):
+
+        """ The shape (number of layers, height, width) of the storage or :obj:`None`. """
+
+        if self._storage is None:
+            return None
+        else:
+            width, height, number_of_layers = self._storage[:3]
+            return number_of_layers, height, width
+
+    ##############################################
+
+    @property
+    def number_of_layers(self):
+
+        return self._storage[2] if self._storage is not None else 0
+
+    ##############################################
+
+    @property
+    def internal_format(self):
+
+        return self._storage[3] if self._storage is not None else None
+
+    ##############################################
+
+    def bind(self, texture_unit=0):
+
+        """ Bind the texture to a texture unit. """
+
+        GL.glActiveTexture(GL.GL_TEXTURE0 + texture_unit)
+        GL.glBindTexture(GL.GL_TEXTURE_2D_ARRAY, self._gl_id)
+
+    ##############################################
+
+    def unbind(self, texture_unit=0):
+
+        """ Unbind the texture of a texture unit. """
+
+        GL.glActiveTexture(GL.GL_TEXTURE0 + texture_unit)
+        GL.glBindTexture(GL.GL_TEXTURE_2D_ARRAY, 0)
+
+    ##############################################
+
+    def _allocate_storage(self, width, height, number_of_layers, internal_format):
+
+        self.bind()
+        GL.glTexStorage3D(GL.GL_TEXTURE_2D_ARRAY, 1, internal_format, width, height, number_of_layers)
+        self.unbind()
+        self._storage = (width, height, number_of_layers, internal_format)
+        self.number_of_allocations += 1
+
+    ##############################################
+
+    def allocate(self, width, height, number_of_layers, internal_format):
+
+        """ Allocate the immutable storage of *number_of_layers* layers of size *width* x *height*,
+        the layers are undefined.  Return :obj:`True` if a new storage was allocated.
+        """
+
+        storage = (width, height, number_of_layers, internal_format)
+        if storage == self._storage:
+            return False
+
+        if self._storage is not None:
+            # An immutable storage cannot be reallocated
+            self._deletion_queue.enqueue('texture', self._gl_id)
+            self._create()
+        self._allocate_storage(*storage)
+
+        return True
+
+    ##############################################
+
+    def resize(self, number_of_layers):
+
+        """ Change the number of layers and copy the content of the layers which are kept, using
+        ``glCopyImageSubData``.  The texture name changes.
+
+        If the copy between textures is not supported, the layers are copied one by one from a read
+        frame buffer using ``glCopyTexSubImage3D``, thus the internal format must be colour
+        renderable.
+        """
+
+        if self._storage is None:
+            raise NameError("The texture storage is not allocated")
+
+        width, height, old_number_of_layers, internal_format = self._storage
+        old_gl_id = self._gl_id
+        self._create()
+        self._allocate_storage(width, height, number_of_layers, internal_format)
+        number_of_copied_layers = min(old_number_of_layers, number_of_layers)
+        if has_copy_image():
+            GL.glCopyImageSubData(old_gl_id, GL.GL_TEXTURE_2D_ARRAY, 0, 0, 0, 0,
+                                  self._gl_id, GL.GL_TEXTURE_2D_ARRAY, 0, 0, 0, 0,
+                                  width, height, number_of_copied_layers)
+        else:
+            self._copy_layers_from_frame_buffer(old_gl_id, width, height, number_of_copied_layers)
+        self._deletion_queue.enqueue('texture', old_gl_id)
+
+    ##############################################
+
+    def _copy_layers_from_frame_buffer(self, source_gl_id, width, height, number_of_layers):
+
+        """ Copy the first layers of the texture *source_gl_id* to the texture, a layer is attached to
+        a read frame buffer and copied using ``glCopyTexSubImage3D``.
+        """
+
+        read_frame_buffer = GL.glGetIntegerv(GL.GL_READ_FRAMEBUFFER_BINDING)
+        frame_buffer = GL.glGenFramebuffers(1)
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, frame_buffer)
+        GL.glBindTexture(GL.GL_TEXTURE_2D_ARRAY, self._gl_id)
+        try:
+            for layer in range(number_of_layers):
+                GL.glFramebufferTextureLayer(GL.GL_READ_FRAMEBUFFER, GL.GL_COLOR_ATTACHMENT0,
+                                             source_gl_id, 0, layer)
+                if not layer:
+                    status = GL.glCheckFramebufferStatus(GL.GL_READ_FRAMEBUFFER)
+                    if status != GL.GL_FRAMEBUFFER_COMPLETE:
+                        raise RuntimeError("Cannot copy the layers, the internal format %s is not"
+                                           " colour renderable and the copy between textures is not"
+                                           " supported" % GL.reverse_enums.get(self._storage[3],
+                                                                               self._storage[3]))
+                GL.glCopyTexSubImage3D(GL.GL_TEXTURE_2D_ARRAY, 0, 0, 0, layer, 0, 0, width, height)
+        finally:
+            GL.glBindTexture(GL.GL_TEXTURE_2D_ARRAY, 0)
+            GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, read_frame_buffer)
+            self._deletion_queue.enqueue('framebuffer', frame_buffer)
+
+    ##############################################
+
+    def update(self, image, layer, region=None):
+
+        """ Update a layer in place using ``glTexSubImage3D``.
+
+        The parameter *region* is a tuple (x, y, width, height) in texel, by default the whole layer
+        is updated.  The image must have the shape of the region.
+        """
+
+        if self._storage is None:
+            raise NameError("The texture storage is not allocated")
+
+        storage_width, storage_height, number_of_layers = self._storage[:3]
+        if not 0 <= layer < number_of_layers:
+            raise ValueError("Layer %u is out of the texture" % layer)
+        height, width = image.shape[:2]
+        if region is None:
+            x = y = 0
+            region_shape = storage_height, storage_width
+        else:
+            x, y, region_width, region_height = region
+            region_shape = region_height, region_width
+            if x + region_width > storage_width or y + region_height > storage_height:
+                raise ValueError("Region %s is out of the texture" % str(region))
+        if (height, width) != region_shape:
+            raise ValueError("Image shape %s doesn't match the region %s" % (str(image.shape[:2]),
+                                                                            str(region_shape)))
+
+        internal_format, data_format, data_type = texture_format(image)
+        image = np.ascontiguousarray(image)
+        self.bind()
+        GL.glTexSubImage3D(GL.GL_TEXTURE_2D_ARRAY, 0, x, y, layer, width, height, 1,
+                           data_format, data_type, image)
+        self.unbind()
+
+        self.number_of_updates += 1
+        self.bytes_uploaded += image.nbytes
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
@@ -0,0 +1,296 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+
+""" This module implements a pool of images stored in the layers of a 2D array texture.
+
+Drawing many small images with a texture per image costs a texture binding and a draw call per
+image.  A :class:`GlTextureArrayPool` stores the images in the layers of one ``GL_TEXTURE_2D_ARRAY``
+and returns a :class:`GlTextureArrayRegion` per image, which gives its layer and its UV rectangle::
+
+  pool = GlTextureArrayPool(width=1024, height=1024)
+  region = pool.add(thumbnail)
+  ...
+  pool.remove(region)
+
+The images are packed by size bucket: a layer is split in a grid of cells of the same size, which is
+the power of 2 larger or equal to the image dimensions.  A layer is assigned to a bucket on demand
+and is released when its last image is removed.  If there is no free layer, the number of layers is
+doubled and the texture is copied, see :meth:`.Texture.GlTexture2DArray.resize`.
+
+The cells have no gutter, thus the UV rectangle of an image is inset by half a texel, so as the
+linear filtering doesn't sample the neighbour cells.
+
+The images of a pool are drawn with one instanced call using :class:`.SpriteBatch.GlSpriteBatch`.
+
+"""
+
+####################################################################################################
+
+import logging
+
+####################################################################################################
+
+from . import GL
+from .Texture import GlTexture2DArray
+from .TextureAtlas import ceil2
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+class GlTextureArrayRegion(object):
+
+    """ This class defines the location of an image in a pool.
+
+    Public attributes:
+
+      layer
+
+      x, y, width, height
+        rectangle of the image in the layer in texel
+
+      uv_rectangle
+        tuple (u_min, v_min, u_max, v_max) of the normalised texture coordinates, which are inset by
+        half a texel, i.e. at the centre of the border texels
+
+    The property :attr:`removed` is set when the image is removed from the pool.
+
+    """
+
+    ##############################################
+
+    def __init__(self, layer, x, y, width, height, layer_width, layer_height, cell_size):
+
+        self.layer = layer
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        # The cells have no gutter, thus a linear filtering at the edges of the image would blend
+        # the neighbour cells
+        self.uv_rectangle = ((x + .5) / layer_width, (y + .5) / layer_height,
+                             (x + width - .5) / layer_width, (y + height - .5) / layer_height)
+        self._cell_size = cell_size
+        self._removed = False
+
+    ##############################################
+
+    @property
+    def removed(self):
+        return self._removed
+
+    @property
+    def rectangle(self):
+        return self.x, self.y, self.width, self.height
+
+    ##############################################
+
+    def __repr__(self):
+
+        return "GlTextureArrayRegion(layer=%u, %s)" % (self.layer, str(self.rectangle))
+
+####################################################################################################
+
+class GlTextureArrayPool(object):
+
+    """ This class packs images in the layers of a 2D array texture.
+
+    The layers have the size *width* x *height*, which are rounded to a power of 2, and the internal
+    format *internal_format*.  The images must have a pixel format compatible with it, e.g. uint8
+    RGBA images for ``GL_RGBA8``.  The smallest cell has the size *minimum_cell_size*.
+
+    Public attributes:
+
+      number_of_images
+
+      number_of_resizes
+
+    """
+
+    _logger = _module_logger.getChild('GlTextureArrayPool')
+
+    __default_parameters__ = (
+        (GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_EDGE),
+        (GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_EDGE),
+        (GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR),
+        (GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR),
+        )
+
+    ##############################################
+
+    def __init__(self, width=1024, height=1024, number_of_layers=4, internal_format=GL.GL_RGBA8,
+                 minimum_cell_size=16, parameters=None):
+
+        self._width = ceil2(width)
+        self._height = ceil2(height)
+        self._minimum_cell_size = minimum_cell_size
+
+        if parameters is None:
+            parameters = self.__default_parameters__
+        self._texture = GlTexture2DArray(parameters)
+        self._texture.allocate(self._width, self._height, number_of_layers, internal_format)
+
+        self._layer_cell_sizes = [None] * number_of_layers # cell size of the bucket of a layer
+        self._layer_usages = [0] * number_of_layers # number of images in a layer
+        self._free_cells = {} # cell size -> [(layer, x, y), ...]
+
+        self.number_of_images = 0
+        self.number_of_resizes = 0
+
+    ##############################################
+
+    @property
+    def texture(self):
+        return self._texture
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def number_of_layers(self):
+        return self._texture.number_of_layers
+
+    ##############################################
+
+    def __len__(self):
+
+        return self.number_of_images
+
+    ##############################################
+
+    def bind(self, texture_unit=0):
+
+        self._texture.bind(texture_unit)
+
+    ##############################################
+
+    def unbind(self, texture_unit=0):
+
+        self._texture.unbind(texture_unit)
+
+    ##############################################
+
+    def _cell_size(self, width, height):
+
+        """ Return the cell size (width, height) of the bucket of an image. """
+
+        if width > self._width or height > self._height:
+            raise ValueError("Image size %ux%u is larger than the layer size %ux%u" %
+                             (width, height, self._width, self._height))
+        return (ceil2(max(width, self._minimum_cell_size)),
+                ceil2(max(height, self._minimum_cell_size)))
+
+    ##############################################
+
+    def _assign_layer(self, cell_size):
+
+        """ Assign a free layer to a bucket and return its cells. """
+
+        try:
+            layer = self._layer_cell_sizes.index(None)
+        except ValueError:
+            layer = self.number_of_layers
+            self._resize(2 * layer)
+        self._layer_cell_sizes[layer] = cell_size
+
+        cell_width, cell_height = cell_size
+        # The cells are popped in the raster order
+        return [(layer, x, y)
+                for y in range(self._height - cell_height, -1, -cell_height)
+                for x in range(self._width - cell_width, -1, -cell_width)]
+
+    ##############################################
+
+    def _resize(self, number_of_layers):
+
+        self._logger.info("Resize the pool to %u layers", number_of_layers)
+        self._texture.resize(number_of_layers)
+        number_of_new_layers = number_of_layers - len(self._layer_cell_sizes)
+        self._layer_cell_sizes.extend([None] * number_of_new_layers)
+        self._layer_usages.extend([0] * number_of_new_layers)
+        self.number_of_resizes += 1
+
+    ##############################################
+
+    def add(self, image):
+
+        """ Add an image and return its :class:`GlTextureArrayRegion`. """
+
+        height, width = image.shape[:2]
+        cell_size = self._cell_size(width, height)
+        free_cells = self._free_cells.setdefault(cell_size, [])
+        if not free_cells:
+            free_cells.extend(self._assign_layer(cell_size))
+        layer, x, y = free_cells.pop()
+
+        region = GlTextureArrayRegion(layer, x, y, width, height,
+                                      self._width, self._height, cell_size)
+        self._texture.update(image, layer, region.rectangle)
+        self._layer_usages[layer] += 1
+        self.number_of_images += 1
+
+        return region
+
+    ##############################################
+
+    def update(self, region, image):
+
+        """ Update the image of a region, the image must have the same size. """
+
+        if region._removed:
+            raise NameError("%s is removed" % str(region))
+        self._texture.update(image, region.layer, region.rectangle)
+
+    ##############################################
+
+    def remove(self, region):
+
+        """ Remove the image of a region, the cell is reused by the next images of the same bucket.
+        A region cannot be removed twice.
+        """
+
+        if region._removed:
+            raise NameError("%s is already removed" % str(region))
+        region._removed = True
+        layer = region.layer
+        cell_size = region._cell_size
+        free_cells = self._free_cells[cell_size]
+        self._layer_usages[layer] -= 1
+        self.number_of_images -= 1
+        if self._layer_usages[layer]:
+            free_cells.append((layer, region.x, region.y))
+        else:
+            # Release the layer, so as it can be assigned to another bucket
+            free_cells[:] = [cell for cell in free_cells if cell[0] != layer]
+            self._layer_cell_sizes[layer] = None
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
@@ -29,7 +29,7 @@ import numpy as np
 ####################################################################################################
 
 from . import GL
-from .Buffer import GlArrayBuffer
+from .Texture import GlTexture2D
 from .VertexArrayObject import GlVertexArrayObject
 
 ####################################################################################################
@@ -44,29 +44,31 @@ class GlTextureVertexArray(GlVertexArrayObject):
 
     ##############################################
 
-    def __init__(self, position, dimension, image=None, integer_internal_format=False):
+    def __init__(self, position, dimension, image=None, integer_internal_format=False, buffer_heap=None,
+                 number_of_unpack_buffers=0):
 
         """ The parameters *position* and *dimension* define the quad where is mapped the texture.
+        The vertex buffers are allocated in *buffer_heap* if it is given.  If
+        *number_of_unpack_buffers* is not null, the texture updates are staged in a ring of pixel
+        unpack buffers, see :class:`.Texture.GlTexture2D`.
         """
 
-        super(GlTextureVertexArray, self).__init__()
+        super(GlTextureVertexArray, self).__init__(buffer_heap)
 
         if self._uv_vbo is None:
             self._create_uv_vbo()
 
         self._create_vertex(position, dimension)
-        self._create_texture()
+        self._create_texture(number_of_unpack_buffers)
 
         if image is not None:
             self.set(image, integer_internal_format)
 
     ##############################################
 
-    def __del__(self):
-
-        #!# self._logger("Delete Texture %u" % (self._gl_textures_id))
-        super(GlTextureVertexArray, self).__del__()
-        GL.glDeleteTextures([self._gl_textures_id])
+    @property
+    def texture(self):
+        return self._texture
 
     ##############################################
 
@@ -75,8 +77,7 @@ class GlTextureVertexArray(GlVertexArrayObject):
         """ Bind the texture. """
 
         # Select the texture unit and bind it
-        GL.glActiveTexture(GL.GL_TEXTURE0)
-        GL.glBindTexture(GL.GL_TEXTURE_2D, self._gl_textures_id) # [0]
+        self._texture.bind()
 
     ##############################################
 
@@ -85,31 +86,24 @@ class GlTextureVertexArray(GlVertexArrayObject):
         """ Unbind the texture. """
 
         # Select the texture unit and unbind it
-        GL.glActiveTexture(GL.GL_TEXTURE0)
-        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        self._texture.unbind()
 
     ##############################################
 
-    def _create_texture(self):
+    def _create_texture(self, number_of_unpack_buffers=0):
 
         """ Create the texture. """
 
-        self._gl_textures_id = GL.glGenTextures(1)
-
-        self._bind_texture()
-
         # Fixme:
         #  - ok?
         #  - use a sampler
         # GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_BORDER_COLOR, 0, 0, 0, 0) # ?
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_BORDER) # ?
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_BORDER) # ?
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR) # ?
-        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR) # ?
-
-        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1) # 1 means byte-alignment
-
-        self._unbind_texture()
+        parameters = [(GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_BORDER), # ?
+                      (GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_BORDER), # ?
+                      (GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR), # ?
+                      (GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR), # ?
+                     ]
+        self._texture = GlTexture2D(parameters, number_of_unpack_buffers)
 
     ##############################################
 
@@ -118,61 +112,25 @@ class GlTextureVertexArray(GlVertexArrayObject):
         """ Set the texture data.
 
         The parameter *image* is a Numpy array that can have up to 4 interleaved planes and of type
-        uint8, int8, uint16 and int16.
+        uint8, int8, uint16, int16, float16 and float32.
 
         The flag *integer_internal_format* specfies if the texture uses an integer internal format.
+
+        The texture has an immutable storage which is allocated again when the shape or the format
+        changes, use :meth:`update` to upload a new image of the same shape.
         """
 
-        self._bind_texture()
+        self._texture.set(image, integer_internal_format)
 
-        if image.ndim == 2:
-            height, width = image.shape
-            number_of_planes = 1
-        elif image.ndim == 3:
-            height, width, number_of_planes = image.shape
-        else:
-            ValueError("Image dimension %u is not supported" % (image.ndim))
-
-        if number_of_planes == 1:
-            format_name = 'GL_RED'
-        elif number_of_planes == 2:
-            format_name = 'GL_RG'
-        elif number_of_planes == 3:
-            format_name = 'GL_RGB'
-        elif number_of_planes == 4:
-            format_name = 'GL_RGBA'
-        else:
-            raise ValueError("Image number of planes %s is not supported" % (number_of_planes))
-        if integer_internal_format:
-            format_name += '_INTEGER'
-        data_format = getattr(GL, format_name)
-
-        if image.dtype == np.uint8:
-            data_type = GL.GL_UNSIGNED_BYTE
-            if integer_internal_format:
-                internal_format = GL.GL_RGBA8UI
-            else:
-                internal_format = GL.GL_RGBA8
-        elif image.dtype == np.uint16:
-            data_type = GL.GL_UNSIGNED_SHORT
-            if integer_internal_format:
-                internal_format = GL.GL_RGBA16UI
-            else:
-                internal_format = GL.GL_RGBA16
-        elif image.dtype == np.float32:
-            data_type = GL.GL_FLOAT
-            internal_format = GL.GL_RGBA32F
-        else:
-            raise ValueError("Image data type %s is not supported" % (str(image.dtype)))
-
-        level = 0
-        border = 0
-        # Fixme: check speed
-        GL.glTexImage2D(GL.GL_TEXTURE_2D,
-                        level, internal_format, width, height, border, data_format, data_type,
-                        image)
+    ##############################################
 
-        self._unbind_texture()
+    def update(self, image, region=None):
+
+        """ Update the texture data in place, *region* is a tuple (x, y, width, height) and by
+        default the whole texture is updated.
+        """
+
+        self._texture.update(image, region)
 
     ##############################################
 
@@ -197,7 +155,7 @@ class GlTextureVertexArray(GlVertexArrayObject):
                                 ],
                                dtype='f')
 
-        self._uv_vbo = GlArrayBuffer(position_uv)
+        self._uv_vbo = self._create_buffer(position_uv)
 
     ##############################################
 
@@ -214,7 +172,7 @@ class GlTextureVertexArray(GlVertexArrayObject):
                            ],
                           dtype='f') # dtype=np.float
 
-        self._vertex_vbo = GlArrayBuffer(vertex)
+        self._vertex_vbo = self._create_buffer(vertex)
 
     ##############################################
 
@@ -0,0 +1,376 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+
+""" This module implements the capture of the vertex shader outputs into Numpy arrays using
+transform feedback.
+
+The captured varyings are set on the program before it is linked, then a
+:class:`GlTransformFeedback` draws a vertex array with the rasterizer disabled and returns the
+captured vertexes as a Numpy structured array, whose fields are the varyings::
+
+  program.set_transform_feedback_varyings(('gl_Position', 'colour'))
+  program.link()
+  transform_feedback = GlTransformFeedback(program)
+  vertexes = transform_feedback.capture(vertex_array, number_of_vertexes)
+  vertexes['gl_Position']
+
+By default the vertexes are drawn as points, so as each vertex is captured once.  The draw requires a
+complete frame buffer even if the rasterization is disabled, e.g. an offscreen frame buffer must be
+bound in a surfaceless context.  The captured
+vertexes can be read asynchronously using a :class:`.Readback.GlReadbackPool`::
+
+  with transform_feedback.capture(vertex_array, number_of_vertexes, readback_pool) as future:
+      ...
+      vertexes = future.result()
+
+If the varyings are captured in separate mode, i.e. ``interleaved=False``, each varying is captured
+in its own buffer and a capture returns a dictionary of arrays indexed by the varying names.  In
+this case, the readback pool must provide a pack buffer per varying.
+
+"""
+
+####################################################################################################
+
+import logging
+
+import numpy as np
+
+####################################################################################################
+
+from . import GL
+from .Buffer import GlBuffer
+from .DeletionQueue import deletion_queue
+from .GpuTimer import GlQueryPool
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+#: Number of vertexes of a captured primitive
+_primitive_vertexes = {
+    GL.GL_POINTS:1,
+    GL.GL_LINES:2,
+    GL.GL_TRIANGLES:3,
+    }
+
+####################################################################################################
+
+class GlTransformFeedbackBuffer(GlBuffer):
+
+    """ This class wraps an OpenGl Transform Feedback Buffer, which stores the captured vertexes.
+    """
+
+    _target = GL.GL_TRANSFORM_FEEDBACK_BUFFER
+
+    _logger = _module_logger.getChild('GlTransformFeedbackBuffer')
+
+    ##############################################
+
+    def __init__(self, data=None):
+
+        self.number_of_vertexes = 0
+        super(GlTransformFeedbackBuffer, self).__init__(data)
+
+    ##############################################
+
+    def set(self, data, usage=GL.GL_STREAM_READ):
+
+        self.number_of_vertexes = data.shape[0]
+        self._set(data, usage)
+
+    ##############################################
+
+    def allocate(self, number_of_vertexes, dtype, usage=GL.GL_STREAM_READ):
+
+        """ Allocate an uninitialised data store for *number_of_vertexes* vertexes of the given data
+        type.
+        """
+
+        self.number_of_vertexes = number_of_vertexes
+        self._set_data_type(dtype, (number_of_vertexes,))
+        self.nbytes = number_of_vertexes * self._dtype_nbytes
+        self._buffer_data(self.nbytes, usage)
+
+    ##############################################
+
+    def read(self, number_of_vertexes=None):
+
+        """ Read synchronously the first vertexes of the buffer, by default all the vertexes. """
+
+        if number_of_vertexes is None:
+            number_of_vertexes = self.number_of_vertexes
+        data = np.zeros(number_of_vertexes, dtype=self._dtype)
+        if number_of_vertexes:
+            self._get_buffer_sub_data(0, data)
+
+        return data
+
+####################################################################################################
+
+class GlTransformFeedbackFuture(object):
+
+    """ This class represents a pending capture read asynchronously.
+
+    The number of captured vertexes is given by a primitive query which is read when the readback
+    has completed, i.e. without stall.  The future can be used as a context manager which releases
+    it.
+
+    The parameter *readback_futures* is a list of a readback per buffer, and *names* is the list of
+    the varying names in separate mode, else :obj:`None`.
+    """
+
+    ##############################################
+
+    def __init__(self, transform_feedback, readback_futures, names, query, vertexes_per_primitive):
+
+        self._transform_feedback = transform_feedback
+        self._readback_futures = readback_futures
+        self._names = names
+        self._query = query
+        self._vertexes_per_primitive = vertexes_per_primitive
+        self._array = None
+
+    ##############################################
+
+    def __del__(self):
+
+        # Don't call OpenGL from the garbage collector
+        if self._readback_futures is not None:
+            for readback_future in self._readback_futures:
+                readback_future._discard()
+            self._readback_futures = None
+            self._transform_feedback._query_pool.release(self._query)
+
+    ##############################################
+
+    def __enter__(self):
+
+        return self
+
+    ##############################################
+
+    def __exit__(self, type_, value, traceback):
+
+        self.release()
+
+    ##############################################
+
+    def done(self):
+
+        """ Test if the GPU has completed the capture, without waiting. """
+
+        # Test all the fences, a readback deletes its fence once signaled
+        return all([readback_future.done() for readback_future in self._readback_futures])
+
+    ##############################################
+
+    def wait(self, timeout=None):
+
+        """ Wait the GPU has completed the capture, *timeout* is in second.  Return :obj:`False` if
+        the timeout expired.
+        """
+
+        # The last readback was issued after the others
+        return self._readback_futures[-1].wait(timeout)
+
+    ##############################################
+
+    def result(self, timeout=None):
+
+        """ Wait the capture and return the structured array of the captured vertexes, or a
+        dictionary of arrays in separate mode, which becomes invalid when the future is released.
+        """
+
+        if self._readback_futures is None:
+            raise NameError("The future is released")
+        if self._array is None:
+            arrays = [readback_future.result(timeout) for readback_future in self._readback_futures]
+            number_of_primitives = GL.glGetQueryObjectiv(self._query, GL.GL_QUERY_RESULT)
+            number_of_vertexes = number_of_primitives * self._vertexes_per_primitive
+            if self._names is None:
+                self._array = arrays[0][:number_of_vertexes]
+            else:
+                self._array = {name:array[name][:number_of_vertexes]
+                               for name, array in zip(self._names, arrays)}
+
+        return self._array
+
+    ##############################################
+
+    def release(self):
+
+        """ Release the readback buffers and the query. """
+
+        if self._readback_futures is None:
+            return
+        for readback_future in self._readback_futures:
+            readback_future.release()
+        self._readback_futures = None
+        self._transform_feedback._query_pool.release(self._query)
+        self._array = None
+
+####################################################################################################
+
+class GlTransformFeedback(object):
+
+    """ This class captures the varyings of a program using transform feedback.
+
+    The captured vertexes are written to a :class:`GlTransformFeedbackBuffer` which grows to the
+    number of drawn vertexes, or to a buffer per varying in separate mode.
+
+    Public attributes:
+
+      interleaved
+        the varyings are captured in one buffer
+
+      buffer
+        the :class:`GlTransformFeedbackBuffer` in interleaved mode, else :obj:`None`
+
+      buffers
+        the list of the :class:`GlTransformFeedbackBuffer`, one per varying in separate mode
+
+      dtype
+        Numpy structured data type of a captured vertex
+
+      number_of_captures
+
+    """
+
+    _logger = _module_logger.getChild('GlTransformFeedback')
+
+    ##############################################
+
+    def __init__(self, shader_program):
+
+        varyings = shader_program.transform_feedback_varyings
+        if varyings is None or not len(varyings):
+            raise NameError("Program %s doesn't capture varyings" % shader_program._name)
+
+        self._shader_program = shader_program
+        self.interleaved = varyings.interleaved
+        self.dtype = varyings.dtype
+
+        self._gl_id = GL.glGenTransformFeedbacks(1)
+        self._deletion_queue = deletion_queue()
+        self._deletion_queue.register('transform_feedback', self._gl_id, self)
+
+        if self.interleaved:
+            self._names = None
+            self._buffer_dtypes = [self.dtype]
+        else:
+            # A single field record, so as the buffer arrays are indexed by the varying names
+            self._names = [varying.name for varying in varyings]
+            self._buffer_dtypes = [np.dtype([(varying.name, varying.dtype)]) for varying in varyings]
+        self.buffers = [GlTransformFeedbackBuffer() for dtype in self._buffer_dtypes]
+        if self.interleaved:
+            self.buffer = self.buffers[0]
+        else:
+            self.buffer = None
+        self._query_pool = GlQueryPool(GL.GL_TRANSFORM_FEEDBACK_PRIMITIVES_WRITTEN)
+
+        self.number_of_captures = 0
+
+    ##############################################
+
+    def __del__(self):
+
+        self._logger.debug("Delete Transform Feedback %u" % (self._gl_id))
+        self._deletion_queue.enqueue('transform_feedback', self._gl_id)
+
+    ##############################################
+
+    def reserve(self, number_of_vertexes):
+
+        """ Grow the buffer so as to capture *number_of_vertexes* vertexes. """
+
+        if number_of_vertexes > self.buffers[0].number_of_vertexes:
+            for buffer_, dtype in zip(self.buffers, self._buffer_dtypes):
+                buffer_.allocate(number_of_vertexes, dtype)
+
+    ##############################################
+
+    def capture(self, vertex_array, number_of_vertexes=None, readback_pool=None,
+                primitive=GL.GL_POINTS, discard=True):
+
+        """ Draw a vertex array and capture the varyings.
+
+        If *number_of_vertexes* is given, the first vertexes are drawn as *primitive*.  Else the
+        vertex array is drawn by its :meth:`draw` method and *primitive* must be the same
+        primitive, as points, lines or triangles, the buffer must be reserved before.  The
+        rasterization is disabled if *discard* is set.
+
+        Return the structured array of the captured vertexes, a dictionary of arrays indexed by
+        the varying names in separate mode, or a :class:`GlTransformFeedbackFuture` if a
+        *readback_pool* is given.
+        """
+
+        vertexes_per_primitive = _primitive_vertexes.get(primitive)
+        if vertexes_per_primitive is None:
+            raise ValueError("Wrong transform feedback primitive")
+        if number_of_vertexes is not None:
+            self.reserve(number_of_vertexes)
+        if not self.buffers[0].number_of_vertexes:
+            raise NameError("The transform feedback buffer is not allocated")
+
+        query = self._query_pool.acquire()
+        GL.glBindTransformFeedback(GL.GL_TRANSFORM_FEEDBACK, self._gl_id)
+        for i, buffer_ in enumerate(self.buffers):
+            GL.glBindBufferBase(GL.GL_TRANSFORM_FEEDBACK_BUFFER, i, buffer_._gl_id)
+        if discard:
+            GL.glEnable(GL.GL_RASTERIZER_DISCARD)
+        self._shader_program.bind()
+        GL.glBeginQuery(GL.GL_TRANSFORM_FEEDBACK_PRIMITIVES_WRITTEN, query)
+        GL.glBeginTransformFeedback(primitive)
+        if number_of_vertexes is not None:
+            vertex_array.bind()
+            GL.glDrawArrays(primitive, 0, number_of_vertexes)
+            vertex_array.unbind()
+        else:
+            vertex_array.draw()
+        GL.glEndTransformFeedback()
+        GL.glEndQuery(GL.GL_TRANSFORM_FEEDBACK_PRIMITIVES_WRITTEN)
+        self._shader_program.unbind()
+        if discard:
+            GL.glDisable(GL.GL_RASTERIZER_DISCARD)
+        GL.glBindTransformFeedback(GL.GL_TRANSFORM_FEEDBACK, 0)
+        self.number_of_captures += 1
+
+        if readback_pool is not None:
+            readback_futures = [readback_pool.read_buffer(buffer_) for buffer_ in self.buffers]
+            return GlTransformFeedbackFuture(self, readback_futures, self._names, query,
+                                             vertexes_per_primitive)
+        else:
+            number_of_primitives = GL.glGetQueryObjectiv(query, GL.GL_QUERY_RESULT)
+            self._query_pool.release(query)
+            number_of_vertexes = number_of_primitives * vertexes_per_primitive
+            if self.interleaved:
+                return self.buffer.read(number_of_vertexes)
+            else:
+                return {name:buffer_.read(number_of_vertexes)[name]
+                        for name, buffer_ in zip(self._names, self.buffers)}
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
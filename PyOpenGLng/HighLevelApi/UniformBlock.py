@@ -0,0 +1,329 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+
+""" This module implements uniform buffers whose layout is given by the shader reflection.
+
+The layout of a uniform block, std140, std430 or shared, is defined by the offsets, the array strides
+and the matrix strides of its members, which are queried at link time, see
+:class:`.Shader.GlUniformBlock`.  A :class:`UniformBlockLayout` translates them to a Numpy structured
+data type, and a :class:`GlUniformBlockBuffer` keeps a CPU copy of the block and uploads only the
+modified members::
+
+  layout = UniformBlockLayout.from_uniform_block(shader_program.uniform_blocks.viewport)
+  viewport = GlUniformBlockBuffer(layout, binding_point=0)
+  # per frame
+  viewport['model_view_projection_matrix'] = matrix
+  viewport['viewport_scale'] = scale
+  viewport.sync()
+
+Since the block is bound to a binding point, one upload per frame feeds all the programs which share
+the block.  The values have the mathematical shape of the GLSL types, e.g. a ``mat4x3`` has the
+shape (3, 4) and an array of ``vec3`` the shape (N, 3), the padding is handled by the layout.
+
+"""
+
+####################################################################################################
+
+import logging
+
+import numpy as np
+
+####################################################################################################
+
+from . import Type as GlType
+from .Buffer import GlUniformBuffer
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+class UniformBlockMember(object):
+
+    """ This class defines the layout of a member of a uniform block.
+
+    Public attributes:
+
+      name
+
+      offset
+        in byte
+
+      shape
+        shape of the value, e.g. (N, 3) for an array of N ``vec3``
+
+      storage_shape
+        shape of the stored array, including the padding
+
+    """
+
+    ##############################################
+
+    def __init__(self, name, gl_type, offset, size=1, array_stride=0, matrix_stride=0,
+                 is_row_major=False):
+
+        self.name = name
+        self.offset = offset
+        self.dtype = np.dtype(gl_type.dtype)
+        self.is_array = size > 1 or array_stride > 0
+        self.is_matrix = isinstance(gl_type, GlType.GlMatrixType)
+        self.is_row_major = is_row_major
+
+        itemsize = self.dtype.itemsize
+        if self.is_matrix:
+            # The type keyword is matCxR
+            number_of_columns, number_of_rows = gl_type.shape
+            element_shape = (number_of_rows, number_of_columns)
+            if is_row_major:
+                vectors, length = number_of_rows, number_of_columns
+            else:
+                vectors, length = number_of_columns, number_of_rows
+            # a column, or a row, is padded to the matrix stride
+            element_storage_shape = (vectors, max(matrix_stride // itemsize, length))
+            self._length = length
+            if self.is_array and array_stride != vectors * matrix_stride:
+                raise NotImplementedError("Matrix array stride %u is not supported" % array_stride)
+        elif isinstance(gl_type, GlType.GlVectorType):
+            element_shape = gl_type.shape
+            element_storage_shape = element_shape
+            self._length = element_shape[0]
+        elif isinstance(gl_type, GlType.GlVariableType):
+            element_shape = ()
+            element_storage_shape = element_shape
+            self._length = 1
+        else:
+            raise NotImplementedError("Type %s is not supported in a uniform block" % gl_type)
+
+        if self.is_array:
+            element_nbytes = int(np.prod(element_storage_shape, dtype=int)) * itemsize
+            if not self.is_matrix and array_stride > element_nbytes:
+                # the scalars and the vectors are padded to the array stride
+                element_storage_shape = (array_stride // itemsize,)
+            self.shape = (size,) + tuple(element_shape)
+            self.storage_shape = (size,) + tuple(element_storage_shape)
+        else:
+            self.shape = tuple(element_shape)
+            self.storage_shape = tuple(element_storage_shape)
+
+        self.nbytes = int(np.prod(self.storage_shape, dtype=int)) * itemsize
+
+    ##############################################
+
+    def __repr__(self):
+
+        return "UniformBlockMember(%s, offset=%u, shape=%s)" % (self.name, self.offset, self.shape)
+
+    ##############################################
+
+    def _view(self, storage):
+
+        """ Return the view of the value in the stored array. """
+
+        if self.is_matrix:
+            view = storage[..., :self._length]
+            if not self.is_row_major:
+                view = np.swapaxes(view, -1, -2)
+            return view
+        elif self.storage_shape != self.shape:
+            # padded array
+            view = storage[..., :self._length]
+            return view.reshape(self.shape)
+        else:
+            return storage
+
+    ##############################################
+
+    def read(self, record):
+
+        """ Return a copy of the value from a record of the block data type. """
+
+        return np.array(self._view(record[self.name]))
+
+    ##############################################
+
+    def write(self, record, value):
+
+        """ Write the value to a record of the block data type. """
+
+        if self.shape:
+            view = self._view(record[self.name])
+            view[...] = value
+        else:
+            record[self.name] = value
+
+####################################################################################################
+
+class UniformBlockLayout(object):
+
+    """ This class defines the layout of a uniform block of *size* bytes from a list of
+    :class:`UniformBlockMember`.
+
+    Public attributes:
+
+      dtype
+        Numpy structured data type of the block
+
+    """
+
+    _logger = _module_logger.getChild('UniformBlockLayout')
+
+    ##############################################
+
+    def __init__(self, size, members):
+
+        self.size = size
+        self._members = {member.name:member for member in members}
+
+        members = sorted(members, key=lambda member: member.offset)
+        self.dtype = np.dtype(dict(names=[member.name for member in members],
+                                   formats=[(member.dtype, member.storage_shape) for member in members],
+                                   offsets=[member.offset for member in members],
+                                   itemsize=size))
+
+    ##############################################
+
+    @classmethod
+    def from_uniform_block(cls, uniform_block):
+
+        """ Return the layout of a :class:`.Shader.GlUniformBlock`. """
+
+        members = [UniformBlockMember(uniform.name, uniform.gl_type, uniform.offset, uniform.size,
+                                      uniform.array_stride, uniform.matrix_stride, uniform.is_row_major)
+                   for uniform in uniform_block]
+        return cls(uniform_block.uniform_block_data_size(), members)
+
+    ##############################################
+
+    def __contains__(self, name):
+
+        return name in self._members
+
+    def __getitem__(self, name):
+
+        return self._members[name]
+
+    def __iter__(self):
+
+        return iter(self._members.values())
+
+    ##############################################
+
+    def zeros(self):
+
+        """ Return a zero initialised record of the block data type. """
+
+        return np.zeros(1, dtype=self.dtype)[0]
+
+####################################################################################################
+
+class GlUniformBlockBuffer(object):
+
+    """ This class implements a uniform buffer for a block layout with a CPU copy.
+
+    The members are written to the CPU copy and :meth:`sync` uploads the modified byte ranges, the
+    ranges separated by at most *merge_gap* bytes are uploaded in one call.  If *binding_point* is
+    given, the buffer is bound to it.
+
+    Public attributes:
+
+      number_of_syncs
+
+      bytes_uploaded
+
+    """
+
+    _logger = _module_logger.getChild('GlUniformBlockBuffer')
+
+    ##############################################
+
+    def __init__(self, layout, binding_point=None, merge_gap=16):
+
+        self._layout = layout
+        self._buffer = GlUniformBuffer(np.zeros(layout.size, dtype=np.uint8))
+        # The shadow is an array of bytes, thus the dirty ranges are in byte
+        self._buffer.create_shadow(merge_gap)
+        self._record = self._buffer.shadow.view(layout.dtype)[0]
+        if binding_point is not None:
+            self.bind_buffer_base(binding_point)
+
+    ##############################################
+
+    @property
+    def layout(self):
+        return self._layout
+
+    @property
+    def buffer(self):
+        return self._buffer
+
+    @property
+    def number_of_syncs(self):
+        return self._buffer.number_of_syncs
+
+    @property
+    def bytes_uploaded(self):
+        return self._buffer.bytes_uploaded
+
+    ##############################################
+
+    def bind_buffer_base(self, binding_point):
+
+        self._buffer.bind_buffer_base(binding_point)
+
+    ##############################################
+
+    def __getitem__(self, name):
+
+        return self._layout[name].read(self._record)
+
+    ##############################################
+
+    def __setitem__(self, name, value):
+
+        """ Write a member to the CPU copy and mark it as modified. """
+
+        member = self._layout[name]
+        member.write(self._record, value)
+        self._buffer.mark_dirty(member.offset, member.offset + member.nbytes)
+
+    ##############################################
+
+    def update(self, **kwargs):
+
+        """ Write several members. """
+
+        for name, value in kwargs.items():
+            self[name] = value
+
+    ##############################################
+
+    def sync(self):
+
+        """ Upload the modified members and return the number of bytes uploaded. """
+
+        return self._buffer.sync()
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
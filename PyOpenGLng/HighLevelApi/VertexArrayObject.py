@@ -31,15 +31,25 @@ and are not shared.
 
 The usual programming flow is to bind the VAO, then to bind a set of VBO at some locations and
 finnaly to unbind the VAO for latter use.
+
+The vertex buffers of a VAO can be allocated in a :class:`GlBufferHeap` instead of dedicated
+buffer objects, see :meth:`GlVertexArrayObject._create_buffer`.
+
+A VAO tracks the heap allocations which are bound to it, so as to remove its bindings from them
+when it is deleted, since OpenGL can then reuse its name for another VAO.
 """
 
 ####################################################################################################
 
 import logging
+import weakref
 
 ####################################################################################################
 
 from . import GL
+from .DeletionQueue import deletion_queue
+from .Buffer import GlArrayBuffer
+from .BufferHeap import GlHeapAllocation
 
 ####################################################################################################
 
@@ -51,16 +61,22 @@ class GlVertexArrayObject(object):
 
     ##############################################
     
-    def __init__(self):
+    def __init__(self, buffer_heap=None):
 
         self._gl_id = GL.glGenVertexArrays(1)
+        self._deletion_queue = deletion_queue()
+        self._deletion_queue.register('vertex_array', self._gl_id, self)
+        self._buffer_heap = buffer_heap
+        self._heap_allocations = weakref.WeakSet()
 
     ##############################################
     
     def __del__(self):
 
         self._logger.debug("Delete VAO %u" % (self._gl_id))
-        GL.glDeleteVertexArrays([self._gl_id])
+        for allocation in self._heap_allocations:
+            allocation._forget_vertex_array(self._gl_id)
+        self._deletion_queue.enqueue('vertex_array', self._gl_id)
 
     ##############################################
     
@@ -78,6 +94,56 @@ class GlVertexArrayObject(object):
 
         GL.glBindVertexArray(0)
 
+    ##############################################
+
+    def bind_buffer(self, vertex_buffer, locations, divisor=0):
+
+        """ Bind a vertex buffer to the attribute locations of the vertex array object, a
+        per-instance buffer is bound with a *divisor* of 1.
+        """
+
+        self.bind()
+        pairs = vertex_buffer.bind_at_locations(locations, divisor)
+        self.unbind()
+        if isinstance(vertex_buffer, GlHeapAllocation):
+            self._heap_allocations.add(vertex_buffer)
+
+        return pairs
+
+    ##############################################
+
+    def bind_element_buffer(self, element_buffer):
+
+        """ Bind an element array buffer to the vertex array object. """
+
+        self.bind()
+        element_buffer.bind()
+        self.unbind()
+
+    ##############################################
+
+    def disable_attribute(self, location):
+
+        """ Disable a vertex attribute array, the attribute then takes its constant generic value.
+        """
+
+        self.bind()
+        GL.glDisableVertexAttribArray(location)
+        self.unbind()
+
+    ##############################################
+    
+    def _create_buffer(self, data=None):
+
+        """ Return a vertex buffer allocated in the buffer heap if any, else a dedicated
+        :class:`GlArrayBuffer`.
+        """
+
+        if self._buffer_heap is not None:
+            return self._buffer_heap.buffer(data)
+        else:
+            return GlArrayBuffer(data)
+
 ####################################################################################################
 #
 # End
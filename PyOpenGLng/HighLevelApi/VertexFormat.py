@@ -0,0 +1,194 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+""" This module provides compact vertex formats and the Numpy helpers to pack the vertex data.
+
+The vertex attributes can be stored using half floats, normalized integers or the packed
+``GL_INT_2_10_10_10_REV`` format instead of 32-bit floats.  The OpenGL type of an attribute is
+defined by the data type of the array or of the field of a structured array.  The normalized and
+packed formats cannot be deduced from the data type, they are given by an :class:`AttributeType`
+in the *vertex format* which is passed to the buffer, i.e. a dictionary *attribute name:
+attribute type*, where the name of the attribute of a non-structured array is :obj:`None`:
+
+==================================== ========== =========================================
+Attribute type                       Bytes      Usage
+==================================== ========== =========================================
+``np.float16`` (no attribute type)   2          positions, texture coordinates
+:data:`UNORM8`, :data:`UNORM16`      1, 2       colours, weights in [0, 1]
+:data:`SNORM8`, :data:`SNORM16`      1, 2       normals, tangents in [-1, 1]
+:data:`INT_2_10_10_10_REV`           4          normals with 4 components in one integer
+==================================== ========== =========================================
+
+For example, a vertex of 16 bytes instead of 40 bytes::
+
+  vertex_dtype = np.dtype([('position', np.float16, 4),
+                           ('normal', INT_2_10_10_10_REV.dtype),
+                           ('colour', UNORM8.dtype, 4)])
+  vertexes = np.zeros(number_of_vertexes, dtype=vertex_dtype)
+  vertexes['position'][:,:3] = positions
+  vertexes['normal'] = pack_int_2_10_10_10_rev(normals)
+  vertexes['colour'] = pack_unorm(colours)
+  vbo = GlArrayBuffer()
+  vbo.set(vertexes, vertex_format={'normal':INT_2_10_10_10_REV, 'colour':UNORM8})
+
+The format is not stored in the metadata of the Numpy data type, since most of the Numpy
+operations, e.g. ``np.concatenate``, drop it.
+
+The components of an attribute should be aligned to 4 bytes.
+
+An attribute which has the same value for all the vertexes of a draw can be set as a constant
+generic attribute using :func:`set_constant_attribute`.
+
+"""
+
+####################################################################################################
+
+import numpy as np
+
+####################################################################################################
+
+from . import GL
+
+####################################################################################################
+
+class AttributeType(object):
+
+    """ This class defines the OpenGL format of a vertex attribute which is not given by the Numpy
+    data type *dtype* of its array: the integers are *normalized*, i.e. the integer range is mapped
+    to [0, 1] or [-1, 1], and/or packed as the OpenGL type *gl_type* with *size* components per
+    integer.
+    """
+
+    ##############################################
+
+    def __init__(self, dtype, normalized=False, gl_type=None, size=None):
+
+        self.dtype = np.dtype(dtype)
+        self.normalized = normalized
+        self.gl_type = gl_type
+        self.size = size
+
+    ##############################################
+
+    def __repr__(self):
+
+        return 'AttributeType %s normalized %s' % (self.dtype, self.normalized)
+
+#: Normalized unsigned 8-bit integer
+UNORM8 = AttributeType(np.uint8, normalized=True)
+#: Normalized signed 8-bit integer
+SNORM8 = AttributeType(np.int8, normalized=True)
+#: Normalized unsigned 16-bit integer
+UNORM16 = AttributeType(np.uint16, normalized=True)
+#: Normalized signed 16-bit integer
+SNORM16 = AttributeType(np.int16, normalized=True)
+
+#: Normalized signed (x, y, z, w) packed as 10, 10, 10 and 2 bits in an integer
+INT_2_10_10_10_REV = AttributeType(np.int32, normalized=True,
+                                   gl_type=GL.GL_INT_2_10_10_10_REV, size=4)
+
+#: Normalized unsigned (x, y, z, w) packed as 10, 10, 10 and 2 bits in an integer
+UNSIGNED_INT_2_10_10_10_REV = AttributeType(np.uint32, normalized=True,
+                                            gl_type=GL.GL_UNSIGNED_INT_2_10_10_10_REV, size=4)
+
+####################################################################################################
+
+def pack_half(array):
+
+    """ Return the array converted to half floats. """
+
+    return np.asarray(array, dtype=np.float16)
+
+####################################################################################################
+
+def pack_unorm(array, attribute_type=UNORM8):
+
+    """ Return the array of floats in [0, 1] converted to normalized unsigned integers of the data
+    type of *attribute_type*.
+    """
+
+    dtype = attribute_type.dtype
+    maximum = np.iinfo(dtype).max
+    array = np.clip(np.asarray(array, dtype=np.float32), 0., 1.)
+    return np.rint(array * maximum).astype(dtype)
+
+####################################################################################################
+
+def pack_snorm(array, attribute_type=SNORM8):
+
+    """ Return the array of floats in [-1, 1] converted to normalized signed integers of the data
+    type of *attribute_type*.
+    """
+
+    dtype = attribute_type.dtype
+    maximum = np.iinfo(dtype).max
+    array = np.clip(np.asarray(array, dtype=np.float32), -1., 1.)
+    return np.rint(array * maximum).astype(dtype)
+
+####################################################################################################
+
+def pack_int_2_10_10_10_rev(array):
+
+    """ Pack an array of shape (N, 3) or (N, 4) of floats in [-1, 1], e.g. normals, into an array of
+    integers of :data:`INT_2_10_10_10_REV`.  The *w* component is set to 0 if it is not given.
+    """
+
+    array = np.clip(np.asarray(array, dtype=np.float32), -1., 1.)
+    x = np.rint(array[:,0] * 511).astype(np.int32) & 0x3FF
+    y = np.rint(array[:,1] * 511).astype(np.int32) & 0x3FF
+    z = np.rint(array[:,2] * 511).astype(np.int32) & 0x3FF
+    if array.shape[1] > 3:
+        w = np.rint(array[:,3]).astype(np.int32) & 0x3
+    else:
+        w = 0
+    packed = (x | (y << 10) | (z << 20) | (w << 30)).astype(np.uint32)
+    return packed.view(np.int32)
+
+####################################################################################################
+
+def unpack_int_2_10_10_10_rev(array):
+
+    """ Unpack an array of :data:`INT_2_10_10_10_REV` to an array of shape (N, 4) of floats. """
+
+    packed = np.asarray(array).view(np.uint32)
+    unpacked = np.zeros((packed.shape[0], 4), dtype=np.float32)
+    for i, (shift, bits) in enumerate(((0, 10), (10, 10), (20, 10), (30, 2))):
+        mask = (1 << bits) - 1
+        value = ((packed >> shift) & mask).astype(np.int32)
+        value[value > mask >> 1] -= 1 << bits # sign extension
+        unpacked[:,i] = np.maximum(value / float(mask >> 1), -1.)
+    return unpacked
+
+####################################################################################################
+
+def set_constant_attribute(location, value):
+
+    """ Set the value of a generic vertex attribute, which is used when the attribute array is
+    disabled in the bound vertex array object.  The missing components are set to (0, 0, 0, 1).
+    """
+
+    value = list(value) + [0., 0., 0., 1.][len(value):]
+    GL.glVertexAttrib4f(location, *value)
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
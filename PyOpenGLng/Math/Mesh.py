@@ -0,0 +1,111 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+""" This module implements tools to convert triangle soups to indexed meshes.
+
+A triangle soup duplicates each vertex for each triangle which shares it.  The function :func:`weld`
+merges the vertexes which have the same position and normal, up to a tolerance, and returns the
+indices to draw the mesh using ``glDrawElements``::
+
+  positions, normals, colours, indices = weld_mesh(positions, normals, colours)
+
+"""
+
+####################################################################################################
+
+import numpy as np
+
+####################################################################################################
+
+def index_dtype(number_of_vertexes):
+
+    """ Return the smallest index data type, uint16 or uint32, for a number of vertexes. """
+
+    if number_of_vertexes <= 2**16:
+        return np.dtype(np.uint16)
+    else:
+        return np.dtype(np.uint32)
+
+####################################################################################################
+
+def quantize(array, tolerance):
+
+    """ Return the array rounded to a multiple of *tolerance* as integers. """
+
+    return np.floor(np.asarray(array, dtype=np.float64) / tolerance + .5).astype(np.int64)
+
+####################################################################################################
+
+def weld(positions, normals=None, colours=None,
+         tolerance=1e-5, normal_tolerance=1e-3, colour_tolerance=1/512.):
+
+    """ Merge the vertexes having the same quantized position, normal and colour.
+
+    Return the pair (*vertexes*, *indices*), where *vertexes* is the array of the indexes of the
+    kept vertexes in the input arrays, in order of first appearance, and *indices* is the array of
+    the indexes of the input vertexes in the welded arrays.  The indices have the smallest data type
+    given by :func:`index_dtype`.
+
+    The quantized attributes of a vertex are packed in a key, and the keys are deduplicated using
+    one vectorised :func:`numpy.unique`.
+    """
+
+    keys = [quantize(positions, tolerance)]
+    if normals is not None:
+        keys.append(quantize(normals, normal_tolerance))
+    if colours is not None:
+        keys.append(quantize(colours, colour_tolerance))
+    keys = np.ascontiguousarray(np.hstack(keys))
+    # view a row as an opaque key
+    keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+
+    unique_keys, first_vertexes, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    # Keep the order of first appearance, so as to preserve the locality of the triangles
+    order = np.argsort(first_vertexes)
+    vertexes = first_vertexes[order]
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+    indices = rank[inverse.ravel()].astype(index_dtype(vertexes.size))
+
+    return vertexes, indices
+
+####################################################################################################
+
+def weld_mesh(positions, normals, colours=None, **kwargs):
+
+    """ Weld a triangle soup and return the tuple (*positions*, *normals*, *colours*, *indices*),
+    *colours* can be a single colour.  The keyword arguments are passed to :func:`weld`.
+    """
+
+    per_vertex_colours = colours is not None and np.ndim(colours) > 1
+    vertexes, indices = weld(positions, normals, colours if per_vertex_colours else None, **kwargs)
+    positions = positions[vertexes]
+    normals = normals[vertexes]
+    if per_vertex_colours:
+        colours = colours[vertexes]
+
+    return positions, normals, colours, indices
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
@@ -37,13 +37,13 @@ class TimerContextManager(object):
 
     def __enter__(self):
 
-        self._start = time.clock()
+        self._start = time.perf_counter()
 
     ##############################################
     
     def __exit__(self, type_, value, traceback):
 
-        dt = time.clock() - self._start
+        dt = time.perf_counter() - self._start
         self._logger.info("{} dt = {} s".format(self._title, dt))
 
 ####################################################################################################
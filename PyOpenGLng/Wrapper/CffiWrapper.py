@@ -697,6 +697,12 @@ class GlCommandWrapper(object):
 
     ##############################################
 
+    @property
+    def name(self):
+        return str(self._command)
+
+    ##############################################
+
     @property
     def call_counter(self):
         return self._call_counter
@@ -0,0 +1,578 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""This module implements evaluators for the size of the output arrays.
+
+The XML registry tags the size of some pointer parameters as ``COMPSIZE(...)``: the size is
+computed from the listed parameters and possibly from the current GL state, but the registry doesn't
+provide the formulae.  Some commands like ``glGetShaderInfoLog`` have a size parameter, but the
+right value must be queried before.  The evaluators defined here interpret these cases so as the
+wrapper can allocate exactly the output arrays when they are omitted in the call:
+
+* the glGet family, e.g. ``glGetFloatv(pname)``, using the getter table of
+  :mod:`PyOpenGLng.GlApi.Getter`,
+* the pixel transfer commands, e.g. ``glReadPixels(x, y, width, height, format, type)``, using
+  byte-size tables for the pixel formats and types,
+* ``glGetTexImage(target, level, format, type)``, using the texture level parameters,
+* the program and shader info queries, e.g. ``glGetShaderInfoLog(shader)``, using a size query.
+
+"""
+
+####################################################################################################
+
+import six
+
+####################################################################################################
+
+import logging
+import re
+
+import numpy as np
+
+####################################################################################################
+
+import PyOpenGLng.GlApi.Getter as Getter
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+#: Suffixes of the getter commands, e.g. glGetFloatv -> glGet, glGetTexParameteriv -> glGetTexParameter
+__getter_suffixes__ = (
+    'Integer64i_v', 'Booleani_v', 'Integeri_v', 'Floati_v', 'Doublei_v',
+    'Integer64v', 'Booleanv', 'Integerv', 'Floatv', 'Doublev',
+    'ui64v', 'i64v', 'Iuiv', 'Iiv', 'uiv', 'iv', 'fv', 'dv', 'xv', 'v',
+    )
+
+#: Size per index of the indexed getters, e.g. glGetIntegeri_v, when it differs from the size of the
+#: non-indexed getter, i.e. for the vectors whose components are queried by index
+__indexed_getter_sizes__ = {
+    'GL_MAX_COMPUTE_WORK_GROUP_COUNT':1,
+    'GL_MAX_COMPUTE_WORK_GROUP_SIZE':1,
+    }
+
+#: Number of components of the pixel formats
+__pixel_format_components__ = {
+    'GL_RED':1, 'GL_GREEN':1, 'GL_BLUE':1, 'GL_ALPHA':1, 'GL_LUMINANCE':1,
+    'GL_RED_INTEGER':1, 'GL_GREEN_INTEGER':1, 'GL_BLUE_INTEGER':1,
+    'GL_DEPTH_COMPONENT':1, 'GL_STENCIL_INDEX':1, 'GL_DEPTH_STENCIL':1, 'GL_COLOR_INDEX':1,
+    'GL_RG':2, 'GL_RG_INTEGER':2, 'GL_LUMINANCE_ALPHA':2,
+    'GL_RGB':3, 'GL_BGR':3, 'GL_RGB_INTEGER':3, 'GL_BGR_INTEGER':3,
+    'GL_RGBA':4, 'GL_BGRA':4, 'GL_RGBA_INTEGER':4, 'GL_BGRA_INTEGER':4,
+    }
+
+#: Numpy data type of the pixel types
+__pixel_type_dtype__ = {
+    'GL_UNSIGNED_BYTE':np.uint8,
+    'GL_BYTE':np.int8,
+    'GL_UNSIGNED_SHORT':np.uint16,
+    'GL_SHORT':np.int16,
+    'GL_UNSIGNED_INT':np.uint32,
+    'GL_INT':np.int32,
+    'GL_HALF_FLOAT':np.float16,
+    'GL_FLOAT':np.float32,
+    'GL_DOUBLE':np.float64,
+    }
+
+#: Numpy data type and number of elements per pixel of the packed pixel types
+__packed_pixel_type_dtype__ = {
+    'GL_UNSIGNED_BYTE_3_3_2':(np.uint8, 1),
+    'GL_UNSIGNED_BYTE_2_3_3_REV':(np.uint8, 1),
+    'GL_UNSIGNED_SHORT_5_6_5':(np.uint16, 1),
+    'GL_UNSIGNED_SHORT_5_6_5_REV':(np.uint16, 1),
+    'GL_UNSIGNED_SHORT_4_4_4_4':(np.uint16, 1),
+    'GL_UNSIGNED_SHORT_4_4_4_4_REV':(np.uint16, 1),
+    'GL_UNSIGNED_SHORT_5_5_5_1':(np.uint16, 1),
+    'GL_UNSIGNED_SHORT_1_5_5_5_REV':(np.uint16, 1),
+    'GL_UNSIGNED_INT_8_8_8_8':(np.uint32, 1),
+    'GL_UNSIGNED_INT_8_8_8_8_REV':(np.uint32, 1),
+    'GL_UNSIGNED_INT_10_10_10_2':(np.uint32, 1),
+    'GL_UNSIGNED_INT_2_10_10_10_REV':(np.uint32, 1),
+    'GL_UNSIGNED_INT_24_8':(np.uint32, 1),
+    'GL_UNSIGNED_INT_10F_11F_11F_REV':(np.uint32, 1),
+    'GL_UNSIGNED_INT_5_9_9_9_REV':(np.uint32, 1),
+    'GL_FLOAT_32_UNSIGNED_INT_24_8_REV':(np.uint32, 2),
+    }
+
+#: Size queries for the commands having a size parameter which must be queried before, the tuple
+#: gives the getter command, the object parameter name and the pname.
+__size_queries__ = {
+    'glGetActiveAttrib':('glGetProgramiv', 'program', 'GL_ACTIVE_ATTRIBUTE_MAX_LENGTH'),
+    'glGetActiveUniform':('glGetProgramiv', 'program', 'GL_ACTIVE_UNIFORM_MAX_LENGTH'),
+    'glGetActiveUniformBlockName':('glGetProgramiv', 'program', 'GL_ACTIVE_UNIFORM_BLOCK_MAX_NAME_LENGTH'),
+    'glGetProgramBinary':('glGetProgramiv', 'program', 'GL_PROGRAM_BINARY_LENGTH'),
+    'glGetProgramInfoLog':('glGetProgramiv', 'program', 'GL_INFO_LOG_LENGTH'),
+    'glGetProgramPipelineInfoLog':('glGetProgramPipelineiv', 'pipeline', 'GL_INFO_LOG_LENGTH'),
+    'glGetShaderInfoLog':('glGetShaderiv', 'shader', 'GL_INFO_LOG_LENGTH'),
+    'glGetShaderSource':('glGetShaderiv', 'shader', 'GL_SHADER_SOURCE_LENGTH'),
+    'glGetTransformFeedbackVarying':('glGetProgramiv', 'program', 'GL_TRANSFORM_FEEDBACK_VARYING_MAX_LENGTH'),
+    }
+
+####################################################################################################
+
+def parse_computed_size(length):
+
+    """ Return the parameter names of a ``COMPSIZE(...)`` expression as a tuple. """
+
+    match = re.match(r'^COMPSIZE\((.*)\)$', length)
+    if match is None:
+        raise ValueError("Malformed computed size " + length)
+    return tuple(name.strip() for name in match.group(1).split(',') if name.strip())
+
+####################################################################################################
+
+def getter_family(command_name):
+
+    """ Return the key of :attr:`Getter.commands_dict` corresponding to a getter command, e.g.
+    *glGet* for *glGetFloatv*, or :obj:`None` if the command is not a getter.
+    """
+
+    if command_name in Getter.commands_dict:
+        return command_name
+    for suffix in __getter_suffixes__:
+        if command_name.endswith(suffix):
+            family = command_name[:-len(suffix)]
+            if family in Getter.commands_dict:
+                return family
+    return None
+
+####################################################################################################
+
+class OutputArrayPool(object):
+
+    """ This class implements a pool of reusable output arrays indexed by data type and shape.
+
+    An array provided by the pool is overwritten by the next command that requests an array of the
+    same data type and shape, thus the caller must copy it if it must be kept.
+    """
+
+    ##############################################
+
+    def __init__(self):
+
+        self._arrays = {}
+
+    ##############################################
+
+    def __len__(self):
+
+        return len(self._arrays)
+
+    ##############################################
+
+    def get(self, dtype, shape):
+
+        """ Return an array for the given data type and shape. """
+
+        key = (np.dtype(dtype).str, tuple(shape))
+        array = self._arrays.get(key, None)
+        if array is None:
+            array = np.empty(shape, dtype=dtype)
+            self._arrays[key] = array
+        return array
+
+    ##############################################
+
+    def clear(self):
+
+        """ Release the arrays. """
+
+        self._arrays.clear()
+
+####################################################################################################
+
+class ComputedSize(object):
+
+    """ Base class for size evaluators.
+
+    The parameter *arguments* of the methods is a dictionary of the Python arguments of the call
+    indexed by their parameter names.
+    """
+
+    #: The output is returned as a list, else as a Numpy array
+    as_list = False
+
+    ##############################################
+
+    def __init__(self, wrapper, parameter):
+
+        self._wrapper = wrapper
+        self._parameter = parameter
+
+    ##############################################
+
+    def _query_integer(self, command_name, *args):
+
+        """ Query an integer using a getter command, the output array is appended to *args*. """
+
+        data = np.zeros(1, dtype=np.int32)
+        getattr(self._wrapper.commands, command_name)(*(args + (data,)))
+        return int(data[0])
+
+    ##############################################
+
+    def size(self, arguments):
+
+        """ Return the number of elements. """
+
+        raise NotImplementedError
+
+    ##############################################
+
+    def dtype(self, arguments):
+
+        """ Return the data type of the elements. """
+
+        raise NotImplementedError
+
+    ##############################################
+
+    def shape(self, arguments):
+
+        """ Return the shape of the output array. """
+
+        return (self.size(arguments),)
+
+    ##############################################
+
+    def nbytes(self, arguments):
+
+        """ Return the minimal number of bytes, i.e. without row padding. """
+
+        return int(np.prod(self.shape(arguments))) * np.dtype(self.dtype(arguments)).itemsize
+
+    ##############################################
+
+    def allocate(self, arguments, pool=None):
+
+        """ Return a new output array or an array from *pool*. """
+
+        shape = self.shape(arguments)
+        dtype = self.dtype(arguments)
+        if pool is not None:
+            return pool.get(dtype, shape)
+        else:
+            return np.zeros(shape, dtype=dtype)
+
+####################################################################################################
+
+class GetterComputedSize(ComputedSize):
+
+    """ Evaluate the size of a getter output from the query enum, e.g. ``glGetFloatv(pname)``.
+
+    If *indexed* is set, the getter queries an element of an indexed state, e.g.
+    ``glGetIntegeri_v(target, index)``, which is sized per index.
+    """
+
+    as_list = True
+
+    _logger = _module_logger.getChild('GetterComputedSize')
+
+    _size_query_pattern = re.compile(r'^glGetInteger\((GL_\w+)\)$')
+
+    ##############################################
+
+    def __init__(self, wrapper, parameter, dtype, enum_name, command_dict, indexed=False):
+
+        super(GetterComputedSize, self).__init__(wrapper, parameter)
+
+        self._dtype = dtype
+        self._enum_name = enum_name
+
+        self._sizes = {}
+        for enum, (type_, size) in six.iteritems(command_dict):
+            enum_value = getattr(wrapper.enums, enum, None)
+            if enum_value is None:
+                continue
+            if indexed:
+                size = __indexed_getter_sizes__.get(enum, size)
+            if isinstance(size, six.string_types):
+                # The size is given by the GL state, e.g. glGetInteger(GL_NUM_COMPRESSED_TEXTURE_FORMATS)
+                match = self._size_query_pattern.match(size)
+                size_enum_value = getattr(wrapper.enums, match.group(1), None) if match else None
+                if size_enum_value is None:
+                    self._logger.warning("Unsupported size %s for %s", size, enum)
+                    continue
+                size = -size_enum_value
+            self._sizes[enum_value] = size
+
+    ##############################################
+
+    def size(self, arguments):
+
+        enum_value = arguments[self._enum_name]
+        try:
+            size = self._sizes[enum_value]
+        except KeyError:
+            enum_name = self._wrapper.reverse_enums.get(enum_value, str(enum_value))
+            raise ValueError("The output size for %s is unknown, an output array must be provided" % enum_name)
+        if size < 0:
+            size = self._query_integer('glGetIntegerv', -size)
+
+        return size
+
+    ##############################################
+
+    def dtype(self, arguments):
+
+        return self._dtype
+
+####################################################################################################
+
+class PixelComputedSize(ComputedSize):
+
+    """ Evaluate the size of a pixel array from its format, type and dimensions, e.g.
+    ``glReadPixels(x, y, width, height, format, type)``.
+
+    The array has the shape (height, width, number of components), the height and the component axis
+    are removed if they equal one, and a depth axis is prepended for 3D images.  For packed pixel
+    types the component axis is replaced by the number of packed words per pixel.
+
+    The rows are padded according to ``GL_PACK_ALIGNMENT``, which is only queried when it matters,
+    in this case the returned array is a view with the corresponding row stride.
+    """
+
+    ##############################################
+
+    def __init__(self, wrapper, parameter):
+
+        super(PixelComputedSize, self).__init__(wrapper, parameter)
+
+        self._format_components = self._enum_table(__pixel_format_components__)
+        self._type_dtype = {key:(dtype, None) for key, dtype in
+                            six.iteritems(self._enum_table(__pixel_type_dtype__))}
+        self._type_dtype.update(self._enum_table(__packed_pixel_type_dtype__))
+        self._pack_alignment = getattr(wrapper.enums, 'GL_PACK_ALIGNMENT', None)
+
+    ##############################################
+
+    def _enum_table(self, table):
+
+        """ Translate a table indexed by enum names to a table indexed by enum values. """
+
+        enums = self._wrapper.enums
+        return {getattr(enums, name):value for name, value in six.iteritems(table) if hasattr(enums, name)}
+
+    ##############################################
+
+    def _dimensions(self, arguments):
+
+        """ Return the image dimensions as a tuple (depth, height, width). """
+
+        return (arguments.get('depth', 1), arguments.get('height', 1), arguments['width'])
+
+    ##############################################
+
+    def _pixel_layout(self, arguments):
+
+        """ Return the data type and the number of elements per pixel. """
+
+        format_, type_ = arguments['format'], arguments['type']
+        try:
+            dtype, number_of_elements = self._type_dtype[type_]
+            if number_of_elements is None:
+                number_of_elements = self._format_components[format_]
+        except KeyError:
+            raise ValueError("Unsupported pixel format %s or type %s" %
+                             (self._wrapper.reverse_enums.get(format_, format_),
+                              self._wrapper.reverse_enums.get(type_, type_)))
+
+        return np.dtype(dtype), number_of_elements
+
+    ##############################################
+
+    def dtype(self, arguments):
+
+        return self._pixel_layout(arguments)[0]
+
+    ##############################################
+
+    def shape(self, arguments):
+
+        depth, height, width = self._dimensions(arguments)
+        dtype, number_of_elements = self._pixel_layout(arguments)
+        shape = [width]
+        if number_of_elements > 1:
+            shape.append(number_of_elements)
+        if height > 1 or depth > 1:
+            shape.insert(0, height)
+        if depth > 1:
+            shape.insert(0, depth)
+
+        return tuple(shape)
+
+    ##############################################
+
+    def size(self, arguments):
+
+        return int(np.prod(self.shape(arguments)))
+
+    ##############################################
+
+    def _row_stride(self, row_nbytes):
+
+        """ Return the number of bytes of a row according to the pack alignment. """
+
+        # The alignment is 1, 2, 4 or 8, thus we don't need to query it for this case
+        if row_nbytes % 8 == 0 or self._pack_alignment is None:
+            return row_nbytes
+        alignment = self._query_integer('glGetIntegerv', self._pack_alignment)
+        return ((row_nbytes + alignment -1) // alignment) * alignment
+
+    ##############################################
+
+    def allocate(self, arguments, pool=None):
+
+        depth, height, width = self._dimensions(arguments)
+        dtype, number_of_elements = self._pixel_layout(arguments)
+        row_nbytes = width * number_of_elements * dtype.itemsize
+        if height == 1 and depth == 1:
+            row_stride = row_nbytes
+        else:
+            row_stride = self._row_stride(row_nbytes)
+        if row_stride == row_nbytes:
+            return super(PixelComputedSize, self).allocate(arguments, pool)
+        shape = self.shape(arguments)
+
+        # Allocate padded rows and return a view
+        raw_shape = (depth*height*row_stride,)
+        if pool is not None:
+            raw_array = pool.get(np.uint8, raw_shape)
+        else:
+            raw_array = np.zeros(raw_shape, dtype=np.uint8)
+        strides = [row_stride]
+        if depth > 1:
+            strides.insert(0, height*row_stride)
+        if number_of_elements > 1:
+            strides += [number_of_elements*dtype.itemsize, dtype.itemsize]
+        else:
+            strides.append(dtype.itemsize)
+        return np.ndarray(shape=shape, dtype=dtype, buffer=raw_array, strides=strides)
+
+####################################################################################################
+
+class TextureImageComputedSize(PixelComputedSize):
+
+    """ Evaluate the size of a texture image from the texture level parameters, e.g.
+    ``glGetTexImage(target, level, format, type)``.
+    """
+
+    ##############################################
+
+    def _dimensions(self, arguments):
+
+        target, level = arguments['target'], arguments['level']
+        enums = self._wrapper.enums
+        return tuple(self._query_integer('glGetTexLevelParameteriv', target, level, pname)
+                     for pname in (enums.GL_TEXTURE_DEPTH, enums.GL_TEXTURE_HEIGHT, enums.GL_TEXTURE_WIDTH))
+
+    ##############################################
+
+    def shape(self, arguments):
+
+        # Don't query the dimensions twice
+        arguments = dict(arguments)
+        arguments['depth'], arguments['height'], arguments['width'] = self._dimensions(arguments)
+        return super(TextureImageComputedSize, self).shape(arguments)
+
+####################################################################################################
+
+class QueriedSize(ComputedSize):
+
+    """ Evaluate the size of an output array using a size query, e.g. ``glGetShaderInfoLog(shader)``
+    queries ``GL_INFO_LOG_LENGTH`` using ``glGetShaderiv``.
+    """
+
+    ##############################################
+
+    def __init__(self, wrapper, parameter, command_name, object_name, pname):
+
+        super(QueriedSize, self).__init__(wrapper, parameter)
+
+        self._command_name = command_name
+        self._object_name = object_name
+        self._pname = getattr(wrapper.enums, pname)
+
+    ##############################################
+
+    def size(self, arguments):
+
+        size = self._query_integer(self._command_name, arguments[self._object_name], self._pname)
+        # the length includes the null terminator and it is zero if there is no log
+        return max(size, 1)
+
+    ##############################################
+
+    def dtype(self, arguments):
+
+        return np.uint8
+
+####################################################################################################
+
+def computed_size_evaluator(wrapper, command, parameter, dtype=None, input_pointer=False):
+
+    """ Return a size evaluator for the output pointer *parameter* of *command* or :obj:`None` if
+    the size cannot be evaluated.  The parameter *dtype* is the Numpy data type of a typed pointer.
+
+    If *input_pointer* is set, then an evaluator is returned for a const pointer, e.g. the *pixels*
+    parameter of ``glTexImage2D``, in order to validate the input array.
+    """
+
+    command_name = str(command)
+
+    if parameter.const != input_pointer:
+        return None
+
+    if not parameter.computed_size:
+        query = __size_queries__.get(command_name, None)
+        if query is not None and hasattr(wrapper.commands, query[0]):
+            return QueriedSize(wrapper, parameter, *query)
+        else:
+            return None
+
+    argument_names = parse_computed_size(parameter.size_parameter)
+
+    family = getter_family(command_name)
+    if family is not None and dtype is not None:
+        if len(argument_names) == 1:
+            enum_name = argument_names[0]
+        elif 'pname' in argument_names:
+            enum_name = 'pname'
+        else:
+            return None
+        indexed = command_name.endswith('i_v')
+        return GetterComputedSize(wrapper, parameter, dtype, enum_name, Getter.commands_dict[family],
+                                  indexed)
+
+    if parameter.is_generic_pointer():
+        if set(('format', 'type', 'width')) <= set(argument_names):
+            return PixelComputedSize(wrapper, parameter)
+        elif argument_names == ('target', 'level', 'format', 'type') and hasattr(wrapper.commands, 'glGetTexLevelParameteriv'):
+            return TextureImageComputedSize(wrapper, parameter)
+
+    return None
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
@@ -29,10 +29,11 @@ import six
 
 ####################################################################################################
 
-import collections
+import collections.abc
 import ctypes
 import logging
 import os
+import re
 import subprocess
 import sys
 import types
@@ -41,10 +42,12 @@ import numpy as np
 
 ####################################################################################################
 
+from .ComputedSize import OutputArrayPool, computed_size_evaluator
 from .PythonicWrapper import PythonicWrapper
+from .StateSnapshot import GetterBatch, queryable_states, diff
+from .Validation import EnumGroups, check_validation_level, compile_validators
 from PyOpenGLng.Tools.Timer import TimerContextManager
 import PyOpenGLng.Config as Config
-import PyOpenGLng.GlApi.Getter as Getter
 
 ####################################################################################################
 
@@ -72,14 +75,15 @@ __to_ctypes_type__ = {
     'intptr_t':ctypes.c_void_p, # ?
     'ptrdiff_t':ctypes.c_void_p, # int64 ?
     'ssize_t':ctypes.c_uint64, # ?
+    'GLsync':ctypes.c_void_p, # opaque pointer, passed as an integer
     }
 
 __numpy_to_ctypes_type__ = {
-    '<u1':ctypes.c_uint8,
+    '|u1':ctypes.c_uint8, # byte order is not applicable
     '<u2':ctypes.c_uint16,
     '<u4':ctypes.c_uint32,
     '<u8':ctypes.c_uint64,
-    '<i1':ctypes.c_int8,
+    '|i1':ctypes.c_int8,
     '<i2':ctypes.c_int16,
     '<i4':ctypes.c_int32,
     '<i8':ctypes.c_int64,
@@ -108,6 +112,29 @@ __command_directives__ = {
 
 ####################################################################################################
 
+_uniform_command_pattern = re.compile(r'^gl(?:Program)?Uniform(Matrix)?([1-4])(?:x([2-4]))?'
+                                      r'(?:ui64|i64|ui|i|f|d)v')
+
+def command_element_size(command_name):
+
+    """ Return the number of components of the GL type which is passed per element of the array of
+    a command, e.g. 4 for ``glUniform4fv`` (vec4) and 16 for ``glUniformMatrix4fv`` (mat4), else 1.
+    """
+
+    match = _uniform_command_pattern.match(command_name)
+    if match is None:
+        return 1
+    matrix, number_of_columns, number_of_rows = match.groups()
+    number_of_columns = int(number_of_columns)
+    if matrix is None:
+        return number_of_columns
+    elif number_of_rows is None:
+        return number_of_columns**2
+    else:
+        return number_of_columns * int(number_of_rows)
+
+####################################################################################################
+
 def check_numpy_type(array, ctypes_type):
     """ Check the Numpy array data type is same as *ctypes_type*. """
     if numpy_to_ctypes_type(array) != ctypes_type:
@@ -149,6 +176,19 @@ class ParameterWrapperBase(object):
 
     """ Base class for parameter wrapper. """
 
+    #: Size evaluator for an output array which can be omitted in the call, see :mod:`.ComputedSize`
+    size_evaluator = None
+
+    #: Check the data type of the Numpy arrays, unset by the validation level *off*
+    check_type = True
+
+    ##############################################
+
+    @property
+    def name(self):
+        """ Name of the parameter in the Python prototype. """
+        return self._parameter.name
+
     ##############################################
 
     def repr_string(self, parameter):
@@ -199,7 +239,8 @@ class PointerWrapper(ParameterWrapperBase):
     :meth:`__str__` method, else a Numpy array must be provided and the data type is only checked if
     the pointer is not generic.
 
-    If the parameter value is :obj:`None`, the value is passed as is.
+    If the parameter value is :obj:`None`, the value is passed as is.  If the pointer is generic, an
+    integer can be passed, e.g. an offset in a buffer object for ``glVertexAttribPointer``.
     """
 
     _logger = _module_logger.getChild('PointerWrapper')
@@ -226,19 +267,37 @@ class PointerWrapper(ParameterWrapperBase):
         elif isinstance(parameter, np.ndarray):
             if self._logger.isEnabledFor(logging.DEBUG):
                 self._logger.debug('ndarray')
-            if self._type != ctypes.c_void_p:
+            if self.check_type and self._type != ctypes.c_void_p:
                 check_numpy_type(parameter, self._type)
             ctypes_parameter = parameter.ctypes.data_as(ctypes.POINTER(self._type))
         elif parameter is None:
             if self._logger.isEnabledFor(logging.DEBUG):
                 self._logger.debug('None')
             ctypes_parameter = None # already done
+        elif self._type == ctypes.c_void_p and isinstance(parameter, six.integer_types):
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug('offset')
+            # e.g. glVertexAttribPointer: offset in the bound buffer
+            ctypes_parameter = ctypes.c_void_p(parameter)
         else:
             raise NotImplementedError
         c_parameters[self._location] = ctypes_parameter
 
         return None
 
+    ##############################################
+
+    def from_size_evaluator(self, arguments, c_parameters, pool=None):
+
+        """ Allocate the output array using the size evaluator. """
+
+        array = self.size_evaluator.allocate(arguments, pool)
+        self.from_python(array, c_parameters)
+        if self.size_evaluator.as_list:
+            return ArrayToListConverter(array)
+        else:
+            return IdentityConverter(array)
+
 ####################################################################################################
 
 class ReferenceWrapper(ParameterWrapperBase):
@@ -297,6 +356,12 @@ class ArrayWrapper(ParameterWrapperBase):
 
     ##############################################
 
+    @property
+    def name(self):
+        return self._pointer_parameter.name
+
+    ##############################################
+
     def __repr__(self):
 
         return self.repr_string(self._pointer_parameter)
@@ -318,6 +383,8 @@ class OutputArrayWrapper(ArrayWrapper):
     If the user passes a size, then a Numpy (or a list) array is created and returned.
     <<size_parameter_threshold>>
 
+    If the size can be queried, e.g. for ``glGetShaderInfoLog``, then the parameter can be omitted.
+
     """
 
     _logger = _module_logger.getChild('OutputArrayWrapper')
@@ -359,7 +426,8 @@ class OutputArrayWrapper(ArrayWrapper):
             # Typed pointer
             # The output array is provided by user
             array = parameter
-            check_numpy_type(array, self._pointer_type)
+            if self.check_type:
+                check_numpy_type(array, self._pointer_type)
             c_parameters[self._size_location] = self._size_type(array.size)
             ctypes_parameter = array.ctypes.data_as(ctypes.POINTER(self._pointer_type))
             c_parameters[self._pointer_location] = ctypes_parameter
@@ -382,6 +450,20 @@ class OutputArrayWrapper(ArrayWrapper):
             c_parameters[self._pointer_location] = ctypes_parameter
             return to_python_converter
 
+    ##############################################
+
+    def from_size_evaluator(self, arguments, c_parameters, pool=None):
+
+        """ Set the size using the size evaluator. """
+
+        size = self.size_evaluator.size(arguments)
+        if self._pointer_type == ctypes.c_void_p:
+            array = np.zeros(size, dtype=np.uint8)
+            self.from_python(array, c_parameters)
+            return IdentityConverter(array)
+        else:
+            return self.from_python(size, c_parameters)
+
 ####################################################################################################
 
 class InputArrayWrapper(ArrayWrapper):
@@ -390,6 +472,21 @@ class InputArrayWrapper(ArrayWrapper):
 
     ##############################################
 
+    def __init__(self, size_parameter, element_size=1):
+
+        """ The parameter *element_size* is the number of components of the GL type of an element,
+        it is used when the registry doesn't give the size multiplier.
+        """
+
+        super(InputArrayWrapper, self).__init__(size_parameter)
+
+        if self._pointer_parameter.size_multiplier > 1:
+            self._element_size = self._pointer_parameter.size_multiplier
+        else:
+            self._element_size = element_size
+
+    ##############################################
+
     def from_python(self, array, c_parameters):
 
         # print array
@@ -418,22 +515,20 @@ class InputArrayWrapper(ArrayWrapper):
                 self._logger.debug('ndarray')
             if self._pointer_type == ctypes.c_void_p:
                 size_parameter = array.nbytes
-            elif self._pointer_type == ctypes.c_float: # fixme
-                size_parameter = 1 # array.shape[0]
-            # else:
-            #     size_parameter = array.nbytes
-            # ctypes_parameter = array.ctypes.data_as(ctypes.c_void_p)
+            else:
+                # e.g. glUniformMatrix4fv: count = size/16
+                size_parameter = array.size // self._element_size
             ctypes_parameter = array.ctypes.data_as(ctypes.POINTER(self._pointer_type))
-        elif isinstance(array, collections.Iterable):
+        elif self._pointer_type == ctypes.c_void_p and isinstance(array, six.integer_types):
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug('size -> void * = NULL')
+            # e.g. glBufferData: allocate a store of the given size in byte without initialising it
+            size_parameter = array
+            ctypes_parameter = None
+        elif isinstance(array, collections.abc.Iterable):
             size_parameter = len(array)
             array_type = self._pointer_type * size_parameter
-            if six.PY3:
-                if size_parameter > 1:
-                    ctypes_parameter = array_type(array)
-                else:
-                    ctypes_parameter = array_type(array[0])
-            else:
-                ctypes_parameter = array_type(array)
+            ctypes_parameter = array_type(*array)
         else:
             raise ValueError(str(array))
 
@@ -468,6 +563,11 @@ class ListConverter(ToPythonConverter):
     def __call__(self):
         return list(self._c_object)
 
+class ArrayToListConverter(ToPythonConverter):
+    """ Convert the Numpy array to a Python list. """
+    def __call__(self):
+        return self._c_object.tolist()
+
 class ValueConverter(ToPythonConverter):
     """ Get the Python value of the ctype object. """
     def __call__(self):
@@ -501,6 +601,8 @@ class GlCommandWrapper(object):
         self._command = command
         self._number_of_parameters = command.number_of_parameters
         self._call_counter = 0
+        self._check_arguments = True
+        self._validators = ()
 
         try:
             self._function = getattr(self._wrapper.libGL, str(command))
@@ -517,7 +619,7 @@ class GlCommandWrapper(object):
         self._parameter_wrappers = []
         self._reference_parameter_wrappers = []
         for parameter in command.parameters:
-            if parameter.type in ('GLsync', 'GLDEBUGPROC'):
+            if parameter.type == 'GLDEBUGPROC':
                 raise NotImplementedError
             parameter_wrapper = None
             if command_directive and parameter.name in command_directive:
@@ -540,7 +642,7 @@ class GlCommandWrapper(object):
                 #     glShaderSource
                 pointer_parameter = parameter.pointer_parameters[0]
                 if pointer_parameter.const:
-                    parameter_wrapper = InputArrayWrapper(parameter)
+                    parameter_wrapper = InputArrayWrapper(parameter, command_element_size(str(command)))
                 else:
                     parameter_wrapper = OutputArrayWrapper(parameter)
             else:
@@ -551,16 +653,18 @@ class GlCommandWrapper(object):
                 else:
                     parameter_list = self._parameter_wrappers
                 parameter_list.append(parameter_wrapper)
+        self._minimum_number_of_parameters = len(self._parameter_wrappers)
+        self._parameter_names = [parameter_wrapper.name for parameter_wrapper in self._parameter_wrappers]
 
         return_type = command.return_type
-        if return_type.type == 'GLsync':
-            raise NotImplementedError
-        elif return_type.type != 'void': # Fixme: .type or .c_type?
+        if return_type.type != 'void' or return_type.pointer: # Fixme: .type or .c_type?
             # Fixme: -> to func?
             ctypes_type = to_ctypes_type(return_type)
             if return_type.pointer:
                 if ctypes_type == ctypes.c_ubyte: # return type is char *
                     ctypes_type = ctypes.c_char_p
+                elif ctypes_type == ctypes.c_void_p: # e.g. glMapBufferRange, returns an int or None
+                    pass
                 else:
                     raise NotImplementedError
             self._function.restype = ctypes_type
@@ -569,17 +673,6 @@ class GlCommandWrapper(object):
             self._function.restype = None
             self._return_void = True # Fixme: required or doublon?
 
-        # Getter
-        if command.name in Getter.commands_dict:
-            command_dict = Getter.commands_dict[command.name]
-            self._getter = {}
-            for enum, type_and_size in six.iteritems(command_dict):
-                try:
-                    enum_value = getattr(wrapper.enums, enum)
-                    self._getter[enum_value] = type_and_size
-                except AttributeError:
-                    self._logger.warn("Enum {} not found".format(enum))
-
         manual_page = self._manual_page()
         if manual_page is not None:
             doc = '%s - %s\n\n' % (self._command, manual_page.purpose)
@@ -590,17 +683,70 @@ class GlCommandWrapper(object):
 
     ##############################################
 
+    def init_size_evaluators(self):
+
+        """ Set the size evaluators of the trailing output parameters which can be omitted in the
+        call.  This method must be called when all the commands are wrapped, since the evaluators can
+        rely on other commands.
+        """
+
+        for parameter_wrapper in reversed(self._parameter_wrappers):
+            if isinstance(parameter_wrapper, PointerWrapper):
+                parameter = parameter_wrapper._parameter
+                if parameter_wrapper._type == ctypes.c_void_p:
+                    dtype = None
+                else:
+                    dtype = np.dtype(parameter_wrapper._type)
+            elif isinstance(parameter_wrapper, OutputArrayWrapper):
+                parameter = parameter_wrapper._pointer_parameter
+                dtype = None
+            else:
+                break
+            size_evaluator = computed_size_evaluator(self._wrapper, self._command, parameter, dtype)
+            if size_evaluator is None:
+                break
+            parameter_wrapper.size_evaluator = size_evaluator
+            self._minimum_number_of_parameters -= 1
+
+    ##############################################
+
+    def set_validation_level(self, level, enum_groups=None):
+
+        """ Set the validation level, see :mod:`.Validation`.  The parameter *enum_groups* is an
+        :class:`.Validation.EnumGroups` instance required for the *strict* level.
+        """
+
+        check_validation_level(level)
+        self._check_arguments = level != 'off'
+        for parameter_wrapper in self._parameter_wrappers:
+            parameter_wrapper.check_type = level != 'off'
+        if level == 'strict':
+            self._validators = compile_validators(self, enum_groups)
+        else:
+            self._validators = ()
+
+    ##############################################
+
     def __call__(self, *args, **kwargs):
 
         self._call_counter += 1
 
-        if len(self._parameter_wrappers) != len(args):
+        number_of_args = len(args)
+        auto_sized = self._minimum_number_of_parameters <= number_of_args < len(self._parameter_wrappers)
+        if self._check_arguments and len(self._parameter_wrappers) != number_of_args and not auto_sized:
             self._logger.warn("%s requires %u arguments, but %u was given\n  %s\n  %s",
                               str(self._command), len(self._parameter_wrappers), len(args),
                               self._command.prototype(),
                               str([parameter_wrapper.__class__.__name__
                                    for parameter_wrapper in self._parameter_wrappers]))
 
+        arguments = None
+        if self._validators:
+            arguments = dict(zip(self._parameter_names, args))
+            for validator in self._validators:
+                if validator.index < number_of_args: # skip omitted output arrays
+                    validator(args, arguments)
+
         # Initialise the input/output parameter array
         c_parameters = [None]*self._number_of_parameters
         to_python_converters = []
@@ -610,6 +756,14 @@ class GlCommandWrapper(object):
             to_python_converter = parameter_wrapper.from_python(parameter, c_parameters)
             if to_python_converter is not None:
                 to_python_converters.append(to_python_converter)
+        # then allocate the omitted output arrays
+        if auto_sized:
+            if arguments is None:
+                arguments = dict(zip(self._parameter_names, args))
+            for parameter_wrapper in self._parameter_wrappers[number_of_args:]:
+                to_python_converter = parameter_wrapper.from_size_evaluator(arguments, c_parameters,
+                                                                            self._wrapper.output_array_pool)
+                to_python_converters.append(to_python_converter)
         # second process the parameters by reference
         for parameter_wrapper in self._reference_parameter_wrappers:
             to_python_converter = parameter_wrapper.from_python(c_parameters)
@@ -721,6 +875,30 @@ class GlCommandWrapper(object):
 
     ##############################################
 
+    @property
+    def is_fire_and_forget(self):
+
+        """ The command doesn't return a value and doesn't write to the user memory, thus its call
+        can be deferred.
+        """
+
+        if not self._return_void or self._reference_parameter_wrappers:
+            return False
+        for parameter_wrapper in self._parameter_wrappers:
+            if isinstance(parameter_wrapper, OutputArrayWrapper):
+                return False
+            elif isinstance(parameter_wrapper, PointerWrapper) and not parameter_wrapper._parameter.const:
+                return False
+        return True
+
+    ##############################################
+
+    @property
+    def name(self):
+        return str(self._command)
+
+    ##############################################
+
     @property
     def call_counter(self):
         return self._call_counter
@@ -736,6 +914,12 @@ class CtypeWrapper(object):
 
     libGL = None
 
+    #: Pool of reusable output arrays, see :meth:`use_output_array_pool`
+    output_array_pool = None
+
+    #: Validation level, see :meth:`set_validation_level`
+    validation_level = 'basic'
+
     _logger = _module_logger.getChild('CtypeWrapper')
 
     ##############################################
@@ -759,6 +943,9 @@ class CtypeWrapper(object):
         # self._gl_spec = gl_spec
         self.api_number = api_number
         self._manuals = manuals
+        self._getter_batches = {}
+        self._snapshot_batch = None
+        self._enum_groups = None
 
         with TimerContextManager(self._logger, 'generate_api'):
             api_enums, api_commands = gl_spec.generate_api(api, api_number, profile) # 0.080288 s
@@ -810,6 +997,8 @@ class CtypeWrapper(object):
             except CommandNotAvailable:
                 self._logger.warn("Command %s is not implemented by the vendor", str(command))
         self.commands = gl_commands
+        for command_wrapper in gl_commands:
+            command_wrapper.init_size_evaluators()
 
     ##############################################
 
@@ -847,6 +1036,79 @@ class CtypeWrapper(object):
 
     ##############################################
 
+    def set_validation_level(self, level):
+
+        """ Set the validation level of the commands: *off*, *basic* or *strict*, see
+        :mod:`.Validation`.
+        """
+
+        check_validation_level(level)
+        if level == 'strict' and self._enum_groups is None:
+            self._enum_groups = EnumGroups(self)
+        with TimerContextManager(self._logger, 'Compile validators'):
+            for command_wrapper in self.commands:
+                command_wrapper.set_validation_level(level, self._enum_groups)
+        self.validation_level = level
+
+    ##############################################
+
+    def use_output_array_pool(self, enabled=True):
+
+        """ Enable or disable the reuse of the output arrays allocated by the wrapper.
+
+        When the pool is enabled, an output array returned by a command is overwritten by the next
+        command which returns an array of the same data type and shape.
+        """
+
+        if enabled:
+            if self.output_array_pool is None:
+                self.output_array_pool = OutputArrayPool()
+        else:
+            self.output_array_pool = None
+
+    ##############################################
+
+    def get_many(self, pnames, as_record=False):
+
+        """ Query several glGet states at once and return a dictionary indexed by *pnames*, or a Numpy
+        record if *as_record* is set, see :class:`.StateSnapshot.GetterBatch`.
+        """
+
+        pnames = tuple(pnames)
+        batch = self._getter_batches.get(pnames, None)
+        if batch is None:
+            batch = GetterBatch(self, pnames)
+            self._getter_batches[pnames] = batch
+        return batch(as_record)
+
+    ##############################################
+
+    def snapshot(self, as_record=False):
+
+        """ Return the values of all the glGet states supported by the OpenGL implementation as a
+        dictionary indexed by enum names.
+
+        The supported states are probed at the first call, the GL errors are cleared by this call.
+        """
+
+        if self._snapshot_batch is None:
+            with TimerContextManager(self._logger, 'Probe states'):
+                self._snapshot_batch = GetterBatch(self, queryable_states(self))
+        return self._snapshot_batch(as_record)
+
+    ##############################################
+
+    @staticmethod
+    def diff_snapshots(snapshot_a, snapshot_b):
+
+        """ Return the differences between two snapshots as a dictionary *enum name: (value_a,
+        value_b)*.
+        """
+
+        return diff(snapshot_a, snapshot_b)
+
+    ##############################################
+
     def error_checker(self):
 
         return ErrorContextManager(self)
@@ -0,0 +1,378 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""This module implements an executor which owns an OpenGL context on a dedicated thread.
+
+An OpenGL context is current on one thread, thus all the commands must be called from this thread.
+The :class:`GlExecutor` starts a worker thread, makes a context current on it and executes the
+commands queued by the other threads:
+
+* the commands which don't return a value and don't write to the user memory, e.g. ``glClear``, are
+  batched and executed asynchronously, an exception raised by these commands is reported by the
+  next fence,
+* the other commands, e.g. ``glGenBuffers`` or ``glReadPixels``, return a
+  :class:`concurrent.futures.Future`,
+* a function can be submitted to execute a complete job on the worker thread, it receives the
+  wrapper as first argument.
+
+The arrays passed to a batched command must not be modified before the command is executed, i.e.
+before the next flush or fence is done.
+
+For example::
+
+  executor = GlExecutor(context_factory=lambda: glfw.make_context_current(window))
+  gl = executor.gl
+  gl.glClearColor(1., 0., 0., 1.)
+  gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+  pixels = gl.glReadPixels(0, 0, width, height, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE).result()
+
+and from a coroutine::
+
+  pixels = await executor.submit_async(render_job, scene)
+
+"""
+
+####################################################################################################
+
+import concurrent.futures
+import logging
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+def default_wrapper_factory():
+
+    """ Return the wrapper of the high level API. """
+
+    from PyOpenGLng.HighLevelApi import GL
+    return GL
+
+####################################################################################################
+
+class GlCommandProxy(object):
+
+    """ This class queues the calls of a command to the executor. """
+
+    ##############################################
+
+    def __init__(self, executor, command_name, function, fire_and_forget):
+
+        self._executor = executor
+        self.__name__ = command_name
+        self._function = function
+        self.fire_and_forget = fire_and_forget
+
+    ##############################################
+
+    def __call__(self, *args, **kwargs):
+
+        """ Queue the call.  Return :obj:`None` if the command is batched, else a future. """
+
+        if self.fire_and_forget:
+            self._executor._defer(self._function, args, kwargs)
+        else:
+            return self._executor._submit(self._function, args, kwargs)
+
+####################################################################################################
+
+class GlWrapperProxy(object):
+
+    """ This class provides the wrapper interface to the other threads.
+
+    Enums are returned as is and commands are returned as :class:`GlCommandProxy`.
+    """
+
+    ##############################################
+
+    def __init__(self, executor, wrapper):
+
+        self._executor = executor
+        self._wrapper = wrapper
+        self._command_proxies = {}
+
+    ##############################################
+
+    def __getattr__(self, name):
+
+        if name.startswith('GL_'):
+            return getattr(self._wrapper.enums, name)
+        try:
+            return self._command_proxies[name]
+        except KeyError:
+            command_wrapper = getattr(self._wrapper.commands, name, None)
+            if command_wrapper is None:
+                raise AttributeError(name)
+            # The Pythonic wrapper could override the command
+            function = getattr(self._wrapper, name)
+            command_proxy = GlCommandProxy(self._executor, name, function,
+                                           command_wrapper.is_fire_and_forget)
+            self._command_proxies[name] = command_proxy
+            return command_proxy
+
+####################################################################################################
+
+class GlExecutor(object):
+
+    """ This class implements an executor which owns an OpenGL context on a dedicated thread.
+
+    The callable *context_factory* is called on the worker thread to make a context current, its
+    return value is passed to *context_destructor* at shutdown.  The callable *wrapper_factory* is
+    then called on the worker thread and must return the OpenGL wrapper.
+
+    The batched commands are sent to the worker when *batch_size* commands are pending or at the
+    next flush, fence or command returning a value.
+
+    The callable *idle_callback* is called on the worker thread when the queue is drained, i.e. after
+    the last pending job or batch, and before the shutdown.  It is the place to do the deferred
+    work of the context, e.g. to flush the deletion queue of the high level API::
+
+      executor = GlExecutor(context_factory, idle_callback=lambda: deletion_queue().flush())
+    """
+
+    _logger = _module_logger.getChild('GlExecutor')
+
+    ##############################################
+
+    def __init__(self, context_factory, wrapper_factory=default_wrapper_factory,
+                 context_destructor=None, batch_size=256, idle_callback=None):
+
+        self._context_factory = context_factory
+        self._wrapper_factory = wrapper_factory
+        self._context_destructor = context_destructor
+        self._idle_callback = idle_callback
+        self._batch_size = batch_size
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch = []
+        self._deferred_exception = None
+        self._shutdown = False
+
+        self.number_of_batches = 0
+        self.number_of_deferred_calls = 0
+        self.number_of_submitted_calls = 0
+
+        started = concurrent.futures.Future()
+        self._thread = threading.Thread(target=self._run, args=(started,), name='GlExecutor')
+        self._thread.daemon = True
+        self._thread.start()
+        self.wrapper = started.result()
+        self.gl = GlWrapperProxy(self, self.wrapper)
+
+    ##############################################
+
+    def __enter__(self):
+
+        return self
+
+    ##############################################
+
+    def __exit__(self, type_, value, traceback):
+
+        self.shutdown()
+
+    ##############################################
+
+    def _run(self, started):
+
+        """ Worker thread loop. """
+
+        try:
+            context = self._context_factory()
+            wrapper = self._wrapper_factory()
+        except Exception as exception:
+            started.set_exception(exception)
+            return
+        started.set_result(wrapper)
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            elif isinstance(item, list):
+                self._run_batch(item)
+            else:
+                future, function, args, kwargs = item
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(function(*args, **kwargs))
+                    except Exception as exception:
+                        future.set_exception(exception)
+            if self._queue.empty():
+                self._run_idle_callback()
+
+        self._run_idle_callback()
+        if self._context_destructor is not None:
+            self._context_destructor(context)
+
+    ##############################################
+
+    def _run_idle_callback(self):
+
+        if self._idle_callback is not None:
+            try:
+                self._idle_callback()
+            except Exception as exception:
+                self._logger.error("Idle callback raised %s", exception)
+
+    ##############################################
+
+    def _run_batch(self, batch):
+
+        for function, args, kwargs in batch:
+            try:
+                function(*args, **kwargs)
+            except Exception as exception:
+                self._logger.error("%s raised %s", function.__name__, exception)
+                if self._deferred_exception is None:
+                    self._deferred_exception = exception
+
+    ##############################################
+
+    def _flush(self):
+
+        """ Send the pending batch, the lock must be acquired. """
+
+        if self._batch:
+            self._queue.put(self._batch)
+            self._batch = []
+            self.number_of_batches += 1
+
+    ##############################################
+
+    def _check_running(self):
+
+        if self._shutdown:
+            raise RuntimeError("The executor is shut down")
+
+    ##############################################
+
+    def _defer(self, function, args, kwargs):
+
+        with self._lock:
+            self._check_running()
+            self._batch.append((function, args, kwargs))
+            self.number_of_deferred_calls += 1
+            if len(self._batch) >= self._batch_size:
+                self._flush()
+
+    ##############################################
+
+    def _submit(self, function, args, kwargs):
+
+        future = concurrent.futures.Future()
+        with self._lock:
+            self._check_running()
+            self._flush()
+            self._queue.put((future, function, args, kwargs))
+            self.number_of_submitted_calls += 1
+        return future
+
+    ##############################################
+
+    def submit(self, function, *args, **kwargs):
+
+        """ Execute ``function(wrapper, *args, **kwargs)`` on the worker thread and return a future.
+        """
+
+        return self._submit(function, (self.wrapper,) + args, kwargs)
+
+    ##############################################
+
+    def submit_async(self, function, *args, **kwargs):
+
+        """ Like :meth:`submit` but return an asyncio future bound to the current event loop. """
+
+        import asyncio
+        return asyncio.wrap_future(self.submit(function, *args, **kwargs))
+
+    ##############################################
+
+    def flush(self):
+
+        """ Send the pending batched commands to the worker thread, without waiting. """
+
+        with self._lock:
+            self._flush()
+
+    ##############################################
+
+    def _raise_deferred_exception(self, wrapper, finish, check_error):
+
+        if finish:
+            wrapper.glFinish()
+        if check_error:
+            wrapper.check_error()
+        exception = self._deferred_exception
+        if exception is not None:
+            self._deferred_exception = None
+            raise exception
+
+    ##############################################
+
+    def fence(self, finish=False, check_error=False):
+
+        """ Return a future which is done when all the previous commands are executed.
+
+        The future raises the first exception raised by a batched command since the last fence.  If
+        *finish* is set, then ``glFinish`` is called so as the GPU has completed the commands.  If
+        *check_error* is set, then the GL error flag is checked.
+        """
+
+        return self.submit(self._raise_deferred_exception, finish, check_error)
+
+    ##############################################
+
+    def fence_async(self, finish=False, check_error=False):
+
+        """ Like :meth:`fence` but return an asyncio future. """
+
+        import asyncio
+        return asyncio.wrap_future(self.fence(finish, check_error))
+
+    ##############################################
+
+    def shutdown(self, wait=True):
+
+        """ Execute the pending commands and stop the worker thread. """
+
+        with self._lock:
+            if self._shutdown:
+                return
+            self._flush()
+            self._shutdown = True
+            self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
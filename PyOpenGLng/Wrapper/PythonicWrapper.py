@@ -24,15 +24,12 @@ import six
 
 ####################################################################################################
 
+import ctypes
 import logging
 import numpy as np
 
 ####################################################################################################
 
-import PyOpenGLng.GlApi.Getter as Getter
-
-####################################################################################################
-
 _module_logger = logging.getLogger(__name__)
 
 ####################################################################################################
@@ -45,6 +42,23 @@ _module_logger = logging.getLogger(__name__)
 
 ####################################################################################################
 
+def mapped_array(pointer, nbytes, dtype=np.uint8):
+
+    """ Return a Numpy array view on the memory at *pointer* without copying it.
+
+    The array is only valid until the buffer is unmapped.
+    """
+
+    if not pointer:
+        return None
+    c_array = (ctypes.c_ubyte * nbytes).from_address(pointer)
+    array = np.ctypeslib.as_array(c_array)
+    if dtype is not None and np.dtype(dtype) != np.uint8:
+        array = array.view(dtype)
+    return array
+
+####################################################################################################
+
 class PythonicWrapper(object):
 
     _logger = _module_logger.getChild('PythonicWrapper')
@@ -84,8 +98,8 @@ class PythonicWrapper(object):
         if index < 0 or index >= number_of_uniform_blocks:
             raise IndexError("Index %s out of range 0 to %i" % (index, number_of_uniform_blocks -1))
 
-        max_name_length = self.glGetProgramiv(program, self.GL_ACTIVE_UNIFORM_BLOCK_MAX_NAME_LENGTH)
-        name, name_length = self.commands.glGetActiveUniformBlockName(program, index, max_name_length)
+        # the name length is queried by the wrapper
+        name, name_length = self.commands.glGetActiveUniformBlockName(program, index)
         return name
 
     ##############################################    
@@ -116,57 +130,18 @@ class PythonicWrapper(object):
         else:
             return params[0]
 
-    ##############################################    
-    
-    def glGetProgram(self, program, pname):
-
-        self._logger.info("Use commands_dict")
-
-        dtype, size = Getter.commands_dict['glGetProgram'][pname]
-
-        command_wrapper = self.commands.glGetProgramiv
-
-        # dtype is imposed by command
-        # size is COMPSIZE
-        # can we accelerate wrapper ??? overhead versus ctype pointer
-        #  pass size
-        dtype, size = command_wrapper._getter[pname]
-        data = np.zeros(size, dtype=dtype)
-        command_wrapper(program, pname, data)
-        data = data.tolist()
-        if size == 1:
-            return data[0]
-        else:
-            return data
+    ##############################################
 
-    ##############################################    
-    
-    def glGetProgramiv(self, program, pname):
-
-        self._logger.info("Use commands_dict")
-
-        command_wrapper = self.commands.glGetProgramiv
-        # dtype is imposed by command
-        # size is COMPSIZE
-        # can we accelerate wrapper ??? overhead versus ctype pointer
-        #  pass size
-        dtype, size = command_wrapper._getter[pname]
-        data = np.zeros(size, dtype=dtype)
-        command_wrapper(program, pname, data)
-        data = data.tolist()
-        if size == 1:
-            return data[0]
-        else:
-            return data
+    def glMapBufferRange(self, target, offset, length, access, dtype=np.uint8):
 
-    ##############################################    
+        """ Map a range of a buffer object's data store and return it as a Numpy array of the given
+        data type.  The array is a view on the mapped memory and becomes invalid when the buffer is
+        unmapped.  Return :obj:`None` if the mapping failed.
+        """
 
-    def glGetShaderiv(self, program, pname):
+        pointer = self.commands.glMapBufferRange(target, offset, length, access)
+        return mapped_array(pointer, length, dtype)
 
-        # Fixme: cf. infra
-        data = np.zeros(1, dtype=np.int32)
-        self.commands.glGetShaderiv(program, pname, data)
-        return int(data[0])
 
     ##############################################
 
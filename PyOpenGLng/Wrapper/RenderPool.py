@@ -0,0 +1,573 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""This module implements a pool of processes rendering offscreen images.
+
+Each worker process creates its own headless OpenGL context using a *context factory*, then calls
+an *initializer* which prepares the resources shared by the jobs, e.g. compiles the shader programs,
+and renders the jobs using a *renderer*.  A job is described by data, i.e. a picklable object passed
+to the renderer.
+
+The images are read by ``glReadPixels`` directly into shared memory slots, thus the pixels come back
+to the client without copy.  The number of slots bounds the number of pending jobs: :meth:`submit`
+blocks when all the slots are used, until a result is released.
+
+Each worker has its own task queue and result pipe, thus the pool knows the jobs in flight on a
+worker and a killed worker cannot leave a shared lock acquired.  If a worker dies, e.g. on a driver
+crash, its jobs fail with a :exc:`RenderError`, their slots are released and the worker is
+respawned.  A worker which cannot be started is not respawned and the pool shrinks.
+
+The context factory, the initializer and the renderer must be picklable, i.e. module level
+functions, and have these signatures::
+
+  context_factory(width, height) -> context
+  initializer(GL) -> state
+  renderer(GL, state, job)
+
+The renderer draws in the framebuffer bound by the worker.  The high level API is imported by the
+worker once the context is current, thus this module doesn't import it.  The worker flushes the
+deletion queue of the high level API after each job, thus the objects released by a job are deleted
+before the next one.
+
+For example::
+
+  with RenderPool(context_factory, renderer, width, height, initializer=initializer) as pool:
+      futures = [pool.submit(job) for job in jobs]
+      for future in futures:
+          with future.result() as result:
+              save(result.pixels)
+
+"""
+
+####################################################################################################
+
+import concurrent.futures
+import logging
+import multiprocessing
+import multiprocessing.connection
+import threading
+import traceback
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+def _create_framebuffer(GL, width, height):
+
+    """ Create a framebuffer with a RGBA colour and a depth renderbuffers. """
+
+    framebuffer = GL.glGenFramebuffers(1)
+    GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, framebuffer)
+    colour_renderbuffer, depth_renderbuffer = GL.glGenRenderbuffers(2)
+    for renderbuffer, internal_format, attachment in (
+            (colour_renderbuffer, GL.GL_RGBA8, GL.GL_COLOR_ATTACHMENT0),
+            (depth_renderbuffer, GL.GL_DEPTH_COMPONENT24, GL.GL_DEPTH_ATTACHMENT),
+            ):
+        GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, renderbuffer)
+        GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, internal_format, width, height)
+        GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, attachment, GL.GL_RENDERBUFFER, renderbuffer)
+    status = GL.glCheckFramebufferStatus(GL.GL_FRAMEBUFFER)
+    if status != GL.GL_FRAMEBUFFER_COMPLETE:
+        raise NameError("Framebuffer is not complete: %s" % GL.reverse_enums.get(status, status))
+
+    return framebuffer
+
+####################################################################################################
+
+def _worker_main(context_factory, initializer, renderer, width, height, shape, slot_names,
+                 task_queue, connection):
+
+    """ Main function of a worker process.
+
+    The messages sent to the pool are *(job_id, slot_index, error)*, where *job_id* is :obj:`None`
+    for the start-up message.
+    """
+
+    try:
+        context = context_factory(width, height)
+
+        from PyOpenGLng.HighLevelApi import GL
+        from PyOpenGLng.HighLevelApi.DeletionQueue import deletion_queue
+
+        framebuffer = _create_framebuffer(GL, width, height)
+        if initializer is not None:
+            state = initializer(GL)
+        else:
+            state = None
+
+        # Attach the shared memory slots once
+        slots = []
+        for slot_name in slot_names:
+            slot = shared_memory.SharedMemory(name=slot_name)
+            slots.append((slot, np.ndarray(shape, dtype=np.uint8, buffer=slot.buf)))
+    except Exception:
+        connection.send((None, None, traceback.format_exc()))
+        return
+    connection.send((None, None, None))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        job_id, slot_index, job = task
+        try:
+            GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, framebuffer)
+            GL.glViewport(0, 0, width, height)
+            renderer(GL, state, job)
+            GL.glReadPixels(0, 0, width, height, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, slots[slot_index][1])
+            connection.send((job_id, slot_index, None))
+        except Exception:
+            connection.send((job_id, slot_index, traceback.format_exc()))
+        # Delete the objects released by the job, once the result is sent
+        deletion_queue().flush()
+
+    for slot, array in slots:
+        del array
+        slot.close()
+    del context
+
+####################################################################################################
+
+class RenderError(Exception):
+    pass
+
+####################################################################################################
+
+class _Worker(object):
+
+    """ This class holds a worker process, its task queue, its result connection and the
+    identifiers of its jobs in flight.
+    """
+
+    ##############################################
+
+    def __init__(self, index, process, task_queue, connection):
+
+        self.index = index
+        self.process = process
+        self.task_queue = task_queue
+        self.connection = connection
+        self.job_ids = set()
+        self.ready = False
+
+####################################################################################################
+
+class RenderResult(object):
+
+    """ This class gives access to a rendered image stored in a shared memory slot.
+
+    The image is an array of shape (height, width, 4) with the first row at the bottom.  The slot
+    must be released when the image was consumed, this class is a context manager for this purpose.
+    """
+
+    ##############################################
+
+    def __init__(self, pool, slot_index, pixels):
+
+        self._pool = pool
+        self._slot_index = slot_index
+        self.pixels = pixels
+
+    ##############################################
+
+    def __enter__(self):
+
+        return self
+
+    ##############################################
+
+    def __exit__(self, type_, value, traceback):
+
+        self.release()
+
+    ##############################################
+
+    def copy(self):
+
+        """ Return a copy of the image and release the slot. """
+
+        pixels = self.pixels.copy()
+        self.release()
+        return pixels
+
+    ##############################################
+
+    def release(self):
+
+        """ Release the shared memory slot, the pixels must not be used afterwards. """
+
+        if self._slot_index is not None:
+            self.pixels = None
+            self._pool._release_slot(self._slot_index)
+            self._slot_index = None
+
+####################################################################################################
+
+class RenderPool(object):
+
+    """ This class implements a pool of processes rendering offscreen images of size *width* x
+    *height*.
+
+    The parameter *number_of_slots* sets the maximum number of pending and unreleased images, it
+    defaults to twice the number of workers.  The start-up of the workers is checked every
+    *poll_interval* seconds.
+    """
+
+    _logger = _module_logger.getChild('RenderPool')
+
+    ##############################################
+
+    def __init__(self, context_factory, renderer, width, height,
+                 number_of_workers=None, initializer=None, number_of_slots=None,
+                 start_method='spawn', poll_interval=1.):
+
+        if number_of_workers is None:
+            number_of_workers = multiprocessing.cpu_count()
+        if number_of_slots is None:
+            number_of_slots = 2 * number_of_workers
+
+        self.width = width
+        self.height = height
+        self.number_of_workers = number_of_workers
+        self._shape = (height, width, 4)
+
+        self._poll_interval = poll_interval
+
+        # A forked process would inherit the OpenGL state of the parent
+        self._multiprocessing_context = multiprocessing.get_context(start_method)
+        # Wake up the collector on close
+        self._stop_reader, self._stop_writer = multiprocessing.Pipe(duplex=False)
+
+        nbytes = int(np.prod(self._shape))
+        self._slots = [shared_memory.SharedMemory(create=True, size=nbytes) for i in range(number_of_slots)]
+        self._slot_arrays = [np.ndarray(self._shape, dtype=np.uint8, buffer=slot.buf) for slot in self._slots]
+        self._free_slots = list(range(number_of_slots))
+        self._slot_condition = threading.Condition()
+
+        self._futures = {} # job_id -> (future, slot_index, worker)
+        self._job_counter = 0
+        self._closed = False
+        self.number_of_jobs = 0
+
+        slot_names = [slot.name for slot in self._slots]
+        self._worker_args = (context_factory, initializer, renderer, width, height, self._shape, slot_names)
+        self._worker_counter = 0
+        self._workers = {}
+        for i in range(number_of_workers):
+            self._start_worker()
+        self._wait_workers()
+
+        self._collector = threading.Thread(target=self._collect, name='RenderPoolCollector')
+        self._collector.daemon = True
+        self._collector.start()
+
+    ##############################################
+
+    def __enter__(self):
+
+        return self
+
+    ##############################################
+
+    def __exit__(self, type_, value, traceback):
+
+        self.close()
+
+    ##############################################
+
+    @property
+    def number_of_alive_workers(self):
+
+        with self._slot_condition:
+            return len(self._workers)
+
+    ##############################################
+
+    def _start_worker(self):
+
+        """ Start a worker process, it sends a message when it is ready. """
+
+        worker_index = self._worker_counter
+        self._worker_counter += 1
+        task_queue = self._multiprocessing_context.Queue()
+        reader, writer = self._multiprocessing_context.Pipe(duplex=False)
+        process = self._multiprocessing_context.Process(
+            target=_worker_main,
+            args=self._worker_args + (task_queue, writer),
+            name='RenderWorker-%u' % worker_index)
+        process.daemon = True
+        process.start()
+        # The reader gets an end of file when the worker exits
+        writer.close()
+        worker = _Worker(worker_index, process, task_queue, reader)
+        with self._slot_condition:
+            self._workers[worker_index] = worker
+
+        return worker
+
+    ##############################################
+
+    def _wait_workers(self):
+
+        """ Wait the workers are ready, raise a :exc:`RenderError` if a worker failed. """
+
+        for worker in self._workers.values():
+            while not worker.connection.poll(self._poll_interval):
+                if not worker.process.is_alive():
+                    error = 'A worker process exited'
+                    break
+            else:
+                try:
+                    job_id, slot_index, error = worker.connection.recv()
+                except EOFError:
+                    error = 'A worker process exited'
+            if error is not None:
+                self._terminate()
+                raise RenderError("Failed to start the render worker:\n" + error)
+            worker.ready = True
+
+    ##############################################
+
+    @property
+    def number_of_free_slots(self):
+
+        with self._slot_condition:
+            return len(self._free_slots)
+
+    ##############################################
+
+    def _acquire_slot(self, timeout):
+
+        with self._slot_condition:
+            if not self._slot_condition.wait_for(lambda: self._free_slots or not self._workers, timeout):
+                raise concurrent.futures.TimeoutError("No free slot")
+            if not self._workers:
+                raise RenderError("All the render workers exited")
+            return self._free_slots.pop()
+
+    ##############################################
+
+    def _release_slot(self, slot_index):
+
+        with self._slot_condition:
+            self._free_slots.append(slot_index)
+            self._slot_condition.notify()
+
+    ##############################################
+
+    def submit(self, job, timeout=None):
+
+        """ Submit a job and return a future of a :class:`RenderResult`.
+
+        This method blocks if all the slots are used, until a slot is released or *timeout* is
+        elapsed.
+        """
+
+        if self._closed:
+            raise RuntimeError("The render pool is closed")
+
+        slot_index = self._acquire_slot(timeout)
+        future = concurrent.futures.Future()
+        with self._slot_condition:
+            # The last worker can exit after the slot is acquired
+            if not self._workers:
+                self._free_slots.append(slot_index)
+                self._slot_condition.notify()
+                raise RenderError("All the render workers exited")
+            # Dispatch to the least loaded worker
+            worker = min(self._workers.values(), key=lambda worker: len(worker.job_ids))
+            job_id = self._job_counter
+            self._job_counter += 1
+            self._futures[job_id] = (future, slot_index, worker)
+            worker.job_ids.add(job_id)
+            worker.task_queue.put((job_id, slot_index, job))
+        self.number_of_jobs += 1
+
+        return future
+
+    ##############################################
+
+    def map(self, jobs, function):
+
+        """ Render the jobs and call *function(job, pixels)* for each image in submission order.  The
+        slots are released after each call.
+        """
+
+        futures = []
+        for job in jobs:
+            # Release a slot before to submit, else the pool is starved
+            if len(futures) == len(self._slots):
+                previous_job, future = futures.pop(0)
+                with future.result() as result:
+                    function(previous_job, result.pixels)
+            futures.append((job, self.submit(job)))
+        for job, future in futures:
+            with future.result() as result:
+                function(job, result.pixels)
+
+    ##############################################
+
+    def _collect(self):
+
+        """ Collector thread loop, resolve the futures and handle the exit of the workers. """
+
+        while True:
+            with self._slot_condition:
+                workers = list(self._workers.values())
+            objects = {self._stop_reader:None}
+            for worker in workers:
+                objects[worker.connection] = worker
+                objects[worker.process.sentinel] = worker
+            ready_objects = multiprocessing.connection.wait(list(objects.keys()))
+            dead_workers = set()
+            for ready_object in ready_objects:
+                worker = objects[ready_object]
+                if worker is None or worker in dead_workers:
+                    continue
+                if ready_object is worker.connection:
+                    try:
+                        message = worker.connection.recv()
+                    except EOFError:
+                        dead_workers.add(worker)
+                        continue
+                    self._handle_message(worker, message)
+                else:
+                    dead_workers.add(worker)
+            for worker in dead_workers:
+                self._handle_dead_worker(worker)
+            if self._stop_reader in ready_objects:
+                break
+
+    ##############################################
+
+    def _handle_message(self, worker, message):
+
+        job_id, slot_index, error = message
+        if job_id is None:
+            # Start-up message of a respawned worker
+            if error is None:
+                worker.ready = True
+            else:
+                self._logger.error("Failed to start the render worker:\n%s", error)
+            return
+        with self._slot_condition:
+            future, slot_index, worker = self._futures.pop(job_id)
+            worker.job_ids.discard(job_id)
+        if error is None:
+            future.set_result(RenderResult(self, slot_index, self._slot_arrays[slot_index]))
+        else:
+            self._release_slot(slot_index)
+            future.set_exception(RenderError(error))
+
+    ##############################################
+
+    def _handle_dead_worker(self, worker):
+
+        """ Fail the jobs of a dead worker and respawn it. """
+
+        # The results sent before the exit are in the pipe
+        try:
+            while worker.connection.poll():
+                self._handle_message(worker, worker.connection.recv())
+        except EOFError:
+            pass
+        worker.process.join()
+        worker.connection.close()
+        # Don't wait the feeder thread of a queue which has no reader
+        worker.task_queue.cancel_join_thread()
+        worker.task_queue.close()
+
+        with self._slot_condition:
+            del self._workers[worker.index]
+            failed_jobs = [self._futures.pop(job_id) for job_id in worker.job_ids]
+            worker.job_ids.clear()
+        exitcode = worker.process.exitcode
+        if failed_jobs or not self._closed:
+            self._logger.error("Render worker %u exited with code %s, %u jobs failed",
+                               worker.index, exitcode, len(failed_jobs))
+        for future, slot_index, _worker in failed_jobs:
+            self._release_slot(slot_index)
+            future.set_exception(RenderError("Render worker %u exited with code %s" % (worker.index, exitcode)))
+
+        # A worker which was not started successfully would fail again
+        if worker.ready and not self._closed:
+            self._start_worker()
+        with self._slot_condition:
+            if not self._workers:
+                # Wake up the submitters, they raise an exception
+                self._slot_condition.notify_all()
+
+    ##############################################
+
+    def close(self):
+
+        """ Wait the pending jobs, stop the workers and free the shared memory. """
+
+        if self._closed:
+            return
+        self._closed = True
+
+        with self._slot_condition:
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.task_queue.put(None)
+        for worker in workers:
+            worker.process.join()
+        self._stop_writer.send(None)
+        self._collector.join()
+        self._free_shared_memory()
+
+    ##############################################
+
+    def _terminate(self):
+
+        """ Kill the workers and free the shared memory. """
+
+        self._closed = True
+        for worker in self._workers.values():
+            worker.process.terminate()
+            worker.process.join()
+            worker.connection.close()
+        self._free_shared_memory()
+
+    ##############################################
+
+    def _free_shared_memory(self):
+
+        self._slot_arrays = None
+        for slot in self._slots:
+            try:
+                slot.close()
+            except BufferError:
+                # a result is not released
+                self._logger.warning("Shared memory %s is still used", slot.name)
+            slot.unlink()
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
@@ -0,0 +1,269 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""This module implements batched state queries using the glGet family.
+
+A query of many states using the wrapped commands pays the call overhead of the wrapper for each
+state.  A :class:`GetterBatch` groups the states by getter command, i.e. by data type, and writes
+the values in one preallocated array per group by calling directly the C functions.
+
+"""
+
+####################################################################################################
+
+import six
+
+####################################################################################################
+
+import ctypes
+import logging
+
+import numpy as np
+
+####################################################################################################
+
+import PyOpenGLng.GlApi.Getter as Getter
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+#: Getter command for the data types of :mod:`PyOpenGLng.GlApi.Getter`
+__getter_commands__ = {
+    np.uint8:'glGetBooleanv', # GLboolean
+    np.uint32:'glGetIntegerv', # GLenum and GLhandleARB
+    np.int32:'glGetIntegerv',
+    np.int64:'glGetInteger64v',
+    np.float32:'glGetFloatv',
+    np.double:'glGetDoublev',
+    }
+
+#: Number of extra elements at the end of a group array, some implementations write more values
+#: than expected
+__getter_slack__ = 16
+
+#: Array data type of the getter commands
+__getter_command_dtypes__ = {
+    'glGetBooleanv':np.uint8,
+    'glGetIntegerv':np.int32,
+    'glGetInteger64v':np.int64,
+    'glGetFloatv':np.float32,
+    'glGetDoublev':np.double,
+    }
+
+####################################################################################################
+
+class GetterBatch(object):
+
+    """ This class implements a batch of glGet queries.
+
+    The parameter *pnames* is an iterable of enum names or values.  The plan of the calls is computed
+    once, thus a batch should be kept and executed several times.
+    """
+
+    _logger = _module_logger.getChild('GetterBatch')
+
+    ##############################################
+
+    def __init__(self, wrapper, pnames):
+
+        self._wrapper = wrapper
+
+        getter_dict = Getter.commands_dict['glGet']
+        groups = {}
+        for pname in pnames:
+            if isinstance(pname, six.string_types):
+                enum_name = pname
+                enum_value = getattr(wrapper.enums, enum_name, None)
+                if enum_value is None:
+                    raise NameError("Enum %s is not defined" % enum_name)
+            else:
+                enum_value = pname
+                enum_name = wrapper.reverse_enums[enum_value]
+            try:
+                dtype, size = getter_dict[enum_name]
+            except KeyError:
+                raise ValueError("%s is not a glGet state" % enum_name)
+            if dtype not in __getter_commands__ or not isinstance(size, int):
+                raise ValueError("%s is not supported by batched queries" % enum_name)
+            command_name = __getter_commands__[dtype]
+            groups.setdefault(command_name, []).append((pname, enum_name, enum_value, size))
+
+        # Build the record data type, an array per getter command and the argument lists
+        self._calls = []
+        self._fields = [] # (key, enum name, array, start, stop, size)
+        record_dtype = []
+        for command_name, entries in sorted(six.iteritems(groups)):
+            function = getattr(wrapper.commands, command_name)._function
+            dtype = __getter_command_dtypes__[command_name]
+            # The calls are executed in order, thus an overflow is overwritten by the next query of
+            # the group, except for the last one which writes in the slack
+            number_of_values = sum(size for pname, enum_name, enum_value, size in entries)
+            array = np.zeros(number_of_values + __getter_slack__, dtype=dtype)
+            address = array.ctypes.data
+            offset = 0
+            for pname, enum_name, enum_value, size in entries:
+                self._calls.append((function,
+                                    (ctypes.c_uint32(enum_value),
+                                     ctypes.c_void_p(address + offset*array.itemsize))))
+                self._fields.append((pname, enum_name, array, offset, offset + size, size))
+                if size > 1:
+                    record_dtype.append((enum_name, dtype, (size,)))
+                else:
+                    record_dtype.append((enum_name, dtype))
+                offset += size
+        self.record_dtype = np.dtype(record_dtype)
+
+    ##############################################
+
+    def __len__(self):
+
+        return len(self._fields)
+
+    ##############################################
+
+    def execute(self):
+
+        """ Query the states. """
+
+        for function, args in self._calls:
+            function(*args)
+
+    ##############################################
+
+    def to_dict(self):
+
+        """ Return the values of the last execution as a dictionary indexed by the given pnames.  The
+        values are scalars or lists.
+        """
+
+        values = {}
+        for key, enum_name, array, start, stop, size in self._fields:
+            if size == 1:
+                values[key] = array[start].item()
+            else:
+                values[key] = array[start:stop].tolist()
+        return values
+
+    ##############################################
+
+    def to_record(self):
+
+        """ Return the values of the last execution as a Numpy structured scalar whose fields are
+        named by the enum names.
+        """
+
+        record = np.zeros((), dtype=self.record_dtype)
+        for key, enum_name, array, start, stop, size in self._fields:
+            if size == 1:
+                record[enum_name] = array[start]
+            else:
+                record[enum_name] = array[start:stop]
+        return record
+
+    ##############################################
+
+    def __call__(self, as_record=False):
+
+        """ Query the states and return a dictionary or a record, see :meth:`to_dict` and
+        :meth:`to_record`.
+        """
+
+        self.execute()
+        if as_record:
+            return self.to_record()
+        else:
+            return self.to_dict()
+
+####################################################################################################
+
+def queryable_states(wrapper):
+
+    """ Return the names of the glGet states which are supported by the OpenGL implementation.
+
+    Each state is probed once using a single query and rejected if an error is raised.
+    """
+
+    getter_dict = Getter.commands_dict['glGet']
+
+    # Clear the error flags
+    while wrapper.glGetError():
+        pass
+
+    # Call directly the C functions to bypass the wrapper size evaluation
+    enum_names = []
+    for enum_name, (dtype, size) in sorted(six.iteritems(getter_dict)):
+        enum_value = getattr(wrapper.enums, enum_name, None)
+        if enum_value is None or dtype not in __getter_commands__ or not isinstance(size, int):
+            continue
+        command_name = __getter_commands__[dtype]
+        # Some implementations write more values than expected
+        array = np.zeros(size + __getter_slack__, dtype=__getter_command_dtypes__[command_name])
+        getattr(wrapper.commands, command_name)._function(ctypes.c_uint32(enum_value),
+                                                         array.ctypes.data_as(ctypes.c_void_p))
+        if not wrapper.glGetError():
+            enum_names.append(enum_name)
+
+    return enum_names
+
+####################################################################################################
+
+def _snapshot_to_dict(snapshot):
+
+    """ Return a snapshot as a dictionary, a record is converted to a dictionary indexed by the
+    enum names.
+    """
+
+    if isinstance(snapshot, dict):
+        return snapshot
+    elif isinstance(snapshot, (np.ndarray, np.void)) and snapshot.dtype.names is not None:
+        return {name:snapshot[name].tolist() for name in snapshot.dtype.names}
+    else:
+        raise ValueError("A snapshot must be a dictionary or a record")
+
+####################################################################################################
+
+def diff(snapshot_a, snapshot_b):
+
+    """ Return the differences between two snapshots as a dictionary *key: (value_a, value_b)*.  A
+    missing value is set to :obj:`None`.
+
+    The snapshots can be dictionaries or records, see :meth:`GetterBatch.to_dict` and
+    :meth:`GetterBatch.to_record`.  Records are compared by enum names, thus a dictionary indexed by
+    enum values cannot be compared to a record.
+    """
+
+    snapshot_a = _snapshot_to_dict(snapshot_a)
+    snapshot_b = _snapshot_to_dict(snapshot_b)
+    differences = {}
+    for key in set(snapshot_a) | set(snapshot_b):
+        value_a = snapshot_a.get(key, None)
+        value_b = snapshot_b.get(key, None)
+        if value_a != value_b:
+            differences[key] = (value_a, value_b)
+    return differences
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
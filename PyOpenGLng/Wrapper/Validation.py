@@ -0,0 +1,303 @@
+####################################################################################################
+#
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+####################################################################################################
+
+"""This module implements the argument validators of the wrapper.
+
+The wrapper features three validation levels:
+
+``off``
+  no check is done on the Python side, for maximum throughput,
+
+``basic``
+  the number of arguments and the data type of the Numpy arrays are checked, it is the default,
+
+``strict``
+  in addition, the enum arguments are checked against the registry, the array sizes are checked
+  against the size parameters and the arrays must be contiguous.
+
+The strict validators are compiled once per command when the level is selected, see
+:func:`compile_validators`.
+
+"""
+
+####################################################################################################
+
+import logging
+
+import numpy as np
+
+####################################################################################################
+
+from .ComputedSize import computed_size_evaluator
+import PyOpenGLng.GlApi.Getter as Getter
+
+####################################################################################################
+
+_module_logger = logging.getLogger(__name__)
+
+####################################################################################################
+
+VALIDATION_LEVELS = ('off', 'basic', 'strict')
+
+####################################################################################################
+
+def check_validation_level(level):
+
+    """ Raise a :exc:`ValueError` if *level* is not a validation level. """
+
+    if level not in VALIDATION_LEVELS:
+        raise ValueError("Validation level must be one of %s" % ', '.join(VALIDATION_LEVELS))
+
+####################################################################################################
+
+class EnumGroups(object):
+
+    """ This class provides the set of enum values of the registry groups for an API.
+
+    The sets are computed on demand and cached.
+    """
+
+    ##############################################
+
+    def __init__(self, wrapper):
+
+        self._wrapper = wrapper
+        self._groups = Getter.gl_spec.groups
+        self._cache = {}
+        self.enum_values = frozenset(wrapper.reverse_enums)
+
+    ##############################################
+
+    def __getitem__(self, group_name):
+
+        """ Return the set of enum values of a group or :obj:`None` if the group is unknown. """
+
+        if group_name not in self._cache:
+            if group_name in self._groups:
+                enums = self._wrapper.enums
+                values = frozenset(getattr(enums, enum_name) for enum_name in self._groups[group_name]
+                                   if hasattr(enums, enum_name))
+            else:
+                values = None
+            self._cache[group_name] = values
+        return self._cache[group_name]
+
+####################################################################################################
+
+class Validator(object):
+
+    """ Base class for argument validators.
+
+    A validator checks the argument at position *index* and raises a :exc:`ValueError` if it is
+    wrong.
+    """
+
+    ##############################################
+
+    def __init__(self, command_wrapper, index, parameter):
+
+        self._command_name = str(command_wrapper._command)
+        self.index = index
+        self._parameter = parameter
+
+    ##############################################
+
+    def error(self, message):
+
+        raise ValueError("%s parameter %s: %s" % (self._command_name, self._parameter.name, message))
+
+    ##############################################
+
+    def __call__(self, args, arguments):
+
+        """ Check the argument.  The parameter *args* is the list of the Python arguments and
+        *arguments* a dictionary of these arguments indexed by parameter names.
+        """
+
+        raise NotImplementedError
+
+####################################################################################################
+
+class EnumValidator(Validator):
+
+    """ Check an enum argument is defined by the API and belongs to the parameter group.
+
+    Since the groups of the registry are known to be incomplete, an enum outside of the group only
+    logs a warning once.
+    """
+
+    _logger = _module_logger.getChild('EnumValidator')
+
+    ##############################################
+
+    def __init__(self, command_wrapper, index, parameter, enum_groups):
+
+        super(EnumValidator, self).__init__(command_wrapper, index, parameter)
+
+        self._reverse_enums = command_wrapper._wrapper.reverse_enums
+        self._enum_values = enum_groups.enum_values
+        if parameter.group is not None:
+            self._group_values = enum_groups[parameter.group]
+        else:
+            self._group_values = None
+        self._warned = set()
+
+    ##############################################
+
+    def __call__(self, args, arguments):
+
+        value = args[self.index]
+        if value not in self._enum_values:
+            self.error("%s is not an enum of the API" % str(value))
+        if (self._group_values is not None
+            and value not in self._group_values
+            and value not in self._warned):
+            self._warned.add(value)
+            self._logger.warning("%s parameter %s: %s is not in group %s",
+                                 self._command_name, self._parameter.name,
+                                 self._reverse_enums[value], self._parameter.group)
+
+####################################################################################################
+
+class ContiguityValidator(Validator):
+
+    """ Check a Numpy array is contiguous. """
+
+    ##############################################
+
+    def __call__(self, args, arguments):
+
+        array = args[self.index]
+        if isinstance(array, np.ndarray) and not array.flags.c_contiguous:
+            self.error("array must be contiguous")
+
+####################################################################################################
+
+class ArraySizeValidator(Validator):
+
+    """ Check the size of an array is at least *minimum_size* and a multiple of *multiplier*. """
+
+    ##############################################
+
+    def __init__(self, command_wrapper, index, parameter, minimum_size=None, multiplier=1):
+
+        super(ArraySizeValidator, self).__init__(command_wrapper, index, parameter)
+
+        self._minimum_size = minimum_size
+        self._multiplier = multiplier
+
+    ##############################################
+
+    def __call__(self, args, arguments):
+
+        array = args[self.index]
+        if isinstance(array, np.ndarray):
+            size = array.size
+        elif isinstance(array, (list, tuple)):
+            size = len(array)
+        else:
+            return
+        if self._minimum_size is not None and size < self._minimum_size:
+            self.error("array size is %u, but %u is required" % (size, self._minimum_size))
+        if size % self._multiplier:
+            self.error("array size %u is not a multiple of %u" % (size, self._multiplier))
+
+####################################################################################################
+
+class ComputedSizeValidator(Validator):
+
+    """ Check the number of bytes of a Numpy array using a size evaluator.
+
+    The check is skipped if the evaluator cannot size the call, e.g. for a getter enum which is not
+    in the getter table, since the caller then provides the output array.
+    """
+
+    ##############################################
+
+    def __init__(self, command_wrapper, index, parameter, size_evaluator):
+
+        super(ComputedSizeValidator, self).__init__(command_wrapper, index, parameter)
+
+        self._size_evaluator = size_evaluator
+
+    ##############################################
+
+    def __call__(self, args, arguments):
+
+        array = args[self.index]
+        if isinstance(array, np.ndarray):
+            try:
+                nbytes = self._size_evaluator.nbytes(arguments)
+            except ValueError:
+                return
+            if array.nbytes < nbytes:
+                self.error("array has %u bytes, but %u bytes are required" % (array.nbytes, nbytes))
+
+####################################################################################################
+
+def compile_validators(command_wrapper, enum_groups):
+
+    """ Return the list of the strict validators for a command wrapper. """
+
+    # Fixme: parameter wrapper classes are imported here to prevent a circular import
+    from .CtypeWrapper import ParameterWrapper, PointerWrapper, ArrayWrapper
+
+    wrapper = command_wrapper._wrapper
+    command = command_wrapper._command
+
+    validators = []
+    for index, parameter_wrapper in enumerate(command_wrapper._parameter_wrappers):
+        if isinstance(parameter_wrapper, ParameterWrapper):
+            parameter = parameter_wrapper._parameter
+            if parameter.type == 'GLenum':
+                validators.append(EnumValidator(command_wrapper, index, parameter, enum_groups))
+        elif isinstance(parameter_wrapper, PointerWrapper):
+            parameter = parameter_wrapper._parameter
+            validators.append(ContiguityValidator(command_wrapper, index, parameter))
+            if parameter.array_size is not None:
+                validators.append(ArraySizeValidator(command_wrapper, index, parameter,
+                                                     minimum_size=parameter.array_size))
+            elif parameter.computed_size:
+                size_evaluator = parameter_wrapper.size_evaluator
+                if size_evaluator is None:
+                    if parameter.is_generic_pointer():
+                        dtype = None
+                    else:
+                        dtype = np.dtype(parameter_wrapper._type)
+                    size_evaluator = computed_size_evaluator(wrapper, command, parameter, dtype,
+                                                             input_pointer=parameter.const)
+                if size_evaluator is not None:
+                    validators.append(ComputedSizeValidator(command_wrapper, index, parameter,
+                                                            size_evaluator))
+        elif isinstance(parameter_wrapper, ArrayWrapper):
+            parameter = parameter_wrapper._pointer_parameter
+            if parameter.pointer == 1:
+                validators.append(ContiguityValidator(command_wrapper, index, parameter))
+                if parameter.size_multiplier > 1:
+                    validators.append(ArraySizeValidator(command_wrapper, index, parameter,
+                                                         multiplier=parameter.size_multiplier))
+
+    return validators
+
+####################################################################################################
+#
+# End
+#
+####################################################################################################
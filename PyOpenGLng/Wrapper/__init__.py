@@ -34,7 +34,8 @@ _module_logger = logging.getLogger(__name__)
 
 ####################################################################################################
 
-def init(wrapper='ctypes', api='gl', api_number=None, profile='core', check_api_number=True):
+def init(wrapper='ctypes', api='gl', api_number=None, profile='core', check_api_number=True,
+         validation_level='basic'):
 
     """ Initialise the OpenGL wrapper.
 
@@ -43,6 +44,9 @@ def init(wrapper='ctypes', api='gl', api_number=None, profile='core', check_api_
     version cannot be retrieved. On Linux, see the source of the Mesa 3D Graphics Library tool
     *glxinfo* for more details.
 
+    The parameter *validation_level* sets the checks done by the ctypes wrapper on the arguments,
+    see :mod:`PyOpenGLng.Wrapper.Validation`.  The cffi wrapper only supports the *basic* level.
+
     ..  On Fedora: package mesa-demos and file src/xdemos/glxinfo.c
     """
 
@@ -58,6 +62,10 @@ def init(wrapper='ctypes', api='gl', api_number=None, profile='core', check_api_
     else:
         ValueError("wrapper must be 'ctypes' or 'cffi'")
 
+    if validation_level != 'basic' and not hasattr(Wrapper, 'set_validation_level'):
+        raise ValueError("The %s wrapper doesn't support the validation level %s" %
+                         (wrapper, validation_level))
+
     if sys.platform.startswith('linux'):
         libGL_name = 'libGL.so'
     else:
@@ -98,6 +106,8 @@ def init(wrapper='ctypes', api='gl', api_number=None, profile='core', check_api_
 
     with TimerContextManager(_module_logger, 'Wrapper'):
         GL = Wrapper(gl_spec, api, api_number, profile, manuals)
+    if validation_level != 'basic':
+        GL.set_validation_level(validation_level)
 
     return GL
 
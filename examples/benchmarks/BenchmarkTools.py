@@ -0,0 +1,104 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This module provides the tools shared by the benchmarks.
+#
+#   GLFW is used to create a hidden window and an OpenGL context.
+#
+####################################################################################################
+
+import logging
+import sys
+import timeit
+
+####################################################################################################
+
+import PyGlfwCffi as glfw
+from PyOpenGLng.GlApi import ApiNumber
+
+####################################################################################################
+
+logging.basicConfig(
+    format='\033[1;32m%(asctime)s\033[0m - \033[1;34m%(name)s.%(funcName)s\033[0m - \033[1;31m%(levelname)s\033[0m - %(message)s',
+    level=logging.WARNING,
+)
+
+####################################################################################################
+
+def create_window(width=640, height=480, api_number='4.4'):
+
+    """ Create a hidden window with an OpenGL context, the context is not made current. """
+
+    if not glfw.init():
+        sys.exit()
+
+    api_number = ApiNumber(api_number)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, api_number.major)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, api_number.minor)
+    glfw.window_hint(glfw.CLIENT_API, glfw.OPENGL_API)
+    glfw.window_hint(glfw.VISIBLE, 0)
+    window = glfw.create_window(width, height, "Benchmark")
+    if not window:
+        glfw.terminate()
+        sys.exit()
+
+    return window
+
+####################################################################################################
+
+def create_context(width=640, height=480, api_number='4.4'):
+
+    """ Create a hidden window with an OpenGL context and return the high level API wrapper. """
+
+    window = create_window(width, height, api_number)
+    glfw.make_context_current(window)
+
+    # The high level API initialises the wrapper at import time
+    from PyOpenGLng.HighLevelApi import GL
+
+    return GL
+
+####################################################################################################
+
+def glfw_context_factory(width, height):
+
+    """ Context factory for a render pool worker. """
+
+    window = create_window(width, height)
+    glfw.make_context_current(window)
+    return window
+
+####################################################################################################
+
+def benchmark(title, function, number=1000, repeat=3):
+
+    """ Run *function* and print the best time per call. """
+
+    dt = min(timeit.repeat(function, number=number, repeat=repeat)) / number
+    print('{:50} {:10.3f} us'.format(title, dt * 1e6))
+    return dt
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
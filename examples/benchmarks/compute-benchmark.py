@@ -0,0 +1,98 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+
+
+####################################################################################################
+#
+# This script computes the normals of a triangle soup using Numpy and using a compute shader, and
+# compares the synchronous and the asynchronous readback of the results.  It runs headless, e.g. on
+# the Mesa software renderer.
+#
+####################################################################################################
+
+import numpy as np
+
+from BenchmarkTools import create_context, benchmark
+
+####################################################################################################
+
+GL = create_context()
+
+from PyOpenGLng.HighLevelApi.Buffer import GlShaderStorageBuffer
+from PyOpenGLng.HighLevelApi.ComputeProgram import GlComputeProgram
+from PyOpenGLng.HighLevelApi.Readback import GlReadbackPool
+
+####################################################################################################
+
+source = """
+#version 430
+layout(local_size_x = 64) in;
+layout(std430) buffer positions { vec4 position[]; };
+layout(std430) buffer normals { vec4 normal[]; };
+void main() {
+  uint i = gl_GlobalInvocationID.x;
+  if (i < normal.length()) {
+    vec3 p0 = position[3*i].xyz;
+    normal[i] = vec4(normalize(cross(position[3*i+1].xyz - p0, position[3*i+2].xyz - p0)), 0);
+  }
+}
+"""
+
+number_of_triangles = 100000
+positions = np.random.random((3 * number_of_triangles, 4)).astype(np.float32)
+
+def numpy_normals():
+    triangles = positions[:,:3].reshape(-1, 3, 3)
+    normals = np.cross(triangles[:,1] - triangles[:,0], triangles[:,2] - triangles[:,0])
+    return normals / np.linalg.norm(normals, axis=1)[:,np.newaxis]
+
+program = GlComputeProgram('normals', source_code=source)
+position_buffer = GlShaderStorageBuffer(positions)
+normal_buffer = GlShaderStorageBuffer()
+normal_buffer.allocate((number_of_triangles, 4), np.float32)
+readback_pool = GlReadbackPool()
+
+def gpu_normals():
+    program(number_of_triangles, positions=position_buffer, normals=normal_buffer)
+    return normal_buffer.read()
+
+def gpu_normals_upload():
+    program(number_of_triangles, positions=positions, normals=normal_buffer)
+    return normal_buffer.read()
+
+def gpu_normals_async():
+    program(number_of_triangles, positions=position_buffer, normals=normal_buffer)
+    with readback_pool.read_buffer(normal_buffer) as future:
+        return future.result()
+
+assert np.allclose(gpu_normals()[:,:3], numpy_normals(), atol=1e-4)
+
+print('normals of {} triangles'.format(number_of_triangles))
+benchmark('  numpy', numpy_normals, number=20)
+benchmark('  compute shader', gpu_normals, number=20)
+benchmark('  compute shader with upload', gpu_normals_upload, number=20)
+benchmark('  compute shader async readback', gpu_normals_async, number=20)
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
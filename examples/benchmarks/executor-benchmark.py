@@ -0,0 +1,107 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script submits render jobs from many asyncio coroutines to a GL executor and compares the
+# throughput to direct calls.
+#
+####################################################################################################
+
+import asyncio
+import time
+
+import PyGlfwCffi as glfw
+from PyOpenGLng.Wrapper.Executor import GlExecutor
+
+from BenchmarkTools import create_window
+
+####################################################################################################
+
+width, height = 256, 256
+number_of_coroutines = 32
+number_of_jobs = 20
+
+####################################################################################################
+
+def setup(GL):
+
+    # Render to a framebuffer since the window is hidden
+    framebuffer = GL.glGenFramebuffers(1)
+    GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, framebuffer)
+    renderbuffer = GL.glGenRenderbuffers(1)
+    GL.glBindRenderbuffer(GL.GL_RENDERBUFFER, renderbuffer)
+    GL.glRenderbufferStorage(GL.GL_RENDERBUFFER, GL.GL_RGBA8, width, height)
+    GL.glFramebufferRenderbuffer(GL.GL_FRAMEBUFFER, GL.GL_COLOR_ATTACHMENT0,
+                                 GL.GL_RENDERBUFFER, renderbuffer)
+
+def render_job(GL, value):
+
+    GL.glClearColor(value, 0., 0., 1.)
+    GL.glClear(GL.GL_COLOR_BUFFER_BIT)
+    return GL.glReadPixels(0, 0, width, height, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE)
+
+####################################################################################################
+
+window = create_window(width, height)
+executor = GlExecutor(context_factory=lambda: glfw.make_context_current(window))
+executor.submit(setup).result()
+
+async def client(i):
+    for j in range(number_of_jobs):
+        await executor.submit_async(render_job, j / number_of_jobs)
+
+async def proxy_client(i):
+    # Batched commands followed by a command returning a value
+    gl = executor.gl
+    for j in range(number_of_jobs):
+        gl.glClearColor(j / number_of_jobs, 0., 0., 1.)
+        gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+        await asyncio.wrap_future(gl.glReadPixels(0, 0, width, height, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE))
+
+async def run(client):
+    start = time.perf_counter()
+    await asyncio.gather(*[client(i) for i in range(number_of_coroutines)])
+    await executor.fence_async(finish=True)
+    return time.perf_counter() - start
+
+def direct():
+    start = time.perf_counter()
+    for i in range(number_of_coroutines * number_of_jobs):
+        executor.submit(render_job, i / 100).result()
+    return time.perf_counter() - start
+
+number_of_renders = number_of_coroutines * number_of_jobs
+for title, dt in (('sequential submit', direct()),
+                  ('asyncio submit', asyncio.run(run(client))),
+                  ('asyncio proxy', asyncio.run(run(proxy_client))),
+                  ):
+    print('{:30} {:10.1f} renders/s'.format(title, number_of_renders / dt))
+print('batches: {0.number_of_batches} deferred calls: {0.number_of_deferred_calls}'
+      ' submitted calls: {0.number_of_submitted_calls}'.format(executor))
+
+executor.shutdown()
+glfw.terminate()
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
@@ -0,0 +1,81 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+
+####################################################################################################
+#
+# This script renders offscreen batches and compares the creation of a frame buffer per batch to the
+# reuse of the frame buffers of a pool, with and without multisampling.  It runs headless, e.g. on
+# the Mesa software renderer.
+#
+####################################################################################################
+
+import numpy as np
+
+from BenchmarkTools import create_context, benchmark
+
+####################################################################################################
+
+GL = create_context()
+
+from PyOpenGLng.HighLevelApi.DeletionQueue import deletion_queue
+from PyOpenGLng.HighLevelApi.FrameBuffer import GlOffscreenFrameBuffer, GlFrameBufferPool
+
+####################################################################################################
+
+width, height = 512, 512
+colour_formats = (GL.GL_RGBA8, GL.GL_R32F)
+clear_colour = np.array([1., .5, .25, 1.], dtype=np.float32)
+
+def render(frame_buffer):
+    frame_buffer.bind()
+    for i in range(len(colour_formats)):
+        GL.glClearBufferfv(GL.GL_COLOR, i, clear_colour)
+    frame_buffer.unbind()
+    frame_buffer.resolve()
+    return frame_buffer.read()
+
+def make_batch(samples, pool=None):
+    def batch():
+        if pool is None:
+            frame_buffer = GlOffscreenFrameBuffer(width, height, colour_formats, samples=samples)
+        else:
+            frame_buffer = pool.acquire(width, height, colour_formats, samples=samples)
+        image = render(frame_buffer)
+        if pool is not None:
+            pool.release(frame_buffer)
+        deletion_queue().flush()
+        return image
+    return batch
+
+print('batches of {}x{} with {} colour attachments'.format(width, height, len(colour_formats)))
+for samples in (0, 4):
+    image = make_batch(samples)()
+    assert (image[0, 0] == (255, 128, 64, 255)).all()
+    benchmark('  samples {} new frame buffer'.format(samples), make_batch(samples), number=20)
+    pool = GlFrameBufferPool()
+    benchmark('  samples {} pool'.format(samples), make_batch(samples, pool), number=20)
+    print('    hits: {0.number_of_hits} misses: {0.number_of_misses}'.format(pool))
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
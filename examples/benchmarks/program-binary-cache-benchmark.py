@@ -0,0 +1,82 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+
+
+####################################################################################################
+#
+# This script links the text shader program of the demo from the sources and from a program binary
+# cache, so as to compare the startup time of the programs.  It runs headless, e.g. on the Mesa
+# software renderer.
+#
+####################################################################################################
+
+import os
+import shutil
+import tempfile
+
+from BenchmarkTools import create_context, benchmark
+
+####################################################################################################
+
+GL = create_context()
+
+from PyOpenGLng.HighLevelApi.ProgramBinaryCache import GlProgramBinaryCache
+from PyOpenGLng.HighLevelApi.Shader import GlShader, GlShaderProgram, GlShaderProgramInterface
+
+####################################################################################################
+
+glsl_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         '..', 'high-level-api-demo', 'glslv4', 'text-shader')
+program_interface = GlShaderProgramInterface(uniform_blocks=('viewport',),
+                                             attributes=('position', 'glyph_size', 'position_uv', 'colour'))
+
+cache_path = tempfile.mkdtemp()
+cache = GlProgramBinaryCache(cache_path)
+
+def load_shaders():
+    return [GlShader(file_name=os.path.join(glsl_path, 'text_%s_shader.glsl' % shader_type))
+            for shader_type in ('vertex', 'geometry', 'fragment')]
+
+def link_from_sources():
+    shader_program = GlShaderProgram('text_shader_program')
+    for shader in load_shaders():
+        shader_program.attach_shader(shader)
+    shader_program.set_program_interface(program_interface)
+    shader_program.link()
+    return shader_program
+
+def link_from_cache():
+    return cache.link_program(GlShaderProgram('text_shader_program'), load_shaders(), program_interface)
+
+link_from_cache()
+
+print('text shader program')
+benchmark('  compile and link', link_from_sources, number=20)
+benchmark('  program binary cache', link_from_cache, number=20)
+print('    hits: {0.number_of_hits} misses: {0.number_of_misses}'.format(cache))
+
+shutil.rmtree(cache_path)
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
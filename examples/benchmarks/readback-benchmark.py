@@ -0,0 +1,82 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+
+####################################################################################################
+#
+# This script compares a frame export using a synchronous glReadPixels to asynchronous readbacks
+# through a pool of pixel pack buffers with several frames in flight.
+#
+####################################################################################################
+
+import collections
+
+import numpy as np
+
+from BenchmarkTools import create_context, benchmark
+
+####################################################################################################
+
+width, height = 1280, 720
+GL = create_context(width, height)
+
+from PyOpenGLng.HighLevelApi.Readback import GlReadbackPool
+
+####################################################################################################
+
+number_of_frames = 100
+exported = np.zeros((height, width, 4), dtype=np.uint8)
+
+def render(i):
+    GL.glClearColor(i / float(number_of_frames), 0., 0., 1.)
+    GL.glClear(GL.GL_COLOR_BUFFER_BIT)
+
+def synchronous_export():
+    for i in range(number_of_frames):
+        render(i)
+        exported[...] = GL.glReadPixels(0, 0, width, height, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE)
+
+def make_asynchronous_export(pool):
+    def asynchronous_export():
+        futures = collections.deque()
+        for i in range(number_of_frames):
+            render(i)
+            futures.append(pool.read_pixels(0, 0, width, height))
+            if len(futures) == pool.number_of_buffers:
+                with futures.popleft() as future:
+                    exported[...] = future.result()
+        while futures:
+            with futures.popleft() as future:
+                exported[...] = future.result()
+    return asynchronous_export
+
+print('{} frames of {}x{}'.format(number_of_frames, width, height))
+benchmark('  synchronous glReadPixels', synchronous_export, number=1)
+for number_of_buffers in (1, 2, 3, 4):
+    pool = GlReadbackPool(number_of_buffers)
+    benchmark('  pack buffer pool of {}'.format(number_of_buffers),
+              make_asynchronous_export(pool), number=1)
+    print('    waits: {0.number_of_waits} in {0.wait_time:.3f} s'.format(pool))
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
@@ -0,0 +1,130 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script measures the throughput of a render pool versus the number of workers.
+#
+#   Each job renders a set of random triangles with a costly fragment shader.
+#
+####################################################################################################
+
+import multiprocessing
+import time
+
+import numpy as np
+
+from PyOpenGLng.Wrapper.RenderPool import RenderPool
+
+from BenchmarkTools import glfw_context_factory
+
+####################################################################################################
+
+width, height = 512, 512
+number_of_jobs = 200
+number_of_triangles = 1000
+
+vertex_shader_source = """
+#version 330
+in vec2 position;
+void main() { gl_Position = vec4(position, 0., 1.); }
+"""
+
+fragment_shader_source = """
+#version 330
+uniform float seed;
+out vec4 colour;
+void main()
+{
+  float value = seed;
+  for (int i = 0; i < 32; i++)
+    value = fract(sin(value + gl_FragCoord.x * 12.9898 + gl_FragCoord.y * 78.233) * 43758.5453);
+  colour = vec4(value, seed, 1. - value, 1.);
+}
+"""
+
+####################################################################################################
+
+def compile_shader(GL, shader_type, source):
+
+    shader = GL.glCreateShader(shader_type)
+    GL.glShaderSource(shader, source)
+    GL.glCompileShader(shader)
+    if not GL.glGetShaderiv(shader, GL.GL_COMPILE_STATUS):
+        raise NameError(GL.glGetShaderInfoLog(shader)[0])
+    return shader
+
+def initializer(GL):
+
+    # Compile the program and upload the geometry once per worker
+    program = GL.glCreateProgram()
+    for shader_type, source in ((GL.GL_VERTEX_SHADER, vertex_shader_source),
+                                (GL.GL_FRAGMENT_SHADER, fragment_shader_source)):
+        GL.glAttachShader(program, compile_shader(GL, shader_type, source))
+    GL.glBindAttribLocation(program, 0, 'position')
+    GL.glLinkProgram(program)
+    if not GL.glGetProgramiv(program, GL.GL_LINK_STATUS):
+        raise NameError(GL.glGetProgramInfoLog(program)[0])
+
+    vertices = np.random.uniform(-1, 1, (number_of_triangles*3, 2)).astype(np.float32)
+    vertex_array = GL.glGenVertexArrays(1)
+    GL.glBindVertexArray(vertex_array)
+    vertex_buffer = GL.glGenBuffers(1)
+    GL.glBindBuffer(GL.GL_ARRAY_BUFFER, vertex_buffer)
+    GL.glBufferData(GL.GL_ARRAY_BUFFER, vertices, GL.GL_STATIC_DRAW)
+    GL.glVertexAttribPointer(0, 2, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
+    GL.glEnableVertexAttribArray(0)
+
+    return {'program':program,
+            'seed_location':GL.glGetUniformLocation(program, 'seed'),
+            'vertex_array':vertex_array,
+            }
+
+def renderer(GL, state, job):
+
+    GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+    GL.glUseProgram(state['program'])
+    GL.glUniform1f(state['seed_location'], job)
+    GL.glBindVertexArray(state['vertex_array'])
+    GL.glDrawArrays(GL.GL_TRIANGLES, 0, number_of_triangles*3)
+
+####################################################################################################
+
+if __name__ == '__main__':
+
+    checksums = []
+    def consume(job, pixels):
+        checksums.append(int(pixels[height//2, width//2, 0]))
+
+    number_of_workers = 1
+    while number_of_workers <= multiprocessing.cpu_count():
+        with RenderPool(glfw_context_factory, renderer, width, height,
+                        number_of_workers=number_of_workers, initializer=initializer) as pool:
+            start = time.perf_counter()
+            pool.map([i / number_of_jobs for i in range(number_of_jobs)], consume)
+            dt = time.perf_counter() - start
+        print('{:3} workers {:10.1f} images/s'.format(number_of_workers, number_of_jobs / dt))
+        number_of_workers *= 2
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
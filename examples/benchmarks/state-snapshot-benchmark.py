@@ -0,0 +1,64 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script compares batched glGet queries to sequential wrapper calls.
+#
+####################################################################################################
+
+import PyOpenGLng.GlApi.Getter as Getter
+from PyOpenGLng.Wrapper.StateSnapshot import __getter_commands__ as getter_commands
+
+from BenchmarkTools import create_context, benchmark
+
+####################################################################################################
+
+GL = create_context()
+
+snapshot = GL.snapshot()
+pnames = sorted(snapshot)
+print('Number of states: {}'.format(len(pnames)))
+
+getter_dict = Getter.commands_dict['glGet']
+sequential_queries = [(getattr(GL, getter_commands[getter_dict[pname][0]]), getattr(GL, pname))
+                      for pname in pnames]
+
+def sequential():
+    return {pname:command(enum_value)
+            for pname, (command, enum_value) in zip(pnames, sequential_queries)}
+
+def batched():
+    return GL.get_many(pnames)
+
+assert sequential() == batched()
+
+number = 100
+t_sequential = benchmark('sequential queries', sequential, number)
+t_batched = benchmark('get_many', batched, number)
+benchmark('get_many as record', lambda: GL.get_many(pnames, as_record=True), number)
+benchmark('snapshot', GL.snapshot, number)
+print('Speedup: {:.1f}'.format(t_sequential / t_batched))
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
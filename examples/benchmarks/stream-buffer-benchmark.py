@@ -0,0 +1,102 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+
+####################################################################################################
+#
+# This script compares the upload strategies for per-frame dynamic geometry: a new buffer per frame,
+# glBufferData on the same buffer and a stream buffer, persistent or orphaned.
+#
+####################################################################################################
+
+import numpy as np
+
+from BenchmarkTools import create_context, benchmark
+
+####################################################################################################
+
+GL = create_context()
+
+from PyOpenGLng.HighLevelApi.Buffer import GlArrayBuffer
+from PyOpenGLng.HighLevelApi.DeletionQueue import deletion_queue
+from PyOpenGLng.HighLevelApi.StreamBuffer import GlStreamBuffer
+from PyOpenGLng.HighLevelApi.VertexArrayObject import GlVertexArrayObject
+
+####################################################################################################
+
+location = 0
+vao = GlVertexArrayObject()
+vao.bind()
+
+for number_of_vertexes in (10000, 100000, 1000000):
+
+    vertexes = np.random.random((number_of_vertexes, 2)).astype(np.float32)
+    number_of_frames = max(5, 1000000 // number_of_vertexes)
+    print('{} vertexes'.format(number_of_vertexes))
+
+    def draw():
+        GL.glDrawArrays(GL.GL_POINTS, 0, number_of_vertexes)
+
+    def new_buffer_frame():
+        vbo = GlArrayBuffer(vertexes)
+        vbo.bind_at_location(location)
+        draw()
+        del vbo
+        deletion_queue().flush()
+
+    vbo = GlArrayBuffer()
+    def buffer_data_frame():
+        vbo.set(vertexes, GL.GL_STREAM_DRAW)
+        vbo.bind_at_location(location)
+        draw()
+
+    def make_stream_frame(stream_buffer):
+        def stream_frame():
+            stream_buffer.begin_frame()
+            allocation = stream_buffer.allocate(vertexes.shape, vertexes.dtype)
+            allocation.array[...] = vertexes # the producer writes here
+            stream_buffer.flush()
+            allocation.bind_at_location(location)
+            draw()
+            stream_buffer.end_frame()
+        return stream_frame
+
+    persistent_stream_buffer = GlStreamBuffer(vertexes.nbytes, persistent=True)
+    orphaned_stream_buffer = GlStreamBuffer(vertexes.nbytes, persistent=False)
+
+    for title, function in (
+            ('new buffer', new_buffer_frame),
+            ('glBufferData', buffer_data_frame),
+            ('persistent stream buffer', make_stream_frame(persistent_stream_buffer)),
+            ('orphaned stream buffer', make_stream_frame(orphaned_stream_buffer)),
+            ):
+        function()
+        GL.glFinish()
+        benchmark('  ' + title, lambda: (function(), GL.glFinish()), number=number_of_frames)
+
+    print('  fence waits: {0.number_of_waits} in {0.wait_time:.3f} s, orphans: {1.number_of_orphans}'.format(
+        persistent_stream_buffer, orphaned_stream_buffer))
+    del persistent_stream_buffer, orphaned_stream_buffer
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
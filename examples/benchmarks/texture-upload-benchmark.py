@@ -0,0 +1,92 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script measures the frame rate of a video stream of 4K images uploaded to a texture by
+# re-specifying the texture with glTexImage2D, by updating an immutable storage with glTexSubImage2D
+# and by staging the updates in double-buffered pixel unpack buffers.
+#
+####################################################################################################
+
+import numpy as np
+
+from BenchmarkTools import create_context, benchmark
+
+####################################################################################################
+
+GL = create_context()
+
+from PyOpenGLng.HighLevelApi.DeletionQueue import deletion_queue
+from PyOpenGLng.HighLevelApi.Texture import GlTexture2D, texture_format
+
+####################################################################################################
+
+height, width = 2160, 3840
+number_of_frames = 30
+
+for dtype in (np.float32, np.uint16):
+
+    if dtype == np.float32:
+        frames = [np.random.random((height, width)).astype(dtype) for i in range(2)]
+    else:
+        frames = [np.random.randint(0, 2**16, (height, width)).astype(dtype) for i in range(2)]
+    internal_format, data_format, data_type = texture_format(frames[0])
+    print('{}x{} {}'.format(width, height, np.dtype(dtype).name))
+
+    texture_id = GL.glGenTextures(1)
+    def tex_image_stream():
+        GL.glBindTexture(GL.GL_TEXTURE_2D, texture_id)
+        for i in range(number_of_frames):
+            GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, internal_format, width, height, 0,
+                            data_format, data_type, frames[i % 2])
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        GL.glFinish()
+
+    def make_update_stream(texture):
+        def update_stream():
+            for i in range(number_of_frames):
+                texture.update(frames[i % 2])
+            GL.glFinish()
+        return update_stream
+
+    streams = [('  glTexImage2D', tex_image_stream)]
+    for number_of_unpack_buffers in (0, 2):
+        texture = GlTexture2D(number_of_unpack_buffers=number_of_unpack_buffers)
+        texture.set(frames[0])
+        if number_of_unpack_buffers:
+            title = '  glTexSubImage2D, {} unpack buffers'.format(number_of_unpack_buffers)
+        else:
+            title = '  glTexSubImage2D'
+        streams.append((title, make_update_stream(texture)))
+
+    for title, stream in streams:
+        dt = benchmark(title, stream, number=1)
+        print('    {:.1f} frames per second'.format(number_of_frames / dt))
+
+    GL.glDeleteTextures([texture_id])
+    del texture, streams
+    deletion_queue().flush()
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
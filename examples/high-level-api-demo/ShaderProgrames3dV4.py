@@ -48,12 +48,20 @@ basic_shader_program_interface = GlShaderProgramInterface(uniform_blocks=('viewp
                                                                       'normal',
                                                                       'colour'))
 
+# the transform matrix uses the locations 3 to 6
+instanced_shader_program_interface = GlShaderProgramInterface(uniform_blocks=('viewport',),
+                                                              attributes=('position',
+                                                                          'normal',
+                                                                          'colour',
+                                                                          'transform'))
+
 if shader_manager.has_visual():
 
     for shader_path in (
         #
         'vertex-shader/fixed_colour_vertex_shader_3d',
         'vertex-shader/varying_colour_vertex_shader_3d',
+        'vertex-shader/instanced_colour_vertex_shader_3d',
         'vertex-shader/lighting_vertex_shader',
         #
         'fragment-shader/simple_fragment_shader',
@@ -78,6 +86,11 @@ if shader_manager.has_visual():
                         'lighting_fragment_shader'),
          'program_interface':basic_shader_program_interface,
          },
+        {'program_name':'instanced_shader_program',
+         'shader_list':('instanced_colour_vertex_shader_3d',
+                        'simple_fragment_shader'),
+         'program_interface':instanced_shader_program_interface,
+         },
     
         ):
         shader_manager.link_program(**args)
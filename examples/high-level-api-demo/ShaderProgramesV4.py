@@ -57,6 +57,13 @@ text_shader_program_interface = GlShaderProgramInterface(uniform_blocks=('viewpo
                                                                      'position_uv',
                                                                      'colour'))
 
+# the sprites have the per-instance attributes rectangle, uv_rectangle and layer
+sprite_shader_program_interface = GlShaderProgramInterface(uniform_blocks=('viewport',),
+                                                           attributes=('corner',
+                                                                       'rectangle',
+                                                                       'uv_rectangle',
+                                                                       'layer'))
+
 random_texture = GlRandomTexture(size=1000, texture_unit=1)
 
 if shader_manager.has_visual():
@@ -78,6 +85,8 @@ if shader_manager.has_visual():
         'texture-shader/texture_vertex_shader',
         'texture-shader/texture_fragment_shader',
         'texture-shader/texture_label_fragment_shader',
+        'texture-shader/sprite_vertex_shader',
+        'texture-shader/sprite_fragment_shader',
         #
         'text-shader/text_vertex_shader',
         'text-shader/text_geometry_shader',
@@ -107,6 +116,12 @@ if shader_manager.has_visual():
          'shader_program_args':(random_texture,),
          },
 
+        {'program_name':'sprite_shader_program',
+         'shader_list':('sprite_vertex_shader',
+                        'sprite_fragment_shader'),
+         'program_interface':sprite_shader_program_interface,
+         },
+
         {'program_name':'text_shader_program',
          'shader_list':('text_vertex_shader',
                         'text_geometry_shader',
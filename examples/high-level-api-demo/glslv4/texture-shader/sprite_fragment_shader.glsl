@@ -0,0 +1,35 @@
+/* *********************************************************************************************** */
+
+// #shader_type fragment
+
+#version 330
+
+/* *********************************************************************************************** */
+
+uniform sampler2DArray texture0;
+
+/* *********************************************************************************************** */
+
+in VertexAttributes
+{
+  vec2 uv;
+  flat float layer;
+} vertex;
+
+/* *********************************************************************************************** */
+
+out vec4 fragment_colour;
+
+/* *********************************************************************************************** */
+
+void main()
+{
+  // The UV rectangle is inset by half a texel, thus the neighbour images are not filtered
+  fragment_colour = texture(texture0, vec3(vertex.uv, vertex.layer));
+}
+
+/* *********************************************************************************************** *
+ *
+ * End
+ *
+ * *********************************************************************************************** */
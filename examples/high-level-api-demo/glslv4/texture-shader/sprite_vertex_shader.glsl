@@ -0,0 +1,42 @@
+/* *********************************************************************************************** */
+
+// #shader_type vertex
+
+#version 330
+
+/* *********************************************************************************************** */
+
+#include(../include/model_view_projection_matrix.glsl)
+
+// corner of the unit quad
+in vec2 corner;
+
+// per-instance attributes
+in vec4 rectangle; // x, y, width, height
+in vec4 uv_rectangle; // u min, v min, u max, v max
+in float layer;
+
+/* *********************************************************************************************** */
+
+out VertexAttributes
+{
+  vec2 uv;
+  flat float layer;
+} vertex;
+
+/* *********************************************************************************************** */
+
+void main(void)
+{
+  gl_Position = model_view_projection_matrix * vec4(rectangle.xy + corner * rectangle.zw, 0, 1);
+  // the first row of the image is at the top of the rectangle
+  vertex.uv = vec2(mix(uv_rectangle.x, uv_rectangle.z, corner.x),
+                   mix(uv_rectangle.w, uv_rectangle.y, corner.y));
+  vertex.layer = layer;
+}
+
+/* *********************************************************************************************** *
+ *
+ * End
+ *
+ * *********************************************************************************************** */
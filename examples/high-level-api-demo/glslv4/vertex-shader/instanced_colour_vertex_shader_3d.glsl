@@ -0,0 +1,34 @@
+/* *********************************************************************************************** */
+
+// #shader_type vertex
+
+#version 330
+
+/* *********************************************************************************************** */
+
+#include(../include/model_view_projection_matrix_3d.glsl)
+#include(../include/position_shader_program_interface_3d.glsl)
+
+// per-instance attribute, uses four locations
+in mat4 transform;
+
+/* *********************************************************************************************** */
+
+out VertexAttributes
+{
+  vec4 colour;
+} vertex;
+
+/* *********************************************************************************************** */
+
+void main()
+{
+  gl_Position = model_view_projection_matrix * transform * vec4(position, 1);
+  vertex.colour = colour;
+}
+
+/* *********************************************************************************************** *
+ *
+ * End
+ *
+ * *********************************************************************************************** */
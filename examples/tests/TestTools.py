@@ -0,0 +1,84 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This module provides the tools shared by the test scripts.
+#
+#   The tests which need an OpenGL context use a hidden GLFW window, thus they run headless on the
+#   Mesa software renderer, e.g. with LIBGL_ALWAYS_SOFTWARE=1 and Xvfb.  The other tests only
+#   import the high level API.
+#
+####################################################################################################
+
+import logging
+import sys
+
+####################################################################################################
+
+logging.basicConfig(
+    format='\033[1;32m%(asctime)s\033[0m - \033[1;34m%(name)s.%(funcName)s\033[0m - \033[1;31m%(levelname)s\033[0m - %(message)s',
+    level=logging.WARNING,
+)
+
+####################################################################################################
+
+def create_context(width=64, height=64, api_number='4.4'):
+
+    """ Create a hidden window with an OpenGL context, make it current and return the high level API
+    wrapper.
+    """
+
+    import PyGlfwCffi as glfw
+    from PyOpenGLng.GlApi import ApiNumber
+
+    if not glfw.init():
+        sys.exit("Cannot initialise GLFW")
+
+    api_number = ApiNumber(api_number)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, api_number.major)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, api_number.minor)
+    glfw.window_hint(glfw.CLIENT_API, glfw.OPENGL_API)
+    glfw.window_hint(glfw.VISIBLE, 0)
+    window = glfw.create_window(width, height, "Test")
+    if not window:
+        glfw.terminate()
+        sys.exit("Cannot create an OpenGL %s context" % str(api_number))
+    glfw.make_context_current(window)
+
+    # The high level API initialises the wrapper at import time
+    from PyOpenGLng.HighLevelApi import GL
+
+    return GL
+
+####################################################################################################
+
+def check(title, function):
+
+    """ Run the check *function* and print its title. """
+
+    function()
+    print('{:60} ok'.format(title))
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
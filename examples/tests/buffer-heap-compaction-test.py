@@ -0,0 +1,90 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script checks the compaction of a buffer heap: the allocations are packed at the beginning of
+# the heap, their data is preserved and the empty blocks are released.  It runs headless, e.g. on
+# the Mesa software renderer.
+#
+####################################################################################################
+
+import numpy as np
+
+from TestTools import create_context, check
+
+####################################################################################################
+
+GL = create_context()
+
+from PyOpenGLng.HighLevelApi.BufferHeap import GlBufferHeap
+
+####################################################################################################
+
+def vertexes(value, number_of_vertexes=4):
+
+    return np.full((number_of_vertexes, 4), value, dtype=np.float32)
+
+####################################################################################################
+
+def check_compaction_in_block():
+
+    heap = GlBufferHeap(block_nbytes=1024, alignment=16)
+    allocations = [heap.buffer(vertexes(i)) for i in range(4)] # 64 bytes each
+    assert [allocation.offset for allocation in allocations] == [0, 64, 128, 192]
+    allocations[0].free()
+    allocations[2].free()
+    assert heap.stats()['number_of_free_ranges'] == 3
+    heap.compact()
+    assert allocations[1].offset == 0
+    assert allocations[3].offset == 64
+    assert allocations[1].block.free_ranges == [[128, 1024 - 128]]
+    assert np.all(allocations[1].read_sub_data() == vertexes(1).ravel())
+    assert np.all(allocations[3].read_sub_data() == vertexes(3).ravel())
+    assert heap.moved_nbytes == 128
+
+def check_compaction_across_blocks():
+
+    heap = GlBufferHeap(block_nbytes=256, alignment=16)
+    allocations = [heap.buffer(vertexes(i, 8)) for i in range(4)] # 128 bytes each
+    assert len(heap) == 2
+    allocations[0].free()
+    allocations[1].free()
+    allocations[2].free()
+    heap.compact()
+    # The last allocation is moved to the first block and the empty block is released
+    assert len(heap) == 1
+    assert allocations[3].offset == 0
+    assert np.all(allocations[3].read_sub_data() == vertexes(3, 8).ravel())
+    stats = heap.stats()
+    assert stats['used_nbytes'] == 128
+    assert stats['number_of_live_allocations'] == 1
+    # The free ranges are reused after a compaction
+    allocation = heap.buffer(vertexes(4, 8))
+    assert (allocation.block, allocation.offset) == (allocations[3].block, 128)
+
+check('compaction within a block', check_compaction_in_block)
+check('compaction across blocks', check_compaction_across_blocks)
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
@@ -0,0 +1,92 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script checks the free list of the blocks of a buffer heap: the first-fit allocation and the
+# coalescing of the freed ranges.  It doesn't need an OpenGL context.
+#
+####################################################################################################
+
+from TestTools import check
+
+from PyOpenGLng.HighLevelApi.BufferHeap import FreeList
+
+####################################################################################################
+
+def check_first_fit():
+
+    free_list = FreeList(256)
+    assert free_list.allocate(16) == 0
+    assert free_list.allocate(32) == 16
+    assert free_list.allocate(16) == 48
+    assert free_list.free_ranges == [[64, 192]]
+    assert free_list.allocate(512) is None
+    # A freed range is reused by the next allocation which fits in it
+    free_list.free(16, 32)
+    assert free_list.free_ranges == [[16, 32], [64, 192]]
+    assert free_list.allocate(64) == 64
+    assert free_list.allocate(16) == 16
+    assert free_list.free_ranges == [[32, 16], [128, 128]]
+    # An exact fit removes the range
+    assert free_list.allocate(16) == 32
+    assert free_list.free_ranges == [[128, 128]]
+    assert free_list.allocate(128) == 128
+    assert free_list.free_ranges == []
+    assert free_list.free_nbytes == 0
+
+def check_coalescing():
+
+    free_list = FreeList(256)
+    for nbytes in (16, 16, 16, 16):
+        free_list.allocate(nbytes)
+    free_list.free(0, 16)
+    free_list.free(32, 16)
+    assert free_list.free_ranges == [[0, 16], [32, 16], [64, 192]]
+    # Coalesce with the previous and the next ranges
+    free_list.free(16, 16)
+    assert free_list.free_ranges == [[0, 48], [64, 192]]
+    free_list.free(48, 16)
+    assert free_list.free_ranges == [[0, 256]]
+    assert free_list.free_nbytes == 256
+
+def check_coalescing_order():
+
+    free_list = FreeList(64)
+    for nbytes in (16, 16, 16, 16):
+        free_list.allocate(nbytes)
+    # Coalesce with the next range only, then with the previous range only
+    free_list.free(32, 16)
+    free_list.free(16, 16)
+    assert free_list.free_ranges == [[16, 32]]
+    free_list.free(48, 16)
+    assert free_list.free_ranges == [[16, 48]]
+    free_list.free(0, 16)
+    assert free_list.free_ranges == [[0, 64]]
+
+check('first-fit allocation', check_first_fit)
+check('coalescing of the freed ranges', check_coalescing)
+check('coalescing in any order', check_coalescing_order)
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
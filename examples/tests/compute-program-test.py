@@ -0,0 +1,120 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script checks the compute programs: the number of work groups, a dispatch with a partial
+# work group, an indirect dispatch and the readback of the shader storage buffers.  It runs
+# headless, e.g. on the Mesa software renderer.
+#
+####################################################################################################
+
+import numpy as np
+
+from TestTools import create_context, check
+
+####################################################################################################
+
+GL = create_context()
+
+from PyOpenGLng.HighLevelApi.Buffer import GlShaderStorageBuffer
+from PyOpenGLng.HighLevelApi.ComputeProgram import GlComputeProgram
+
+####################################################################################################
+
+source = """
+#version 430
+layout(local_size_x = 64) in;
+layout(std430) buffer inputs { float x[]; };
+layout(std430) buffer outputs { float y[]; };
+uniform float scale;
+void main() {
+  uint i = gl_GlobalInvocationID.x;
+  if (i < y.length())
+    y[i] = scale * x[i] * x[i];
+}
+"""
+
+program = GlComputeProgram('square', source_code=source)
+
+number_of_items = 100 # the second work group is partial
+inputs = np.arange(number_of_items, dtype=np.float32)
+
+def output_buffer():
+
+    buffer_ = GlShaderStorageBuffer()
+    buffer_.allocate((number_of_items,), np.float32)
+    return buffer_
+
+####################################################################################################
+
+def check_number_of_groups():
+
+    assert program.local_size == (64, 1, 1)
+    assert program.number_of_groups(number_of_items) == (2, 1, 1)
+    assert program.number_of_groups(128) == (2, 1, 1)
+    assert program.number_of_groups((129, 3)) == (3, 3, 1)
+    try:
+        program.number_of_groups(64 * 2**32)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("the work group count limit is not checked")
+
+def check_dispatch():
+
+    outputs = output_buffer()
+    buffers = program(number_of_items, uniforms=dict(scale=2.), inputs=inputs, outputs=outputs)
+    # The array is uploaded to a new buffer
+    assert isinstance(buffers['inputs'], GlShaderStorageBuffer)
+    assert buffers['outputs'] is outputs
+    assert np.all(outputs.read() == 2 * inputs**2)
+
+def check_dispatch_indirect():
+
+    outputs = output_buffer()
+    program.bind_storage_buffer('outputs', outputs)
+    program.bind_storage_buffer('inputs', GlShaderStorageBuffer(inputs))
+    program.uniforms['scale'] = 1.
+    number_of_dispatches = program.number_of_dispatches
+    groups = GlShaderStorageBuffer(np.array(program.number_of_groups(number_of_items), dtype=np.uint32))
+    program.dispatch_indirect(groups)
+    assert program.number_of_dispatches == number_of_dispatches + 1
+    assert np.all(outputs.read() == inputs**2)
+
+def check_unknown_storage_block():
+
+    try:
+        program.storage_block_binding('unknown')
+    except NameError:
+        pass
+    else:
+        raise AssertionError("an unknown storage block is bound")
+
+check('number of work groups', check_number_of_groups)
+check('dispatch', check_dispatch)
+check('indirect dispatch', check_dispatch_indirect)
+check('unknown storage block', check_unknown_storage_block)
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
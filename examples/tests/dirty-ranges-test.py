@@ -0,0 +1,87 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script checks the merging of the dirty ranges of a buffer shadow.  It doesn't need an OpenGL
+# context.
+#
+####################################################################################################
+
+from TestTools import check
+
+from PyOpenGLng.HighLevelApi.Buffer import DirtyRanges
+
+####################################################################################################
+
+def dirty_ranges(*ranges):
+
+    dirty_ranges = DirtyRanges()
+    for start, stop in ranges:
+        dirty_ranges.add(start, stop)
+    return dirty_ranges
+
+####################################################################################################
+
+def check_empty_ranges():
+
+    ranges = dirty_ranges((10, 10), (20, 15))
+    assert len(ranges) == 0
+    assert ranges.merge() == []
+
+def check_disjoint_ranges():
+
+    ranges = dirty_ranges((40, 50), (0, 10), (20, 30))
+    assert len(ranges) == 3
+    assert ranges.merge() == [[0, 10], [20, 30], [40, 50]]
+
+def check_overlapping_ranges():
+
+    # overlapping, contiguous and included ranges
+    ranges = dirty_ranges((0, 10), (5, 15), (15, 20), (2, 3), (30, 40), (25, 45))
+    assert ranges.merge() == [[0, 20], [25, 45]]
+
+def check_gap():
+
+    ranges = dirty_ranges((0, 10), (14, 20), (30, 40))
+    assert ranges.merge(gap=3) == [[0, 10], [14, 20], [30, 40]]
+    assert ranges.merge(gap=4) == [[0, 20], [30, 40]]
+    assert ranges.merge(gap=10) == [[0, 40]]
+    # merge doesn't modify the recorded ranges
+    assert len(ranges) == 3
+
+def check_clear():
+
+    ranges = dirty_ranges((0, 10))
+    ranges.clear()
+    assert len(ranges) == 0
+    assert ranges.merge() == []
+
+check('empty ranges are ignored', check_empty_ranges)
+check('disjoint ranges are sorted', check_disjoint_ranges)
+check('overlapping ranges are merged', check_overlapping_ranges)
+check('ranges closer than the gap are merged', check_gap)
+check('clear', check_clear)
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
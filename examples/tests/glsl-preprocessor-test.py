@@ -0,0 +1,188 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script checks the GLSL preprocessor: the includes, the #line directives, the duplicated
+# includes, the include cycles and the dependencies.  It doesn't need an OpenGL context.
+#
+####################################################################################################
+
+import os
+import shutil
+import tempfile
+
+from TestTools import check
+
+from PyOpenGLng.HighLevelApi.GlslPreprocessor import GlslPreprocessor
+
+####################################################################################################
+
+directory = tempfile.mkdtemp()
+
+def write(file_name, source):
+
+    path = os.path.join(directory, file_name)
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        f.write(source)
+    return path
+
+write('include/common.glsl', """\
+// common
+float square(float x) { return x*x; }
+""")
+
+write('include/lighting.glsl', """\
+#include(common.glsl)
+float lambert(float x) { return square(x); }
+""")
+
+main_path = write('main.glsl', """\
+#version 330
+/* #include "ignored.glsl" */
+#include "lighting.glsl"
+#include "common.glsl"
+out vec4 colour;
+void main() { colour = vec4(lambert(1.)); }
+""")
+
+old_path = write('old.glsl', """\
+#version 120
+#include "common.glsl"
+void main() {}
+""")
+
+write('cycle-a.glsl', """\
+#include "cycle-b.glsl"
+""")
+
+write('cycle-b.glsl', """\
+#include "cycle-a.glsl"
+""")
+
+####################################################################################################
+
+def preprocessor():
+
+    return GlslPreprocessor(include_paths=[os.path.join(directory, 'include')])
+
+def path_of(file_name):
+
+    return os.path.normpath(os.path.join(directory, file_name))
+
+####################################################################################################
+
+def check_includes():
+
+    glsl_source = preprocessor().process_file(main_path)
+    assert glsl_source.source.splitlines() == [
+        '#version 330',
+        '#line 2 0',
+        '/* #include "ignored.glsl" */',
+        '#line 1 1',
+        '#line 1 2',
+        '// common',
+        'float square(float x) { return x*x; }',
+        '#line 2 1',
+        'float lambert(float x) { return square(x); }',
+        '#line 4 0',
+        # common.glsl is included once, the directive is replaced by a line to keep the numbering
+        '// include common.glsl',
+        'out vec4 colour;',
+        'void main() { colour = vec4(lambert(1.)); }',
+        ]
+    assert glsl_source.files == [path_of('main.glsl'),
+                                 path_of('include/lighting.glsl'),
+                                 path_of('include/common.glsl')]
+
+def check_line_mapping():
+
+    glsl_source = preprocessor().process_file(main_path)
+    # An error at the line 2 of the string 1 is in lighting.glsl at line 2
+    assert glsl_source.map_line(1, 2) == (path_of('include/lighting.glsl'), 2)
+    assert glsl_source.map_line(3, 2) == (None, 2)
+    assert glsl_source.context(0, 5, context_size=0) == ['  5| out vec4 colour;']
+
+def check_line_before_glsl_330():
+
+    # Before GLSL 3.30, the #line directive sets the number of the directive line
+    lines = preprocessor().process_file(old_path).source.splitlines()
+    assert lines[:3] == ['#version 120', '#line 1 0', '#line 0 1']
+    assert lines[5] == '#line 2 0'
+
+def check_cycle():
+
+    try:
+        preprocessor().process_file(path_of('cycle-a.glsl'))
+    except ValueError as exception:
+        assert 'cycle' in str(exception)
+        assert str(exception).count('cycle-a.glsl') == 2
+    else:
+        raise AssertionError("the include cycle is not detected")
+
+def check_missing_include():
+
+    path = write('missing.glsl', '#include "missing-include.glsl"\n')
+    try:
+        preprocessor().process_file(path)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("the missing include is not reported")
+
+def check_dependencies():
+
+    glsl_preprocessor = preprocessor()
+    glsl_source = glsl_preprocessor.process_file(main_path)
+    assert glsl_source.dependencies[path_of('main.glsl')] == [path_of('include/lighting.glsl'),
+                                                              path_of('include/common.glsl')]
+    assert glsl_preprocessor.dependants(path_of('include/common.glsl')) == \
+        {path_of('main.glsl'), path_of('include/lighting.glsl')}
+
+def check_cache():
+
+    glsl_preprocessor = preprocessor()
+    glsl_preprocessor.process_file(main_path)
+    assert glsl_preprocessor.number_of_parsed_files == 3
+    glsl_preprocessor.process_file(main_path)
+    assert glsl_preprocessor.number_of_parsed_files == 3
+    # A modified file is parsed again
+    os.utime(path_of('include/common.glsl'), (0, 0))
+    glsl_preprocessor.process_file(main_path)
+    assert glsl_preprocessor.number_of_parsed_files == 4
+
+try:
+    check('includes and #line directives', check_includes)
+    check('line mapping', check_line_mapping)
+    check('#line before GLSL 3.30', check_line_before_glsl_330)
+    check('include cycle', check_cycle)
+    check('missing include', check_missing_include)
+    check('dependencies', check_dependencies)
+    check('cache', check_cache)
+finally:
+    shutil.rmtree(directory)
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
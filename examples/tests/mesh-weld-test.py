@@ -0,0 +1,99 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script checks the welding of a triangle soup to an indexed mesh.  It doesn't need an OpenGL
+# context.
+#
+####################################################################################################
+
+import numpy as np
+
+from TestTools import check
+
+from PyOpenGLng.Math.Mesh import index_dtype, weld, weld_mesh
+
+####################################################################################################
+
+# Two triangles of a quad, the vertexes of the diagonal are shared
+positions = np.array(((0, 0, 0), (1, 0, 0), (1, 1, 0),
+                      (0, 0, 0), (1, 1, 0), (0, 1, 0)), dtype=np.float32)
+normals = np.tile(np.array((0, 0, 1), dtype=np.float32), (6, 1))
+
+####################################################################################################
+
+def check_weld():
+
+    vertexes, indices = weld(positions)
+    # the vertexes are kept in order of first appearance
+    assert vertexes.tolist() == [0, 1, 2, 5]
+    assert indices.tolist() == [0, 1, 2, 0, 2, 3]
+    assert indices.dtype == np.uint16
+    assert np.all(positions[vertexes][indices] == positions)
+
+def check_tolerance():
+
+    noisy_positions = positions.copy()
+    noisy_positions[3] += 1e-7
+    vertexes, indices = weld(noisy_positions)
+    assert vertexes.size == 4
+    noisy_positions[3] += 1e-3
+    vertexes, indices = weld(noisy_positions)
+    assert vertexes.size == 5
+
+def check_normals():
+
+    # A crease: the same position with two normals is not welded
+    crease_normals = normals.copy()
+    crease_normals[3:] = (0, 1, 0)
+    vertexes, indices = weld(positions, crease_normals)
+    assert vertexes.size == 6
+    vertexes, indices = weld(positions, normals)
+    assert vertexes.size == 4
+
+def check_weld_mesh():
+
+    colour = np.array((1, 0, 0, 1), dtype=np.float32)
+    welded_positions, welded_normals, colours, indices = weld_mesh(positions, normals, colour)
+    assert welded_positions.shape == (4, 3) and welded_normals.shape == (4, 3)
+    assert colours is colour
+    colours = np.zeros((6, 4), dtype=np.float32)
+    colours[3] = 1
+    welded_positions, welded_normals, welded_colours, indices = weld_mesh(positions, normals, colours)
+    assert welded_positions.shape == (5, 3)
+    assert np.all(welded_colours[indices] == colours)
+
+def check_index_dtype():
+
+    assert index_dtype(2**16) == np.uint16
+    assert index_dtype(2**16 + 1) == np.uint32
+
+check('weld a triangle soup', check_weld)
+check('position tolerance', check_tolerance)
+check('crease normals', check_normals)
+check('weld a mesh with colours', check_weld_mesh)
+check('index data type', check_index_dtype)
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
@@ -0,0 +1,126 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script checks the offscreen frame buffers: the rendering to several colour textures, the
+# multisample resolve, the resize and the pool.  It runs headless, e.g. on the Mesa software
+# renderer.
+#
+####################################################################################################
+
+import numpy as np
+
+from TestTools import create_context, check
+
+####################################################################################################
+
+GL = create_context()
+
+from PyOpenGLng.HighLevelApi.FrameBuffer import GlOffscreenFrameBuffer, GlFrameBufferPool
+
+####################################################################################################
+
+width, height = 32, 16
+colour_formats = (GL.GL_RGBA8, GL.GL_RGBA8)
+background_colours = ((0, 0, 0, 255), (255, 255, 255, 255))
+colours = ((255, 128, 64, 255), (0, 64, 128, 255))
+
+def render(frame_buffer):
+
+    """ Clear the attachments, then the left half of the attachments to another colour. """
+
+    frame_buffer.bind()
+    for i, colour in enumerate(background_colours):
+        GL.glClearBufferfv(GL.GL_COLOR, i, np.array(colour, dtype=np.float32) / 255)
+    GL.glEnable(GL.GL_SCISSOR_TEST)
+    GL.glScissor(0, 0, width // 2, height)
+    for i, colour in enumerate(colours):
+        GL.glClearBufferfv(GL.GL_COLOR, i, np.array(colour, dtype=np.float32) / 255)
+    GL.glDisable(GL.GL_SCISSOR_TEST)
+    frame_buffer.unbind()
+    frame_buffer.resolve()
+
+def check_images(frame_buffer):
+
+    for i in range(len(colour_formats)):
+        image = frame_buffer.read(i)
+        assert image.shape == (height, width, 4)
+        assert np.all(image[:,:width // 2] == colours[i])
+        assert np.all(image[:,width // 2:] == background_colours[i])
+
+####################################################################################################
+
+def check_render_to_texture():
+
+    frame_buffer = GlOffscreenFrameBuffer(width, height, colour_formats)
+    render(frame_buffer)
+    check_images(frame_buffer)
+    assert frame_buffer.number_of_resolves == 0
+
+def check_multisample_resolve():
+
+    frame_buffer = GlOffscreenFrameBuffer(width, height, colour_formats, samples=4)
+    render(frame_buffer)
+    assert frame_buffer.number_of_resolves == 1
+    # Each attachment is resolved to its texture
+    check_images(frame_buffer)
+
+def check_depth_texture():
+
+    frame_buffer = GlOffscreenFrameBuffer(width, height, depth_texture=True)
+    assert frame_buffer.depth_texture is not None
+    frame_buffer = GlOffscreenFrameBuffer(width, height, depth_texture=True, samples=4)
+    assert frame_buffer.depth_texture is None
+
+def check_resize():
+
+    frame_buffer = GlOffscreenFrameBuffer(width, height, colour_formats, samples=4)
+    assert not frame_buffer.resize(width, height)
+    assert frame_buffer.resize(2 * width, height)
+    assert frame_buffer.number_of_allocations == 2
+    assert frame_buffer.read().shape == (height, 2 * width, 4)
+
+def check_pool():
+
+    pool = GlFrameBufferPool()
+    frame_buffer = pool.acquire(width, height, colour_formats)
+    pool.release(frame_buffer)
+    assert pool.acquire(width, height, colour_formats) is frame_buffer
+    other_frame_buffer = pool.acquire(width, height, colour_formats, samples=4)
+    assert other_frame_buffer is not frame_buffer
+    assert (pool.number_of_hits, pool.number_of_misses) == (1, 2)
+    pool.release(frame_buffer)
+    pool.release(other_frame_buffer)
+    assert pool.number_of_free_frame_buffers == 2
+    pool.clear()
+    assert pool.number_of_free_frame_buffers == 0
+
+check('render to textures', check_render_to_texture)
+check('multisample resolve', check_multisample_resolve)
+check('depth texture', check_depth_texture)
+check('resize', check_resize)
+check('pool', check_pool)
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
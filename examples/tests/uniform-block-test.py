@@ -0,0 +1,166 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script checks the packing of a uniform block from a std140 layout, the offsets and the
+# strides are the ones a driver reports for this block:
+#
+#   layout(std140) uniform block {
+#     float scale;                                // offset   0
+#     vec3 colour;                                // offset  16
+#     float weights[4];                           // offset  32, array stride 16
+#     mat3 normal_matrix;                         // offset  96, matrix stride 16
+#     mat4x3 transform;                           // offset 144, matrix stride 16
+#     layout(row_major) mat4x3 row_transform;     // offset 208, matrix stride 16
+#     vec3 points[2];                             // offset 256, array stride 16
+#     mat2 matrices[2];                           // offset 288, array stride 32, matrix stride 16
+#   };                                            // size 352
+#
+# It doesn't need an OpenGL context.
+#
+####################################################################################################
+
+import numpy as np
+
+from TestTools import check
+
+from PyOpenGLng.HighLevelApi import GL
+from PyOpenGLng.HighLevelApi.Type import gl_types
+from PyOpenGLng.HighLevelApi.UniformBlock import UniformBlockLayout, UniformBlockMember
+
+####################################################################################################
+
+members = (
+    UniformBlockMember('scale', gl_types[GL.GL_FLOAT], 0),
+    UniformBlockMember('colour', gl_types[GL.GL_FLOAT_VEC3], 16),
+    UniformBlockMember('weights', gl_types[GL.GL_FLOAT], 32, size=4, array_stride=16),
+    UniformBlockMember('normal_matrix', gl_types[GL.GL_FLOAT_MAT3], 96, matrix_stride=16),
+    UniformBlockMember('transform', gl_types[GL.GL_FLOAT_MAT4x3], 144, matrix_stride=16),
+    UniformBlockMember('row_transform', gl_types[GL.GL_FLOAT_MAT4x3], 208, matrix_stride=16,
+                       is_row_major=True),
+    UniformBlockMember('points', gl_types[GL.GL_FLOAT_VEC3], 256, size=2, array_stride=16),
+    UniformBlockMember('matrices', gl_types[GL.GL_FLOAT_MAT2], 288, size=2, array_stride=32,
+                       matrix_stride=16),
+    )
+layout = UniformBlockLayout(352, members)
+
+def block():
+
+    """ Return a record of the block and the block as an array of floats. """
+
+    data = np.zeros(1, dtype=layout.dtype)
+    return data[0], data.view(np.float32)
+
+def floats(offset, count):
+
+    """ Return the slice of *count* floats at *offset* bytes. """
+
+    return slice(offset // 4, offset // 4 + count)
+
+####################################################################################################
+
+def check_shapes():
+
+    shapes = {member.name:(member.shape, member.storage_shape, member.nbytes) for member in layout}
+    assert shapes == {
+        'scale': ((), (), 4),
+        'colour': ((3,), (3,), 12),
+        'weights': ((4,), (4, 4), 64),
+        'normal_matrix': ((3, 3), (3, 4), 48),
+        # mat4x3 has 4 columns and 3 rows
+        'transform': ((3, 4), (4, 4), 64),
+        'row_transform': ((3, 4), (3, 4), 48),
+        'points': ((2, 3), (2, 4), 32),
+        'matrices': ((2, 2, 2), (2, 2, 4), 64),
+        }
+    assert layout.dtype.itemsize == 352
+
+def check_padding():
+
+    record, data = block()
+    layout['scale'].write(record, 2)
+    layout['colour'].write(record, (1, 2, 3))
+    layout['weights'].write(record, (1, 2, 3, 4))
+    layout['points'].write(record, ((1, 2, 3), (4, 5, 6)))
+    assert data[0] == 2
+    assert data[floats(16, 3)].tolist() == [1, 2, 3]
+    # The array elements are padded to 16 bytes
+    assert data[floats(32, 16)].tolist() == [1, 0, 0, 0, 2, 0, 0, 0, 3, 0, 0, 0, 4, 0, 0, 0]
+    assert data[floats(256, 8)].tolist() == [1, 2, 3, 0, 4, 5, 6, 0]
+    assert np.all(layout['weights'].read(record) == (1, 2, 3, 4))
+    assert np.all(layout['points'].read(record) == ((1, 2, 3), (4, 5, 6)))
+
+def check_column_major_matrices():
+
+    record, data = block()
+    matrix = np.arange(12, dtype=np.float32).reshape(3, 4) # 3 rows and 4 columns
+    layout['transform'].write(record, matrix)
+    # The columns are padded to the matrix stride
+    for column in range(4):
+        assert data[floats(144 + 16 * column, 4)].tolist() == list(matrix[:,column]) + [0]
+    assert np.all(layout['transform'].read(record) == matrix)
+    normal_matrix = np.arange(9, dtype=np.float32).reshape(3, 3)
+    layout['normal_matrix'].write(record, normal_matrix)
+    assert data[floats(96 + 16, 4)].tolist() == list(normal_matrix[:,1]) + [0]
+    assert np.all(layout['normal_matrix'].read(record) == normal_matrix)
+
+def check_row_major_matrix():
+
+    record, data = block()
+    matrix = np.arange(12, dtype=np.float32).reshape(3, 4)
+    layout['row_transform'].write(record, matrix)
+    for row in range(3):
+        assert data[floats(208 + 16 * row, 4)].tolist() == list(matrix[row])
+    assert np.all(layout['row_transform'].read(record) == matrix)
+
+def check_matrix_array():
+
+    record, data = block()
+    matrices = np.arange(8, dtype=np.float32).reshape(2, 2, 2)
+    layout['matrices'].write(record, matrices)
+    for i in range(2):
+        for column in range(2):
+            offset = 288 + 32 * i + 16 * column
+            assert data[floats(offset, 4)].tolist() == list(matrices[i,:,column]) + [0, 0]
+    assert np.all(layout['matrices'].read(record) == matrices)
+
+def check_unsupported_matrix_array_stride():
+
+    try:
+        UniformBlockMember('matrices', gl_types[GL.GL_FLOAT_MAT2], 0, size=2, array_stride=48,
+                           matrix_stride=16)
+    except NotImplementedError:
+        pass
+    else:
+        raise AssertionError("the matrix array stride is accepted")
+
+check('shapes and padding', check_shapes)
+check('padded scalars and vectors', check_padding)
+check('column major matrices', check_column_major_matrices)
+check('row major matrix', check_row_major_matrix)
+check('matrix array', check_matrix_array)
+check('unsupported matrix array stride', check_unsupported_matrix_array_stride)
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
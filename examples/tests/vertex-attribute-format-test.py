@@ -0,0 +1,104 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script checks the vertex attribute formats of the interleaved arrays.  It doesn't need an
+# OpenGL context.
+#
+####################################################################################################
+
+import numpy as np
+
+from TestTools import check
+
+from PyOpenGLng.HighLevelApi import GL
+from PyOpenGLng.HighLevelApi.Buffer import interleave, vertex_attribute_formats
+
+####################################################################################################
+
+def formats_of(dtype, shape=(1,)):
+
+    formats, stride = vertex_attribute_formats(dtype, shape)
+    return [(attribute.name, attribute.size, attribute.type, attribute.offset, attribute.location_offset)
+            for attribute in formats], stride
+
+####################################################################################################
+
+def check_plain_array():
+
+    assert formats_of(np.float32, (10, 3)) == ([(None, 3, GL.GL_FLOAT, 0, 0)], 12)
+    assert formats_of(np.int16, (10,)) == ([(None, 1, GL.GL_SHORT, 0, 0)], 2)
+
+def check_structured_array():
+
+    dtype = np.dtype([('position', np.float32, 3),
+                      ('colour', np.uint8, 4),
+                      ('weight', np.float32)])
+    assert formats_of(dtype) == ([('position', 3, GL.GL_FLOAT, 0, 0),
+                                  ('colour', 4, GL.GL_UNSIGNED_BYTE, 12, 0),
+                                  ('weight', 1, GL.GL_FLOAT, 16, 0)],
+                                 20)
+
+def check_matrix_field():
+
+    dtype = np.dtype([('transform', np.float32, (4, 4))])
+    formats, stride = formats_of(dtype)
+    assert stride == 64
+    assert formats == [('transform', 4, GL.GL_FLOAT, 16 * row, row) for row in range(4)]
+
+def check_unsupported_fields():
+
+    for dtype in (np.dtype([('vector', np.float32, 5)]),
+                  np.dtype([('tensor', np.float32, (2, 2, 2))])):
+        try:
+            vertex_attribute_formats(dtype, (1,))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("%s is accepted" % str(dtype))
+
+def check_interleave():
+
+    positions = np.arange(12, dtype=np.float32).reshape(4, 3)
+    colours = np.arange(16, dtype=np.uint8).reshape(4, 4)
+    vertexes = interleave((('position', positions), ('colour', colours)))
+    assert vertexes.dtype.names == ('position', 'colour')
+    assert vertexes.dtype.itemsize == 16
+    assert np.all(vertexes['position'] == positions)
+    assert np.all(vertexes['colour'] == colours)
+    try:
+        interleave((('position', positions), ('colour', colours[:3])))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("arrays of different lengths are interleaved")
+
+check('format of a plain array', check_plain_array)
+check('formats of a structured array', check_structured_array)
+check('formats of a matrix field', check_matrix_field)
+check('unsupported fields', check_unsupported_fields)
+check('interleave', check_interleave)
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################
@@ -0,0 +1,105 @@
+####################################################################################################
+# 
+# PyOpenGLng - An OpenGL Python Wrapper with a High Level API.
+# Copyright (C) 2014 Fabrice Salvaire
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# 
+####################################################################################################
+
+####################################################################################################
+#
+# This script checks the round trips of the compact vertex formats: the packed values are unpacked
+# as OpenGL does for a normalized attribute.  It doesn't need an OpenGL context.
+#
+####################################################################################################
+
+import numpy as np
+
+from TestTools import check
+
+from PyOpenGLng.HighLevelApi import GL
+from PyOpenGLng.HighLevelApi.Buffer import vertex_attribute_formats
+from PyOpenGLng.HighLevelApi.VertexFormat import (UNORM8, UNORM16, SNORM8, SNORM16, INT_2_10_10_10_REV,
+                                                  pack_half, pack_unorm, pack_snorm,
+                                                  pack_int_2_10_10_10_rev, unpack_int_2_10_10_10_rev)
+
+####################################################################################################
+
+values = np.linspace(-1.25, 1.25, 101).astype(np.float32)
+
+####################################################################################################
+
+def check_unorm():
+
+    for attribute_type in (UNORM8, UNORM16):
+        packed = pack_unorm(values, attribute_type)
+        assert packed.dtype == attribute_type.dtype
+        maximum = np.iinfo(attribute_type.dtype).max
+        unpacked = packed / float(maximum)
+        assert np.all(np.abs(unpacked - np.clip(values, 0, 1)) <= .5 / maximum + 1e-6)
+        assert pack_unorm([0, 1], attribute_type).tolist() == [0, maximum]
+
+def check_snorm():
+
+    for attribute_type in (SNORM8, SNORM16):
+        packed = pack_snorm(values, attribute_type)
+        assert packed.dtype == attribute_type.dtype
+        maximum = np.iinfo(attribute_type.dtype).max
+        # OpenGL 4.2 conversion, the minimum integer is clamped to -1
+        unpacked = np.maximum(packed / float(maximum), -1)
+        assert np.all(np.abs(unpacked - np.clip(values, -1, 1)) <= .5 / maximum + 1e-6)
+        assert pack_snorm([-1, 0, 1], attribute_type).tolist() == [-maximum, 0, maximum]
+
+def check_half():
+
+    packed = pack_half(values)
+    assert packed.dtype == np.float16
+    assert np.allclose(packed.astype(np.float32), values, rtol=1e-3)
+
+def check_int_2_10_10_10_rev():
+
+    normals = np.random.RandomState(0).uniform(-1, 1, (100, 3)).astype(np.float32)
+    packed = pack_int_2_10_10_10_rev(normals)
+    assert packed.dtype == np.int32 and packed.shape == (100,)
+    unpacked = unpack_int_2_10_10_10_rev(packed)
+    assert np.all(np.abs(unpacked[:,:3] - normals) <= .5 / 511 + 1e-6)
+    assert np.all(unpacked[:,3] == 0)
+    # The w component has two bits
+    vectors = np.array(((-1, 0, 1, -1), (1, -1, 0, 1), (0, 1, -1, 0)), dtype=np.float32)
+    assert np.all(unpack_int_2_10_10_10_rev(pack_int_2_10_10_10_rev(vectors)) == vectors)
+    # The bit layout is x | y << 10 | z << 20 | w << 30
+    packed = pack_int_2_10_10_10_rev(np.array(((1, 0, 0, 0), (0, 0, 0, 1)), dtype=np.float32))
+    assert packed.view(np.uint32).tolist() == [511, 1 << 30]
+
+def check_packed_attribute_format():
+
+    dtype = np.dtype([('position', np.float32, 3), ('normal', np.int32)])
+    formats, stride = vertex_attribute_formats(dtype, (1,), dict(normal=INT_2_10_10_10_REV))
+    normal_format = formats[1]
+    assert (normal_format.size, normal_format.type, normal_format.normalized) == \
+        (4, GL.GL_INT_2_10_10_10_REV, True)
+    assert stride == 16
+
+check('unsigned normalized integers', check_unorm)
+check('signed normalized integers', check_snorm)
+check('half floats', check_half)
+check('packed 2_10_10_10 integers', check_int_2_10_10_10_rev)
+check('format of a packed attribute', check_packed_attribute_format)
+
+####################################################################################################
+# 
+# End
+# 
+####################################################################################################